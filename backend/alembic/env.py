@@ -34,6 +34,7 @@ import app.models.media  # type: ignore[import-not-found]
 import app.models.story  # type: ignore[import-not-found]
 import app.models.system  # type: ignore[import-not-found]
 import app.models.gemini  # type: ignore[import-not-found]
+import app.models.tts_cache  # type: ignore[import-not-found]
 target_metadata = Base.metadata
 
 # Get database URL from environment variable
@@ -0,0 +1,54 @@
+"""Add token-bucket rate limit columns to service_concurrency_limits
+
+Revision ID: 20251101_add_rate_limit_columns
+Revises: 20251031_add_subtitle_style_flags
+Create Date: 2025-11-01 00:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20251101_add_rate_limit_columns"
+down_revision = "20251031_add_subtitle_style_flags"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {column["name"] for column in inspector.get_columns("service_concurrency_limits")}
+    if "rate_per_second" not in columns:
+        op.add_column(
+            "service_concurrency_limits",
+            sa.Column(
+                "rate_per_second",
+                sa.Float(),
+                nullable=True,
+                comment="令牌桶速率 (次/秒)，为空则不限速",
+            ),
+        )
+    if "burst" not in columns:
+        op.add_column(
+            "service_concurrency_limits",
+            sa.Column(
+                "burst",
+                sa.Integer(),
+                nullable=True,
+                comment="令牌桶容量（允许的突发请求数）",
+            ),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {column["name"] for column in inspector.get_columns("service_concurrency_limits")}
+    if "burst" in columns:
+        op.drop_column("service_concurrency_limits", "burst")
+    if "rate_per_second" in columns:
+        op.drop_column("service_concurrency_limits", "rate_per_second")
@@ -0,0 +1,46 @@
+"""create tts audio cache table
+
+Revision ID: 20251102_create_tts_audio_cache
+Revises: 20251101_add_rate_limit_columns
+Create Date: 2025-11-02
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20251102_create_tts_audio_cache"
+down_revision = "20251101_add_rate_limit_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tts_audio_cache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("cache_key", sa.String(length=64), nullable=False, comment="合成参数的 sha256"),
+        sa.Column("provider", sa.String(length=32), nullable=False, comment="TTS 服务，例如 fishaudio"),
+        sa.Column("voice_id", sa.String(length=128), nullable=True, comment="音色 ID"),
+        sa.Column("model", sa.String(length=64), nullable=True, comment="TTS 模型"),
+        sa.Column("audio_format", sa.String(length=16), nullable=True, comment="音频格式"),
+        sa.Column("sample_rate", sa.Integer(), nullable=True, comment="采样率"),
+        sa.Column("text_preview", sa.String(length=200), nullable=True, comment="文本前 200 字（便于排查）"),
+        sa.Column("relative_path", sa.String(length=500), nullable=False, comment="缓存文件相对 STORAGE_BASE_PATH 的路径"),
+        sa.Column("file_size", sa.BigInteger(), nullable=True, comment="文件大小（字节）"),
+        sa.Column("duration", sa.Float(), nullable=True, comment="音频时长（秒）"),
+        sa.Column("probe", sa.JSON(), nullable=True, comment="ffprobe 结果，命中时直接复用"),
+        sa.Column("hit_count", sa.Integer(), nullable=False, server_default=sa.text("0"), comment="命中次数"),
+        sa.Column("last_hit_at", sa.DateTime(), nullable=True, comment="最近命中时间"),
+        comment="跨任务 TTS 音频缓存",
+    )
+    op.create_index("uq_tts_audio_cache_key", "tts_audio_cache", ["cache_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_tts_audio_cache_key", table_name="tts_audio_cache")
+    op.drop_table("tts_audio_cache")
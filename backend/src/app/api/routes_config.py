@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 
 from app.database import get_db
 from app.models import ServiceCredential, ServiceOption
+from app.services.config_cache import invalidate_config_cache
 
 router = APIRouter(prefix="/api/v1/config", tags=["配置管理"])
 
@@ -105,6 +106,7 @@ def create_credential(
     )
     db.add(db_credential)
     db.commit()
+    invalidate_config_cache("service config changed")
     db.refresh(db_credential)
     
     return db_credential.to_dict(include_secret=False)
@@ -181,6 +183,7 @@ def update_credential(
         setattr(credential, field, value)
 
     db.commit()
+    invalidate_config_cache("service config changed")
     db.refresh(credential)
 
     return credential.to_dict(include_secret=False)
@@ -199,6 +202,7 @@ def delete_credential(
     
     db.delete(credential)
     db.commit()
+    invalidate_config_cache("service config changed")
     
     return {"message": "删除成功"}
 
@@ -224,6 +228,7 @@ def create_option(
     )
     db.add(db_option)
     db.commit()
+    invalidate_config_cache("service config changed")
     db.refresh(db_option)
     
     return db_option.to_dict()
@@ -304,6 +309,7 @@ def update_option(
         setattr(option, field, value)
 
     db.commit()
+    invalidate_config_cache("service config changed")
     db.refresh(option)
 
     return option.to_dict()
@@ -322,5 +328,6 @@ def delete_option(
     
     db.delete(option)
     db.commit()
+    invalidate_config_cache("service config changed")
     
     return {"message": "删除成功"}
@@ -12,6 +12,8 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.gemini import GeminiPromptTemplate, GeminiPromptRecord
 from app.services.gemini_service import GeminiService
+from app.services.gemini_response_cache import bypass_gemini_cache, get_gemini_response_cache
+from app.services.gemini_credential_pool import get_gemini_key_rotator
 from app.services.gemini_prompt_templates import (
     normalize_slug,
     build_file_path,
@@ -76,6 +78,7 @@ class PromptRequestPayload(BaseModel):
     generation_config: Optional[Dict[str, Any]] = Field(None, description="Gemini generation_config 覆盖")
     safety_settings: Optional[List[Dict[str, Any]]] = Field(None, description="Gemini safety 设置")
     timeout: Optional[int] = Field(180, ge=1, le=600, description="请求超时时长（秒）")
+    use_cache: bool = Field(True, description="相同提示词与参数时复用缓存的 Gemini 响应")
 
     @model_validator(mode="after")
     def validate_identifier(cls, values: "PromptRequestPayload") -> "PromptRequestPayload":
@@ -340,12 +343,13 @@ def execute_prompt(payload: PromptRequestPayload, db: Session = Depends(get_db))
 
     start_time = time.perf_counter()
     try:
-        response_text = service.generate_prompt_text(
-            prompt,
-            generation_config=payload.generation_config,
-            safety_settings=payload.safety_settings,
-            timeout_seconds=timeout_seconds,
-        )
+        with bypass_gemini_cache(not payload.use_cache):
+            response_text = service.generate_prompt_text(
+                prompt,
+                generation_config=payload.generation_config,
+                safety_settings=payload.safety_settings,
+                timeout_seconds=timeout_seconds,
+            )
         status = "success"
         error_message = None
     except ServiceException as exc:
@@ -384,6 +388,22 @@ def execute_prompt(payload: PromptRequestPayload, db: Session = Depends(get_db))
     return _record_to_response(record)
 
 
+@router.get("/cache", summary="Gemini 响应缓存统计")
+def get_response_cache_stats():
+    return get_gemini_response_cache().stats()
+
+
+@router.delete("/cache", summary="清空 Gemini 响应缓存")
+def clear_response_cache():
+    removed = get_gemini_response_cache().clear()
+    return {"message": "缓存已清空", "removed": removed}
+
+
+@router.get("/keys", summary="Gemini API Key 轮换统计")
+def get_key_rotation_stats():
+    return get_gemini_key_rotator().stats()
+
+
 @router.get("/records", response_model=List[PromptRecordResponse], summary="获取调用记录")
 def list_records(
     template_id: Optional[int] = Query(None, description="按模板过滤"),
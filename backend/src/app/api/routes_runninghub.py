@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.runninghub_workflow import RunningHubWorkflow
+from app.services.config_cache import invalidate_config_cache
 
 router = APIRouter(prefix="/api/v1/runninghub/workflows", tags=["RunningHub"])
 
@@ -145,6 +146,7 @@ def create_workflow(payload: RunningHubWorkflowCreate, db: Session = Depends(get
 
     db.add(record)
     db.commit()
+    invalidate_config_cache("runninghub workflow changed")
     db.refresh(record)
     return record
 
@@ -197,6 +199,7 @@ def update_workflow(workflow_id: int, payload: RunningHubWorkflowUpdate, db: Ses
         setattr(record, key, value)
 
     db.commit()
+    invalidate_config_cache("runninghub workflow changed")
     db.refresh(record)
     return record
 
@@ -213,4 +216,5 @@ def delete_workflow(workflow_id: int, hard_delete: bool = Query(False, descripti
         record.is_active = False
         record.is_default = False
     db.commit()
+    invalidate_config_cache("runninghub workflow changed")
     return {"message": "ok"}
@@ -1,23 +1,120 @@
-"""Static media file serving for generated assets."""
+"""Static media file serving for generated assets.
+
+Responses carry a strong ETag (file size + mtime) and Last-Modified, honour
+``If-None-Match`` / ``If-Modified-Since`` with 304 and serve byte ranges (206) so
+players can seek without downloading the whole file. Artifacts whose names embed a
+write timestamp or random token are never rewritten in place and get a long-lived
+``immutable`` Cache-Control; everything else is revalidated on each use.
+
+``?w=<px>`` (images) and ``?poster=1`` (videos) return cached thumbnails rendered
+by ``app.services.media_derivatives`` instead of the original file.
+
+With a remote ``STORAGE_TYPE`` the file is read through the worker-local object
+cache (``app.services.storage_backends``) at the object's current version, and
+ETag / Last-Modified come from the object itself, so every node behind a load
+balancer answers conditional and range requests the same way.
+
+With ``STORAGE_ACCEL_MODE`` the body is handed to the front proxy through
+``X-Accel-Redirect`` (nginx) or ``X-Sendfile`` so uvicorn workers only check the
+request and never stream bytes.
+"""
 from __future__ import annotations
 
+import logging
 import mimetypes
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from hashlib import md5
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response
 
 from app.config.settings import get_settings
+from app.services.media_derivatives import DerivativeError, UnsupportedDerivative, get_media_derivative_cache
+from app.services.storage_backends import ObjectHead, get_object_read_cache, get_storage_backend
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/storage", tags=["Storage"])
 _settings = get_settings()
 if not _settings.STORAGE_BASE_PATH:
     raise RuntimeError("STORAGE_BASE_PATH is not configured")
 _BASE_STORAGE_PATH = Path(_settings.STORAGE_BASE_PATH).resolve()
+_CACHE_MAX_AGE = _settings.storage_cache_max_age
+_ACCEL_MODE = _settings.storage_accel_mode
+_ACCEL_PREFIX = _settings.storage_accel_prefix
+
+# Names written once by StorageService / FFmpegService: 20240101120000_<hex token>, final_<id>_<epoch ms>, ...
+_IMMUTABLE_NAME = re.compile(r"(?:^|[_-])(?:\d{13,14}|[0-9a-f]{16,})(?=[_.-]|$)")
+_MUTABLE_DIRS = {"tmp", "temp"}
+
+
+def _etag(stat_result: os.stat_result, variant: str = "") -> str:
+    # Same formula as starlette's FileResponse so If-Range revalidation matches.
+    etag_base = str(stat_result.st_mtime) + "-" + str(stat_result.st_size) + variant
+    return f'"{md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def _object_validators(head: ObjectHead, variant: str = "") -> Tuple[str, Optional[float]]:
+    """ETag and mtime of a published object; they must not depend on this node's copy."""
+    etag_base = head.etag.strip('"') + variant
+    return f'"{md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"', head.last_modified
+
+
+def _cache_control(relative_path: str) -> str:
+    parts = relative_path.split("/")
+    if _CACHE_MAX_AGE and parts[0] not in _MUTABLE_DIRS and _IMMUTABLE_NAME.search(Path(parts[-1]).stem):
+        return f"public, max-age={_CACHE_MAX_AGE}, immutable"
+    return "no-cache"
+
 
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2).
+    candidates = [item.strip() for item in header.split(",")]
+    return "*" in candidates or any(item.removeprefix("W/") == etag for item in candidates)
 
-@router.get("/{resource_path:path}", summary="获取生成的媒体文件")
-def serve_storage_file(resource_path: str):
+
+def _not_modified(request: Request, etag: str, mtime: Optional[float]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and mtime is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return since is not None and int(mtime) <= since.timestamp()
+    return False
+
+
+class _ValidatedFileResponse(FileResponse):
+    """Checks ``If-Range`` against the validators sent, not the served file's own stat."""
+
+    def _should_use_range(self, http_if_range: str, stat_result: os.stat_result) -> bool:
+        return http_if_range in (self.headers.get("etag"), self.headers.get("last-modified"))
+
+
+def _accel_response(target_path: Path, relative_path: str, headers: Dict[str, str], media_type: str) -> Response:
+    if _ACCEL_MODE == "x-accel":
+        headers["X-Accel-Redirect"] = _ACCEL_PREFIX + quote(relative_path)
+    else:
+        headers["X-Sendfile"] = str(target_path)
+    return Response(status_code=200, headers=headers, media_type=media_type)
+
+
+@router.api_route("/{resource_path:path}", methods=["GET", "HEAD"], summary="获取生成的媒体文件")
+def serve_storage_file(
+    resource_path: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, description="缩略图宽度（像素，仅图片或配合 poster 使用）"),
+    poster: bool = Query(False, description="返回视频封面帧（JPEG）"),
+):
     """Return a file stored under the configured storage directory."""
     if not resource_path:
         raise HTTPException(status_code=400, detail="文件路径不能为空")
@@ -26,12 +123,76 @@ def serve_storage_file(resource_path: str):
 
     # 防止目录穿越，确保仍位于 storage 目录下
     try:
-        target_path.relative_to(_BASE_STORAGE_PATH)
+        relative_path = target_path.relative_to(_BASE_STORAGE_PATH).as_posix()
     except ValueError as exc:  # pragma: no cover - defensive branch
         raise HTTPException(status_code=404, detail="文件不存在") from exc
+    storage_key = relative_path
 
-    if not target_path.exists() or not target_path.is_file():
+    stat_result: Optional[os.stat_result]
+    try:
+        stat_result = os.stat(target_path)
+    except OSError:
+        stat_result = None
+    backend = get_storage_backend()
+    object_head: Optional[ObjectHead] = None
+    if backend.remote:
+        # 对象存储为准：本机文件可能是旧版本（同名文件在其他节点重新生成），按对象当前版本读取
+        try:
+            object_head = backend.head(storage_key)
+        except Exception as exc:
+            logger.warning("Object storage head failed for %s: %s", relative_path, exc)
+            raise HTTPException(status_code=502, detail="对象存储读取失败") from exc
+    if object_head is None and (stat_result is None or not stat.S_ISREG(stat_result.st_mode)):
         raise HTTPException(status_code=404, detail="文件不存在")
 
+    variant = ""
+    if w is not None or poster:
+        cache = get_media_derivative_cache()
+        spec = cache.normalize(width=w, poster=poster)
+        variant = "-" + spec.token
+    # Derivatives are validated against their source so a re-render keeps the same ETag.
+    if object_head is not None:
+        etag, mtime = _object_validators(object_head, variant)
+    else:
+        etag, mtime = _etag(stat_result, variant), stat_result.st_mtime
+    headers = {"ETag": etag, "Cache-Control": _cache_control(storage_key)}
+    if mtime is not None:
+        headers["Last-Modified"] = formatdate(mtime, usegmt=True)
+    if _not_modified(request, etag, mtime):
+        return Response(status_code=304, headers=headers)
+
+    if object_head is not None:
+        try:
+            cached_path = get_object_read_cache().fetch_version(backend, storage_key, object_head)
+        except Exception as exc:
+            logger.warning("Object storage read-through failed for %s: %s", relative_path, exc)
+            raise HTTPException(status_code=502, detail="对象存储读取失败") from exc
+        if cached_path is None:
+            # 在 head 与下载之间被其他节点替换或删除
+            raise HTTPException(status_code=503, detail="文件正在更新，请重试", headers={"Retry-After": "1"})
+        target_path = cached_path
+        stat_result = os.stat(target_path)
+        relative_path = target_path.relative_to(_BASE_STORAGE_PATH).as_posix()
+
+    if variant:
+        try:
+            derived_path = cache.get(target_path, spec)
+        except UnsupportedDerivative as exc:
+            raise HTTPException(status_code=415, detail=str(exc)) from exc
+        except DerivativeError as exc:
+            logger.warning("Derivative rendering failed for %s: %s", relative_path, exc)
+            raise HTTPException(status_code=422, detail="无法生成缩略图") from exc
+        if derived_path != target_path:
+            target_path = derived_path
+            stat_result = os.stat(target_path)
+            try:
+                relative_path = target_path.relative_to(_BASE_STORAGE_PATH).as_posix()
+            except ValueError:
+                relative_path = None
+
     media_type, _ = mimetypes.guess_type(str(target_path))
-    return FileResponse(target_path, media_type=media_type or "application/octet-stream")
+    media_type = media_type or "application/octet-stream"
+    if _ACCEL_MODE and relative_path is not None:
+        return _accel_response(target_path, relative_path, headers, media_type)
+    # FileResponse handles Range / If-Range (206, multipart ranges, 416) itself.
+    return _ValidatedFileResponse(target_path, media_type=media_type, headers=headers, stat_result=stat_result)
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.style_preset import StylePreset
 from app.models.runninghub_workflow import RunningHubWorkflow
+from app.services.config_cache import invalidate_config_cache
 
 router = APIRouter(prefix="/api/v1/style-presets", tags=["风格预设"])
 
@@ -169,6 +170,7 @@ def create_style_preset(payload: StylePresetCreate, db: Session = Depends(get_db
 
     db.add(preset)
     db.commit()
+    invalidate_config_cache("style preset changed")
     db.refresh(preset)
     return preset.to_dict()
 
@@ -226,6 +228,7 @@ def update_style_preset(preset_id: int, payload: StylePresetUpdate, db: Session
         setattr(preset, key, value)
 
     db.commit()
+    invalidate_config_cache("style preset changed")
     db.refresh(preset)
     return preset.to_dict()
 
@@ -243,8 +246,10 @@ def delete_style_preset(
     if soft_delete:
         preset.is_active = False
         db.commit()
+        invalidate_config_cache("style preset changed")
         return {"message": "风格预设已禁用"}
 
     db.delete(preset)
     db.commit()
+    invalidate_config_cache("style preset changed")
     return {"message": "风格预设已删除"}
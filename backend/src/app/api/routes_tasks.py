@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import hashlib
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field, AliasChoices, ConfigDict, model_validator
 from sqlalchemy import or_
-from sqlalchemy.orm import Session
-from typing import Optional, List, Any, Dict
+from sqlalchemy.orm import Session, load_only
+from typing import Optional, List, Any, Dict, Sequence
 from datetime import datetime
 
-from app.utils.timezone import naive_now, to_local
+from app.utils.timezone import get_timezone, naive_now, to_local
 
 from app.database import get_db
 from app.models.task import Task, TaskStep
@@ -14,6 +20,7 @@ from app.models import MediaAsset, ServiceOption, SubtitleStyle, SubtitleDocumen
 from app.services.gemini_service import GeminiService
 from app.services.exceptions import ServiceException
 from app.celery_app import celery_app
+from app.core.task_events import get_task_event_hub
 from app.tasks.utils import ensure_provider_map
 from app.services.storage_service import StorageService
 from app.services.storyboard_script import persist_script_scenes
@@ -109,46 +116,54 @@ def _build_subtitle_style_snapshot(style: SubtitleStyle) -> Dict[str, Any]:
     return snapshot
 
 
-def _serialize_scene(scene: Scene) -> Dict[str, Any]:
-    data = {
-        "id": scene.id,
-        "task_id": scene.task_id,
-        "seq": scene.seq,
-        "status": scene.status,
-        "narration_text": scene.narration_text,
-        "narration_word_count": scene.narration_word_count,
-        "image_prompt": scene.image_prompt,
-        "video_prompt": getattr(scene, "video_prompt", None),
-        "image_status": scene.image_status,
-        "audio_status": scene.audio_status,
-        "video_status": scene.video_status,
-        "merge_status": getattr(scene, "merge_status", 0),
-        "image_url": scene.image_url,
-        "audio_url": scene.audio_url,
-        "audio_duration": getattr(scene, "audio_duration", None),
-        "merge_video_url": getattr(scene, "merge_video_url", None),
-        "raw_video_url": getattr(scene, "raw_video_url", None),
-        "image_meta": getattr(scene, "image_meta", None),
-        "audio_meta": getattr(scene, "audio_meta", None),
-        "video_meta": getattr(scene, "video_meta", None),
-        "merge_meta": getattr(scene, "merge_meta", None),
-        "merge_video_provider": getattr(scene, "merge_video_provider", None),
-        "image_retry_count": scene.image_retry_count,
-        "audio_retry_count": scene.audio_retry_count,
-        "video_retry_count": scene.video_retry_count,
-        "merge_retry_count": getattr(scene, "merge_retry_count", 0),
-        "params": scene.params,
-        "result": scene.result,
-        "error_msg": scene.error_msg,
-        "started_at": scene.started_at,
-        "finished_at": scene.finished_at,
-    }
-    if data["audio_url"]:
+# Scene 字段输出顺序；fields= 投影时按此过滤，未选中的列在 SQL 层延迟加载
+_SCENE_FIELDS = (
+    "id",
+    "task_id",
+    "seq",
+    "status",
+    "narration_text",
+    "narration_word_count",
+    "image_prompt",
+    "video_prompt",
+    "image_status",
+    "audio_status",
+    "video_status",
+    "merge_status",
+    "image_url",
+    "audio_url",
+    "audio_duration",
+    "merge_video_url",
+    "raw_video_url",
+    "image_meta",
+    "audio_meta",
+    "video_meta",
+    "merge_meta",
+    "merge_video_provider",
+    "image_retry_count",
+    "audio_retry_count",
+    "video_retry_count",
+    "merge_retry_count",
+    "params",
+    "result",
+    "error_msg",
+    "started_at",
+    "finished_at",
+)
+_SCENE_REQUIRED_FIELDS = ("id", "task_id", "seq", "status")
+_SCENE_FIELD_DEFAULTS = {"merge_status": 0, "merge_retry_count": 0}
+
+
+def _serialize_scene(scene: Scene, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    names = _SCENE_FIELDS if fields is None else fields
+    data = {name: getattr(scene, name, _SCENE_FIELD_DEFAULTS.get(name)) for name in names}
+    if data.get("audio_url"):
         data["audio_url"] = _external_url(data["audio_url"]) or data["audio_url"]
-    if data["merge_video_url"]:
+    if data.get("merge_video_url"):
         data["merge_video_url"] = _external_url(data["merge_video_url"]) or data["merge_video_url"]
-    data["started_at"] = to_local(data.get("started_at"))
-    data["finished_at"] = to_local(data.get("finished_at"))
+    for key in ("started_at", "finished_at"):
+        if key in data:
+            data[key] = to_local(data[key])
     return data
 
 
@@ -540,6 +555,9 @@ class TaskDetailOut(BaseModel):
     steps: List[TaskStepOut]
     scenes: List[SceneOut]
     subtitle_document: Optional[SubtitleDocumentOut] = None
+    # 增量请求（updated_since）时返回当前全部分镜 ID；synced_at 作为下一次请求的 updated_since
+    scene_ids: Optional[List[int]] = None
+    synced_at: Optional[str] = None
 
 
 class VoiceOptionOut(BaseModel):
@@ -834,7 +852,6 @@ def create_task(payload: CreateTaskRequest, db: Session = Depends(get_db)):
             celery_app.send_task(
                 "app.tasks.storyboard_task.generate_storyboard_task",
                 args=[task.id],
-                queue="default",
                 serializer="json",
             )
 
@@ -969,7 +986,6 @@ def import_storyboard_script(
             celery_app.send_task(
                 "app.tasks.image_task.generate_images_task",
                 args=[task.id],
-                queue="default",
                 serializer="json",
             )
             auto_dispatched = True
@@ -1206,7 +1222,12 @@ def update_task(task_id: int, payload: UpdateTaskRequest, db: Session = Depends(
 
 
 @router.post("/{task_id}/steps/{step_name}/run")
-def run_step_manual(task_id: int, step_name: str, db: Session = Depends(get_db)):
+def run_step_manual(
+    task_id: int,
+    step_name: str,
+    fresh: bool = Query(False, description="分镜步骤：跳过 Gemini 响应缓存，重新生成"),
+    db: Session = Depends(get_db),
+):
     """手动触发某个步骤（仅在 manual 模式或手动触发时使用）"""
     task = db.get(Task, task_id)
     if not task or task.is_deleted:
@@ -1237,7 +1258,8 @@ def run_step_manual(task_id: int, step_name: str, db: Session = Depends(get_db))
     db.commit()
 
     # send task and record step-level external task id (best-effort)
-    result = celery_app.send_task(mapping[step_name], args=[task_id], queue="default", serializer="json")
+    kwargs = {"fresh": True} if fresh and step_name == "storyboard" else None
+    result = celery_app.send_task(mapping[step_name], args=[task_id], kwargs=kwargs, serializer="json")
     try:
         step.external_task_id = str(result)
         db.commit()
@@ -1247,9 +1269,98 @@ def run_step_manual(task_id: int, step_name: str, db: Session = Depends(get_db))
     return {"message": f"已触发步骤 {step_name} 的执行"}
 
 
+def _parse_scene_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """解析 fields=a,b,c；id/task_id/seq/status 始终返回。None 表示全部字段"""
+    if fields is None or not fields.strip():
+        return None
+    requested = {item.strip() for item in fields.split(",") if item.strip()}
+    unknown = requested - set(_SCENE_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"未知的分镜字段: {', '.join(sorted(unknown))}")
+    requested.update(_SCENE_REQUIRED_FIELDS)
+    return [name for name in _SCENE_FIELDS if name in requested]
+
+
+def _storage_time(value: Optional[datetime]) -> Optional[datetime]:
+    """updated_at 以应用时区的 naive 时间存储；带时区的 updated_since 先换算过去"""
+    if value is None or value.tzinfo is None:
+        return value
+    tz = get_timezone()
+    return (value.astimezone(tz) if tz else value).replace(tzinfo=None)
+
+
+def _sync_cursor() -> str:
+    # MySQL DATETIME 只有秒级精度，游标取整秒并用 >= 比较，宁可重复返回也不漏掉
+    return naive_now().replace(microsecond=0).isoformat()
+
+
+def _query_scenes(
+    db: Session,
+    task_id: int,
+    fields: Optional[List[str]],
+    updated_since: Optional[datetime],
+):
+    query = db.query(Scene).filter(Scene.task_id == task_id)
+    if fields is not None:
+        query = query.options(load_only(*[getattr(Scene, name) for name in fields]))
+    if updated_since is not None:
+        query = query.filter(Scene.updated_at >= updated_since)
+    return query.order_by(Scene.seq.asc()).all()
+
+
+def _scene_payloads(scenes: List[Scene], fields: Optional[List[str]]) -> List[Any]:
+    if fields is None:
+        return [SceneOut.model_validate(_serialize_scene(sc)) for sc in scenes]
+    payloads = []
+    for sc in scenes:
+        data = _serialize_scene(sc, fields)
+        # 与 SceneOut 的时区处理保持一致
+        for key in ("started_at", "finished_at"):
+            if key in data:
+                data[key] = to_local(data[key])
+        payloads.append(data)
+    return payloads
+
+
+def _conditional_json(
+    request: Request,
+    content: Any,
+    *,
+    extra: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """返回带弱 ETag 的 JSON；If-None-Match 命中时返回 304。``extra`` 不参与 ETag 计算"""
+    encoded = jsonable_encoder(content)
+    digest = hashlib.sha1(
+        json.dumps(encoded, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+    etag = f'W/"{digest}"'
+    response_headers = {"ETag": etag, "Cache-Control": "no-cache", **(headers or {})}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in {item.strip() for item in if_none_match.split(",")}:
+        return Response(status_code=304, headers=response_headers)
+    if extra and isinstance(encoded, dict):
+        encoded = {**encoded, **jsonable_encoder(extra)}
+    return JSONResponse(content=encoded, headers=response_headers)
+
+
 @router.get("/{task_id}", response_model=TaskDetailOut)
-def get_task(task_id: int, db: Session = Depends(get_db)):
-    """获取任务详情（包含步骤和分镜）"""
+def get_task(
+    task_id: int,
+    request: Request,
+    updated_since: Optional[datetime] = Query(
+        None, description="只返回该时间之后有更新的分镜（传入上次响应的 synced_at），同时返回 scene_ids 以便删除已移除的分镜"
+    ),
+    fields: Optional[str] = Query(
+        None, description="分镜字段投影（逗号分隔，如 image_status,image_url），未选中的大字段不会从数据库读取"
+    ),
+    db: Session = Depends(get_db),
+):
+    """获取任务详情（包含步骤和分镜），支持 ETag 条件请求、增量与字段投影"""
+    scene_fields = _parse_scene_fields(fields)
+    since = _storage_time(updated_since)
+    synced_at = _sync_cursor()
+
     task = db.get(Task, task_id)
     if not task or task.is_deleted:
         raise HTTPException(status_code=404, detail="任务不存在")
@@ -1258,7 +1369,7 @@ def get_task(task_id: int, db: Session = Depends(get_db)):
     steps = ensure_task_steps(db, task_id)
     
     # 获取分镜
-    scenes = db.query(Scene).filter(Scene.task_id == task_id).order_by(Scene.seq.asc()).all()
+    scenes = _query_scenes(db, task_id, scene_fields, since)
     
     task_dict = _serialize_task(task)
 
@@ -1280,23 +1391,87 @@ def get_task(task_id: int, db: Session = Depends(get_db)):
             "finished_at": s.finished_at,
         })
 
-    scenes_list = [_serialize_scene(sc) for sc in scenes]
-
-    subtitle_document = (
-        db.query(SubtitleDocument)
-        .filter(SubtitleDocument.task_id == task_id)
-        .one_or_none()
-    )
+    subtitle_query = db.query(SubtitleDocument).filter(SubtitleDocument.task_id == task_id)
+    if since is not None:
+        subtitle_query = subtitle_query.filter(SubtitleDocument.updated_at >= since)
+    subtitle_document = subtitle_query.one_or_none()
     subtitle_doc_payload = _serialize_subtitle_document(subtitle_document) if subtitle_document else None
 
-    return TaskDetailOut(task=task_dict, steps=steps_list, scenes=scenes_list, subtitle_document=subtitle_doc_payload)
+    content: Dict[str, Any] = {
+        "task": TaskOut.model_validate(task_dict),
+        "steps": [TaskStepOut.model_validate(item) for item in steps_list],
+        "scenes": _scene_payloads(scenes, scene_fields),
+        "subtitle_document": SubtitleDocumentOut.model_validate(subtitle_doc_payload) if subtitle_doc_payload else None,
+    }
+    if since is not None:
+        # 增量响应：scenes 只含变化的分镜，subtitle_document 为空表示未变化
+        content["scene_ids"] = [
+            row.id for row in db.query(Scene.id).filter(Scene.task_id == task_id).order_by(Scene.seq.asc())
+        ]
+    return _conditional_json(request, content, extra={"synced_at": synced_at})
+
+
+_EVENT_HEARTBEAT_SECONDS = 15.0
+
+
+def _format_sse(event_name: str, payload: Dict[str, Any]) -> str:
+    return f"event: {event_name}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _task_event_stream(task_id: int):
+    hub = get_task_event_hub()
+    queue = hub.subscribe(task_id)
+    try:
+        yield "retry: 3000\n\n"
+        yield _format_sse("ready", {"task_id": task_id})
+        while True:
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=_EVENT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # 注释行保持连接，代理不会因空闲断开
+                yield ": ping\n\n"
+                continue
+            yield _format_sse(str(payload.get("type") or "message"), payload)
+    finally:
+        hub.unsubscribe(task_id, queue)
+
+
+@router.get("/{task_id}/events")
+def stream_task_events(task_id: int, db: Session = Depends(get_db)):
+    """任务进度事件流（SSE）：推送任务/步骤/分镜的状态增量，替代轮询 GET /tasks/{id}
+
+    事件类型：task / step / scene（``changes`` 为变化字段）、resync（需重新拉取详情）。
+    Redis 不可用时返回 503，客户端应回退为轮询。
+    """
+    task = db.get(Task, task_id)
+    if not task or task.is_deleted:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if not get_task_event_hub().available():
+        raise HTTPException(status_code=503, detail="事件推送不可用（未配置 Redis）")
+    return StreamingResponse(
+        _task_event_stream(task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{task_id}/scenes", response_model=List[SceneOut])
-def list_scenes(task_id: int, db: Session = Depends(get_db)):
+def list_scenes(
+    task_id: int,
+    request: Request,
+    updated_since: Optional[datetime] = Query(None, description="只返回该时间之后有更新的分镜（传入上次响应头 X-Synced-At）"),
+    fields: Optional[str] = Query(None, description="分镜字段投影（逗号分隔）"),
+    db: Session = Depends(get_db),
+):
     """获取任务的所有分镜"""
-    scenes = db.query(Scene).filter(Scene.task_id == task_id).order_by(Scene.seq.asc()).all()
-    return [_serialize_scene(sc) for sc in scenes]
+    scene_fields = _parse_scene_fields(fields)
+    synced_at = _sync_cursor()
+    scenes = _query_scenes(db, task_id, scene_fields, _storage_time(updated_since))
+    return _conditional_json(
+        request,
+        _scene_payloads(scenes, scene_fields),
+        headers={"X-Synced-At": synced_at},
+    )
 
 
 @router.get("/{task_id}/steps", response_model=List[TaskStepOut])
@@ -1408,7 +1583,6 @@ def retry_scene(task_id: int, scene_id: int, step_type: str, db: Session = Depen
         task_path,
         args=[task_id],
         kwargs={"scene_id": scene_id},
-        queue="default",
         serializer="json",
     )
 
@@ -1,11 +1,107 @@
 """
 Celery application factory configured via Settings
 """
+import os
 import sys
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Optional, Tuple
 from celery import Celery
-from app.config.settings import get_settings
+from app.config.settings import Settings, get_settings
 from app.utils.timezone import apply_timezone_settings
 
+# Queue classes. Network-bound provider calls and CPU-bound media work run on
+# separate worker pools so a burst of FFmpeg merges never starves Gemini /
+# RunningHub / FishAudio requests (and vice versa).
+QUEUE_CLASS_PROVIDER_IO = "provider-io"
+QUEUE_CLASS_MEDIA_CPU = "media-cpu"
+QUEUE_CLASS_TRANSCRIPTION = "transcription"
+
+# Task name pattern -> queue class (matched with Celery's glob task_routes).
+# Only tasks that wait on remote providers belong on provider-io; anything that
+# runs FFmpeg over whole clips goes to media-cpu.
+TASK_QUEUE_CLASSES: Dict[str, str] = {
+    # Gemini / RunningHub / Liblib / ComfyUI / FishAudio / NCA / fal requests and polling.
+    "app.tasks.storyboard_task.*": QUEUE_CLASS_PROVIDER_IO,
+    "app.tasks.image_task.*": QUEUE_CLASS_PROVIDER_IO,
+    # TTS requests; the per-clip silence analysis is short and capped per process
+    # (see audio_postprocess), so it does not justify a separate hop.
+    "app.tasks.audio_task.*": QUEUE_CLASS_PROVIDER_IO,
+    # Video generation is submitted to remote providers (nca/fal/runninghub) and
+    # prompts come from Gemini; nothing in video_task runs FFmpeg locally.
+    "app.tasks.video_task.*": QUEUE_CLASS_PROVIDER_IO,
+    "app.tasks.runninghub_tracker_task.*": QUEUE_CLASS_PROVIDER_IO,
+    # DB-only scheduler, linked after every scene stage.
+    "app.tasks.scene_pipeline_task.*": QUEUE_CLASS_PROVIDER_IO,
+    "app.tasks.scene_merge_task.*": QUEUE_CLASS_MEDIA_CPU,
+    "app.tasks.merge_task.*": QUEUE_CLASS_MEDIA_CPU,
+    "app.tasks.finalize_task.*": QUEUE_CLASS_MEDIA_CPU,
+    "app.tasks.transcription_task.*": QUEUE_CLASS_TRANSCRIPTION,
+}
+
+# Tasks that submit work to external providers are throttled per worker so a burst
+# of retries cannot hammer an API; schedulers, pollers and CPU tasks are not.
+PROVIDER_TASK_RATE_LIMIT = "10/s"
+RATE_LIMITED_TASKS: Tuple[str, ...] = (
+    "app.tasks.storyboard_task.*",
+    "app.tasks.image_task.*",
+    "app.tasks.audio_task.*",
+    "app.tasks.video_task.*",
+)
+
+# Recommended worker pool per queue class (used by start_celery_worker.sh/.ps1 --group).
+WORKER_GROUPS: Dict[str, Dict[str, object]] = {
+    # Mostly waiting on HTTP: many threads in one process.
+    QUEUE_CLASS_PROVIDER_IO: {"pool": "threads", "concurrency": 16, "prefetch_multiplier": 4},
+    # FFmpeg/NumPy: one process per core, no prefetching of long jobs.
+    QUEUE_CLASS_MEDIA_CPU: {"pool": "prefork", "concurrency": os.cpu_count() or 2, "prefetch_multiplier": 1},
+    # One preloaded Whisper model; parallelism comes from FASTER_WHISPER_NUM_WORKERS.
+    QUEUE_CLASS_TRANSCRIPTION: {"pool": "threads", "concurrency": 1, "prefetch_multiplier": 1},
+}
+
+
+def queue_for_class(queue_class: str, settings: Settings) -> str:
+    """Resolve the configured broker queue name for a queue class."""
+    if not settings.celery_queue_routing:
+        return "default"
+    return {
+        QUEUE_CLASS_PROVIDER_IO: settings.provider_io_queue,
+        QUEUE_CLASS_MEDIA_CPU: settings.media_cpu_queue,
+        QUEUE_CLASS_TRANSCRIPTION: settings.transcription_queue,
+    }.get(queue_class, "default")
+
+
+def queue_class_for(task_name: str) -> Optional[str]:
+    for pattern, queue_class in TASK_QUEUE_CLASSES.items():
+        if fnmatchcase(task_name, pattern):
+            return queue_class
+    return None
+
+
+class TaskAnnotations:
+    """``task_annotations``: retry cap for every task, rate limit only for provider submissions."""
+
+    def __init__(self, max_retries: Optional[int] = None) -> None:
+        self.max_retries = max_retries
+
+    def annotate(self, task: Any) -> Optional[Dict[str, Any]]:
+        if any(fnmatchcase(task.name, pattern) for pattern in RATE_LIMITED_TASKS):
+            return {"rate_limit": PROVIDER_TASK_RATE_LIMIT}
+        return None
+
+    def annotate_any(self) -> Optional[Dict[str, Any]]:
+        if self.max_retries is None:
+            return None
+        return {"max_retries": self.max_retries}
+
+
+def build_task_routes(settings: Settings) -> Dict[str, Dict[str, str]]:
+    if not settings.celery_queue_routing:
+        return {}
+    return {
+        pattern: {"queue": queue_for_class(queue_class, settings)}
+        for pattern, queue_class in TASK_QUEUE_CLASSES.items()
+    }
+
 
 def create_celery() -> Celery:
     apply_timezone_settings()
@@ -23,22 +119,29 @@ def create_celery() -> Celery:
             "app.tasks.scene_merge_task",
             "app.tasks.merge_task",
             "app.tasks.finalize_task",
+            "app.tasks.runninghub_tracker_task",
+            "app.tasks.scene_pipeline_task",
+            "app.tasks.transcription_task",
         ],
     )
 
-    # Basic config
-    annotations = {"*": {"rate_limit": "10/s"}}
-    if settings.MAX_RETRY_ATTEMPTS is not None:
-        annotations["*"]["max_retries"] = settings.MAX_RETRY_ATTEMPTS
-
     config = dict(
         task_default_queue="default",
+        # Producers send without an explicit queue; routing happens here.
+        task_routes=build_task_routes(settings),
         task_ignore_result=False,
-        task_annotations=annotations,
+        task_annotations=[TaskAnnotations(settings.MAX_RETRY_ATTEMPTS)],
         # Broker connection retry behavior
         broker_connection_retry=settings.CELERY_BROKER_CONNECTION_RETRY,
         broker_connection_retry_on_startup=settings.CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP,
         worker_hijack_root_logger=False,
+        # Periodic jobs (requires `celery beat` or a worker started with -B)
+        beat_schedule={
+            "track-runninghub-jobs": {
+                "task": "app.tasks.runninghub_tracker_task.track_runninghub_jobs_task",
+                "schedule": float(settings.RUNNINGHUB_TRACKER_INTERVAL_SECONDS or 15.0),
+            },
+        },
     )
     # Windows prefork support regressed on Python 3.13; fall back to solo pool.
     if sys.platform.startswith("win"):
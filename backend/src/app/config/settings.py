@@ -33,6 +33,23 @@ class Settings(BaseSettings):
     CELERY_BROKER_CONNECTION_RETRY: Optional[bool] = Field(None, env="CELERY_BROKER_CONNECTION_RETRY")
     # Celery 6.0 introduced broker_connection_retry_on_startup separate flag
     CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP: Optional[bool] = Field(None, env="CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP")
+    # Route tasks to per-class queues (provider-io / media-cpu / transcription); false keeps everything on "default"
+    CELERY_QUEUE_ROUTING: Optional[bool] = Field(None, env="CELERY_QUEUE_ROUTING")
+    CELERY_PROVIDER_IO_QUEUE: Optional[str] = Field(None, env="CELERY_PROVIDER_IO_QUEUE")
+    CELERY_MEDIA_CPU_QUEUE: Optional[str] = Field(None, env="CELERY_MEDIA_CPU_QUEUE")
+
+    # Provider credential/option cache (app.services.config_cache)
+    CONFIG_CACHE_TTL_SECONDS: Optional[float] = Field(None, env="CONFIG_CACHE_TTL_SECONDS")
+    CONFIG_CACHE_CHECK_INTERVAL_SECONDS: Optional[float] = Field(None, env="CONFIG_CACHE_CHECK_INTERVAL_SECONDS")
+
+    # Shared outbound HTTP connection pools (app.core.http_client)
+    HTTP_POOL_MAX_CONNECTIONS: Optional[int] = Field(None, env="HTTP_POOL_MAX_CONNECTIONS")
+    HTTP_POOL_MAX_KEEPALIVE: Optional[int] = Field(None, env="HTTP_POOL_MAX_KEEPALIVE")
+    HTTP_POOL_KEEPALIVE_EXPIRY: Optional[float] = Field(None, env="HTTP_POOL_KEEPALIVE_EXPIRY")
+    HTTP_CLIENT_TIMEOUT: Optional[float] = Field(None, env="HTTP_CLIENT_TIMEOUT")
+    HTTP_CLIENT_CONNECT_TIMEOUT: Optional[float] = Field(None, env="HTTP_CLIENT_CONNECT_TIMEOUT")
+    # Negotiate HTTP/2 where the server supports it (requires the "h2" package)
+    HTTP_CLIENT_HTTP2: Optional[bool] = Field(None, env="HTTP_CLIENT_HTTP2")
 
     # Task configuration
     MAX_SCENES_PER_TASK: Optional[int] = Field(None, env="MAX_SCENES_PER_TASK")
@@ -46,6 +63,18 @@ class Settings(BaseSettings):
     # Legacy/alternative Gemini settings for compatibility
     GEMINI_MODEL_ID: Optional[str] = Field(None, env="GEMINI_MODEL_ID")
     GEMINI_API_KEYS: Optional[str] = Field(None, env="GEMINI_API_KEYS")
+    # Per-key Gemini budgets used by the key rotator (sliding 60s window)
+    GEMINI_KEY_RPM: Optional[int] = Field(None, env="GEMINI_KEY_RPM")
+    GEMINI_KEY_TPM: Optional[int] = Field(None, env="GEMINI_KEY_TPM")
+    GEMINI_KEY_WAIT_TIMEOUT: Optional[float] = Field(None, env="GEMINI_KEY_WAIT_TIMEOUT")
+    GEMINI_KEY_BACKOFF_SECONDS: Optional[float] = Field(None, env="GEMINI_KEY_BACKOFF_SECONDS")
+    # Scenes per batched video-prompt request (1 disables batching)
+    VIDEO_PROMPT_BATCH_SIZE: Optional[int] = Field(None, env="VIDEO_PROMPT_BATCH_SIZE")
+    # Content-addressed cache of Gemini responses (storyboard / video prompt / console)
+    GEMINI_RESPONSE_CACHE_ENABLED: Optional[bool] = Field(None, env="GEMINI_RESPONSE_CACHE_ENABLED")
+    GEMINI_RESPONSE_CACHE_TTL_SECONDS: Optional[int] = Field(None, env="GEMINI_RESPONSE_CACHE_TTL_SECONDS")
+    GEMINI_RESPONSE_CACHE_MAX_ENTRIES: Optional[int] = Field(None, env="GEMINI_RESPONSE_CACHE_MAX_ENTRIES")
+    GEMINI_RESPONSE_CACHE_MAX_ENTRY_BYTES: Optional[int] = Field(None, env="GEMINI_RESPONSE_CACHE_MAX_ENTRY_BYTES")
 
     # Fish Audio TTS settings (核心)
     FISH_AUDIO_API_KEY: Optional[str] = Field(None, env="FISH_AUDIO_API_KEY")
@@ -95,6 +124,27 @@ class Settings(BaseSettings):
     STORAGE_MAX_SIZE_MB: Optional[int] = Field(None, env="STORAGE_MAX_SIZE_MB")
     STORAGE_TYPE: Optional[str] = Field(None, env="STORAGE_TYPE")
     STORAGE_PUBLIC_BASE_URL: Optional[str] = Field(None, env="STORAGE_PUBLIC_BASE_URL")
+    # /api/v1/storage: max-age for immutable (timestamp/token named) artifacts
+    STORAGE_CACHE_MAX_AGE: Optional[int] = Field(None, env="STORAGE_CACHE_MAX_AGE")
+    # Hand file bodies to the front proxy: "x-accel" (nginx X-Accel-Redirect) or "x-sendfile" (Apache/lighttpd)
+    STORAGE_ACCEL_MODE: Optional[str] = Field(None, env="STORAGE_ACCEL_MODE")
+    # Internal location prefix mapped to STORAGE_BASE_PATH for X-Accel-Redirect
+    STORAGE_ACCEL_PREFIX: Optional[str] = Field(None, env="STORAGE_ACCEL_PREFIX")
+    # ?w= / ?poster= derivatives (STORAGE_BASE_PATH/tmp/derivatives): byte budget and largest width rendered
+    STORAGE_DERIVATIVE_CACHE_MAX_BYTES: Optional[int] = Field(None, env="STORAGE_DERIVATIVE_CACHE_MAX_BYTES")
+    STORAGE_DERIVATIVE_MAX_WIDTH: Optional[int] = Field(None, env="STORAGE_DERIVATIVE_MAX_WIDTH")
+    # Object storage for published artifacts: STORAGE_TYPE=local (default) or s3 / minio (S3-compatible)
+    STORAGE_S3_BUCKET: Optional[str] = Field(None, env="STORAGE_S3_BUCKET")
+    STORAGE_S3_ENDPOINT_URL: Optional[str] = Field(None, env="STORAGE_S3_ENDPOINT_URL")
+    STORAGE_S3_ACCESS_KEY: Optional[str] = Field(None, env="STORAGE_S3_ACCESS_KEY")
+    STORAGE_S3_SECRET_KEY: Optional[str] = Field(None, env="STORAGE_S3_SECRET_KEY")
+    STORAGE_S3_REGION: Optional[str] = Field(None, env="STORAGE_S3_REGION")
+    STORAGE_S3_PREFIX: Optional[str] = Field(None, env="STORAGE_S3_PREFIX")
+    # Multipart part size (MiB, min 5) and parts uploaded in parallel
+    STORAGE_S3_PART_SIZE_MB: Optional[int] = Field(None, env="STORAGE_S3_PART_SIZE_MB")
+    STORAGE_S3_UPLOAD_CONCURRENCY: Optional[int] = Field(None, env="STORAGE_S3_UPLOAD_CONCURRENCY")
+    # Worker-local read-through copies of remote objects (STORAGE_BASE_PATH/tmp/object-cache): byte budget
+    STORAGE_OBJECT_CACHE_MAX_BYTES: Optional[int] = Field(None, env="STORAGE_OBJECT_CACHE_MAX_BYTES")
 
     # Faster Whisper settings
     FASTER_WHISPER_MODEL: Optional[str] = Field(None, env="FASTER_WHISPER_MODEL")
@@ -110,11 +160,64 @@ class Settings(BaseSettings):
     FASTER_WHISPER_TEMPERATURE: Optional[float] = Field(None, env="FASTER_WHISPER_TEMPERATURE")
     FASTER_WHISPER_CHUNK_LENGTH: Optional[float] = Field(None, env="FASTER_WHISPER_CHUNK_LENGTH")
     FASTER_WHISPER_INITIAL_PROMPT: Optional[str] = Field(None, env="FASTER_WHISPER_INITIAL_PROMPT")
+    # "default" (device/compute from the settings above) or "cpu_batched" (cpu + int8 + batched inference)
+    FASTER_WHISPER_ENGINE: Optional[str] = Field(None, env="FASTER_WHISPER_ENGINE")
+    FASTER_WHISPER_CPU_THREADS: Optional[int] = Field(None, env="FASTER_WHISPER_CPU_THREADS")
+    FASTER_WHISPER_NUM_WORKERS: Optional[int] = Field(None, env="FASTER_WHISPER_NUM_WORKERS")
+    FASTER_WHISPER_BATCH_SIZE: Optional[int] = Field(None, env="FASTER_WHISPER_BATCH_SIZE")
+    # Load the model when the worker starts (set on dedicated transcription workers)
+    FASTER_WHISPER_PRELOAD: Optional[bool] = Field(None, env="FASTER_WHISPER_PRELOAD")
+    # Queue consumed by the transcription workers
+    TRANSCRIPTION_QUEUE: Optional[str] = Field(None, env="TRANSCRIPTION_QUEUE")
+
+    # Subtitle transcription: "video" runs Whisper on the merged video, "scene" transcribes each scene's audio
+    SUBTITLE_TRANSCRIBE_MODE: Optional[str] = Field(None, env="SUBTITLE_TRANSCRIBE_MODE")
+    # Parallel scene transcriptions when finalize has to fill in missing scene transcripts
+    SUBTITLE_SCENE_WORKERS: Optional[int] = Field(None, env="SUBTITLE_SCENE_WORKERS")
 
     # Provider defaults configuration (JSON string like {"image": "liblib"})
     PROVIDER_DEFAULTS: Optional[str] = Field(None, env="PROVIDER_DEFAULTS")
     # Service concurrency defaults (JSON string like {"runninghub": {"image": 3}})
     SERVICE_CONCURRENCY_DEFAULTS: Optional[str] = Field(None, env="SERVICE_CONCURRENCY_DEFAULTS")
+    # Concurrency slot backend per service (JSON like {"runninghub": "redis"}; "__all__" sets the default)
+    CONCURRENCY_BACKENDS: Optional[str] = Field(None, env="CONCURRENCY_BACKENDS")
+    # Mirror Redis-held slots into service_concurrency_slots (audit only, written asynchronously)
+    CONCURRENCY_AUDIT_LOG: Optional[bool] = Field(None, env="CONCURRENCY_AUDIT_LOG")
+    # Token-bucket rate limits (JSON like {"fishaudio": {"audio": {"rps": 2, "burst": 4, "wait_timeout": 120}}})
+    SERVICE_RATE_LIMITS: Optional[str] = Field(None, env="SERVICE_RATE_LIMITS")
+    # Key the Fish Audio bucket by voice as well as by credential
+    FISHAUDIO_RATE_LIMIT_PER_VOICE: Optional[bool] = Field(None, env="FISHAUDIO_RATE_LIMIT_PER_VOICE")
+    # Audio task retries after the rate limiter rejects a scene before it is failed (default 10)
+    AUDIO_RATE_LIMIT_MAX_RETRIES: Optional[int] = Field(None, env="AUDIO_RATE_LIMIT_MAX_RETRIES")
+    # Concurrent streaming FishAudio syntheses per audio step (1 = sequential)
+    FISHAUDIO_TTS_CONCURRENCY: Optional[int] = Field(None, env="FISHAUDIO_TTS_CONCURRENCY")
+    # Reuse previously synthesized narration across tasks (default true)
+    TTS_CACHE_ENABLED: Optional[bool] = Field(None, env="TTS_CACHE_ENABLED")
+
+    # Remote media download cache (STORAGE_BASE_PATH/tmp/ffmpeg-cache): byte budget and ranged downloads
+    MEDIA_CACHE_MAX_BYTES: Optional[int] = Field(None, env="MEDIA_CACHE_MAX_BYTES")
+    MEDIA_CACHE_RANGE_THRESHOLD_BYTES: Optional[int] = Field(None, env="MEDIA_CACHE_RANGE_THRESHOLD_BYTES")
+    MEDIA_CACHE_RANGE_WORKERS: Optional[int] = Field(None, env="MEDIA_CACHE_RANGE_WORKERS")
+    # In-process LRU size for cached ffprobe results (also persisted under STORAGE_BASE_PATH/tmp/ffprobe-cache)
+    MEDIA_METADATA_CACHE_SIZE: Optional[int] = Field(None, env="MEDIA_METADATA_CACHE_SIZE")
+    # Byte budget of the persisted ffprobe results (least recently used entries are evicted)
+    MEDIA_METADATA_DISK_CACHE_MAX_BYTES: Optional[int] = Field(None, env="MEDIA_METADATA_DISK_CACHE_MAX_BYTES")
+    # Merge: splice compatible scene clips with the concat demuxer (-c copy) instead of re-encoding
+    FFMPEG_CONCAT_STREAM_COPY: Optional[bool] = Field(None, env="FFMPEG_CONCAT_STREAM_COPY")
+    # Finalize: run bgm_mix + embed_subtitles as a single FFmpeg pass (default true)
+    FINALIZE_FUSED_ENABLED: Optional[bool] = Field(None, env="FINALIZE_FUSED_ENABLED")
+    # Write a trimmed copy of scene audio instead of trimming at composition time (default false)
+    AUDIO_TRIM_MATERIALIZE: Optional[bool] = Field(None, env="AUDIO_TRIM_MATERIALIZE")
+
+    # Runninghub job tracking: "blocking" polls inside the worker, "async" hands jobs to the tracker
+    RUNNINGHUB_TRACKING_MODE: Optional[str] = Field(None, env="RUNNINGHUB_TRACKING_MODE")
+    RUNNINGHUB_TRACKER_INTERVAL_SECONDS: Optional[float] = Field(None, env="RUNNINGHUB_TRACKER_INTERVAL_SECONDS")
+    RUNNINGHUB_TRACKER_BATCH_SIZE: Optional[int] = Field(None, env="RUNNINGHUB_TRACKER_BATCH_SIZE")
+    # Dispatch image/video scenes as parallel Celery subtasks (chord) instead of a serial loop
+    SCENE_FANOUT_ENABLED: Optional[bool] = Field(None, env="SCENE_FANOUT_ENABLED")
+    SCENE_FANOUT_RETRY_SECONDS: Optional[int] = Field(None, env="SCENE_FANOUT_RETRY_SECONDS")
+    # Auto mode: stream each scene through image/audio -> video -> scene merge without step barriers
+    SCENE_PIPELINE_ENABLED: Optional[bool] = Field(None, env="SCENE_PIPELINE_ENABLED")
     
     model_config = SettingsConfigDict(
         env_file=str(ENV_FILE_PATH),
@@ -180,53 +283,29 @@ class Settings(BaseSettings):
         如果未找到或查询失败，返回 None。调用方应基于此抛出明确的配置异常。
         """
         try:
-            # 延迟导入以避免循环依赖
-            from app.database import get_db_session
-            from app.models.service_config import ServiceCredential
+            # 延迟导入以避免循环依赖；凭证来自进程级配置缓存
+            from app.services.config_cache import get_config_cache
 
-            db = get_db_session()
-            try:
-                cred = db.query(ServiceCredential).filter(
-                    ServiceCredential.service_name == 'gemini',
-                    ServiceCredential.is_active == True,
-                ).order_by(ServiceCredential.id.desc()).first()
-                if cred and cred.credential_key:
-                    return cred.credential_key
-            finally:
-                try:
-                    db.close()
-                except Exception:
-                    pass
+            cred = get_config_cache().active_credential('gemini')
+            if cred and cred.credential_key:
+                return cred.credential_key
         except Exception:
             # 如果 DB 无法访问或查询出错，则返回 None（调用者会抛出配置异常）
             return None
+        return None
 
     @property
     def resolved_gemini_model(self) -> Optional[str]:
         """读取 `service_options` 中默认的 Gemini 模型（model_id）。"""
         try:
-            from app.database import get_db_session
-            from app.models.service_config import ServiceOption
+            from app.services.config_cache import get_config_cache
 
-            db = get_db_session()
-            try:
-                opt = (
-                    db.query(ServiceOption)
-                    .filter(
-                        ServiceOption.service_name == 'gemini',
-                        ServiceOption.option_type == 'model_id',
-                        ServiceOption.is_default == True,
-                    )
-                    .order_by(ServiceOption.id.desc())
-                    .first()
-                )
-                if opt and opt.option_value:
-                    return opt.option_value
-            finally:
-                try:
-                    db.close()
-                except Exception:
-                    pass
+            defaults = [
+                opt for opt in get_config_cache().options('gemini', 'model_id')
+                if opt.is_default and opt.option_value
+            ]
+            if defaults:
+                return defaults[-1].option_value
         except Exception:
             return None
         return None
@@ -272,6 +351,241 @@ class Settings(BaseSettings):
                 result[service.lower()] = nested
         return result
 
+    @property
+    def concurrency_backends(self) -> Dict[str, str]:
+        if not self.CONCURRENCY_BACKENDS:
+            return {}
+        try:
+            raw = json.loads(self.CONCURRENCY_BACKENDS)
+        except json.JSONDecodeError:
+            raise RuntimeError("CONCURRENCY_BACKENDS is not valid JSON")
+        if not isinstance(raw, dict):
+            return {}
+        return {
+            str(service).lower(): str(backend).strip().lower()
+            for service, backend in raw.items()
+            if str(backend).strip().lower() in {"db", "redis"}
+        }
+
+    def concurrency_backend_for(self, service_name: str) -> str:
+        backends = self.concurrency_backends
+        return backends.get(service_name.lower()) or backends.get("__all__") or "db"
+
+    @property
+    def concurrency_audit_enabled(self) -> bool:
+        return True if self.CONCURRENCY_AUDIT_LOG is None else bool(self.CONCURRENCY_AUDIT_LOG)
+
+    @property
+    def service_rate_limits(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        if not self.SERVICE_RATE_LIMITS:
+            return {}
+        try:
+            raw = json.loads(self.SERVICE_RATE_LIMITS)
+        except json.JSONDecodeError:
+            raise RuntimeError("SERVICE_RATE_LIMITS is not valid JSON")
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        if not isinstance(raw, dict):
+            return result
+        for service, payload in raw.items():
+            if not isinstance(service, str) or not isinstance(payload, dict):
+                continue
+            nested: Dict[str, Dict[str, float]] = {}
+            for feature, values in payload.items():
+                if not isinstance(values, dict):
+                    continue
+                parsed: Dict[str, float] = {}
+                for key in ("rps", "burst", "wait_timeout"):
+                    try:
+                        if values.get(key) is not None:
+                            parsed[key] = float(values[key])
+                    except (TypeError, ValueError):
+                        continue
+                if parsed.get("rps"):
+                    nested[str(feature)] = parsed
+            if nested:
+                result[service.lower()] = nested
+        return result
+
+    @property
+    def runninghub_tracking_mode(self) -> str:
+        value = (self.RUNNINGHUB_TRACKING_MODE or "blocking").strip().lower()
+        return value if value in {"blocking", "async"} else "blocking"
+
+    @property
+    def subtitle_transcribe_mode(self) -> str:
+        value = (self.SUBTITLE_TRANSCRIBE_MODE or "video").strip().lower()
+        return value if value in {"video", "scene"} else "video"
+
+    @property
+    def transcription_queue(self) -> str:
+        return (self.TRANSCRIPTION_QUEUE or "transcription").strip() or "transcription"
+
+    @property
+    def celery_queue_routing(self) -> bool:
+        return True if self.CELERY_QUEUE_ROUTING is None else bool(self.CELERY_QUEUE_ROUTING)
+
+    @property
+    def provider_io_queue(self) -> str:
+        return (self.CELERY_PROVIDER_IO_QUEUE or "provider-io").strip() or "provider-io"
+
+    @property
+    def media_cpu_queue(self) -> str:
+        return (self.CELERY_MEDIA_CPU_QUEUE or "media-cpu").strip() or "media-cpu"
+
+    @property
+    def subtitle_scene_workers(self) -> int:
+        return max(int(self.SUBTITLE_SCENE_WORKERS or 2), 1)
+
+    @property
+    def config_cache_ttl_seconds(self) -> float:
+        value = self.CONFIG_CACHE_TTL_SECONDS
+        return 300.0 if value is None else max(float(value), 0.0)
+
+    @property
+    def config_cache_check_interval(self) -> float:
+        value = self.CONFIG_CACHE_CHECK_INTERVAL_SECONDS
+        return 2.0 if value is None else max(float(value), 0.0)
+
+    @property
+    def http_pool_max_connections(self) -> int:
+        return max(int(self.HTTP_POOL_MAX_CONNECTIONS or 50), 1)
+
+    @property
+    def http_pool_max_keepalive(self) -> int:
+        return max(int(self.HTTP_POOL_MAX_KEEPALIVE or 10), 0)
+
+    @property
+    def http_pool_keepalive_expiry(self) -> float:
+        return float(self.HTTP_POOL_KEEPALIVE_EXPIRY or 30.0)
+
+    @property
+    def http_client_timeout(self) -> float:
+        return float(self.HTTP_CLIENT_TIMEOUT or 60.0)
+
+    @property
+    def http_client_connect_timeout(self) -> float:
+        return float(self.HTTP_CLIENT_CONNECT_TIMEOUT or 10.0)
+
+    @property
+    def http_client_http2(self) -> bool:
+        return bool(self.HTTP_CLIENT_HTTP2)
+
+    @property
+    def storage_cache_max_age(self) -> int:
+        value = self.STORAGE_CACHE_MAX_AGE
+        return 31536000 if value is None else max(int(value), 0)
+
+    @property
+    def storage_accel_mode(self) -> Optional[str]:
+        mode = (self.STORAGE_ACCEL_MODE or "").strip().lower()
+        return mode if mode in {"x-accel", "x-sendfile"} else None
+
+    @property
+    def storage_accel_prefix(self) -> str:
+        prefix = (self.STORAGE_ACCEL_PREFIX or "/_storage/").strip() or "/_storage/"
+        return "/" + prefix.strip("/") + "/"
+
+    @property
+    def storage_derivative_cache_max_bytes(self) -> int:
+        value = self.STORAGE_DERIVATIVE_CACHE_MAX_BYTES
+        return 1024 ** 3 if value is None else max(int(value), 0)
+
+    @property
+    def storage_derivative_max_width(self) -> int:
+        return max(int(self.STORAGE_DERIVATIVE_MAX_WIDTH or 1920), 16)
+
+    @property
+    def storage_backend_type(self) -> str:
+        value = (self.STORAGE_TYPE or "local").strip().lower()
+        return "s3" if value in {"s3", "minio"} else "local"
+
+    @property
+    def storage_s3_part_size(self) -> int:
+        return max(int(self.STORAGE_S3_PART_SIZE_MB or 8), 5) * 1024 ** 2
+
+    @property
+    def storage_s3_upload_concurrency(self) -> int:
+        return max(int(self.STORAGE_S3_UPLOAD_CONCURRENCY or 4), 1)
+
+    @property
+    def storage_object_cache_max_bytes(self) -> int:
+        value = self.STORAGE_OBJECT_CACHE_MAX_BYTES
+        return 10 * 1024 ** 3 if value is None else max(int(value), 0)
+
+    @property
+    def media_metadata_disk_cache_max_bytes(self) -> int:
+        value = self.MEDIA_METADATA_DISK_CACHE_MAX_BYTES
+        return 256 * 1024 ** 2 if value is None else max(int(value), 0)
+
+    @property
+    def ffmpeg_concat_stream_copy(self) -> bool:
+        return True if self.FFMPEG_CONCAT_STREAM_COPY is None else bool(self.FFMPEG_CONCAT_STREAM_COPY)
+
+    @property
+    def audio_rate_limit_max_retries(self) -> int:
+        value = self.AUDIO_RATE_LIMIT_MAX_RETRIES
+        return 10 if value is None else max(int(value), 0)
+
+    @property
+    def fishaudio_tts_concurrency(self) -> int:
+        return max(int(self.FISHAUDIO_TTS_CONCURRENCY or 4), 1)
+
+    @property
+    def tts_cache_enabled(self) -> bool:
+        return True if self.TTS_CACHE_ENABLED is None else bool(self.TTS_CACHE_ENABLED)
+
+    @property
+    def audio_trim_materialize(self) -> bool:
+        return bool(self.AUDIO_TRIM_MATERIALIZE)
+
+    @property
+    def finalize_fused_enabled(self) -> bool:
+        return True if self.FINALIZE_FUSED_ENABLED is None else bool(self.FINALIZE_FUSED_ENABLED)
+
+    @property
+    def scene_fanout_enabled(self) -> bool:
+        return True if self.SCENE_FANOUT_ENABLED is None else bool(self.SCENE_FANOUT_ENABLED)
+
+    @property
+    def gemini_key_rpm(self) -> int:
+        return max(int(self.GEMINI_KEY_RPM or 60), 1)
+
+    @property
+    def gemini_key_tpm(self) -> int:
+        return max(int(self.GEMINI_KEY_TPM or 1_000_000), 1)
+
+    @property
+    def gemini_key_wait_timeout(self) -> float:
+        return 30.0 if self.GEMINI_KEY_WAIT_TIMEOUT is None else max(float(self.GEMINI_KEY_WAIT_TIMEOUT), 0.0)
+
+    @property
+    def gemini_key_backoff_seconds(self) -> float:
+        return max(float(self.GEMINI_KEY_BACKOFF_SECONDS or 10.0), 0.1)
+
+    @property
+    def video_prompt_batch_size(self) -> int:
+        return max(int(self.VIDEO_PROMPT_BATCH_SIZE or 20), 1)
+
+    @property
+    def gemini_response_cache_enabled(self) -> bool:
+        return True if self.GEMINI_RESPONSE_CACHE_ENABLED is None else bool(self.GEMINI_RESPONSE_CACHE_ENABLED)
+
+    @property
+    def gemini_response_cache_ttl_seconds(self) -> int:
+        return max(int(self.GEMINI_RESPONSE_CACHE_TTL_SECONDS or 7 * 24 * 3600), 1)
+
+    @property
+    def gemini_response_cache_max_entries(self) -> int:
+        return max(int(self.GEMINI_RESPONSE_CACHE_MAX_ENTRIES or 5000), 1)
+
+    @property
+    def gemini_response_cache_max_entry_bytes(self) -> int:
+        return max(int(self.GEMINI_RESPONSE_CACHE_MAX_ENTRY_BYTES or 256 * 1024), 1)
+
+    @property
+    def scene_pipeline_enabled(self) -> bool:
+        return True if self.SCENE_PIPELINE_ENABLED is None else bool(self.SCENE_PIPELINE_ENABLED)
+
     @property
     def cors_allow_origins(self) -> List[str]:
         if self.CORS_ALLOW_ORIGINS:
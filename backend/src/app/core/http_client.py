@@ -1,12 +1,205 @@
-"""HTTP 请求辅助模块 - 支持代理配置"""
-import requests
-from typing import Optional, Dict, Any
+"""HTTP 请求辅助模块 - 支持代理配置与进程级连接池
+
+所有外部服务共享一个进程级客户端注册表，按 (服务名, 代理地址) 复用
+httpx 客户端，保持 keep-alive 连接，避免每个服务实例都重新建立 TCP/TLS 连接。
+
+- get_http_client(service_name)        -> 同步 httpx.Client（线程安全，可跨线程共享）
+- get_async_http_client(service_name)  -> 异步 httpx.AsyncClient（按事件循环隔离）
+- http_client_stats()                  -> 复用命中、建连和请求计数
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.config.settings import get_settings
 from app.core.proxy_config import get_proxy_for_service
 
+logger = logging.getLogger(__name__)
+
+_ClientKey = Tuple[str, Optional[str]]
+
+
+@dataclass
+class HTTPPoolStats:
+    clients_created: int = 0
+    client_hits: int = 0
+    requests: int = 0
+    connections_opened: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+def _proxy_url(proxies: Optional[Dict[str, str]]) -> Optional[str]:
+    if not proxies:
+        return None
+    return proxies.get("https") or proxies.get("http")
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class HTTPClientRegistry:
+    """进程级 httpx 客户端注册表，按 (服务名, 代理地址) 复用连接池"""
+
+    def __init__(self) -> None:
+        self._clients: Dict[_ClientKey, httpx.Client] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[_ClientKey, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._stats = HTTPPoolStats()
+
+    # ------------------------------------------------------------------
+    # Client construction
+    # ------------------------------------------------------------------
+    def _client_options(self, proxy: Optional[str]) -> Dict[str, Any]:
+        settings = get_settings()
+        http2 = settings.http_client_http2
+        if http2 and not _http2_available():
+            logger.warning("HTTP_CLIENT_HTTP2 is enabled but the 'h2' package is missing; using HTTP/1.1")
+            http2 = False
+        options: Dict[str, Any] = {
+            "limits": httpx.Limits(
+                max_connections=settings.http_pool_max_connections,
+                max_keepalive_connections=settings.http_pool_max_keepalive,
+                keepalive_expiry=settings.http_pool_keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(settings.http_client_timeout, connect=settings.http_client_connect_timeout),
+            "http2": http2,
+            "follow_redirects": True,
+            # 代理完全由配置中心控制，不继承系统环境变量
+            "trust_env": False,
+        }
+        if proxy:
+            options["proxies"] = proxy
+        return options
+
+    def _on_request(self, request: httpx.Request) -> None:
+        with self._lock:
+            self._stats.requests += 1
+        # httpcore reports connection lifecycle events through the "trace" extension.
+        request.extensions.setdefault("trace", self._count_connection)
+
+    async def _on_request_async(self, request: httpx.Request) -> None:
+        with self._lock:
+            self._stats.requests += 1
+        request.extensions.setdefault("trace", self._count_connection_async)
+
+    def _count_connection(self, event_name: str, _info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._stats.connections_opened += 1
+
+    async def _count_connection_async(self, event_name: str, info: Dict[str, Any]) -> None:
+        self._count_connection(event_name, info)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get_client(self, service_name: str, *, proxies: Optional[Dict[str, str]] = None) -> httpx.Client:
+        """获取（或创建）服务对应的共享同步客户端"""
+        proxy = _proxy_url(proxies if proxies is not None else get_proxy_for_service(service_name))
+        key = (service_name, proxy)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None and not client.is_closed:
+                self._stats.client_hits += 1
+                return client
+            client = httpx.Client(
+                event_hooks={"request": [self._on_request]},
+                **self._client_options(proxy),
+            )
+            self._clients[key] = client
+            self._stats.clients_created += 1
+            return client
+
+    def get_async_client(self, service_name: str, *, proxies: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+        """获取当前事件循环下的共享异步客户端（必须在协程中调用）"""
+        loop = asyncio.get_running_loop()
+        proxy = _proxy_url(proxies if proxies is not None else get_proxy_for_service(service_name))
+        key = (service_name, proxy)
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is not None and not client.is_closed:
+                self._stats.client_hits += 1
+                return client
+            client = httpx.AsyncClient(
+                event_hooks={"request": [self._on_request_async]},
+                **self._client_options(proxy),
+            )
+            clients[key] = client
+            self._stats.clients_created += 1
+            return client
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            payload: Dict[str, Any] = self._stats.as_dict()
+            pools = {}
+            for (service_name, proxy), client in self._clients.items():
+                pool = getattr(getattr(client, "_transport", None), "_pool", None)
+                connections = list(getattr(pool, "connections", []) or [])
+                pools[f"{service_name}|{proxy or 'direct'}"] = {
+                    "connections": len(connections),
+                    "idle": sum(1 for conn in connections if getattr(conn, "is_idle", lambda: False)()),
+                }
+            payload["clients"] = len(self._clients)
+            payload["pools"] = pools
+        return payload
+
+    def close_all(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            try:
+                client.close()
+            except Exception:  # pragma: no cover - defensive cleanup
+                pass
+
+    def reset_after_fork(self) -> None:
+        """子进程不能复用父进程的 socket，直接丢弃已有连接池"""
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._async_clients = weakref.WeakKeyDictionary()
+
+
+_registry = HTTPClientRegistry()
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch - POSIX only
+    os.register_at_fork(after_in_child=_registry.reset_after_fork)
+
+
+def get_http_client_registry() -> HTTPClientRegistry:
+    return _registry
+
+
+def get_http_client(service_name: str, *, proxies: Optional[Dict[str, str]] = None) -> httpx.Client:
+    return _registry.get_client(service_name, proxies=proxies)
+
+
+def get_async_http_client(service_name: str, *, proxies: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+    return _registry.get_async_client(service_name, proxies=proxies)
+
+
+def http_client_stats() -> Dict[str, Any]:
+    return _registry.stats()
+
 
 class ProxyHTTPClient:
-    """支持代理的 HTTP 客户端"""
-    
+    """支持代理的 HTTP 客户端（底层为共享的 httpx 连接池）"""
+
     def __init__(self, service_name: str, timeout: int = 60):
         """
         Args:
@@ -16,62 +209,62 @@ class ProxyHTTPClient:
         self.service_name = service_name
         self.timeout = timeout
         self.proxies = get_proxy_for_service(service_name)
-        self.session = requests.Session()
-        # 禁用 requests 默认从环境变量继承代理，完全交由配置中心控制
-        self.session.trust_env = False
-
-        # 如果有代理，配置到 session
-        if self.proxies:
-            self.session.proxies.update(self.proxies)
-        else:
-            # 显式清空代理字典，确保不会落回系统级设置
-            self.session.proxies.clear()
-    
-    def get(self, url: str, **kwargs) -> requests.Response:
-        """GET 请求"""
+        self.client = get_http_client(service_name, proxies=self.proxies or {})
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
         kwargs.setdefault("timeout", self.timeout)
-        if self.proxies:
-            kwargs["proxies"] = self.proxies
-        return self.session.get(url, **kwargs)
-    
-    def post(self, url: str, **kwargs) -> requests.Response:
-        """POST 请求"""
+        return self.client.request(method, url, **kwargs)
+
+    def stream(self, method: str, url: str, **kwargs):
+        """流式请求（上下文管理器），响应体通过 iter_bytes 逐块读取"""
         kwargs.setdefault("timeout", self.timeout)
-        if self.proxies:
-            kwargs["proxies"] = self.proxies
-        return self.session.post(url, **kwargs)
-    
-    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.client.stream(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        """GET 请求"""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        """POST 请求"""
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> httpx.Response:
         """PUT 请求"""
-        kwargs.setdefault("timeout", self.timeout)
-        if self.proxies:
-            kwargs["proxies"] = self.proxies
-        return self.session.put(url, **kwargs)
-    
-    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> httpx.Response:
         """DELETE 请求"""
-        kwargs.setdefault("timeout", self.timeout)
-        if self.proxies:
-            kwargs["proxies"] = self.proxies
-        return self.session.delete(url, **kwargs)
-    
+        return self.request("DELETE", url, **kwargs)
+
     def close(self):
-        """关闭会话"""
-        self.session.close()
+        """连接池由注册表统一管理，这里不关闭共享连接"""
+        return None
 
 
 def create_http_client(service_name: str, timeout: int = 30) -> ProxyHTTPClient:
     """快捷函数：创建 HTTP 客户端
-    
+
     Args:
         service_name: 服务名称 (gemini, fishaudio, liblib, etc.)
         timeout: 超时时间
-    
+
     Returns:
-        ProxyHTTPClient 实例
-    
+        ProxyHTTPClient 实例（同一服务/代理共享连接池）
+
     Example:
         client = create_http_client("fishaudio")
         response = client.post("https://api.fish.audio/v1/tts", json={...})
     """
     return ProxyHTTPClient(service_name, timeout)
+
+
+__all__ = [
+    "HTTPClientRegistry",
+    "HTTPPoolStats",
+    "ProxyHTTPClient",
+    "create_http_client",
+    "get_async_http_client",
+    "get_http_client",
+    "get_http_client_registry",
+    "http_client_stats",
+]
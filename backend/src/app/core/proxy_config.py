@@ -7,11 +7,15 @@ Scheme A: environment variables
 
 get_proxy_for_service(service_name) -> Optional[dict]
 returns {'http': url, 'https': url} or None
+
+The PROXY_* scan is done once per process; call reset_proxy_config_cache() after
+changing those variables at runtime.
 """
 from __future__ import annotations
 
 import os
-from typing import Dict, Optional
+import threading
+from typing import Dict, Optional, Tuple
 from urllib.parse import urlparse
 
 
@@ -40,6 +44,29 @@ def _load_proxy_channels_from_env() -> Dict[str, str]:
     return channels
 
 
+_env_cache: Optional[Tuple[Dict[str, str], Dict[str, str]]] = None
+_env_cache_lock = threading.Lock()
+
+
+def _proxy_env() -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Return (service_map, channels), parsed from the environment once."""
+    global _env_cache
+    if _env_cache is None:
+        with _env_cache_lock:
+            if _env_cache is None:
+                _env_cache = (
+                    _parse_service_map(os.environ.get('PROXY_SERVICE_MAP')),
+                    _load_proxy_channels_from_env(),
+                )
+    return _env_cache
+
+
+def reset_proxy_config_cache() -> None:
+    global _env_cache
+    with _env_cache_lock:
+        _env_cache = None
+
+
 def _host_matches_no_proxy(host: str, no_proxy: Optional[str]) -> bool:
     if not no_proxy:
         return False
@@ -84,8 +111,7 @@ def get_proxy_for_service(service_name: str, target_url: Optional[str] = None) -
         except Exception:
             pass
 
-    service_map = _parse_service_map(os.environ.get('PROXY_SERVICE_MAP'))
-    channels = _load_proxy_channels_from_env()
+    service_map, channels = _proxy_env()
 
     # Enforce explicit mapping: if service not listed in PROXY_SERVICE_MAP -> do NOT use proxy
     if service_name not in service_map:
@@ -0,0 +1,76 @@
+"""Shared Redis client helper.
+
+Redis is already required as the Celery broker; coordination helpers (rate
+limiting, semaphores, pub/sub) reuse the same server through this module.
+
+get_redis_client() -> Optional[redis.Redis]
+returns None when no Redis URL is configured or the server is unreachable, so
+callers can fall back to a local/DB implementation.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Optional
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_RETRY_AFTER_SECONDS = 30.0
+# Blocking commands (BLPOP) must return well before this or the read times out.
+REDIS_SOCKET_TIMEOUT = 10
+
+_lock = threading.Lock()
+_client = None
+_unavailable_until = 0.0
+
+
+def get_redis_url() -> Optional[str]:
+    """Redis URL shared by coordination helpers (REDIS_URL, else the Celery broker)."""
+    settings = get_settings()
+    return settings.REDIS_URL or settings.CELERY_BROKER_URL
+
+
+def get_redis_client():
+    """Return a process-wide Redis client, or None when Redis cannot be used."""
+    global _client, _unavailable_until
+    if _client is not None:
+        return _client
+    if time.monotonic() < _unavailable_until:
+        return None
+
+    url = get_redis_url()
+    if not url or not url.startswith(("redis://", "rediss://", "unix://")):
+        return None
+
+    with _lock:
+        if _client is not None:
+            return _client
+        try:
+            import redis
+
+            client = redis.Redis.from_url(
+                url,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=5,
+            )
+            client.ping()
+        except Exception as exc:  # pragma: no cover - depends on environment
+            logger.warning("Redis unavailable (%s); falling back to local coordination", exc)
+            _unavailable_until = time.monotonic() + _RETRY_AFTER_SECONDS
+            return None
+        _client = client
+        return _client
+
+
+def reset_redis_client() -> None:
+    """Drop the cached client (used after fork or in tests)."""
+    global _client, _unavailable_until
+    with _lock:
+        _client = None
+        _unavailable_until = 0.0
+
+
+__all__ = ["REDIS_SOCKET_TIMEOUT", "get_redis_client", "get_redis_url", "reset_redis_client"]
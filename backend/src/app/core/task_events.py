@@ -0,0 +1,288 @@
+"""任务进度事件 - Redis pub/sub 推送 Task / TaskStep / Scene 状态增量
+
+写入端（Celery worker 与 API 进程）无需改动各处提交逻辑：SQLAlchemy 会话钩子在
+flush 时记录被跟踪字段的变化，事务提交后按实体合并，发布到
+``task-events:<task_id>`` 频道；回滚的事务不会发布任何事件。
+无法走 ORM 的批量 UPDATE 通过 ``record_task_event`` 手动登记。
+
+读取端（``GET /api/v1/tasks/{id}/events``）由 ``TaskEventHub`` 在每个 API 进程内
+只订阅一次 ``task-events:*``，再分发给该任务的所有 SSE 连接。
+
+事件格式::
+
+    {"type": "scene", "task_id": 1, "id": 12, "changes": {"image_status": 2, ...}}
+    {"type": "step",  "task_id": 1, "id": 3,  "changes": {"status": 1, ...}}
+    {"type": "task",  "task_id": 1, "id": 1,  "changes": {"progress": 40, ...}}
+    {"type": "resync", "task_id": 1}   # 分镜/步骤增删，客户端需重新拉取详情
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.redis_client import get_redis_client, get_redis_url
+from app.models.media import Scene
+from app.models.task import Task, TaskStep
+from app.utils.timezone import to_local
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "task-events:"
+
+EVENT_TASK = "task"
+EVENT_STEP = "step"
+EVENT_SCENE = "scene"
+EVENT_RESYNC = "resync"
+
+# 只推送状态类小字段；大 JSON 列（*_meta/params/result）仍通过详情接口获取
+_TRACKED_FIELDS: Dict[type, Tuple[str, Tuple[str, ...]]] = {
+    Task: (
+        EVENT_TASK,
+        (
+            "status",
+            "progress",
+            "total_scenes",
+            "completed_scenes",
+            "error_msg",
+            "merged_video_url",
+            "final_video_url",
+        ),
+    ),
+    TaskStep: (
+        EVENT_STEP,
+        ("status", "progress", "retry_count", "error_msg", "started_at", "finished_at"),
+    ),
+    Scene: (
+        EVENT_SCENE,
+        (
+            "status",
+            "image_status",
+            "audio_status",
+            "video_status",
+            "merge_status",
+            "image_url",
+            "audio_url",
+            "audio_duration",
+            "raw_video_url",
+            "merge_video_url",
+            "merge_video_provider",
+            "image_retry_count",
+            "audio_retry_count",
+            "video_retry_count",
+            "merge_retry_count",
+            "error_msg",
+            "started_at",
+            "finished_at",
+        ),
+    ),
+}
+
+# 与 routes_tasks 序列化保持一致：这些字段对外返回可访问的完整 URL
+_EXTERNAL_URL_FIELDS = {"audio_url", "merge_video_url", "merged_video_url", "final_video_url"}
+
+_PENDING_KEY = "task_events_pending"
+
+_EventKey = Tuple[str, int, Optional[int]]
+
+
+def channel_for(task_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{task_id}"
+
+
+def _json_value(field: str, value: Any) -> Any:
+    if isinstance(value, datetime):
+        return to_local(value).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if value and field in _EXTERNAL_URL_FIELDS:
+        from app.services.storage_service import StorageService
+
+        try:
+            return StorageService().get_external_url(value) or value
+        except Exception:  # pragma: no cover - misconfigured storage keeps the raw path
+            return value
+    return value
+
+
+def _pending(session: Session) -> Dict[_EventKey, Dict[str, Any]]:
+    return session.info.setdefault(_PENDING_KEY, {})
+
+
+def record_task_event(
+    session: Session,
+    event_type: str,
+    task_id: int,
+    entity_id: Optional[int] = None,
+    changes: Optional[Dict[str, Any]] = None,
+) -> None:
+    """登记一条待发布事件（随 session 下一次提交发布），用于绕过 ORM 的批量 UPDATE。"""
+    if task_id is None:
+        return
+    bucket = _pending(session).setdefault((event_type, int(task_id), entity_id), {})
+    for field, value in (changes or {}).items():
+        bucket[field] = _json_value(field, value)
+
+
+def _collect_changes(session: Session, _flush_context: Any) -> None:
+    for obj in session.dirty:
+        tracked = _TRACKED_FIELDS.get(type(obj))
+        if tracked is None:
+            continue
+        event_type, fields = tracked
+        state = inspect(obj)
+        changes = {
+            field: getattr(obj, field)
+            for field in fields
+            if state.attrs[field].history.has_changes()
+        }
+        if changes:
+            task_id = obj.id if event_type == EVENT_TASK else obj.task_id
+            record_task_event(session, event_type, task_id, obj.id, changes)
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, (Scene, TaskStep)) and obj.task_id is not None:
+            record_task_event(session, EVENT_RESYNC, obj.task_id)
+
+
+def _publish_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for (event_type, task_id, entity_id), changes in pending.items():
+            payload: Dict[str, Any] = {"type": event_type, "task_id": task_id}
+            if event_type != EVENT_RESYNC:
+                payload["id"] = entity_id
+                payload["changes"] = changes
+            pipe.publish(channel_for(task_id), json.dumps(payload, ensure_ascii=False, default=str))
+        pipe.execute()
+    except Exception:  # pragma: no cover - progress events are best effort
+        logger.debug("Failed to publish task events", exc_info=True)
+
+
+def _discard_pending(session: Session, *_args: Any) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def install_task_event_hooks(session_factory: sessionmaker) -> None:
+    """为 sessionmaker 创建的所有会话注册事件采集/发布钩子（幂等）。"""
+    if event.contains(session_factory, "after_flush", _collect_changes):
+        return
+    event.listen(session_factory, "after_flush", _collect_changes)
+    event.listen(session_factory, "after_commit", _publish_pending)
+    event.listen(session_factory, "after_rollback", _discard_pending)
+
+
+class TaskEventHub:
+    """API 进程内的事件分发器：一个 Redis 模式订阅，扇出到各 SSE 连接的队列。"""
+
+    def __init__(self, *, queue_size: int = 256) -> None:
+        self._queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def available() -> bool:
+        return get_redis_client() is not None
+
+    def subscribe(self, task_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.setdefault(int(task_id), set()).add(queue)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, task_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(int(task_id))
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            self._subscribers.pop(int(task_id), None)
+        if not self._subscribers and self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def dispatch(self, payload: Dict[str, Any]) -> None:
+        try:
+            task_id = int(payload.get("task_id"))
+        except (TypeError, ValueError):
+            return
+        for queue in list(self._subscribers.get(task_id, ())):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # 慢客户端：丢弃积压，让其重新拉取一次完整详情
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": EVENT_RESYNC, "task_id": task_id})
+
+    async def _listen(self) -> None:
+        import redis.asyncio as aioredis
+
+        backoff = 1.0
+        while self._subscribers:
+            client = aioredis.from_url(get_redis_url())
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    try:
+                        payload = json.loads(message["data"])
+                    except (TypeError, ValueError):
+                        continue
+                    self.dispatch(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Task event subscription lost (%s); reconnecting in %.0fs", exc, backoff)
+                # 重连期间可能漏掉事件，通知所有连接重新同步
+                for task_id in list(self._subscribers):
+                    self.dispatch({"type": EVENT_RESYNC, "task_id": task_id})
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.close()
+                    await client.close()
+                except Exception:  # pragma: no cover - connection already gone
+                    pass
+
+
+_hub: Optional[TaskEventHub] = None
+
+
+def get_task_event_hub() -> TaskEventHub:
+    global _hub
+    if _hub is None:
+        _hub = TaskEventHub()
+    return _hub
+
+
+__all__ = [
+    "CHANNEL_PREFIX",
+    "EVENT_RESYNC",
+    "EVENT_SCENE",
+    "EVENT_STEP",
+    "EVENT_TASK",
+    "TaskEventHub",
+    "channel_for",
+    "get_task_event_hub",
+    "install_task_event_hooks",
+    "record_task_event",
+]
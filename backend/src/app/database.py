@@ -4,6 +4,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 
 from app.config.settings import get_settings
+from app.core.task_events import install_task_event_hooks
 
 settings = get_settings()
 
@@ -18,6 +19,9 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 提交时把 Task/TaskStep/Scene 状态增量发布到 Redis，供 /tasks/{id}/events 推送
+install_task_event_hooks(SessionLocal)
+
 def get_db() -> Generator[Session, None, None]:
     """获取数据库会话"""
     db = SessionLocal()
@@ -8,6 +8,7 @@ from pathlib import Path
 from swagger_ui_bundle import swagger_ui_3_path
 
 from app.config.settings import get_settings
+from app.core.http_client import http_client_stats
 from .api.routes_story import router as story_router
 from .api.routes_tasks import router as tasks_router
 from .api.routes_config import router as config_router
@@ -47,6 +48,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=['ETag', 'X-Synced-At'],
 )
 
 app.include_router(story_router)
@@ -66,6 +68,11 @@ def health():
     return {'status': 'ok'}
 
 
+@app.get('/health/http-clients', include_in_schema=False)
+def http_clients_health():
+    return http_client_stats()
+
+
 @app.get('/docs', include_in_schema=False)
 def custom_swagger_ui_html():
     return get_swagger_ui_html(
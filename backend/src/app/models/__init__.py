@@ -11,6 +11,7 @@ from .style_preset import StylePreset
 from .subtitle_style import SubtitleStyle
 from .subtitle_document import SubtitleDocument
 from .gemini import GeminiPromptTemplate, GeminiPromptRecord
+from .tts_cache import TtsAudioCache
 
 __all__ = [
     'Base',
@@ -32,4 +33,5 @@ __all__ = [
     'ServiceConcurrencySlot',
     'GeminiPromptTemplate',
     'GeminiPromptRecord',
+    'TtsAudioCache',
 ]
@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import timedelta
 from typing import Optional
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, Index
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, Index, Float
 
 from .base import BaseModel
 from app.utils.timezone import naive_now
@@ -22,6 +22,8 @@ class ServiceConcurrencyLimit(BaseModel):
     wait_timeout_seconds = Column(Integer, nullable=True, comment="等待名额的最大时间 (秒)，为空则不限")
     slot_timeout_seconds = Column(Integer, nullable=False, default=600, comment="名额占用的超时时长 (秒)")
     enabled = Column(Boolean, nullable=False, default=True, comment="是否启用此限制")
+    rate_per_second = Column(Float, nullable=True, comment="令牌桶速率 (次/秒)，为空则不限速")
+    burst = Column(Integer, nullable=True, comment="令牌桶容量（允许的突发请求数）")
 
     __table_args__ = (
         Index("idx_service_feature", "service_name", "feature", unique=True),
@@ -0,0 +1,31 @@
+"""数据库模型：跨任务 TTS 音频缓存索引"""
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, Index, Integer, JSON, String
+
+from .base import BaseModel
+
+
+class TtsAudioCache(BaseModel):
+    """按 (provider, 音色, 规范化文本, 格式, 采样率, 模型) 哈希索引已合成的音频文件"""
+
+    __tablename__ = "tts_audio_cache"
+
+    cache_key = Column(String(64), nullable=False, comment="合成参数的 sha256")
+    provider = Column(String(32), nullable=False, comment="TTS 服务，例如 fishaudio")
+    voice_id = Column(String(128), nullable=True, comment="音色 ID")
+    model = Column(String(64), nullable=True, comment="TTS 模型")
+    audio_format = Column(String(16), nullable=True, comment="音频格式")
+    sample_rate = Column(Integer, nullable=True, comment="采样率")
+    text_preview = Column(String(200), nullable=True, comment="文本前 200 字（便于排查）")
+    relative_path = Column(String(500), nullable=False, comment="缓存文件相对 STORAGE_BASE_PATH 的路径")
+    file_size = Column(BigInteger, nullable=True, comment="文件大小（字节）")
+    duration = Column(Float, nullable=True, comment="音频时长（秒）")
+    probe = Column(JSON, nullable=True, comment="ffprobe 结果，命中时直接复用")
+    hit_count = Column(Integer, nullable=False, default=0, comment="命中次数")
+    last_hit_at = Column(DateTime, nullable=True, comment="最近命中时间")
+
+    __table_args__ = (
+        Index("uq_tts_audio_cache_key", "cache_key", unique=True),
+        {"comment": "跨任务 TTS 音频缓存"},
+    )
@@ -1,21 +1,37 @@
-"""Audio post-processing utilities (silence trimming, etc.)."""
+"""Audio post-processing utilities (silence trimming, etc.).
+
+Leading/trailing silence is measured once on decoded PCM (frame RMS with NumPy)
+and the resulting keep-window is cached on ``Scene.audio_meta["silence_trim"]``.
+Scene composition applies it as an ``atrim`` inside its own filter graph, so no
+trimmed copy of the audio is written unless ``AUDIO_TRIM_MATERIALIZE`` (or
+``task_config.audio.trim_materialize``) asks for one.
+
+The audio step runs on the threaded provider-io workers, so at most one decode/trim
+per CPU core runs at a time in a worker process.
+"""
 from __future__ import annotations
 
 import logging
+import os
 import re
 import subprocess
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Iterable, Optional, Tuple
 
 import ffmpeg
+import numpy as np
 
 from app.config.settings import get_settings
+from app.services.media_metadata_cache import probe_media, register_media_metadata
 from app.services.storage_service import StorageReference, StorageService
 from app.utils.timezone import naive_now
 
 logger = logging.getLogger(__name__)
 
+_cpu_slots = threading.BoundedSemaphore(max(os.cpu_count() or 1, 1))
+
 
 SILENCE_START_RE = re.compile(r"silence_start:\s*([-+]?\d*\.?\d+)")
 SILENCE_END_RE = re.compile(
@@ -38,7 +54,11 @@ class SilenceReport:
 
 @dataclass(frozen=True)
 class AudioTrimResult:
-    """Result from attempting to trim silence."""
+    """Result from attempting to trim silence.
+
+    ``trimmed`` means a keep-window (``start``..``end``) was computed; ``reference``
+    is only set when the trimmed audio was also written to a new file.
+    """
 
     trimmed: bool
     reference: Optional[StorageReference]
@@ -46,6 +66,29 @@ class AudioTrimResult:
     tool: str
     removed_leading: float = 0.0
     removed_trailing: float = 0.0
+    start: float = 0.0
+    end: Optional[float] = None
+
+
+def silence_trim_window(audio_meta: Any, audio_url: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Keep-window cached for ``audio_url`` that still has to be applied at compose time.
+
+    Returns None when nothing was trimmed, the window belongs to an older audio
+    file, or the trim was already materialized into ``audio_url`` itself.
+    """
+    if not isinstance(audio_meta, dict) or not audio_url:
+        return None
+    block = audio_meta.get("silence_trim")
+    if not isinstance(block, dict) or block.get("audio_url") != audio_url:
+        return None
+    try:
+        start = max(float(block.get("start") or 0.0), 0.0)
+        end = float(block["end"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if end <= start:
+        return None
+    return start, end
 
 
 class BaseAudioTrimStrategy:
@@ -153,10 +196,15 @@ class FFMpegTrimStrategy(BaseAudioTrimStrategy):
             .overwrite_output()
         )
         self._run_ffmpeg(pipeline)
+        try:
+            # Downstream scene composition probes the trimmed file; record it now.
+            register_media_metadata(str(target), ffprobe_bin=self._ffprobe_bin)
+        except ffmpeg.Error:  # pragma: no cover - best effort
+            logger.warning("Failed to register metadata for %s", target)
 
     def _probe_duration(self, source: Path) -> float:
         try:
-            probe = ffmpeg.probe(str(source), cmd=self._ffprobe_bin)
+            probe = probe_media(str(source), ffprobe_bin=self._ffprobe_bin)
             duration_value = probe.get("format", {}).get("duration")
             return float(duration_value) if duration_value else 0.0
         except Exception:  # pragma: no cover - fall back
@@ -176,6 +224,73 @@ class FFMpegTrimStrategy(BaseAudioTrimStrategy):
             raise RuntimeError(f"ffmpeg command failed: {stderr}") from exc
 
 
+class PcmRmsTrimStrategy(FFMpegTrimStrategy):
+    """Measure edge silence from one PCM decode using frame RMS.
+
+    Replaces ffprobe + ``silencedetect`` stderr parsing: the audio is decoded once
+    to mono float32, split into ``frame_ms`` frames and the first/last frame whose
+    RMS exceeds the threshold bound the speech. The duration comes from the
+    sample count, so no separate probe is needed.
+    """
+
+    def __init__(
+        self,
+        ffmpeg_bin: str = "ffmpeg",
+        ffprobe_bin: str = "ffprobe",
+        *,
+        sample_rate: int = 16000,
+        frame_ms: float = 10.0,
+    ) -> None:
+        super().__init__(ffmpeg_bin=ffmpeg_bin, ffprobe_bin=ffprobe_bin)
+        self._sample_rate = int(sample_rate)
+        self._frame_size = max(int(self._sample_rate * frame_ms / 1000.0), 1)
+
+    @property
+    def name(self) -> str:  # pragma: no cover - trivial
+        return "pcm-rms"
+
+    def analyze(self, source: Path, *, threshold_db: float) -> SilenceReport:
+        pipeline = (
+            ffmpeg
+            .input(str(source))
+            .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=self._sample_rate)
+            .global_args("-hide_banner", "-nostats", "-loglevel", "error")
+        )
+        stdout, _ = self._run_ffmpeg(pipeline)
+        return self.analyze_samples(np.frombuffer(stdout, dtype=np.float32), threshold_db=threshold_db)
+
+    def analyze_samples(self, samples: np.ndarray, *, threshold_db: float) -> SilenceReport:
+        sample_count = int(samples.size)
+        duration = sample_count / float(self._sample_rate)
+        if sample_count == 0:
+            return SilenceReport(0.0, 0.0, 0.0, tuple())
+
+        frame_count = -(-sample_count // self._frame_size)
+        padded = np.zeros(frame_count * self._frame_size, dtype=np.float32)
+        padded[:sample_count] = samples
+        frames = padded.reshape(frame_count, self._frame_size).astype(np.float64)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        loud = np.flatnonzero(rms > 10.0 ** (threshold_db / 20.0))
+        if loud.size == 0:
+            # All silence: report it, but AudioPostProcessor leaves such audio untouched.
+            return SilenceReport(duration, duration, duration, (("start", 0.0, 0.0),))
+
+        frame_seconds = self._frame_size / float(self._sample_rate)
+        speech_start = float(loud[0]) * frame_seconds
+        speech_end = min(float(loud[-1] + 1) * frame_seconds, duration)
+        raw_events = []
+        if speech_start > 0.0:
+            raw_events.append(("end", speech_start, speech_start))
+        if speech_end < duration:
+            raw_events.append(("start", speech_end, 0.0))
+        return SilenceReport(
+            duration=duration,
+            leading_silence=speech_start,
+            trailing_silence=duration - speech_end,
+            raw_events=tuple(raw_events),
+        )
+
+
 class AudioPostProcessor:
     """Coordinates silence detection/trimming for generated audio files."""
 
@@ -188,7 +303,7 @@ class AudioPostProcessor:
         self._storage = storage_service or StorageService()
         if strategy is None:
             settings = get_settings()
-            strategy = FFMpegTrimStrategy(
+            strategy = PcmRmsTrimStrategy(
                 ffmpeg_bin=settings.FFMPEG_BIN or "ffmpeg",
                 ffprobe_bin=settings.FFPROBE_BIN or "ffprobe",
             )
@@ -205,13 +320,22 @@ class AudioPostProcessor:
         threshold_db: float,
         max_leading: float,
         max_trailing: float,
+        materialize: bool = False,
     ) -> AudioTrimResult:
+        """Analyse ``api_path`` and compute the keep-window.
+
+        The audio file is only re-encoded when ``materialize`` is set; otherwise
+        callers apply ``start``/``end`` downstream (see ``silence_trim_window``).
+        """
         local_path = self._resolve_local_path(api_path)
         if not local_path:
             report = SilenceReport(0.0, 0.0, 0.0, tuple())
             return AudioTrimResult(False, None, report, self._strategy.name)
 
-        report = self._strategy.analyze(local_path, threshold_db=threshold_db)
+        with _cpu_slots:
+            report = self._strategy.analyze(local_path, threshold_db=threshold_db)
+        if report.duration <= 0.0 or report.leading_silence >= report.duration:
+            return AudioTrimResult(False, None, report, self._strategy.name)
         if not report.exceeds_limits(max_leading=max_leading, max_trailing=max_trailing):
             return AudioTrimResult(False, None, report, self._strategy.name)
 
@@ -224,14 +348,21 @@ class AudioPostProcessor:
         start = remove_leading
         end = max(report.duration - remove_trailing, start + 0.01)
 
-        target_path = self._allocate_target_path(local_path)
-        self._strategy.trim(
-            local_path,
-            target_path,
-            start=start,
-            end=end,
-        )
-        reference = self._storage.reference_from_absolute(target_path)
+        reference = None
+        if materialize:
+            # Next to the stored original, not the read-through copy of a remote object.
+            stored = self._storage.resolve_reference(api_path)
+            target_path = self._allocate_target_path(
+                stored.absolute_path if stored and stored.absolute_path else local_path
+            )
+            with _cpu_slots:
+                self._strategy.trim(
+                    local_path,
+                    target_path,
+                    start=start,
+                    end=end,
+                )
+            reference = self._storage.publish(target_path)
         return AudioTrimResult(
             True,
             reference,
@@ -239,6 +370,8 @@ class AudioPostProcessor:
             self._strategy.name,
             removed_leading=remove_leading,
             removed_trailing=remove_trailing,
+            start=start,
+            end=end,
         )
 
     def _resolve_local_path(self, api_path: str) -> Optional[Path]:
@@ -252,6 +385,7 @@ class AudioPostProcessor:
         timestamp = naive_now().strftime("%Y%m%d%H%M%S")
         stem = source.stem
         suffix = source.suffix or ".wav"
+        source.parent.mkdir(parents=True, exist_ok=True)
         candidate = source.with_name(f"{stem}_trim_{timestamp}{suffix}")
         counter = 1
         while candidate.exists():
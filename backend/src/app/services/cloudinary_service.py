@@ -9,9 +9,8 @@ import cloudinary.uploader
 import cloudinary.api
 
 from app.config.settings import Settings
-from app.database import get_db_session
-from app.models.service_config import ServiceCredential
 from .base import BaseService
+from .config_cache import get_config_cache
 from .exceptions import APIException, ConfigurationException, ValidationException
 
 
@@ -51,19 +50,14 @@ class CloudinaryService(BaseService):
         This enforces the policy that credentials must exist in MySQL and
         prevents any fallback to environment variables.
         """
-        db = None
         try:
-            db = get_db_session()
-            cred = db.query(ServiceCredential).filter(
-                ServiceCredential.service_name == "cloudinary",
-                ServiceCredential.is_active == True,
-            ).order_by(ServiceCredential.id.desc()).first()
+            cred = get_config_cache().active_credential("cloudinary")
             if not cred:
                 # leave attributes unset; ensure_configured()/ _configure_client will raise/log
                 self.logger.warning("No active Cloudinary credential found in database")
                 return
 
-            self.cloud_name = cred.credential_key or getattr(cred, "cloud_name", None)
+            self.cloud_name = cred.credential_key
             # Historically some schemas stored api_key in credential_key and secret in credential_secret
             self.api_key = getattr(cred, "credential_key", None)
             self.api_secret = getattr(cred, "credential_secret", None)
@@ -72,12 +66,6 @@ class CloudinaryService(BaseService):
             self.logger.info("Loaded Cloudinary credentials from database")
         except Exception as e:
             self.logger.error(f"Failed to load Cloudinary credentials from database: {e}")
-        finally:
-            try:
-                if db:
-                    db.close()
-            except Exception:
-                pass
 
     def ensure_configured(self):
         if not (getattr(self, "cloud_name", None) and getattr(self, "api_key", None) and getattr(self, "api_secret", None)):
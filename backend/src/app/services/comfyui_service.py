@@ -3,9 +3,8 @@
 Loads host and optional API key from `service_credentials` for service_name 'comfyui'.
 """
 from typing import Optional, Dict, Any
-from app.database import get_db_session
-from app.models.service_config import ServiceCredential
 from .base import BaseService
+from .config_cache import get_config_cache
 from .exceptions import ConfigurationException, APIException
 from app.core.http_client import create_http_client
 
@@ -21,29 +20,17 @@ class ComfyUIService(BaseService):
         return "ComfyUI"
 
     def _load_credentials(self):
-        db = None
-        try:
-            db = get_db_session()
-            cred = db.query(ServiceCredential).filter(
-                ServiceCredential.service_name == "comfyui",
-                ServiceCredential.is_active == True,
-            ).order_by(ServiceCredential.id.desc()).first()
-            if not cred or not cred.api_url:
-                raise ConfigurationException(
-                    "ComfyUI host not found in database (service_credentials). Add an active comfyui credential with api_url pointing to the host",
-                    service_name=self.service_name,
-                    required_envs=["service_credentials (comfyui)"],
-                )
-            self.host = cred.api_url
-            # optional api key stored in credential_key
-            self.api_key = cred.credential_key
-            self.logger.info("Loaded ComfyUI configuration from database")
-        finally:
-            try:
-                if db:
-                    db.close()
-            except Exception:
-                pass
+        cred = get_config_cache().active_credential("comfyui")
+        if not cred or not cred.api_url:
+            raise ConfigurationException(
+                "ComfyUI host not found in database (service_credentials). Add an active comfyui credential with api_url pointing to the host",
+                service_name=self.service_name,
+                required_envs=["service_credentials (comfyui)"],
+            )
+        self.host = cred.api_url
+        # optional api key stored in credential_key
+        self.api_key = cred.credential_key
+        self.logger.info("Loaded ComfyUI configuration from database")
 
     def ensure_configured(self):
         if not getattr(self, "host", None):
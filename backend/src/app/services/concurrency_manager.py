@@ -1,26 +1,73 @@
-"""Global concurrency manager for external service usage."""
+"""Global concurrency manager for external service usage.
+
+Two slot backends are available, selected per service via ``CONCURRENCY_BACKENDS``:
+
+- ``db`` (default): active slots are rows in ``service_concurrency_slots``; waiters
+  poll with ``SELECT ... FOR UPDATE`` every ``wait_interval``.
+- ``redis``: slots are members of a sorted set scored by expiry, taken and released
+  by atomic Lua scripts. A release pushes a wake-up onto a list that waiters block
+  on (``BLPOP``), so a freed slot is handed over immediately. The DB table is then
+  only an optional audit log, written from a background thread.
+"""
 from __future__ import annotations
 
+import logging
+import queue
 import threading
 import time
+import uuid
 from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import Dict, Generator, Optional, Tuple
+from typing import Any, Dict, Generator, Optional, Tuple
 
 from sqlalchemy import or_
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.config.settings import get_settings
+from app.core.redis_client import REDIS_SOCKET_TIMEOUT, get_redis_client
 from app.database import get_db_session
 from app.models.concurrency import ServiceConcurrencyLimit, ServiceConcurrencySlot
-from app.services.exceptions import APIException
+from app.services.exceptions import ConcurrencyLimitException
 from app.utils.timezone import naive_now
 
 _DEFAULT_WAIT_INTERVAL = 5.0
 _DEFAULT_WAIT_TIMEOUT = 60.0
 _DEFAULT_SLOT_TIMEOUT = 600.0
+# BLPOP holds the connection's read open; stay below the shared client's socket timeout.
+_MAX_BLOCK_SECONDS = max(REDIS_SOCKET_TIMEOUT - 2, 1)
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DB = "db"
+BACKEND_REDIS = "redis"
+
+_REDIS_KEY_PREFIX = "concurrency"
+
+# KEYS[1] holders zset (member -> expiry ms), ARGV: holder, max_slots, ttl_ms
+_REDIS_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+  return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[3]) * 2)
+return 1
+"""
+
+# KEYS[1] holders zset, KEYS[2] wake-up list, ARGV: holder, max_slots
+_REDIS_RELEASE_LUA = """
+local removed = redis.call('ZREM', KEYS[1], ARGV[1])
+if removed == 1 then
+  redis.call('LPUSH', KEYS[2], '1')
+  redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[2]) - 1)
+  redis.call('PEXPIRE', KEYS[2], 600000)
+end
+return removed
+"""
 
 _ALLOWED_RELEASE_STATUSES = {
     ServiceConcurrencySlot.STATUS_RELEASED,
@@ -47,10 +94,114 @@ class SlotToken:
     slot_id: Optional[int]
     resource_id: Optional[str]
     unlimited: bool = False
+    backend: str = BACKEND_DB
+    holder: Optional[str] = None
 
     @property
     def is_real(self) -> bool:
-        return not self.unlimited and self.slot_id is not None
+        if self.unlimited:
+            return False
+        if self.backend == BACKEND_REDIS:
+            return self.holder is not None
+        return self.slot_id is not None
+
+
+class _SlotAuditWriter:
+    """Mirror Redis slot activity into service_concurrency_slots off the hot path."""
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._slot_ids: Dict[str, int] = {}
+
+    def submit(self, action: str, payload: Dict[str, Any]) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((action, payload))
+        except queue.Full:
+            logger.warning("Concurrency audit queue full; dropping %s event", action)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="concurrency-audit", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            action, payload = self._queue.get()
+            try:
+                if action == "acquire":
+                    self._write_acquire(payload)
+                elif action == "release":
+                    self._write_release(payload)
+                elif action == "metadata":
+                    self._write_metadata(payload)
+            except Exception:
+                logger.exception("Failed to write concurrency audit event %s", action)
+
+    def _find_slot(self, session: Session, payload: Dict[str, Any]) -> Optional[ServiceConcurrencySlot]:
+        slot_id = self._slot_ids.get(payload["holder"])
+        if slot_id:
+            return session.get(ServiceConcurrencySlot, slot_id)
+        # Released from another process (e.g. the Runninghub tracker): match the active row.
+        return (
+            session.query(ServiceConcurrencySlot)
+            .filter(
+                ServiceConcurrencySlot.service_name == payload["service_name"],
+                ServiceConcurrencySlot.feature == payload["feature"],
+                ServiceConcurrencySlot.resource_id == payload.get("resource_id"),
+                ServiceConcurrencySlot.status == ServiceConcurrencySlot.STATUS_ACTIVE,
+            )
+            .order_by(ServiceConcurrencySlot.id.desc())
+            .first()
+        )
+
+    def _write_acquire(self, payload: Dict[str, Any]) -> None:
+        session = get_db_session()
+        try:
+            meta = dict(payload.get("metadata") or {})
+            meta.update({"backend": BACKEND_REDIS, "holder": payload["holder"]})
+            slot = ServiceConcurrencySlot(
+                service_name=payload["service_name"],
+                feature=payload["feature"],
+                resource_id=payload.get("resource_id"),
+                acquired_at=payload["acquired_at"],
+                expires_at=payload["expires_at"],
+                meta_json=meta,
+            )
+            session.add(slot)
+            session.commit()
+            self._slot_ids[payload["holder"]] = slot.id
+        finally:
+            session.close()
+
+    def _write_release(self, payload: Dict[str, Any]) -> None:
+        session = get_db_session()
+        try:
+            slot = self._find_slot(session, payload)
+            if slot and slot.status == ServiceConcurrencySlot.STATUS_ACTIVE:
+                slot.mark_released(payload["status"], metadata=payload.get("metadata"))
+                session.commit()
+            self._slot_ids.pop(payload["holder"], None)
+        finally:
+            session.close()
+
+    def _write_metadata(self, payload: Dict[str, Any]) -> None:
+        session = get_db_session()
+        try:
+            slot = self._find_slot(session, payload)
+            if slot and slot.status == ServiceConcurrencySlot.STATUS_ACTIVE:
+                existing = dict(slot.meta_json) if isinstance(slot.meta_json, dict) else {}
+                existing.update(payload.get("metadata") or {})
+                slot.meta_json = existing
+                session.commit()
+        finally:
+            session.close()
 
 
 class ConcurrencyManager:
@@ -60,6 +211,8 @@ class ConcurrencyManager:
         self._settings = get_settings()
         self._limit_cache: Dict[tuple[str, Optional[str]], Tuple[SlotLimit, float]] = {}
         self._cache_lock = threading.Lock()
+        self._audit = _SlotAuditWriter()
+        self._redis_scripts: Dict[str, Any] = {}
 
     # ------------------------------------------------------------------
     # Public API
@@ -76,7 +229,7 @@ class ConcurrencyManager:
     ) -> SlotToken:
         """Acquire a slot for a given service/feature.
 
-        Raises APIException when wait_timeout is reached.
+        Raises ConcurrencyLimitException (an APIException) when wait_timeout is reached.
         Returns a token that must be released when work is done.
         """
 
@@ -93,6 +246,21 @@ class ConcurrencyManager:
         wait_interval = max(limit.wait_interval, 1.0)
         deadline = time.monotonic() + wait_timeout if wait_timeout else None
 
+        if self._settings.concurrency_backend_for(service_key) == BACKEND_REDIS:
+            client = get_redis_client()
+            if client is not None:
+                return self._acquire_redis(
+                    client,
+                    limit,
+                    feature=feature_key,
+                    resource_id=resource_id,
+                    slot_timeout=slot_timeout,
+                    wait_interval=wait_interval,
+                    deadline=deadline,
+                    metadata=metadata,
+                )
+            logger.warning("Redis concurrency backend unavailable for %s; using database slots", service_key)
+
         # Opportunistically clean up expired slots for this service
         self._cleanup_expired_for(service_key, feature_key)
 
@@ -100,9 +268,10 @@ class ConcurrencyManager:
         try:
             while True:
                 if deadline and time.monotonic() >= deadline:
-                    raise APIException(
+                    raise ConcurrencyLimitException(
                         "外部服务并发名额已满，请稍后重试",
                         service_name=service_name,
+                        feature=feature_key,
                     )
 
                 session = get_db_session()
@@ -133,6 +302,9 @@ class ConcurrencyManager:
         status: str = ServiceConcurrencySlot.STATUS_RELEASED,
         metadata: Optional[dict] = None,
     ) -> None:
+        if token.backend == BACKEND_REDIS:
+            self._release_redis(token, status=status, metadata=metadata)
+            return
         if token.unlimited or not token.slot_id:
             return
 
@@ -152,7 +324,12 @@ class ConcurrencyManager:
             raise
         finally:
             session.close()
+
     def update_metadata(self, token: SlotToken, metadata: dict) -> None:
+        if token.backend == BACKEND_REDIS:
+            if token.is_real and metadata and self._settings.concurrency_audit_enabled:
+                self._audit.submit("metadata", self._audit_payload(token, metadata=metadata))
+            return
         if token.unlimited or not token.slot_id or not metadata:
             return
 
@@ -226,9 +403,105 @@ class ConcurrencyManager:
         else:
             self.release(token, status=release_status, metadata=metadata)
 
+    def slot_timeout(self, service_name: str, feature: Optional[str] = None) -> float:
+        """Seconds after which an unreleased slot of this pool expires."""
+        limit = self._resolve_limit(service_name, feature)
+        return limit.slot_timeout if limit is not None else _DEFAULT_SLOT_TIMEOUT
+
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
+    @staticmethod
+    def _redis_keys(service_name: str, feature: Optional[str]) -> Tuple[str, str]:
+        base = f"{_REDIS_KEY_PREFIX}:{service_name}:{feature or '*'}"
+        return f"{base}:holders", f"{base}:wake"
+
+    def _redis_script(self, client: Any, name: str, source: str) -> Any:
+        script = self._redis_scripts.get(name)
+        if script is None:
+            script = client.register_script(source)
+            self._redis_scripts[name] = script
+        return script
+
+    def _acquire_redis(
+        self,
+        client: Any,
+        limit: SlotLimit,
+        *,
+        feature: Optional[str],
+        resource_id: Optional[str],
+        slot_timeout: float,
+        wait_interval: float,
+        deadline: Optional[float],
+        metadata: Optional[dict],
+    ) -> SlotToken:
+        holders_key, wake_key = self._redis_keys(limit.service_name, limit.feature)
+        acquire_script = self._redis_script(client, "acquire", _REDIS_ACQUIRE_LUA)
+        holder = uuid.uuid4().hex
+        ttl_ms = int(max(slot_timeout, 1.0) * 1000)
+
+        while True:
+            if acquire_script(keys=[holders_key], args=[holder, limit.max_slots, ttl_ms]):
+                token = SlotToken(
+                    limit.service_name,
+                    feature,
+                    slot_id=None,
+                    resource_id=resource_id,
+                    backend=BACKEND_REDIS,
+                    holder=holder,
+                )
+                if self._settings.concurrency_audit_enabled:
+                    now = naive_now()
+                    payload = self._audit_payload(token, metadata=metadata)
+                    payload.update(acquired_at=now, expires_at=now + timedelta(seconds=max(slot_timeout, 1.0)))
+                    self._audit.submit("acquire", payload)
+                return token
+
+            remaining = deadline - time.monotonic() if deadline else None
+            if remaining is not None and remaining <= 0:
+                raise ConcurrencyLimitException(
+                    "外部服务并发名额已满，请稍后重试",
+                    service_name=limit.service_name,
+                    feature=limit.feature,
+                )
+            # Block until a release signals a free slot; the timeout also covers
+            # slots that simply expire without an explicit release.
+            block_for = wait_interval if remaining is None else min(wait_interval, remaining)
+            client.blpop([wake_key], timeout=min(max(int(round(block_for)), 1), _MAX_BLOCK_SECONDS))
+
+    def _release_redis(self, token: SlotToken, *, status: str, metadata: Optional[dict]) -> None:
+        if not token.is_real:
+            return
+        client = get_redis_client()
+        if client is None:
+            logger.warning("Redis unavailable; slot %s will be freed by TTL expiry", token.holder)
+            return
+        # Key by the resolved limit so a service-wide limit shares one semaphore across features.
+        limit = self._resolve_limit(token.service_name, token.feature)
+        if limit is not None:
+            holders_key, wake_key = self._redis_keys(limit.service_name, limit.feature)
+            max_slots = limit.max_slots
+        else:
+            holders_key, wake_key = self._redis_keys(token.service_name, token.feature)
+            max_slots = 1
+        release_script = self._redis_script(client, "release", _REDIS_RELEASE_LUA)
+        release_script(keys=[holders_key, wake_key], args=[token.holder, max(max_slots, 1)])
+        if self._settings.concurrency_audit_enabled:
+            release_status = status if status in _ALLOWED_RELEASE_STATUSES else ServiceConcurrencySlot.STATUS_RELEASED
+            payload = self._audit_payload(token, metadata=metadata)
+            payload["status"] = release_status
+            self._audit.submit("release", payload)
+
+    @staticmethod
+    def _audit_payload(token: SlotToken, *, metadata: Optional[dict]) -> Dict[str, Any]:
+        return {
+            "service_name": token.service_name,
+            "feature": token.feature,
+            "resource_id": token.resource_id,
+            "holder": token.holder,
+            "metadata": dict(metadata) if metadata else None,
+        }
+
     def _cleanup_expired_for(self, service_name: str, feature: Optional[str]) -> None:
         session = get_db_session()
         try:
@@ -379,4 +652,4 @@ class ConcurrencyManager:
 # module-level singleton
 concurrency_manager = ConcurrencyManager()
 
-__all__ = ["concurrency_manager", "ConcurrencyManager", "SlotToken"]
+__all__ = ["concurrency_manager", "ConcurrencyManager", "SlotToken", "BACKEND_DB", "BACKEND_REDIS"]
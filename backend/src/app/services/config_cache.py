@@ -0,0 +1,364 @@
+"""Process-wide cache of provider credentials, options and workflow configs.
+
+Provider construction used to query ``service_credentials`` / ``service_options``
+(and ``runninghub_workflows`` / ``style_presets``) for every task and scene. This
+module loads them once per process into detached, read-only records:
+
+- ``active_credential`` / ``find_option`` / ``options`` / ``style_preset`` read the
+  snapshot (one query per table, loaded lazily);
+- ``get_or_load`` memoizes derived values such as resolved RunningHub configs;
+- ``generation`` changes whenever the cache is dropped, so callers can key
+  longer-lived objects (provider instances) on it.
+
+Invalidation is version based: config mutations call ``invalidate_config_cache``,
+which bumps a Redis counter. Every process compares that counter at most once per
+``CONFIG_CACHE_CHECK_INTERVAL_SECONDS`` and reloads when it moved. Without Redis
+the snapshot simply expires after ``CONFIG_CACHE_TTL_SECONDS``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from app.config.settings import get_settings
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+_VERSION_KEY = "config_cache:version"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CredentialRecord:
+    id: int
+    service_name: str
+    credential_type: Optional[str]
+    credential_key: Optional[str]
+    credential_secret: Optional[str]
+    api_url: Optional[str]
+    description: Optional[str]
+
+
+@dataclass(frozen=True)
+class OptionRecord:
+    id: int
+    service_name: str
+    option_type: str
+    option_key: str
+    option_value: str
+    option_name: Optional[str]
+    description: Optional[str]
+    is_default: bool
+    is_active: bool
+    meta_data: Any
+
+
+@dataclass(frozen=True)
+class StylePresetRecord:
+    id: int
+    name: str
+    prompt_example: Optional[str]
+    trigger_words: Optional[str]
+    word_count_strategy: Optional[str]
+    channel_identity: Optional[str]
+    lora_id: Optional[str]
+    checkpoint_id: Optional[str]
+    image_provider: Optional[str]
+    video_provider: Optional[str]
+    runninghub_image_workflow_id: Optional[int]
+    runninghub_video_workflow_id: Optional[int]
+    meta: Any
+    is_active: bool
+
+
+@dataclass
+class _Snapshot:
+    credentials: Dict[str, List[CredentialRecord]]
+    options: Dict[str, List[OptionRecord]]
+    style_presets: Dict[int, StylePresetRecord]
+
+
+class ServiceConfigCache:
+    """Versioned, lazily loaded snapshot of DB-managed provider configuration."""
+
+    def __init__(self, *, ttl_seconds: float = 300.0, check_interval: float = 2.0) -> None:
+        self._ttl = max(float(ttl_seconds), 0.0)
+        self._check_interval = max(float(check_interval), 0.0)
+        self._lock = threading.RLock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._memo: Dict[Hashable, Any] = {}
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._remote_version: Optional[int] = None
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Freshness
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _read_remote_version() -> Optional[int]:
+        client = get_redis_client()
+        if client is None:
+            return None
+        try:
+            value = client.get(_VERSION_KEY)
+        except Exception:  # pragma: no cover - depends on environment
+            return None
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def _clear_locked(self) -> None:
+        self._snapshot = None
+        self._memo.clear()
+        self._loaded_at = 0.0
+        self.generation += 1
+
+    def _ensure_fresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self._check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self._check_interval:
+                return
+            self._checked_at = now
+            remote = self._read_remote_version()
+            if remote is None:
+                if self._loaded_at and self._ttl and now - self._loaded_at > self._ttl:
+                    self._clear_locked()
+                return
+            if self._remote_version is not None and remote != self._remote_version:
+                logger.info("Service config changed (version %s -> %s); reloading", self._remote_version, remote)
+                self._clear_locked()
+            self._remote_version = remote
+
+    def invalidate(self, reason: Optional[str] = None) -> None:
+        """Drop the local snapshot and tell every other process to do the same."""
+        client = get_redis_client()
+        remote: Optional[int] = None
+        if client is not None:
+            try:
+                remote = int(client.incr(_VERSION_KEY))
+            except Exception:  # pragma: no cover - depends on environment
+                logger.warning("Failed to bump service config version", exc_info=True)
+        with self._lock:
+            self._clear_locked()
+            self._remote_version = remote
+            self._checked_at = time.monotonic() if remote is not None else 0.0
+        logger.info("Service config cache invalidated (%s)", reason or "manual")
+
+    def current_generation(self) -> int:
+        self._ensure_fresh()
+        return self.generation
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _load_snapshot(self) -> _Snapshot:
+        from app.database import get_db_session
+        from app.models.service_config import ServiceCredential, ServiceOption
+        from app.models.style_preset import StylePreset
+
+        db = get_db_session()
+        try:
+            credentials: Dict[str, List[CredentialRecord]] = {}
+            rows = (
+                db.query(ServiceCredential)
+                .filter(ServiceCredential.is_active == True)  # noqa: E712
+                .order_by(ServiceCredential.id.asc())
+                .all()
+            )
+            for row in rows:
+                credentials.setdefault(row.service_name, []).append(
+                    CredentialRecord(
+                        id=row.id,
+                        service_name=row.service_name,
+                        credential_type=row.credential_type,
+                        credential_key=row.credential_key,
+                        credential_secret=row.credential_secret,
+                        api_url=row.api_url,
+                        description=row.description,
+                    )
+                )
+
+            options: Dict[str, List[OptionRecord]] = {}
+            for row in db.query(ServiceOption).order_by(ServiceOption.id.asc()).all():
+                options.setdefault(row.service_name, []).append(
+                    OptionRecord(
+                        id=row.id,
+                        service_name=row.service_name,
+                        option_type=row.option_type,
+                        option_key=row.option_key,
+                        option_value=row.option_value,
+                        option_name=row.option_name,
+                        description=row.description,
+                        is_default=bool(row.is_default),
+                        is_active=bool(row.is_active),
+                        meta_data=row.meta_data,
+                    )
+                )
+
+            presets: Dict[int, StylePresetRecord] = {}
+            for row in db.query(StylePreset).filter(StylePreset.is_active == True).all():  # noqa: E712
+                presets[row.id] = StylePresetRecord(
+                    id=row.id,
+                    name=row.name,
+                    prompt_example=row.prompt_example,
+                    trigger_words=row.trigger_words,
+                    word_count_strategy=row.word_count_strategy,
+                    channel_identity=row.channel_identity,
+                    lora_id=row.lora_id,
+                    checkpoint_id=row.checkpoint_id,
+                    image_provider=row.image_provider,
+                    video_provider=row.video_provider,
+                    runninghub_image_workflow_id=row.runninghub_image_workflow_id,
+                    runninghub_video_workflow_id=row.runninghub_video_workflow_id,
+                    meta=row.meta,
+                    is_active=bool(row.is_active),
+                )
+            return _Snapshot(credentials=credentials, options=options, style_presets=presets)
+        finally:
+            db.close()
+
+    def _get_snapshot(self) -> _Snapshot:
+        self._ensure_fresh()
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._load_snapshot()
+                self._loaded_at = time.monotonic()
+            return self._snapshot
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def active_credential(self, service_name: str, *, latest: bool = True) -> Optional[CredentialRecord]:
+        """Newest (or oldest, ``latest=False``) active credential for a service."""
+        rows = self._get_snapshot().credentials.get(service_name) or []
+        if not rows:
+            return None
+        return rows[-1] if latest else rows[0]
+
+    def credentials(self, service_name: str) -> List[CredentialRecord]:
+        """All active credentials of a service, oldest first."""
+        return list(self._get_snapshot().credentials.get(service_name) or [])
+
+    def active_service_names(self) -> List[str]:
+        return sorted(self._get_snapshot().credentials)
+
+    def options(self, service_name: str, option_types: Iterable[str]) -> List[OptionRecord]:
+        wanted = {option_types} if isinstance(option_types, str) else set(option_types)
+        return [
+            option
+            for option in self._get_snapshot().options.get(service_name) or []
+            if option.option_type in wanted
+        ]
+
+    def find_option(
+        self,
+        service_name: str,
+        option_types: Iterable[str],
+        *,
+        key: Optional[str] = None,
+        default: bool = False,
+    ) -> Optional[OptionRecord]:
+        """First option matching ``key`` (or the first default one when ``default``)."""
+        for option in self.options(service_name, option_types):
+            if key is not None and option.option_key == key:
+                return option
+            if key is None and default and option.is_default:
+                return option
+        return None
+
+    def style_preset(self, preset_id: int) -> Optional[StylePresetRecord]:
+        return self._get_snapshot().style_presets.get(int(preset_id))
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], T]) -> T:
+        """Memoize ``loader()`` until the next invalidation; exceptions are not cached."""
+        self._ensure_fresh()
+        with self._lock:
+            if key in self._memo:
+                self.hits += 1
+                return self._memo[key]
+            generation = self.generation
+        value = loader()
+        with self._lock:
+            self.misses += 1
+            if generation == self.generation:
+                self._memo[key] = value
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "generation": self.generation,
+                "remote_version": self._remote_version,
+                "loaded": self._snapshot is not None,
+                "memo_entries": len(self._memo),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache: Optional[ServiceConfigCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_config_cache() -> ServiceConfigCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = ServiceConfigCache(
+                    ttl_seconds=settings.config_cache_ttl_seconds,
+                    check_interval=settings.config_cache_check_interval,
+                )
+    return _cache
+
+
+def invalidate_config_cache(reason: Optional[str] = None) -> None:
+    get_config_cache().invalidate(reason)
+
+
+_ProviderKey = Tuple[str, str]
+_provider_local = threading.local()
+
+
+def cached_provider(key: _ProviderKey, factory: Callable[[], T]) -> T:
+    """Reuse provider instances per worker thread until the config generation changes.
+
+    Providers keep per-call state on their service objects (model overrides,
+    configured SDK clients), so instances are shared across tasks on the same
+    thread but never between threads.
+    """
+    generation = get_config_cache().current_generation()
+    providers: Dict[_ProviderKey, Tuple[int, Any]] = getattr(_provider_local, "providers", None) or {}
+    _provider_local.providers = providers
+    entry = providers.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+    provider = factory()
+    providers[key] = (generation, provider)
+    return provider
+
+
+__all__ = [
+    "CredentialRecord",
+    "OptionRecord",
+    "ServiceConfigCache",
+    "StylePresetRecord",
+    "cached_provider",
+    "get_config_cache",
+    "invalidate_config_cache",
+]
@@ -48,6 +48,22 @@ class APIException(ServiceException):
         )
 
 
+class ConcurrencyLimitException(APIException):
+    """Exception raised when no concurrency slot frees up before the wait timeout"""
+    
+    def __init__(self, message: str, service_name: str, feature: Optional[str] = None, **kwargs):
+        self.feature = feature
+        super().__init__(message, service_name=service_name, feature=feature, **kwargs)
+
+
+class RateLimitExceededException(APIException):
+    """Exception raised when a rate-limit token is not available within the wait timeout"""
+    
+    def __init__(self, message: str, service_name: str, retry_after: Optional[float] = None, **kwargs):
+        self.retry_after = retry_after
+        super().__init__(message, service_name=service_name, retry_after=retry_after, **kwargs)
+
+
 class ConfigurationException(ServiceException):
     """Exception raised when service configuration is invalid or missing"""
     
@@ -6,9 +6,8 @@ ConfigurationException is raised with a clear instruction to add the
 credential via the config API.
 """
 from typing import Optional, Dict, Any
-from app.database import get_db_session
-from app.models.service_config import ServiceCredential
 from .base import BaseService
+from .config_cache import get_config_cache
 from .exceptions import ConfigurationException, APIException
 from app.core.http_client import create_http_client
 
@@ -27,28 +26,16 @@ class FalService(BaseService):
         return "Fal AI"
 
     def _load_credentials(self):
-        db = None
-        try:
-            db = get_db_session()
-            cred = db.query(ServiceCredential).filter(
-                ServiceCredential.service_name == "fal",
-                ServiceCredential.is_active == True,
-            ).order_by(ServiceCredential.id.desc()).first()
-            if not cred or not cred.credential_key:
-                raise ConfigurationException(
-                    "Fal API key not found in database (service_credentials). Add an active fal credential via /api/v1/config/credentials",
-                    service_name=self.service_name,
-                    required_envs=["service_credentials (fal)"],
-                )
-            self.api_key = cred.credential_key
-            self.api_url = cred.api_url or "https://api.fal.ai"
-            self.logger.info("Loaded Fal credentials from database")
-        finally:
-            try:
-                if db:
-                    db.close()
-            except Exception:
-                pass
+        cred = get_config_cache().active_credential("fal")
+        if not cred or not cred.credential_key:
+            raise ConfigurationException(
+                "Fal API key not found in database (service_credentials). Add an active fal credential via /api/v1/config/credentials",
+                service_name=self.service_name,
+                required_envs=["service_credentials (fal)"],
+            )
+        self.api_key = cred.credential_key
+        self.api_url = cred.api_url or "https://api.fal.ai"
+        self.logger.info("Loaded Fal credentials from database")
 
     def ensure_configured(self):
         if not getattr(self, "api_key", None):
@@ -1,11 +1,9 @@
 """Service wrapper around the faster-whisper transcription model."""
 from __future__ import annotations
 
-import os
-import secrets
-import tempfile
 from dataclasses import dataclass
 from pathlib import Path
+import threading
 import time
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
@@ -17,9 +15,15 @@ try:  # pragma: no cover - optional dependency guard
 except ImportError:  # pragma: no cover - handled during validation
     WhisperModel = None  # type: ignore[assignment]
 
+try:  # pragma: no cover - faster-whisper >= 1.1
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:  # pragma: no cover - older releases fall back to sequential decoding
+    BatchedInferencePipeline = None  # type: ignore[assignment]
+
 from app.config.settings import Settings, get_settings
 from app.services.base import BaseService
 from app.services.exceptions import ConfigurationException, ServiceException
+from app.services.media_cache import get_remote_media_cache
 from app.services.storage_service import StorageService
 
 
@@ -98,10 +102,20 @@ class FasterWhisperService(BaseService):
     def __init__(self, settings: Optional[Settings] = None):
         super().__init__(settings)
         self._model = None
+        self._pipeline = None
+        self._model_lock = threading.Lock()
         self._storage = StorageService(self.settings)
+        # "cpu_batched": dedicated CPU transcription workers (int8 + batched inference).
+        self.engine = (self.settings.FASTER_WHISPER_ENGINE or "default").strip().lower()
+        cpu_engine = self.engine == "cpu_batched"
         self.model_id = (self.settings.FASTER_WHISPER_MODEL or "medium").strip()
-        self.device = (self.settings.FASTER_WHISPER_DEVICE or "cuda").strip()
-        self.compute_type = (self.settings.FASTER_WHISPER_COMPUTE_TYPE or "float16").strip()
+        self.device = (self.settings.FASTER_WHISPER_DEVICE or ("cpu" if cpu_engine else "cuda")).strip()
+        self.compute_type = (
+            self.settings.FASTER_WHISPER_COMPUTE_TYPE or ("int8" if cpu_engine else "float16")
+        ).strip()
+        self.cpu_threads = self.settings.FASTER_WHISPER_CPU_THREADS
+        self.num_workers = self.settings.FASTER_WHISPER_NUM_WORKERS
+        self.batch_size = max(int(self.settings.FASTER_WHISPER_BATCH_SIZE or 8), 1) if cpu_engine else None
         self.download_root = (self.settings.FASTER_WHISPER_DOWNLOAD_ROOT or "").strip() or None
         self.device_index = self._parse_device_index(self.settings.FASTER_WHISPER_DEVICE_INDEX)
         self.default_beam_size = self.settings.FASTER_WHISPER_BEAM_SIZE or 5
@@ -169,15 +183,35 @@ class FasterWhisperService(BaseService):
                 self.service_name,
             ) from exc
 
+    def load_model(self) -> Any:
+        """Load the model eagerly (used by transcription workers at start-up)."""
+        return self._load_model()
+
     def _load_model(self) -> Any:
         if self._model is not None:
             return self._model
+        with self._model_lock:
+            if self._model is None:
+                self._model = self._create_model()
+                if self.batch_size and BatchedInferencePipeline is not None:
+                    self._pipeline = BatchedInferencePipeline(model=self._model)
+                elif self.batch_size:
+                    self.logger.warning(
+                        "faster-whisper BatchedInferencePipeline unavailable; using sequential decoding",
+                        extra={"service": self.service_name},
+                    )
+        return self._model
 
+    def _create_model(self) -> Any:
         kwargs: Dict[str, Any] = {}
         if self.download_root:
             kwargs["download_root"] = self.download_root
         if self.device_index is not None:
             kwargs["device_index"] = self.device_index
+        if self.cpu_threads:
+            kwargs["cpu_threads"] = int(self.cpu_threads)
+        if self.num_workers:
+            kwargs["num_workers"] = int(self.num_workers)
 
         self.logger.info(
             "Loading faster-whisper model",
@@ -188,16 +222,25 @@ class FasterWhisperService(BaseService):
                 "compute_type": self.compute_type,
                 "device_index": self.device_index,
                 "download_root": self.download_root,
+                "engine": self.engine,
+                "cpu_threads": self.cpu_threads,
+                "num_workers": self.num_workers,
             },
         )
 
-        self._model = WhisperModel(
+        started = time.perf_counter()
+        model = WhisperModel(
             self.model_id,
             device=self.device,
             compute_type=self.compute_type,
             **kwargs,
         )
-        return self._model
+        self.logger.info(
+            "faster-whisper model loaded in %.1fs",
+            time.perf_counter() - started,
+            extra={"service": self.service_name, "model": self.model_id},
+        )
+        return model
 
     def _resolve_source(self, source: str) -> Tuple[Path, Optional[Path]]:
         try:
@@ -213,35 +256,16 @@ class FasterWhisperService(BaseService):
                 code="TRANSCRIBE_INPUT_ERROR",
             )
 
-        suffix = Path(parsed.path or "").suffix or ".tmp"
-        temp_dir = (
-            Path(self.settings.STORAGE_TEMP_PATH)
-            if self.settings.STORAGE_TEMP_PATH
-            else Path(tempfile.gettempdir())
-        )
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        temp_name = f"whisper_{secrets.token_hex(8)}_{os.getpid()}{suffix}"
-        temp_path = temp_dir / temp_name
-
         try:
-            with httpx.stream("GET", source, follow_redirects=True, timeout=self.download_timeout) as response:
-                response.raise_for_status()
-                with temp_path.open("wb") as buffer:
-                    for chunk in response.iter_bytes():
-                        if chunk:
-                            buffer.write(chunk)
+            # Shared bounded cache: re-transcribing the same URL does not download again.
+            cached_path = get_remote_media_cache().fetch(source, timeout=self.download_timeout)
         except httpx.HTTPError as exc:
-            if temp_path.exists():  # best effort cleanup
-                try:
-                    temp_path.unlink()
-                except Exception:  # pragma: no cover - cleanup best effort
-                    pass
             raise ServiceException(
                 f"Failed to download media source: {exc}",
                 code="TRANSCRIBE_DOWNLOAD_FAILED",
             ) from exc
 
-        return temp_path, temp_path
+        return cached_path, None
 
     def transcribe(
         self,
@@ -322,7 +346,14 @@ class FasterWhisperService(BaseService):
         combined_text: List[str] = []
         start_time = time.perf_counter()
         try:
-            segments_iter, info = model.transcribe(str(local_path), **invoke_options)
+            if self._pipeline is not None:
+                segments_iter, info = self._pipeline.transcribe(
+                    str(local_path),
+                    batch_size=self.batch_size,
+                    **invoke_options,
+                )
+            else:
+                segments_iter, info = model.transcribe(str(local_path), **invoke_options)
             for index, segment in enumerate(segments_iter, start=1):
                 words: List[TranscriptionWord] = []
                 if getattr(segment, "words", None):
@@ -358,6 +389,7 @@ class FasterWhisperService(BaseService):
                 except Exception:  # pragma: no cover - best effort cleanup
                     pass
 
+        elapsed = time.perf_counter() - start_time
         info_payload: Dict[str, Any] = {}
         if info is not None:
             info_payload = {
@@ -366,6 +398,15 @@ class FasterWhisperService(BaseService):
                 "duration": getattr(info, "duration", None),
                 "duration_after_vad": getattr(info, "duration_after_vad", None),
             }
+        audio_duration = info_payload.get("duration")
+        # Real-time factor: processing seconds per second of audio (< 1 is faster than real time).
+        info_payload["performance"] = {
+            "latency_ms": round(elapsed * 1000.0, 1),
+            "audio_seconds": audio_duration,
+            "rtf": round(elapsed / float(audio_duration), 4) if audio_duration else None,
+            "engine": self.engine,
+            "batched": self._pipeline is not None,
+        }
 
         result = TranscriptionResult(
             model=self.model_id,
@@ -376,12 +417,18 @@ class FasterWhisperService(BaseService):
             options=dict(invoke_options),
         )
 
-        duration_ms = (time.perf_counter() - start_time) * 1000.0
-
         self._log_response(
             endpoint="transcribe",
             status_code=200,
-            duration_ms=duration_ms,
+            duration_ms=elapsed * 1000.0,
+        )
+        self.logger.info(
+            "[%s] transcribed %.1fs of audio in %.2fs (rtf=%s)",
+            self.service_name,
+            float(audio_duration or 0.0),
+            elapsed,
+            info_payload["performance"]["rtf"],
+            extra={"service": self.service_name, "operation": "transcribe", **info_payload["performance"]},
         )
 
         return result
@@ -1,7 +1,6 @@
 """Local FFmpeg integration utilities."""
 from __future__ import annotations
 
-import hashlib
 import json
 import logging
 import os
@@ -17,6 +16,8 @@ import httpx
 from .base import BaseService
 from .exceptions import APIException, ValidationException, ConfigurationException
 from app.config.settings import get_settings
+from app.services.media_cache import get_remote_media_cache
+from app.services.media_metadata_cache import probe_media, register_media_metadata
 from app.services.storage_service import StorageService, StorageReference
 
 
@@ -65,7 +66,7 @@ class FFmpegService(BaseService):
         return value
 
     def _reference_from_output(self, file_path: Path) -> StorageReference:
-        return self.storage_service.reference_from_absolute(file_path)
+        return self.storage_service.publish(file_path)
 
     @staticmethod
     def _parse_ass_play_res(subtitle_file: Path) -> Optional[Tuple[int, int]]:
@@ -104,29 +105,8 @@ class FFmpegService(BaseService):
         return None
 
     def _cache_remote_input(self, url: str) -> Optional[Path]:
-        cache_dir = self._ensure_dir("tmp", "ffmpeg-cache")
-        suffix = Path(urlparse(url).path).suffix or ".bin"
-        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
-        target = cache_dir / f"{digest}{suffix}"
-        if target.exists():
-            return target
-        tmp_path = target.with_suffix(target.suffix + ".part")
         try:
-            with httpx.stream(
-                "GET",
-                url,
-                timeout=60.0,
-                follow_redirects=True,
-                trust_env=False,
-                verify=True,
-            ) as response:
-                response.raise_for_status()
-                with tmp_path.open("wb") as handle:
-                    for chunk in response.iter_bytes():
-                        if chunk:
-                            handle.write(chunk)
-            tmp_path.replace(target)
-            return target
+            return get_remote_media_cache().fetch(url, timeout=60.0)
         except httpx.HTTPError as exc:
             self._log_error(
                 exc,
@@ -136,8 +116,6 @@ class FFmpegService(BaseService):
                     "trust_env": False,
                 },
             )
-            if tmp_path.exists():
-                tmp_path.unlink(missing_ok=True)
         return None
 
     def _run_stream(self, stream: ffmpeg.nodes.Stream) -> tuple[str, str]:
@@ -194,10 +172,20 @@ class FFmpegService(BaseService):
         if not media_url:
             raise ValidationException("media_url is required", field="media_url")
         try:
-            data = ffmpeg.probe(
-                self._normalise_media_input(media_url),
-                cmd=self.ffprobe_bin,
-            )
+            data = probe_media(self._normalise_media_input(media_url), ffprobe_bin=self.ffprobe_bin)
+        except ffmpeg.Error as exc:
+            stderr = (exc.stderr or b"").decode("utf-8", errors="ignore")
+            raise APIException(
+                f"ffprobe failed: {stderr.strip() or str(exc)}",
+                service_name=self.service_name,
+                response_data={"stderr": stderr},
+            ) from exc
+        return self._format_metadata(data)
+
+    def _register_output(self, output_path: Path) -> Dict[str, Any]:
+        """Probe a file we just wrote once and share the result with later readers."""
+        try:
+            data = register_media_metadata(str(output_path), ffprobe_bin=self.ffprobe_bin)
         except ffmpeg.Error as exc:
             stderr = (exc.stderr or b"").decode("utf-8", errors="ignore")
             raise APIException(
@@ -205,7 +193,10 @@ class FFmpegService(BaseService):
                 service_name=self.service_name,
                 response_data={"stderr": stderr},
             ) from exc
+        return self._format_metadata(data)
 
+    @staticmethod
+    def _format_metadata(data: Any) -> Dict[str, Any]:
         format_section = data.get("format", {}) if isinstance(data, dict) else {}
         try:
             duration = float(format_section.get("duration")) if format_section.get("duration") else None
@@ -231,6 +222,7 @@ class FFmpegService(BaseService):
         task_id: int,
         scene_id: int,
         scene_seq: int,
+        audio_trim: Optional[Tuple[float, float]] = None,
     ) -> Dict[str, Any]:
         video_meta = self.get_media_metadata(video_url)
         audio_meta = self.get_media_metadata(audio_url)
@@ -241,6 +233,15 @@ class FFmpegService(BaseService):
             raise APIException("无法获取视频时长", service_name=self.service_name)
         if not audio_duration or audio_duration <= 0:
             raise APIException("无法获取音频时长", service_name=self.service_name)
+        if audio_trim:
+            # Silence window cached on the scene: trim inside this graph instead of a separate pass.
+            trim_start = max(float(audio_trim[0]), 0.0)
+            trim_end = min(float(audio_trim[1]), float(audio_duration))
+            if trim_end > trim_start:
+                audio_trim = (trim_start, trim_end)
+                audio_duration = trim_end - trim_start
+            else:
+                audio_trim = None
 
         required_frames = int((audio_duration * frame_rate) + 0.9999)
         target_duration = required_frames / frame_rate
@@ -253,10 +254,15 @@ class FFmpegService(BaseService):
             .filter("setpts", f"{speed_ratio:.10f}*PTS")
             .filter("fps", frame_rate)
         )
+        filter_audio = ffmpeg.input(self._normalise_media_input(audio_url)).audio
+        if audio_trim:
+            filter_audio = (
+                filter_audio
+                .filter("atrim", start=f"{audio_trim[0]:.6f}", end=f"{audio_trim[1]:.6f}")
+                .filter("asetpts", "PTS-STARTPTS")
+            )
         filter_audio = (
-            ffmpeg
-            .input(self._normalise_media_input(audio_url))
-            .audio
+            filter_audio
             .filter("apad", whole_dur=f"{target_duration:.10f}")
             .filter("asetpts", "PTS-STARTPTS")
         )
@@ -297,7 +303,7 @@ class FFmpegService(BaseService):
 
         access = self._reference_from_output(output_path)
         public_url = access.public_url
-        merged_meta = self.get_media_metadata(str(output_path))
+        merged_meta = self._register_output(output_path)
 
         return {
             "video_url": public_url,
@@ -309,6 +315,7 @@ class FFmpegService(BaseService):
             "target_duration": target_duration,
             "video_duration": video_duration,
             "audio_duration": audio_duration,
+            "audio_trim": {"start": audio_trim[0], "end": audio_trim[1]} if audio_trim else None,
             "video_metadata": video_meta,
             "audio_metadata": audio_meta,
             "output_metadata": merged_meta,
@@ -328,26 +335,12 @@ class FFmpegService(BaseService):
     ) -> Dict[str, Any]:
         video_input = ffmpeg.input(self._normalise_media_input(base_video_url))
         video_stream = video_input.video
-        main_audio = video_input.audio.filter("aresample", **{"async": 1, "first_pts": 0})
-
-        bgm_audio = (
-            ffmpeg
-            .input(self._normalise_media_input(bgm_url))
-            .audio
-            .filter("volume", f"{volume_db}dB")
-            .filter("aloop", loop=-1)
-            .filter("atrim", start=0, end=fade_start + fade_duration)
-            .filter("asetpts", "PTS-STARTPTS")
-            .filter("afade", t="out", st=fade_start, d=fade_duration)
-        )
-
-        mixed_audio = ffmpeg.filter(
-            [main_audio, bgm_audio],
-            "amix",
-            inputs=2,
-            duration="first",
-            normalize=False,
-            weights="1 1",
+        mixed_audio = self._bgm_audio_filter(
+            video_input.audio,
+            self._normalise_media_input(bgm_url),
+            fade_start=fade_start,
+            fade_duration=fade_duration,
+            volume_db=volume_db,
         )
 
         output_dir = self._ensure_dir("video", "finalize")
@@ -379,7 +372,7 @@ class FFmpegService(BaseService):
 
         access = self._reference_from_output(output_path)
         public_url = access.public_url
-        meta = self.get_media_metadata(str(output_path))
+        meta = self._register_output(output_path)
         return {
             "video_url": public_url,
             "video_api_path": access.api_path,
@@ -388,18 +381,16 @@ class FFmpegService(BaseService):
             "output_metadata": meta,
         }
 
-    def embed_subtitles(
+    def _subtitle_video_filter(
         self,
+        video_stream: Any,
         *,
         base_video_url: str,
         subtitle_path: str,
-        task_id: int,
         subtitle_style: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        if not subtitle_path:
-            raise ValidationException("subtitle_path is required", field="subtitle_path")
-
-        video_input_path = self._normalise_media_input(base_video_url)
+        video_metadata: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Any, Optional[Tuple[int, int]]]:
+        """Append scale (to the ASS PlayRes) + subtitles filters to a video stream."""
         subtitle_input_path = self._normalise_media_input(subtitle_path)
 
         subtitle_path_resolved = Path(subtitle_input_path)
@@ -410,17 +401,18 @@ class FFmpegService(BaseService):
         subtitles_arg = resolved_subtitle.as_posix()
 
         target_play_res = self._parse_ass_play_res(resolved_subtitle)
-        video_meta: Dict[str, Any] = {}
-        try:
-            video_meta = self.get_media_metadata(base_video_url)
-        except Exception as exc:  # pragma: no cover - best effort metadata fetch
-            self._log_error(
-                exc,
-                context={
-                    "operation": "embed_subtitles_metadata",
-                    "video": base_video_url,
-                },
-            )
+        video_meta: Dict[str, Any] = video_metadata or {}
+        if not video_meta:
+            try:
+                video_meta = self.get_media_metadata(base_video_url)
+            except Exception as exc:  # pragma: no cover - best effort metadata fetch
+                self._log_error(
+                    exc,
+                    context={
+                        "operation": "embed_subtitles_metadata",
+                        "video": base_video_url,
+                    },
+                )
 
         video_width: Optional[int] = None
         video_height: Optional[int] = None
@@ -447,15 +439,63 @@ class FFmpegService(BaseService):
                 if scale_needed:
                     scale_target = (target_w, target_h)
 
-        input_stream = ffmpeg.input(video_input_path)
         filter_kwargs: Dict[str, Any] = {"filename": subtitles_arg}
         if subtitle_style:
             filter_kwargs["force_style"] = subtitle_style
-        video_stream = input_stream.video
         if scale_target:
             target_w, target_h = scale_target
             video_stream = video_stream.filter("scale", target_w, target_h, flags="lanczos").filter("setsar", "1")
         video_stream = video_stream.filter("subtitles", **filter_kwargs)
+        return video_stream, scale_target
+
+    @staticmethod
+    def _bgm_audio_filter(
+        main_audio: Any,
+        bgm_url_input: str,
+        *,
+        fade_start: float,
+        fade_duration: float,
+        volume_db: float,
+    ) -> Any:
+        """Loop, trim and fade the BGM, then amix it under the main audio track."""
+        bgm_audio = (
+            ffmpeg
+            .input(bgm_url_input)
+            .audio
+            .filter("volume", f"{volume_db}dB")
+            .filter("aloop", loop=-1)
+            .filter("atrim", start=0, end=fade_start + fade_duration)
+            .filter("asetpts", "PTS-STARTPTS")
+            .filter("afade", t="out", st=fade_start, d=fade_duration)
+        )
+        return ffmpeg.filter(
+            [main_audio.filter("aresample", **{"async": 1, "first_pts": 0}), bgm_audio],
+            "amix",
+            inputs=2,
+            duration="first",
+            normalize=False,
+            weights="1 1",
+        )
+
+    def embed_subtitles(
+        self,
+        *,
+        base_video_url: str,
+        subtitle_path: str,
+        task_id: int,
+        subtitle_style: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        if not subtitle_path:
+            raise ValidationException("subtitle_path is required", field="subtitle_path")
+
+        video_input_path = self._normalise_media_input(base_video_url)
+        input_stream = ffmpeg.input(video_input_path)
+        video_stream, scale_target = self._subtitle_video_filter(
+            input_stream.video,
+            base_video_url=base_video_url,
+            subtitle_path=subtitle_path,
+            subtitle_style=subtitle_style,
+        )
 
         audio_stream = None
         try:
@@ -497,7 +537,93 @@ class FFmpegService(BaseService):
 
         access = self._reference_from_output(output_path)
         public_url = access.public_url
-        meta = self.get_media_metadata(str(output_path))
+        meta = self._register_output(output_path)
+        return {
+            "video_url": public_url,
+            "video_api_path": access.api_path,
+            "video_relative_path": access.relative_path,
+            "video_url_raw": str(output_path),
+            "output_metadata": meta,
+            "subtitle_source": subtitle_path,
+            "subtitle_style": subtitle_style,
+            "scale_resolution": scale_target,
+        }
+
+    def mix_background_music_with_subtitles(
+        self,
+        *,
+        base_video_url: str,
+        bgm_url: str,
+        subtitle_path: str,
+        fade_start: float,
+        fade_duration: float,
+        volume_db: float,
+        task_id: int,
+        subtitle_style: Optional[str] = None,
+        video_metadata: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Burn subtitles and mix BGM in a single decode/encode pass.
+
+        Equivalent to ``mix_background_music`` followed by ``embed_subtitles`` but
+        builds one filter graph, so the intermediate MP4 and its re-decode are skipped.
+        """
+        if not subtitle_path:
+            raise ValidationException("subtitle_path is required", field="subtitle_path")
+
+        video_input = ffmpeg.input(self._normalise_media_input(base_video_url))
+        video_stream, scale_target = self._subtitle_video_filter(
+            video_input.video,
+            base_video_url=base_video_url,
+            subtitle_path=subtitle_path,
+            subtitle_style=subtitle_style,
+            video_metadata=video_metadata,
+        )
+        mixed_audio = self._bgm_audio_filter(
+            video_input.audio,
+            self._normalise_media_input(bgm_url),
+            fade_start=fade_start,
+            fade_duration=fade_duration,
+            volume_db=volume_db,
+        )
+
+        output_dir = self._ensure_dir("video", "finalize")
+        filename = f"final_{task_id}_{int(time.time() * 1000)}_subtitled.mp4"
+        output_path = output_dir / filename
+
+        stream = (
+            ffmpeg
+            .output(
+                video_stream,
+                mixed_audio,
+                str(output_path),
+                **{
+                    "c:v": "libx264",
+                    "preset": "medium",
+                    "crf": "18",
+                    "pix_fmt": "yuv420p",
+                    "movflags": "+faststart",
+                    "c:a": "aac",
+                    "shortest": None,
+                },
+            )
+            .overwrite_output()
+        )
+
+        self._run_stream(stream)
+        self.logger.info(
+            "[%s] mix_background_music_with_subtitles -> %s",
+            self.service_name,
+            output_path.name,
+            extra={
+                "service": self.service_name,
+                "operation": "mix_background_music_with_subtitles",
+                "output_path": str(output_path),
+            },
+        )
+
+        access = self._reference_from_output(output_path)
+        public_url = access.public_url
+        meta = self._register_output(output_path)
         return {
             "video_url": public_url,
             "video_api_path": access.api_path,
@@ -511,6 +637,65 @@ class FFmpegService(BaseService):
 
     # Concat helpers ---------------------------------------------------
 
+    # Stream fields that must match for the concat demuxer to splice clips without re-encoding.
+    _CONCAT_VIDEO_KEYS = ("codec_name", "profile", "width", "height", "pix_fmt", "r_frame_rate", "time_base", "sample_aspect_ratio")
+    _CONCAT_AUDIO_KEYS = ("codec_name", "sample_rate", "channels", "channel_layout")
+
+    @classmethod
+    def _concat_signature(cls, metadata: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        video: Optional[Tuple[Any, ...]] = None
+        audio: Optional[Tuple[Any, ...]] = None
+        for stream in metadata.get("streams", []):
+            if not isinstance(stream, dict):
+                continue
+            codec_type = stream.get("codec_type")
+            if codec_type == "video" and video is None:
+                video = tuple(stream.get(key) for key in cls._CONCAT_VIDEO_KEYS)
+            elif codec_type == "audio" and audio is None:
+                audio = tuple(stream.get(key) for key in cls._CONCAT_AUDIO_KEYS)
+        if video is None:
+            return None
+        return video, audio
+
+    def _stream_copy_compatible(self, input_paths: Sequence[str]) -> Tuple[bool, Optional[str]]:
+        """Probe the inputs; return (compatible, reason) for concat-demuxer stream copy."""
+        signature: Optional[Tuple[Any, ...]] = None
+        for path in input_paths:
+            if not Path(path).is_file():
+                return False, "non_local_input"
+            try:
+                current = self._concat_signature(self.get_media_metadata(path))
+            except APIException:
+                return False, "probe_failed"
+            if current is None:
+                return False, "missing_video_stream"
+            if current[0][self._CONCAT_VIDEO_KEYS.index("pix_fmt")] != "yuv420p":
+                # The filter path normalises to yuv420p; keep that guarantee.
+                return False, "pix_fmt"
+            if signature is None:
+                signature = current
+            elif current != signature:
+                return False, "parameters_differ"
+        return True, None
+
+    def _concat_stream_copy(self, input_paths: Sequence[str], output_path: Path) -> None:
+        list_path = output_path.with_suffix(".txt")
+        lines = []
+        for path in input_paths:
+            escaped = Path(path).resolve().as_posix().replace("'", "'\\''")
+            lines.append(f"file '{escaped}'")
+        list_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        try:
+            stream = (
+                ffmpeg
+                .input(str(list_path), f="concat", safe=0)
+                .output(str(output_path), c="copy", movflags="+faststart")
+                .overwrite_output()
+            )
+            self._run_stream(stream)
+        finally:
+            list_path.unlink(missing_ok=True)
+
     def concat_with_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         inputs = payload.get("inputs", [])
         if not inputs:
@@ -529,12 +714,67 @@ class FFmpegService(BaseService):
         if not inputs:
             raise ValidationException("concat payload requires inputs", field="inputs")
 
-        input_streams = []
+        input_paths: list[str] = []
         for item in inputs:
             file_url = item.get("file_url") if isinstance(item, dict) else None
             if not file_url:
                 raise ValidationException("each input requires file_url", field="inputs")
-            input_streams.append(ffmpeg.input(self._normalise_media_input(str(file_url))))
+            input_paths.append(self._normalise_media_input(str(file_url)))
+
+        # Scene clips from compose_scene_with_audio share codec/fps/resolution, so they
+        # can usually be spliced with the concat demuxer instead of a full re-encode.
+        concat_mode = "filter"
+        stream_copy = payload.get("stream_copy")
+        if stream_copy is None:
+            stream_copy = self.settings.ffmpeg_concat_stream_copy
+        fallback_reason: Optional[str] = None if stream_copy else "disabled"
+        if stream_copy:
+            compatible, fallback_reason = self._stream_copy_compatible(input_paths)
+            if compatible:
+                try:
+                    self._concat_stream_copy(input_paths, output_path)
+                    concat_mode = "stream_copy"
+                except APIException:
+                    fallback_reason = "stream_copy_failed"
+
+        if concat_mode == "filter":
+            self._concat_filter(input_paths, output_path, output_options, global_options)
+
+        self.logger.info(
+            "[%s] concat_with_payload (%s) -> %s",
+            self.service_name,
+            concat_mode,
+            output_path.name,
+            extra={
+                "service": self.service_name,
+                "operation": "concat_with_payload",
+                "concat_mode": concat_mode,
+                "fallback_reason": fallback_reason,
+                "output_path": str(output_path),
+            },
+        )
+
+        access = self._reference_from_output(output_path)
+        public_url = access.public_url
+        meta = self._register_output(output_path)
+        return {
+            "video_url": public_url,
+            "video_api_path": access.api_path,
+            "video_relative_path": access.relative_path,
+            "video_url_raw": str(output_path),
+            "output_metadata": meta,
+            "concat_mode": concat_mode,
+            "concat_fallback_reason": fallback_reason if concat_mode == "filter" else None,
+        }
+
+    def _concat_filter(
+        self,
+        input_paths: Sequence[str],
+        output_path: Path,
+        output_options: Sequence[Dict[str, Any]],
+        global_options: Sequence[Dict[str, Any]],
+    ) -> None:
+        input_streams = [ffmpeg.input(path) for path in input_paths]
 
         output_kwargs: Dict[str, Any] = {}
         global_args: list[str] = []
@@ -611,29 +851,7 @@ class FFmpegService(BaseService):
             stream = stream.global_args(*args)
 
         stream = stream.overwrite_output()
-
         self._run_stream(stream)
-        self.logger.info(
-            "[%s] concat_with_payload -> %s",
-            self.service_name,
-            output_path.name,
-            extra={
-                "service": self.service_name,
-                "operation": "concat_with_payload",
-                "output_path": str(output_path),
-            },
-        )
-
-        access = self._reference_from_output(output_path)
-        public_url = access.public_url
-        meta = self.get_media_metadata(str(output_path))
-        return {
-            "video_url": public_url,
-            "video_api_path": access.api_path,
-            "video_relative_path": access.relative_path,
-            "video_url_raw": str(output_path),
-            "output_metadata": meta,
-        }
 
 
 __all__ = ["FFmpegService"]
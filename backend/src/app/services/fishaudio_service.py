@@ -1,12 +1,15 @@
 """Fish Audio TTS 服务"""
 import logging
+import os
 import time
-from typing import Optional, Dict, Any
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 
-from app.core.http_client import create_http_client
-from app.models.service_config import ServiceCredential, ServiceOption
+from app.core.http_client import create_http_client, get_async_http_client
+from app.core.proxy_config import get_proxy_for_service
 from .base import BaseService
+from .config_cache import get_config_cache
 from .exceptions import (
     APIException,
     ConfigurationException,
@@ -52,10 +55,7 @@ class FishAudioService(BaseService):
     
     def _load_credentials(self):
         """从数据库加载凭证"""
-        credential = self.db.query(ServiceCredential).filter(
-            ServiceCredential.service_name == "fishaudio",
-            ServiceCredential.is_active == True
-        ).first()
+        credential = get_config_cache().active_credential("fishaudio", latest=False)
         
         if not credential:
             raise ConfigurationException(
@@ -64,6 +64,7 @@ class FishAudioService(BaseService):
             )
         
         self.api_key = credential.credential_key
+        self.credential_id = credential.id
         if not credential.api_url:
             raise ConfigurationException(
                 "Fish Audio API URL not configured in database",
@@ -82,11 +83,7 @@ class FishAudioService(BaseService):
         """
         if voice_id:
             # 使用指定的音色ID
-            option = self.db.query(ServiceOption).filter(
-                ServiceOption.service_name == "fishaudio",
-                ServiceOption.option_type == "voice_id",
-                ServiceOption.option_key == voice_id
-            ).first()
+            option = get_config_cache().find_option("fishaudio", "voice_id", key=voice_id)
             
             if not option:
                 self.logger.warning(f"Voice ID '{voice_id}' not found in database, will try to use it directly")
@@ -97,11 +94,7 @@ class FishAudioService(BaseService):
                 self.voice_name = option.option_name
         else:
             # 使用默认音色
-            option = self.db.query(ServiceOption).filter(
-                ServiceOption.service_name == "fishaudio",
-                ServiceOption.option_type == "voice_id",
-                ServiceOption.is_default == True
-            ).first()
+            option = get_config_cache().find_option("fishaudio", "voice_id", default=True)
             
             if not option:
                     raise ConfigurationException(
@@ -137,6 +130,51 @@ class FishAudioService(BaseService):
             ValidationException: 输入验证失败
             APIException: API调用失败
         """
+        url, headers, payload = self._build_tts_request(text, voice_id, format, sample_rate)
+        
+        try:
+            self._log_request("text_to_speech", method="POST", text_length=len(text))
+
+            start_time = time.time()
+            response = self.client.post(url, json=payload, headers=headers)
+            duration_ms = (time.time() - start_time) * 1000
+
+            if response.status_code == 200:
+                self._log_response("text_to_speech", status_code=200, duration_ms=duration_ms)
+                return response.content
+            else:
+                error_msg = f"Fish Audio API error: {response.status_code}"
+                try:
+                    error_data = response.json()
+                    error_msg = error_data.get("error", {}).get("message", error_msg)
+                except:
+                    error_msg = response.text or error_msg
+                
+                self._log_error(error_msg, {"endpoint": "text_to_speech"})
+                raise APIException(
+                    message=error_msg,
+                    service_name=self.service_name,
+                    status_code=response.status_code,
+                    response_data=error_data if 'error_data' in locals() else None,
+                )
+        
+        except APIException:
+            raise
+        except Exception as e:
+            self._log_error(e, {"endpoint": "text_to_speech"})
+            raise APIException(
+                message=f"Failed to call Fish Audio API: {str(e)}",
+                service_name=self.service_name,
+            )
+    
+    def _build_tts_request(
+        self,
+        text: str,
+        voice_id: Optional[str],
+        format: str,
+        sample_rate: int,
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """校验输入并构建 /v1/tts 请求（URL、请求头、请求体）"""
         # 验证输入
         if not text or not text.strip():
             raise ValidationException("text cannot be empty", field="text")
@@ -150,7 +188,6 @@ class FishAudioService(BaseService):
         # 使用指定音色或默认音色
         target_voice_id = voice_id or self.voice_id
         
-        # 构建请求
         url = f"{self.api_url}/v1/tts"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -164,41 +201,143 @@ class FishAudioService(BaseService):
             "normalize": True,
             "mp3_bitrate": 192
         }
-        
+        return url, headers, payload
+    
+    def _stream_error(self, response, body: bytes, endpoint: str) -> APIException:
+        """把非 200 的流式响应转换为 APIException（响应体已读取为 body）"""
+        error_msg = f"Fish Audio API error: {response.status_code}"
+        error_data = None
         try:
-            self._log_request("text_to_speech", method="POST", text_length=len(text))
+            error_data = response.json()
+            error_msg = error_data.get("error", {}).get("message", error_msg)
+        except Exception:
+            error_msg = body.decode("utf-8", errors="ignore") or error_msg
+        self._log_error(error_msg, {"endpoint": endpoint})
+        return APIException(
+            message=error_msg,
+            service_name=self.service_name,
+            status_code=response.status_code,
+            response_data=error_data,
+        )
 
-            start_time = time.time()
-            response = self.client.post(url, json=payload, headers=headers)
-            duration_ms = (time.time() - start_time) * 1000
+    def _finish_stream(self, temp_path: Path, output_path: Path, written: int) -> None:
+        if not written:
+            raise APIException(
+                message="Fish Audio API returned empty audio",
+                service_name=self.service_name,
+            )
+        # 原子替换：output_path 可能硬链接到 TTS 缓存条目，原地写入会连缓存一起改掉
+        os.replace(temp_path, output_path)
 
-            if response.status_code == 200:
-                self._log_response("text_to_speech", status_code=200, duration_ms=duration_ms)
-                return response.content
-            else:
-                error_msg = f"Fish Audio API error: {response.status_code}"
-                try:
-                    error_data = response.json()
-                    error_msg = error_data.get("error", {}).get("message", error_msg)
-                except:
-                    error_msg = response.text or error_msg
-                
-                self._log_error(error_msg, {"endpoint": "text_to_speech"})
-                raise APIException(
-                    message=error_msg,
-                    service_name=self.service_name,
-                    status_code=response.status_code,
-                    response_data=error_data if 'error_data' in locals() else None,
-                )
+    @staticmethod
+    def _stream_stats(start_time: float, ttfb_ms: Optional[float], written: int) -> Dict[str, Any]:
+        latency_ms = (time.monotonic() - start_time) * 1000
+        return {
+            "bytes": written,
+            "latency_ms": round(latency_ms, 1),
+            "ttfb_ms": round(ttfb_ms, 1) if ttfb_ms is not None else None,
+        }
+
+    def stream_text_to_speech_sync(
+        self,
+        text: str,
+        output_path: Path,
+        voice_id: Optional[str] = None,
+        format: str = "mp3",
+        sample_rate: int = 44100,
+    ) -> Dict[str, Any]:
+        """
+        同步版 stream_text_to_speech：经共享连接池流式写入 output_path（逐分镜调度时使用）
         
+        Returns:
+            本次请求的统计：bytes、latency_ms（总耗时）、ttfb_ms（首字节耗时）
+        """
+        url, headers, payload = self._build_tts_request(text, voice_id, format, sample_rate)
+        temp_path = output_path.with_name(f"{output_path.name}.part")
+        
+        self._log_request("stream_text_to_speech", method="POST", text_length=len(text))
+        start_time = time.monotonic()
+        ttfb_ms: Optional[float] = None
+        written = 0
+        try:
+            with self.client.stream("POST", url, json=payload, headers=headers) as response:
+                if response.status_code != 200:
+                    raise self._stream_error(response, response.read(), "stream_text_to_speech")
+                with open(temp_path, "wb") as fh:
+                    for chunk in response.iter_bytes():
+                        if ttfb_ms is None:
+                            ttfb_ms = (time.monotonic() - start_time) * 1000
+                        fh.write(chunk)
+                        written += len(chunk)
+            self._finish_stream(temp_path, output_path, written)
         except APIException:
+            temp_path.unlink(missing_ok=True)
             raise
         except Exception as e:
-            self._log_error(e, {"endpoint": "text_to_speech"})
+            temp_path.unlink(missing_ok=True)
+            self._log_error(e, {"endpoint": "stream_text_to_speech"})
+            raise APIException(
+                message=f"Failed to call Fish Audio API: {str(e)}",
+                service_name=self.service_name,
+            )
+        
+        stats = self._stream_stats(start_time, ttfb_ms, written)
+        self._log_response("stream_text_to_speech", status_code=200, duration_ms=stats["latency_ms"])
+        return stats
+    
+    async def stream_text_to_speech(
+        self,
+        text: str,
+        output_path: Path,
+        voice_id: Optional[str] = None,
+        format: str = "mp3",
+        sample_rate: int = 44100,
+    ) -> Dict[str, Any]:
+        """
+        流式调用 TTS，将响应体边接收边写入 output_path（不在内存中缓冲整段音频）
+        
+        先写入同目录下的 .part 临时文件，完成后原子替换，失败时删除临时文件。
+        
+        Returns:
+            本次请求的统计：bytes、latency_ms（总耗时）、ttfb_ms（首字节耗时）
+        
+        Raises:
+            ValidationException: 输入验证失败
+            APIException: API调用失败
+        """
+        url, headers, payload = self._build_tts_request(text, voice_id, format, sample_rate)
+        client = get_async_http_client("fishaudio", proxies=get_proxy_for_service("fishaudio") or {})
+        temp_path = output_path.with_name(f"{output_path.name}.part")
+        
+        self._log_request("stream_text_to_speech", method="POST", text_length=len(text))
+        start_time = time.monotonic()
+        ttfb_ms: Optional[float] = None
+        written = 0
+        try:
+            async with client.stream("POST", url, json=payload, headers=headers, timeout=60) as response:
+                if response.status_code != 200:
+                    raise self._stream_error(response, await response.aread(), "stream_text_to_speech")
+                with open(temp_path, "wb") as fh:
+                    async for chunk in response.aiter_bytes():
+                        if ttfb_ms is None:
+                            ttfb_ms = (time.monotonic() - start_time) * 1000
+                        fh.write(chunk)
+                        written += len(chunk)
+            self._finish_stream(temp_path, output_path, written)
+        except APIException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        except Exception as e:
+            temp_path.unlink(missing_ok=True)
+            self._log_error(e, {"endpoint": "stream_text_to_speech"})
             raise APIException(
                 message=f"Failed to call Fish Audio API: {str(e)}",
                 service_name=self.service_name,
             )
+        
+        stats = self._stream_stats(start_time, ttfb_ms, written)
+        self._log_response("stream_text_to_speech", status_code=200, duration_ms=stats["latency_ms"])
+        return stats
     
     def get_available_voices(self) -> list:
         """
@@ -207,10 +346,7 @@ class FishAudioService(BaseService):
         Returns:
             音色列表
         """
-        voices = self.db.query(ServiceOption).filter(
-            ServiceOption.service_name == "fishaudio",
-            ServiceOption.option_type == "voice_id"
-        ).all()
+        voices = get_config_cache().options("fishaudio", "voice_id")
         
         return [
             {
@@ -223,6 +359,11 @@ class FishAudioService(BaseService):
             for v in voices
         ]
     
+    async def aclose(self):
+        """关闭当前事件循环下的共享异步客户端（在 asyncio.run 结束前调用，避免连接随事件循环泄漏）"""
+        client = get_async_http_client("fishaudio", proxies=get_proxy_for_service("fishaudio") or {})
+        await client.aclose()
+    
     def close(self):
         """关闭客户端连接"""
         if hasattr(self, 'client'):
@@ -1,67 +1,384 @@
 """Gemini-specific credential pool.
 
-Provides an atomic acquire() to select an active Gemini API key that has not
-been used within a cooldown window. Uses row-level locking (SELECT FOR UPDATE
-SKIP LOCKED) to avoid concurrent allocation of the same key.
+Every Gemini call leases an API key from ``GeminiKeyRotator``. Each key has a
+request (RPM) and token (TPM) budget tracked as a sliding window in Redis; a
+single Lua call refills the windows of all keys and hands out the one with the
+most headroom, so bursts of storyboard / video prompt calls spread over every
+key at full rate without a DB round-trip. Keys that answer 429 are benched with
+an exponential backoff.
+
+Active keys come from the process-wide config cache (``service_credentials``);
+``last_used_at`` is still written for the config UI, but at most once a minute per
+key. Without Redis the same accounting runs in-process.
 """
-from datetime import timedelta
-from typing import Optional
-from sqlalchemy import or_, asc
-from sqlalchemy.orm import Session
-
-from app.database import get_db_session
-from app.models.service_config import ServiceCredential
-from app.services.exceptions import ConfigurationException
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import update as sa_update
+
+from app.config.settings import get_settings
+from app.core.redis_client import get_redis_client
+from app.services.config_cache import CredentialRecord, get_config_cache
+from app.services.exceptions import ConfigurationException, RateLimitExceededException
 from app.utils.timezone import naive_now
 
+logger = logging.getLogger(__name__)
 
-DEFAULT_COOLDOWN_SECONDS = 300
+_KEY_PREFIX = "gemini-keys:"
+_LAST_USED_WRITE_INTERVAL = 60.0
 
+# KEYS: one state hash per credential. ARGV: rpm, tpm, token cost, window ms.
+# Returns {index, headroom * 1000} for the leased key (usage already charged), or
+# {0, wait ms} when every key is exhausted or benched.
+_ACQUIRE_LUA = """
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), tpm)
+local window = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local best, best_room, best_state = 0, -1, nil
+local min_wait = -1
+for i, key in ipairs(KEYS) do
+  local d = redis.call('HMGET', key, 'ws', 'req', 'tok', 'preq', 'ptok', 'until')
+  local ws = tonumber(d[1]) or now
+  local req, tok = tonumber(d[2]) or 0, tonumber(d[3]) or 0
+  local preq, ptok = tonumber(d[4]) or 0, tonumber(d[5]) or 0
+  local benched_until = tonumber(d[6]) or 0
+  if now - ws >= 2 * window then
+    ws, req, tok, preq, ptok = now, 0, 0, 0, 0
+  elseif now - ws >= window then
+    ws, preq, ptok, req, tok = ws + window, req, tok, 0, 0
+  end
+  local weight = 1 - (now - ws) / window
+  local used_req = preq * weight + req
+  local used_tok = ptok * weight + tok
+  local wait = 0
+  if benched_until > now then
+    wait = benched_until - now
+  else
+    local room = math.min((rpm - used_req - 1) / rpm, (tpm - used_tok - cost) / tpm)
+    if room >= 0 then
+      if room > best_room then
+        best, best_room, best_state = i, room, {ws, req, tok, preq, ptok}
+      end
+    else
+      wait = math.max(window - (now - ws), 1)
+    end
+  end
+  if wait > 0 and (min_wait < 0 or wait < min_wait) then
+    min_wait = wait
+  end
+end
+if best > 0 then
+  local s = best_state
+  redis.call('HSET', KEYS[best], 'ws', s[1], 'req', s[2] + 1, 'tok', s[3] + cost, 'preq', s[4], 'ptok', s[5])
+  redis.call('PEXPIRE', KEYS[best], 3 * window)
+  return {best, math.floor(best_room * 1000)}
+end
+return {0, min_wait}
+"""
 
-class GeminiCredentialPool:
-    @staticmethod
-    def acquire(cooldown_seconds: int = DEFAULT_COOLDOWN_SECONDS, allow_reuse_after_exhaust: bool = False) -> ServiceCredential:
-        db: Session = get_db_session()
-        try:
-            now = naive_now()
-            cutoff = now - timedelta(seconds=cooldown_seconds)
-
-            # First try: find an active credential not used within cooldown (including never-used)
-            q = (
-                db.query(ServiceCredential)
-                .filter(ServiceCredential.service_name == "gemini")
-                .filter(ServiceCredential.is_active == True)
-                .filter(or_(ServiceCredential.last_used_at == None, ServiceCredential.last_used_at <= cutoff))
-                .order_by(asc(ServiceCredential.last_used_at))
-                .with_for_update(skip_locked=True)
-            )
+# KEYS[1]: state hash. ARGV: base backoff ms, max backoff ms, retry-after ms (0 = exponential).
+_BENCH_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local strikes = redis.call('HINCRBY', KEYS[1], 'strikes', 1)
+local delay = tonumber(ARGV[3])
+if delay <= 0 then
+  delay = math.min(tonumber(ARGV[1]) * 2 ^ (strikes - 1), tonumber(ARGV[2]))
+end
+redis.call('HSET', KEYS[1], 'until', now + delay)
+redis.call('PEXPIRE', KEYS[1], math.max(redis.call('PTTL', KEYS[1]), delay + 60000))
+return delay
+"""
 
-            cred = q.first()
-            if cred is None and allow_reuse_after_exhaust:
-                # fallback to least-recently-used even if within cooldown
-                q2 = (
-                    db.query(ServiceCredential)
-                    .filter(ServiceCredential.service_name == "gemini")
-                    .filter(ServiceCredential.is_active == True)
-                    .order_by(asc(ServiceCredential.last_used_at))
-                    .with_for_update(skip_locked=True)
-                )
-                cred = q2.first()
 
-            if cred is None:
-                raise ConfigurationException(
-                    "No available Gemini API keys: all keys are in cooldown or none configured",
+@dataclass(frozen=True)
+class GeminiKeyLease:
+    credential: CredentialRecord
+    reserved_tokens: int
+    headroom: float
+    waited_seconds: float = 0.0
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self.credential.credential_key
+
+
+@dataclass
+class _LocalKeyState:
+    window_start: float
+    requests: float = 0.0
+    tokens: float = 0.0
+    prev_requests: float = 0.0
+    prev_tokens: float = 0.0
+    benched_until: float = 0.0
+    strikes: int = 0
+
+
+@dataclass
+class _RotatorStats:
+    leased: int = 0
+    rate_limited: int = 0
+    waited_total: float = 0.0
+    by_key: Dict[int, int] = field(default_factory=dict)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count (~4 UTF-8 bytes per token) used for TPM accounting."""
+    if not text:
+        return 0
+    return max(len(text.encode("utf-8")) // 4, 1)
+
+
+class GeminiKeyRotator:
+    """Hand out the Gemini key with the most RPM/TPM headroom."""
+
+    def __init__(
+        self,
+        *,
+        rpm: int,
+        tpm: int,
+        window_seconds: float = 60.0,
+        wait_timeout: float = 30.0,
+        backoff_seconds: float = 10.0,
+        max_backoff_seconds: float = 300.0,
+    ) -> None:
+        self.rpm = max(int(rpm), 1)
+        self.tpm = max(int(tpm), 1)
+        self.window_ms = max(int(window_seconds * 1000), 1000)
+        self.wait_timeout = max(float(wait_timeout), 0.0)
+        self.backoff_ms = max(int(backoff_seconds * 1000), 1)
+        self.max_backoff_ms = max(int(max_backoff_seconds * 1000), self.backoff_ms)
+        self._lock = threading.Lock()
+        self._local: Dict[int, _LocalKeyState] = {}
+        self._last_used_written: Dict[int, float] = {}
+        self._stats = _RotatorStats()
+        self._acquire_script = None
+        self._bench_script = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def acquire(self, credentials: Sequence[CredentialRecord], *, tokens: int = 0) -> GeminiKeyLease:
+        """Lease a key, waiting up to ``wait_timeout`` for headroom.
+
+        Raises RateLimitExceededException when every key stays exhausted or benched.
+        """
+        if not credentials:
+            raise ConfigurationException("No active Gemini API keys configured", service_name="gemini")
+        cost = max(int(tokens), 0)
+        deadline = time.monotonic() + self.wait_timeout
+        waited = 0.0
+        while True:
+            index, value = self._reserve(credentials, cost)
+            if index is not None:
+                credential = credentials[index]
+                with self._lock:
+                    self._stats.leased += 1
+                    self._stats.waited_total += waited
+                    self._stats.by_key[credential.id] = self._stats.by_key.get(credential.id, 0) + 1
+                self._touch_last_used(credential.id)
+                return GeminiKeyLease(credential, cost, headroom=value, waited_seconds=waited)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RateLimitExceededException(
+                    "Gemini API keys are exhausted, retry later",
                     service_name="gemini",
+                    retry_after=value,
+                )
+            # The sliding window frees headroom gradually, so poll instead of sleeping to the roll.
+            pause = min(value, remaining, 1.0)
+            time.sleep(pause)
+            waited += pause
+
+    def report_usage(self, lease: GeminiKeyLease, tokens_used: int) -> None:
+        """Correct the reserved token estimate and clear the 429 strike count."""
+        delta = int(tokens_used) - lease.reserved_tokens
+        key_id = lease.credential.id
+        client = get_redis_client()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                if delta:
+                    pipe.hincrbyfloat(self._state_key(key_id), "tok", delta)
+                pipe.hdel(self._state_key(key_id), "strikes")
+                pipe.execute()
+                return
+            except Exception:  # pragma: no cover - accounting is best effort
+                logger.debug("Failed to report Gemini key usage", exc_info=True)
+        with self._lock:
+            state = self._local.get(key_id)
+            if state is not None:
+                state.tokens = max(state.tokens + delta, 0.0)
+                state.strikes = 0
+
+    def report_rate_limited(self, lease: GeminiKeyLease, retry_after: Optional[float] = None) -> float:
+        """Bench the key after a 429; returns the backoff in seconds."""
+        key_id = lease.credential.id
+        retry_ms = int((retry_after or 0) * 1000)
+        with self._lock:
+            self._stats.rate_limited += 1
+        client = get_redis_client()
+        if client is not None:
+            try:
+                if self._bench_script is None:
+                    self._bench_script = client.register_script(_BENCH_LUA)
+                delay_ms = int(
+                    self._bench_script(
+                        keys=[self._state_key(key_id)],
+                        args=[self.backoff_ms, self.max_backoff_ms, retry_ms],
+                    )
+                )
+                logger.warning("Gemini key %s rate limited; benched for %.1fs", key_id, delay_ms / 1000)
+                return delay_ms / 1000.0
+            except Exception:
+                logger.exception("Redis key bench failed for Gemini key %s; using local state", key_id)
+        with self._lock:
+            state = self._local.setdefault(key_id, _LocalKeyState(window_start=time.monotonic()))
+            state.strikes += 1
+            delay_ms = retry_ms or min(self.backoff_ms * 2 ** (state.strikes - 1), self.max_backoff_ms)
+            state.benched_until = time.monotonic() + delay_ms / 1000.0
+        logger.warning("Gemini key %s rate limited; benched for %.1fs", key_id, delay_ms / 1000)
+        return delay_ms / 1000.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "leased": self._stats.leased,
+                "rate_limited": self._stats.rate_limited,
+                "waited_total": round(self._stats.waited_total, 3),
+                "leases_by_key": dict(self._stats.by_key),
+            }
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _state_key(key_id: int) -> str:
+        return f"{_KEY_PREFIX}{key_id}"
+
+    def _reserve(self, credentials: Sequence[CredentialRecord], cost: int):
+        """Return (index, headroom) for a leased key or (None, wait seconds)."""
+        client = get_redis_client()
+        if client is not None:
+            try:
+                if self._acquire_script is None:
+                    self._acquire_script = client.register_script(_ACQUIRE_LUA)
+                index, value = self._acquire_script(
+                    keys=[self._state_key(item.id) for item in credentials],
+                    args=[self.rpm, self.tpm, cost, self.window_ms],
                 )
+                if int(index) > 0:
+                    return int(index) - 1, int(value) / 1000.0
+                return None, max(int(value), 1) / 1000.0
+            except Exception:
+                logger.exception("Redis Gemini key rotation failed; using local state")
+        return self._reserve_local(credentials, cost)
+
+    def _reserve_local(self, credentials: Sequence[CredentialRecord], cost: int):
+        window = self.window_ms / 1000.0
+        cost = min(cost, self.tpm)
+        with self._lock:
+            now = time.monotonic()
+            best_index, best_room, min_wait = None, -1.0, None
+            for index, credential in enumerate(credentials):
+                state = self._local.setdefault(credential.id, _LocalKeyState(window_start=now))
+                elapsed = now - state.window_start
+                if elapsed >= 2 * window:
+                    state.window_start, state.requests, state.tokens = now, 0.0, 0.0
+                    state.prev_requests, state.prev_tokens = 0.0, 0.0
+                elif elapsed >= window:
+                    state.window_start += window
+                    state.prev_requests, state.prev_tokens = state.requests, state.tokens
+                    state.requests, state.tokens = 0.0, 0.0
+                if state.benched_until > now:
+                    wait = state.benched_until - now
+                else:
+                    weight = 1 - (now - state.window_start) / window
+                    used_requests = state.prev_requests * weight + state.requests
+                    used_tokens = state.prev_tokens * weight + state.tokens
+                    room = min((self.rpm - used_requests - 1) / self.rpm, (self.tpm - used_tokens - cost) / self.tpm)
+                    if room >= 0:
+                        if room > best_room:
+                            best_index, best_room = index, room
+                        continue
+                    wait = max(window - (now - state.window_start), 0.001)
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+            if best_index is not None:
+                state = self._local[credentials[best_index].id]
+                state.requests += 1
+                state.tokens += cost
+                return best_index, best_room
+            return None, min_wait if min_wait is not None else window
+
+    def _touch_last_used(self, key_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_used_written.get(key_id, 0.0) < _LAST_USED_WRITE_INTERVAL:
+                return
+            self._last_used_written[key_id] = now
+        from app.database import get_db_session
+        from app.models.service_config import ServiceCredential
 
-            # mark used now
-            cred.last_used_at = now
-            db.add(cred)
+        db = get_db_session()
+        try:
+            db.execute(
+                sa_update(ServiceCredential)
+                .where(ServiceCredential.id == key_id)
+                .values(last_used_at=naive_now())
+                .execution_options(synchronize_session=False)
+            )
             db.commit()
-            db.refresh(cred)
-            return cred
-        except Exception:
+        except Exception:  # pragma: no cover - informational column only
             db.rollback()
-            raise
+            logger.debug("Failed to update last_used_at for Gemini key %s", key_id, exc_info=True)
         finally:
             db.close()
+
+
+_rotator: Optional[GeminiKeyRotator] = None
+_rotator_lock = threading.Lock()
+
+
+def get_gemini_key_rotator() -> GeminiKeyRotator:
+    global _rotator
+    if _rotator is None:
+        with _rotator_lock:
+            if _rotator is None:
+                settings = get_settings()
+                _rotator = GeminiKeyRotator(
+                    rpm=settings.gemini_key_rpm,
+                    tpm=settings.gemini_key_tpm,
+                    wait_timeout=settings.gemini_key_wait_timeout,
+                    backoff_seconds=settings.gemini_key_backoff_seconds,
+                )
+    return _rotator
+
+
+class GeminiCredentialPool:
+    @staticmethod
+    def active_credentials() -> List[CredentialRecord]:
+        return [item for item in get_config_cache().credentials("gemini") if item.credential_key]
+
+    @staticmethod
+    def acquire(tokens: int = 0) -> GeminiKeyLease:
+        """Lease the Gemini key with the most headroom for a call costing ``tokens``."""
+        return get_gemini_key_rotator().acquire(GeminiCredentialPool.active_credentials(), tokens=tokens)
+
+
+__all__ = [
+    "GeminiCredentialPool",
+    "GeminiKeyLease",
+    "GeminiKeyRotator",
+    "estimate_tokens",
+    "get_gemini_key_rotator",
+]
@@ -0,0 +1,251 @@
+"""Content-addressed cache for Gemini text responses.
+
+Storyboard, video prompt and console calls are keyed by a hash of the model,
+the rendered prompt and the effective generation/safety settings. A Celery retry
+after a downstream failure, a step reset or a re-run with identical inputs
+therefore reuses the earlier response instead of paying another round-trip and
+quota.
+
+Entries live in Redis (``gemini-cache:<sha256>``) with a TTL; an index sorted by
+write time keeps at most ``GEMINI_RESPONSE_CACHE_MAX_ENTRIES`` of them and
+responses above ``GEMINI_RESPONSE_CACHE_MAX_ENTRY_BYTES`` are never stored.
+Without Redis a bounded in-process LRU is used instead.
+
+Callers only store responses that parsed successfully (see
+``GeminiService._cached_generate``), so a malformed answer is never replayed.
+``bypass_gemini_cache()`` skips lookups for the enclosed calls, for example when a
+user explicitly asks for a fresh generation; the new response replaces the cached
+one so later retries reuse it.
+"""
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.config.settings import get_settings
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "gemini-cache:"
+_INDEX_KEY = "gemini-cache:index"
+_STATS_KEY = "gemini-cache:stats"
+
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("gemini_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_gemini_cache(enabled: bool = True) -> Iterator[None]:
+    """Skip the response cache for Gemini calls made inside this block."""
+    token = _bypass.set(bool(enabled) or _bypass.get())
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cache_key(kind: str, model: Optional[str], prompt: str, **options: Any) -> str:
+    """Stable sha256 over the request; ``None`` options are ignored."""
+    payload = {
+        "kind": kind,
+        "model": model,
+        "prompt": prompt,
+        "options": {key: value for key, value in options.items() if value is not None},
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class GeminiResponseCache:
+    """TTL + size bounded response store shared by all processes through Redis."""
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        ttl_seconds: int = 7 * 24 * 3600,
+        max_entries: int = 5000,
+        max_entry_bytes: int = 256 * 1024,
+    ) -> None:
+        self.enabled = enabled
+        self.ttl_seconds = max(int(ttl_seconds), 1)
+        self.max_entries = max(int(max_entries), 1)
+        self.max_entry_bytes = max(int(max_entry_bytes), 1)
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "bypassed": 0, "skipped": 0}
+
+    @staticmethod
+    def bypassed() -> bool:
+        return _bypass.get()
+
+    def _record(self, field: str, client: Any = None) -> None:
+        with self._lock:
+            self._stats[field] += 1
+        if client is not None:
+            try:
+                client.hincrby(_STATS_KEY, field, 1)
+            except Exception:  # pragma: no cover - stats are best effort
+                pass
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        client = get_redis_client()
+        if self.bypassed():
+            self._record("bypassed", client)
+            return None
+        value: Optional[str] = None
+        if client is not None:
+            try:
+                raw = client.get(_KEY_PREFIX + key)
+            except Exception:  # pragma: no cover - depends on environment
+                raw = None
+            if raw is not None:
+                value = raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)
+        else:
+            with self._lock:
+                entry = self._local.get(key)
+                if entry is not None:
+                    if entry[0] > time.monotonic():
+                        self._local.move_to_end(key)
+                        value = entry[1]
+                    else:
+                        self._local.pop(key, None)
+        self._record("hits" if value is not None else "misses", client)
+        return value
+
+    def set(self, key: str, value: str) -> bool:
+        # Bypassed calls still store: a fresh generation replaces the old entry.
+        if not self.enabled or not value:
+            return False
+        if len(value.encode("utf-8")) > self.max_entry_bytes:
+            self._record("skipped")
+            return False
+        client = get_redis_client()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.set(_KEY_PREFIX + key, value, ex=self.ttl_seconds)
+                pipe.zadd(_INDEX_KEY, {key: time.time()})
+                pipe.zcard(_INDEX_KEY)
+                overflow = pipe.execute()[-1] - self.max_entries
+                if overflow > 0:
+                    self._trim(client, overflow)
+            except Exception:  # pragma: no cover - depends on environment
+                logger.debug("Failed to store Gemini response in cache", exc_info=True)
+                return False
+        else:
+            with self._lock:
+                self._local[key] = (time.monotonic() + self.ttl_seconds, value)
+                self._local.move_to_end(key)
+                while len(self._local) > self.max_entries:
+                    self._local.popitem(last=False)
+        self._record("stores", client)
+        return True
+
+    def delete(self, key: str) -> None:
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.delete(_KEY_PREFIX + key)
+                client.zrem(_INDEX_KEY, key)
+            except Exception:  # pragma: no cover - depends on environment
+                pass
+        with self._lock:
+            self._local.pop(key, None)
+
+    @staticmethod
+    def _trim(client: Any, count: int) -> None:
+        # Oldest writes go first; entries whose TTL already expired are just dropped from the index.
+        oldest = client.zpopmin(_INDEX_KEY, count)
+        keys = [member.decode("utf-8") if isinstance(member, bytes) else member for member, _ in oldest]
+        if keys:
+            client.delete(*(_KEY_PREFIX + key for key in keys))
+
+    def clear(self) -> int:
+        """Drop every cached response; returns the number of entries removed."""
+        removed = 0
+        client = get_redis_client()
+        if client is not None:
+            try:
+                keys = [
+                    member.decode("utf-8") if isinstance(member, bytes) else member
+                    for member in client.zrange(_INDEX_KEY, 0, -1)
+                ]
+                if keys:
+                    client.delete(*(_KEY_PREFIX + key for key in keys))
+                client.delete(_INDEX_KEY)
+                removed += len(keys)
+            except Exception:  # pragma: no cover - depends on environment
+                logger.warning("Failed to clear Gemini response cache", exc_info=True)
+        with self._lock:
+            removed += len(self._local)
+            self._local.clear()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            local = dict(self._stats)
+            local_entries = len(self._local)
+        result: Dict[str, Any] = {
+            "enabled": self.enabled,
+            "backend": "local",
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            "entries": local_entries,
+            "process": local,
+        }
+        client = get_redis_client()
+        if client is not None:
+            try:
+                totals = client.hgetall(_STATS_KEY) or {}
+                result["backend"] = "redis"
+                result["entries"] = int(client.zcard(_INDEX_KEY) or 0)
+                result["total"] = {
+                    (name.decode("utf-8") if isinstance(name, bytes) else name): int(value)
+                    for name, value in totals.items()
+                }
+            except Exception:  # pragma: no cover - depends on environment
+                pass
+        counters = result.get("total") or local
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        result["hit_rate"] = round(counters.get("hits", 0) / lookups, 4) if lookups else None
+        return result
+
+
+_cache: Optional[GeminiResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_gemini_response_cache() -> GeminiResponseCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = GeminiResponseCache(
+                    enabled=settings.gemini_response_cache_enabled,
+                    ttl_seconds=settings.gemini_response_cache_ttl_seconds,
+                    max_entries=settings.gemini_response_cache_max_entries,
+                    max_entry_bytes=settings.gemini_response_cache_max_entry_bytes,
+                )
+    return _cache
+
+
+__all__ = [
+    "GeminiResponseCache",
+    "bypass_gemini_cache",
+    "cache_key",
+    "get_gemini_response_cache",
+]
@@ -5,16 +5,28 @@ import json
 import logging
 import re
 import os
+import threading
 import time
 from contextlib import contextmanager
 from pathlib import Path
 from string import Template
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple, TypeVar
 from textwrap import dedent, indent
 
+import google.ai.generativelanguage as glm
 import google.generativeai as genai
+from google.generativeai.types import content_types, generation_types, safety_types
 
-from app.services.gemini_credential_pool import GeminiCredentialPool
+from google.api_core import exceptions as google_exceptions
+from google.api_core.gapic_v1.client_info import ClientInfo
+
+from app.services.gemini_credential_pool import (
+    GeminiCredentialPool,
+    GeminiKeyLease,
+    estimate_tokens,
+    get_gemini_key_rotator,
+)
+from app.services.gemini_response_cache import cache_key, get_gemini_response_cache
 
 from app.utils.timezone import aware_now
 
@@ -32,9 +44,89 @@ _INVALID_RESPONSE_LOG = Path(__file__).resolve().parents[3] / "logs" / "gemini_s
 
 _STORYBOARD_TEMPLATE: Optional[Template] = None
 _VIDEO_TEMPLATES: Dict[str, Template] = {}
+_VIDEO_BATCH_TEMPLATE: Optional[Template] = None
 
 _DEBUG_MAX_CHARS = 2000
 
+# Output tokens reserved against a key's TPM budget before the real usage is known.
+_EXPECTED_OUTPUT_TOKENS = 1024
+# A 429 benches the key and the call is retried on the next best key.
+_MAX_KEY_ATTEMPTS = 3
+
+# ``genai.configure`` swaps a process-wide client, so concurrent requests on different
+# pooled keys would race; each key gets its own transport client instead. gRPC reads
+# the proxy when the channel is created, so clients are also keyed by the proxy URL.
+_KEY_CLIENTS: Dict[Tuple[str, Optional[str]], glm.GenerativeServiceClient] = {}
+_KEY_CLIENTS_LOCK = threading.Lock()
+
+T = TypeVar("T")
+
+
+def _generative_client(api_key: str, proxy: Optional[str] = None) -> glm.GenerativeServiceClient:
+    with _KEY_CLIENTS_LOCK:
+        client = _KEY_CLIENTS.get((api_key, proxy))
+        if client is None:
+            # A proxy change leaves the key's old channel unusable; drop it.
+            for stale in [key for key in _KEY_CLIENTS if key[0] == api_key]:
+                del _KEY_CLIENTS[stale]
+            client = glm.GenerativeServiceClient(
+                client_options={"api_key": api_key},
+                client_info=ClientInfo(user_agent=f"genai-py/{genai.__version__}"),
+            )
+            _KEY_CLIENTS[(api_key, proxy)] = client
+        return client
+
+
+class _KeyBoundModel:
+    """Calls ``GenerateContent`` on one key's own client with a request built here.
+
+    Stands in for ``genai.GenerativeModel``, whose client can only be swapped
+    globally; the SDK's public type helpers still normalise configs and safety settings.
+    """
+
+    def __init__(
+        self,
+        client: glm.GenerativeServiceClient,
+        model_name: str,
+        generation_config: Optional[Dict[str, Any]] = None,
+        safety_settings: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        self._client = client
+        self.model_name = model_name if "/" in model_name else f"models/{model_name}"
+        self.generation_config = generation_types.to_generation_config_dict(generation_config)
+        self.safety_settings = safety_types.to_easy_safety_dict(safety_settings, harm_category_set="new")
+
+    def build_request(
+        self,
+        prompt: str,
+        *,
+        generation_config: Optional[Dict[str, Any]] = None,
+        safety_settings: Optional[List[Dict[str, Any]]] = None,
+    ) -> glm.GenerateContentRequest:
+        merged_config = {**self.generation_config, **generation_types.to_generation_config_dict(generation_config)}
+        merged_safety = {
+            **self.safety_settings,
+            **safety_types.to_easy_safety_dict(safety_settings, harm_category_set="new"),
+        }
+        return glm.GenerateContentRequest(
+            model=self.model_name,
+            contents=content_types.to_contents(prompt),
+            generation_config=merged_config,
+            safety_settings=safety_types.normalize_safety_settings(merged_safety, harm_category_set="new"),
+        )
+
+    def generate_content(
+        self,
+        prompt: str,
+        *,
+        timeout: Optional[float] = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+        safety_settings: Optional[List[Dict[str, Any]]] = None,
+    ) -> generation_types.GenerateContentResponse:
+        request = self.build_request(prompt, generation_config=generation_config, safety_settings=safety_settings)
+        response = self._client.generate_content(request, timeout=timeout)
+        return generation_types.GenerateContentResponse.from_response(response)
+
 
 def _load_storyboard_template() -> Template:
     global _STORYBOARD_TEMPLATE
@@ -61,12 +153,70 @@ def _load_video_templates() -> Dict[str, Template]:
     return _VIDEO_TEMPLATES
 
 
+# Sections of video_prompt.tmpl reused verbatim by the batch template.
+_WORKFLOW_HEADING = "## **专业制作流程"
+_OUTPUT_HEADING = "## **输出规范"
+# Per-scene placeholders inside the shared sections point at the scene's entry in the batch.
+_BATCH_SECTION_VALUES = {
+    "narration": "该分镜旁白",
+    "scene_seq": "该分镜序号",
+    "image_prompt": "该分镜图片提示词",
+    "image_url": "该分镜首帧图片",
+    "storyboard_context": "完整视频大纲",
+    "duration_hint": "该分镜视频时长",
+}
+
+
+def _video_prompt_sections(content: str) -> Dict[str, str]:
+    """Split the single-scene template into the workflow and output-rule sections."""
+    lines = content.splitlines()
+    starts = {
+        name: next((index for index, line in enumerate(lines) if line.startswith(heading)), None)
+        for name, heading in (("workflow", _WORKFLOW_HEADING), ("output_rules", _OUTPUT_HEADING))
+    }
+    if starts["workflow"] is None or starts["output_rules"] is None:
+        raise ConfigurationException(
+            "video_prompt.tmpl is missing the workflow or output specification section",
+            service_name="gemini",
+        )
+    workflow = lines[starts["workflow"] + 1 : starts["output_rules"]]
+    rules: List[str] = []
+    for line in lines[starts["output_rules"] + 1 :]:
+        if line.startswith("- "):
+            rules.append(line)
+        elif rules:
+            break
+
+    def _render(section: List[str]) -> str:
+        text = Template("\n".join(section).strip()).safe_substitute(_BATCH_SECTION_VALUES)
+        # The result is spliced into another Template.
+        return text.replace("$", "$$")
+
+    return {"workflow": _render(workflow), "output_rules": _render(rules)}
+
+
+def _load_video_batch_template() -> Template:
+    """Batch wrapper whose workflow and output rules come from video_prompt.tmpl."""
+    global _VIDEO_BATCH_TEMPLATE
+    if _VIDEO_BATCH_TEMPLATE is None:
+        path = PROMPTS_DIR / "video_prompt_batch.tmpl"
+        if not path.exists():
+            raise FileNotFoundError(f"Batch video prompt template not found: {path}")
+        shared_path = PROMPTS_DIR / "video_prompt.tmpl"
+        if not shared_path.exists():
+            raise FileNotFoundError(f"Video prompt template not found: {shared_path}")
+        sections = _video_prompt_sections(shared_path.read_text(encoding="utf-8"))
+        wrapper = Template(path.read_text(encoding="utf-8")).safe_substitute(sections)
+        _VIDEO_BATCH_TEMPLATE = Template(wrapper)
+    return _VIDEO_BATCH_TEMPLATE
+
+
 class GeminiService(BaseService):
     """Wrapper around Google Gemini for storyboard and video prompt generation."""
 
     def __init__(self, settings: Optional[Settings] = None):
         super().__init__(settings)
-        self.model: Optional[genai.GenerativeModel] = None
+        self.model: Optional[_KeyBoundModel] = None
         self.api_key: Optional[str] = None
         self.model_name: Optional[str] = None
         self.generation_config: Dict[str, Any] = {
@@ -92,24 +242,19 @@ class GeminiService(BaseService):
         if not prompt or not prompt.strip():
             raise ValidationException("prompt 不能为空", field="prompt")
 
-        call_kwargs: Dict[str, Any] = {}
-        if generation_config:
-            call_kwargs["generation_config"] = generation_config
-        if safety_settings:
-            call_kwargs["safety_settings"] = safety_settings
-
         self._log_request("generate_content", method="POST", mode="console")
         self._log_debug("console_prompt", prompt)
 
         start_time = time.perf_counter()
         try:
-            with self._proxy_context():
-                self._prepare_model_for_request()
-                response = self.model.generate_content(
-                    prompt,
-                    request_options={"timeout": timeout_seconds},
-                    **call_kwargs,
-                )
+            response_text, _, cached = self._cached_generate(
+                "console",
+                prompt,
+                timeout_seconds=timeout_seconds,
+                parse=self._require_text,
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+            )
         except Exception as exc:
             self._log_error(exc, {"prompt_length": len(prompt)})
             if isinstance(exc, (APIException, ValidationException, ConfigurationException)):
@@ -120,19 +265,66 @@ class GeminiService(BaseService):
             ) from exc
 
         duration_ms = (time.perf_counter() - start_time) * 1000
+        self._log_response("generate_content (cached)" if cached else "generate_content", 200, duration_ms)
+        return response_text
 
-        response_text = getattr(response, "text", None)
-        self._log_debug("console_response", response_text or "<empty>")
-
-        if not response_text:
+    def _require_text(self, response_text: str) -> str:
+        if not response_text or not response_text.strip():
             raise APIException(
                 message="Empty response from Gemini",
                 service_name=self.service_name,
             )
-
-        self._log_response("generate_content", 200, duration_ms)
         return response_text
 
+    def _cached_generate(
+        self,
+        kind: str,
+        prompt: str,
+        *,
+        timeout_seconds: int,
+        parse: Callable[[str], T],
+        generation_config: Optional[Dict[str, Any]] = None,
+        safety_settings: Optional[List[Dict[str, Any]]] = None,
+    ) -> Tuple[T, str, bool]:
+        """Call Gemini through the response cache; returns (parsed, raw text, cached).
+
+        ``parse`` validates the text before it is stored, so only responses that
+        parsed are cached; a cached entry that no longer parses is dropped and
+        regenerated.
+        """
+        cache = get_gemini_response_cache()
+        key = cache_key(
+            kind,
+            self.model_name,
+            prompt,
+            generation_config={**self.generation_config, **(generation_config or {})},
+            safety_settings=safety_settings or self.safety_settings or None,
+        )
+        cached_text = cache.get(key)
+        if cached_text is not None:
+            try:
+                parsed = parse(cached_text)
+            except Exception:
+                cache.delete(key)
+            else:
+                self.logger.info("Gemini %s response served from cache (%s)", kind, key[:12])
+                return parsed, cached_text, True
+
+        call_kwargs: Dict[str, Any] = {}
+        if generation_config:
+            call_kwargs["generation_config"] = generation_config
+        if safety_settings:
+            call_kwargs["safety_settings"] = safety_settings
+
+        with self._proxy_context():
+            response = self._generate_content(prompt, timeout_seconds=timeout_seconds, **call_kwargs)
+
+        response_text = getattr(response, "text", None) or ""
+        self._log_debug(f"{kind}_response", response_text or "<empty>")
+        parsed = parse(response_text)
+        cache.set(key, response_text)
+        return parsed, response_text, False
+
     def _log_debug(self, label: str, content: Optional[str]) -> None:
         """Log debug information with optional truncation."""
 
@@ -175,37 +367,70 @@ class GeminiService(BaseService):
                 else:
                     os.environ[key] = old
 
-    def _configure_model(self, api_key: Optional[str]) -> None:
+    def _build_model(self, api_key: Optional[str]) -> _KeyBoundModel:
+        """Return a model bound to ``api_key``'s own client; never touches global genai state."""
         if not api_key:
             raise ConfigurationException("Gemini API key is not configured", service_name=self.service_name)
         if not self.model_name:
             raise ConfigurationException("Gemini model name is not configured", service_name=self.service_name)
 
-        genai.configure(api_key=api_key)
-        model_kwargs: Dict[str, Any] = {"model_name": self.model_name}
-        if self.generation_config:
-            model_kwargs["generation_config"] = self.generation_config
-        if self.safety_settings:
-            model_kwargs["safety_settings"] = self.safety_settings
+        proxies = get_proxy_for_service(self.service_name) or {}
+        return _KeyBoundModel(
+            _generative_client(api_key, proxies.get("https") or proxies.get("http")),
+            self.model_name,
+            generation_config=self.generation_config or None,
+            safety_settings=self.safety_settings or None,
+        )
 
-        self.model = genai.GenerativeModel(**model_kwargs)
-        self._client_ready = True
+    def _prepare_model_for_request(self, tokens: int = 0) -> Tuple[Optional[GeminiKeyLease], _KeyBoundModel]:
+        """Build a model on the pooled key that has the most headroom.
 
-    def _prepare_model_for_request(self) -> None:
-        credential = None
+        Falls back to the settings key when no DB-managed keys exist. Raises
+        RateLimitExceededException when every pooled key stays exhausted. The
+        model is returned rather than stored so concurrent calls keep their key.
+        """
         try:
-            credential = GeminiCredentialPool.acquire()
+            credentials = GeminiCredentialPool.active_credentials()
         except Exception as exc:  # pragma: no cover - pool fallback
-            credential = None
+            credentials = []
             self.logger.debug("Gemini credential pool unavailable, fallback to default key: %s", exc)
 
-        api_key = None
-        if credential and getattr(credential, "credential_key", None):
-            api_key = credential.credential_key
-        else:
-            api_key = self.api_key
-
-        self._configure_model(api_key)
+        lease = get_gemini_key_rotator().acquire(credentials, tokens=tokens) if credentials else None
+        if lease is None:
+            # Rebuilt per call so a changed proxy picks up a matching client.
+            return None, self._build_model(self.api_key)
+        return lease, self._build_model(lease.api_key)
+
+    def _generate_content(self, prompt: str, *, timeout_seconds: int, **call_kwargs: Any) -> Any:
+        """``generate_content`` on a leased key; a 429 benches that key and retries on another."""
+        rotator = get_gemini_key_rotator()
+        reserved = estimate_tokens(prompt) + _EXPECTED_OUTPUT_TOKENS
+        for attempt in range(_MAX_KEY_ATTEMPTS):
+            lease, model = self._prepare_model_for_request(reserved)
+            try:
+                response = model.generate_content(prompt, timeout=timeout_seconds, **call_kwargs)
+            except (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests):
+                if lease is None:
+                    raise
+                rotator.report_rate_limited(lease)
+                if attempt + 1 >= _MAX_KEY_ATTEMPTS:
+                    raise
+                continue
+            if lease is not None:
+                rotator.report_usage(lease, self._response_tokens(prompt, response))
+            return response
+
+    @staticmethod
+    def _response_tokens(prompt: str, response: Any) -> int:
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None) if usage is not None else None
+        if total:
+            return int(total)
+        try:
+            text = getattr(response, "text", None)
+        except Exception:  # blocked responses raise on .text
+            text = None
+        return estimate_tokens(prompt) + estimate_tokens(text)
 
     @property
     def service_name(self) -> str:
@@ -251,7 +476,8 @@ class GeminiService(BaseService):
 
         try:
             with self._proxy_context():
-                self._configure_model(self.api_key)
+                self.model = self._build_model(self.api_key)
+                self._client_ready = True
         except ConfigurationException:
             self._client_ready = False
             raise
@@ -326,25 +552,14 @@ class GeminiService(BaseService):
         try:
             self._log_request("generate_content", method="POST", num_scenes=requested_scenes)
 
-            with self._proxy_context():
-                self._prepare_model_for_request()
-                self._log_debug("storyboard_prompt", prompt)
-                response = self.model.generate_content(
-                    prompt,
-                    request_options={"timeout": 180},
-                )
-
-            response_text = getattr(response, "text", None)
-            self._log_debug("storyboard_response", response_text or "<empty>")
-
-            if not response_text:
-                raise APIException(
-                    message="Empty response from Gemini",
-                    service_name=self.service_name,
-                )
-
-            scenes = self._parse_storyboard_response(response_text, expected_count)
-            self.logger.info("Successfully generated %s scenes", len(scenes))
+            self._log_debug("storyboard_prompt", prompt)
+            scenes, _, cached = self._cached_generate(
+                "storyboard",
+                prompt,
+                timeout_seconds=180,
+                parse=lambda text: self._parse_storyboard_response(self._require_text(text), expected_count),
+            )
+            self.logger.info("Successfully generated %s scenes%s", len(scenes), " (cached)" if cached else "")
             return scenes
 
         except Exception as exc:
@@ -586,13 +801,22 @@ class GeminiService(BaseService):
 
         self._log_debug("video_prompt_request", prompt_text)
 
-        try:
-            with self._proxy_context():
-                self._prepare_model_for_request()
-                response = self.model.generate_content(
-                    prompt_text,
-                    request_options={"timeout": 60},
+        def _parse(raw_text: str) -> str:
+            prompt = self._parse_video_prompt_response(self._require_text(raw_text))
+            if not prompt:
+                raise ValidationException(
+                    "Failed to locate <prompt_en> tag in Gemini response",
+                    response_preview=raw_text[:200],
                 )
+            return prompt
+
+        try:
+            prompt, raw_text, cached = self._cached_generate(
+                "video_prompt",
+                prompt_text,
+                timeout_seconds=60,
+                parse=_parse,
+            )
         except Exception as exc:
             self._log_error(exc, {"feature": "video_prompt", "target": target})
             if isinstance(exc, (ConfigurationException, APIException, ValidationException)):
@@ -602,22 +826,7 @@ class GeminiService(BaseService):
                 service_name=self.service_name,
             ) from exc
 
-        raw_text = getattr(response, "text", "") or ""
-        self._log_debug("video_prompt_response", raw_text or "<empty>")
-        if not raw_text.strip():
-            raise APIException(
-                message="Empty response from Gemini",
-                service_name=self.service_name,
-            )
-
-        prompt = self._parse_video_prompt_response(raw_text)
-        if not prompt:
-            raise ValidationException(
-                "Failed to locate <prompt_en> tag in Gemini response",
-                response_preview=raw_text[:200],
-            )
-
-        return {"prompt": prompt, "raw_text": raw_text}
+        return {"prompt": prompt, "raw_text": raw_text, "cached": cached}
 
     def _build_video_prompt_prompt(
         self,
@@ -669,6 +878,154 @@ class GeminiService(BaseService):
         )
         return dedent(rendered).strip()
 
+    def generate_video_prompts(
+        self,
+        target: str,
+        scenes: List[Dict[str, Any]],
+        storyboard_context: Optional[str] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """Generate motion prompts for several scenes with a single Gemini call.
+
+        ``scenes`` items carry ``scene_seq``, ``narration`` and optionally
+        ``image_prompt``, ``image_url`` and ``duration_hint``. Returns prompts keyed
+        by ``scene_seq``; scenes missing from (or unusable in) the response are
+        simply absent so callers can fall back to ``generate_video_prompt``.
+        """
+
+        items = [item for item in scenes if (item.get("narration") or "").strip()]
+        if not items:
+            raise ValidationException("scenes must contain at least one narration", field="scenes")
+
+        self._log_request(
+            "generate_video_prompts",
+            method="POST",
+            target=target,
+            scene_count=len(items),
+        )
+
+        prompt_text = self._build_video_prompt_batch_prompt(items, storyboard_context)
+        self._log_debug("video_prompt_batch_request", prompt_text)
+
+        wanted = {int(item["scene_seq"]) for item in items}
+
+        def _parse(raw_text: str) -> Dict[int, str]:
+            prompts = self._parse_video_prompt_batch_response(self._require_text(raw_text), wanted)
+            if not prompts:
+                raise ValidationException(
+                    "Batch video prompt response contained no usable prompts",
+                    response_preview=raw_text[:200],
+                )
+            return prompts
+
+        try:
+            prompts, _, cached = self._cached_generate(
+                "video_prompt_batch",
+                prompt_text,
+                timeout_seconds=60 + 15 * len(items),
+                parse=_parse,
+            )
+        except Exception as exc:
+            self._log_error(exc, {"feature": "video_prompt_batch", "target": target, "scene_count": len(items)})
+            if isinstance(exc, (ConfigurationException, APIException, ValidationException)):
+                raise
+            raise APIException(
+                message=f"Failed to generate video prompts: {exc}",
+                service_name=self.service_name,
+            ) from exc
+
+        if len(prompts) < len(wanted):
+            self.logger.warning(
+                "Batch video prompt response covered %s of %s scenes",
+                len(prompts),
+                len(wanted),
+            )
+        return {
+            seq: {"prompt": prompt, "batch_size": len(items), "cached": cached}
+            for seq, prompt in prompts.items()
+        }
+
+    def _build_video_prompt_batch_prompt(
+        self,
+        scenes: List[Dict[str, Any]],
+        storyboard_context: Optional[str],
+    ) -> str:
+        context = (storyboard_context or "").strip()
+        if len(context) > 6000:
+            context = context[:6000] + "\n...[truncated]"
+        context_block = context or "(未提供，可结合旁白与图片提示词补全)"
+
+        def _sanitize_backticks(value: str) -> str:
+            return value.replace("`", "'")
+
+        blocks: List[str] = []
+        for item in scenes:
+            duration_hint = item.get("duration_hint")
+            if duration_hint and duration_hint > 0:
+                duration_block = f"约 {duration_hint:.0f} 秒"
+            else:
+                duration_block = "3-12 秒范围内"
+            lines = [
+                f"### 分镜序号 (scene_seq): {item['scene_seq']}",
+                f"- 旁白内容 (Narration): `{_sanitize_backticks((item.get('narration') or '').strip())}`",
+                "- 分镜图片提示词 (Image Prompt): "
+                f"`{_sanitize_backticks((item.get('image_prompt') or '').strip() or '(未提供)')}`",
+                f"- 首帧图片 (Starting Frame Image): `{item.get('image_url') or '[提供首帧图片，作为视频动态生成的起始画面]'}`",
+                f"- 视频时长 (Duration): {duration_block}",
+            ]
+            blocks.append("\n".join(lines))
+
+        rendered = _load_video_batch_template().substitute(
+            storyboard_context=_sanitize_backticks(context_block),
+            scene_count=len(scenes),
+            scenes_block="\n\n".join(blocks),
+        )
+        return dedent(rendered).strip()
+
+    def _parse_video_prompt_batch_response(self, response_text: str, wanted: set) -> Dict[int, str]:
+        """Extract ``{scene_seq: prompt}`` from a JSON array response (best effort)."""
+
+        candidates: List[str] = []
+        fenced = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", response_text)
+        if fenced:
+            candidates.append(fenced.group(1))
+        stripped = response_text.strip()
+        candidates.append(stripped)
+        first_bracket = stripped.find("[")
+        last_bracket = stripped.rfind("]")
+        if first_bracket != -1 and last_bracket > first_bracket:
+            candidates.append(stripped[first_bracket : last_bracket + 1])
+
+        parsed: Any = None
+        for candidate in candidates:
+            try:
+                parsed = json.loads(candidate)
+                break
+            except json.JSONDecodeError:
+                continue
+
+        if isinstance(parsed, dict):
+            parsed = parsed.get("scenes") or parsed.get("prompts") or parsed.get("分镜")
+        if not isinstance(parsed, list):
+            self._record_invalid_response(response_text)
+            return {}
+
+        prompts: Dict[int, str] = {}
+        for entry in parsed:
+            if not isinstance(entry, dict):
+                continue
+            seq_raw = entry.get("scene_seq") or entry.get("scene_number") or entry.get("分镜序号")
+            try:
+                seq = int(str(seq_raw).strip())
+            except (TypeError, ValueError):
+                continue
+            prompt = entry.get("prompt_en") or entry.get("prompt") or ""
+            if not isinstance(prompt, str):
+                continue
+            prompt = self._parse_video_prompt_response(prompt) or ""
+            if seq in wanted and prompt and seq not in prompts:
+                prompts[seq] = prompt
+        return prompts
+
     def _parse_video_prompt_response(self, response_text: str) -> Optional[str]:
         match = re.search(r"<prompt_en>([\s\S]*?)</prompt_en>", response_text, re.IGNORECASE)
         if match:
@@ -2,8 +2,8 @@
 from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
 from app.core.http_client import create_http_client
-from app.models.service_config import ServiceCredential, ServiceOption
 from .base import BaseService
+from .config_cache import get_config_cache
 from .exceptions import APIException, ConfigurationException, ValidationException
 
 class LiblibService(BaseService):
@@ -30,10 +30,7 @@ class LiblibService(BaseService):
             raise ConfigurationException("Liblib API URL not configured", service_name=self.service_name)
 
     def _load_credentials(self):
-        credential = self.db.query(ServiceCredential).filter(
-            ServiceCredential.service_name == "liblib",
-            ServiceCredential.is_active == True
-        ).first()
+        credential = get_config_cache().active_credential("liblib", latest=False)
         if not credential:
             raise ConfigurationException("Liblib credentials not found in database", service_name=self.service_name)
         self.api_key = credential.credential_key
@@ -45,11 +42,7 @@ class LiblibService(BaseService):
     def _load_checkpoint_config(self, checkpoint_id: Optional[str] = None):
         option_type_candidates = ("checkpoint_id", "model_id")
         if checkpoint_id:
-            option = self.db.query(ServiceOption).filter(
-                ServiceOption.service_name == "liblib",
-                ServiceOption.option_type.in_(option_type_candidates),
-                ServiceOption.option_key == checkpoint_id
-            ).first()
+            option = get_config_cache().find_option("liblib", option_type_candidates, key=checkpoint_id)
             if not option:
                 self.checkpoint_id = checkpoint_id
                 self.checkpoint_name = checkpoint_id
@@ -57,11 +50,7 @@ class LiblibService(BaseService):
                 self.checkpoint_id = option.option_value
                 self.checkpoint_name = option.option_name
         else:
-            option = self.db.query(ServiceOption).filter(
-                ServiceOption.service_name == "liblib",
-                ServiceOption.option_type.in_(option_type_candidates),
-                ServiceOption.is_default == True
-            ).first()
+            option = get_config_cache().find_option("liblib", option_type_candidates, default=True)
             if not option:
                 raise ConfigurationException("No default Liblib checkpoint configured", service_name=self.service_name)
             self.checkpoint_id = option.option_value
@@ -69,11 +58,7 @@ class LiblibService(BaseService):
 
     def _load_lora_config(self, lora_id: Optional[str] = None):
         if lora_id:
-            option = self.db.query(ServiceOption).filter(
-                ServiceOption.service_name == "liblib",
-                ServiceOption.option_type == "lora_id",
-                ServiceOption.option_key == lora_id
-            ).first()
+            option = get_config_cache().find_option("liblib", "lora_id", key=lora_id)
             if not option:
                 self.lora_id = lora_id
                 self.lora_name = lora_id
@@ -81,11 +66,7 @@ class LiblibService(BaseService):
                 self.lora_id = option.option_value
                 self.lora_name = option.option_name
         else:
-            option = self.db.query(ServiceOption).filter(
-                ServiceOption.service_name == "liblib",
-                ServiceOption.option_type == "lora_id",
-                ServiceOption.is_default == True
-            ).first()
+            option = get_config_cache().find_option("liblib", "lora_id", default=True)
             if not option:
                 self.lora_id = None
                 self.lora_name = None
@@ -93,6 +74,11 @@ class LiblibService(BaseService):
                 self.lora_id = option.option_value
                 self.lora_name = option.option_name
 
+    def set_model_overrides(self, lora_id: Optional[str] = None, checkpoint_id: Optional[str] = None) -> None:
+        """切换 checkpoint / LoRA，沿用已加载的凭证与共享 HTTP 客户端"""
+        self._load_checkpoint_config(checkpoint_id)
+        self._load_lora_config(lora_id)
+
     def generate_image(self, prompt: str, negative_prompt: Optional[str] = None, width: int = 1024, height: int = 1024, steps: int = 30, seed: Optional[int] = None) -> Dict[str, Any]:
         if not prompt or not prompt.strip():
             raise ValidationException("prompt cannot be empty", field="prompt")
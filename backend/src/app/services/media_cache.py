@@ -0,0 +1,345 @@
+"""Bounded on-disk cache for remote media inputs.
+
+FFmpegService and FasterWhisperService fetch provider URLs (images, clips, audio)
+through ``RemoteMediaCache.fetch``:
+
+- files live in ``<STORAGE_BASE_PATH>/tmp/ffmpeg-cache/<sha256(url)><suffix>``;
+- a per-key ``flock`` makes concurrent workers wait for a single download;
+- large bodies on servers that accept ranges are fetched as concurrent chunks;
+- after each download the directory is trimmed to ``MEDIA_CACHE_MAX_BYTES``,
+  evicting least recently used files (mtime is bumped on every hit).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from app.config.settings import get_settings
+from app.core.http_client import get_http_client
+
+try:  # pragma: no cover - POSIX only; Windows dev setups fall back to in-process locks
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+_DEFAULT_RANGE_THRESHOLD = 32 * 1024 ** 2
+_DEFAULT_RANGE_WORKERS = 4
+_STREAM_CHUNK = 1024 * 1024
+_TEMP_SUFFIXES = (".part", ".lock")
+
+
+@dataclass
+class MediaCacheStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_downloaded: int = 0
+    range_downloads: int = 0
+    evictions: int = 0
+    bytes_evicted: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class BoundedFileCache:
+    """Directory of cache files trimmed to a byte budget, least recently used first.
+
+    Entries are keyed by file name; ``_key_lock`` serialises producers of the same
+    entry across threads and (via ``flock`` on a ``<name>.lock`` sidecar) across
+    worker processes. Sidecars are deleted together with their entry; orphaned ones
+    (e.g. from failed downloads) are swept on the next eviction pass.
+    """
+
+    def __init__(self, cache_dir: Path, *, max_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max(int(max_bytes), 0)
+        self._stats = self._new_stats()
+        self._stats_lock = threading.Lock()
+        self._local_locks: Dict[str, threading.Lock] = {}
+        self._local_locks_guard = threading.Lock()
+
+    def _new_stats(self) -> Any:
+        return MediaCacheStats()
+
+    def evict(self, *, keep: Optional[Path] = None) -> int:
+        """Delete least recently used files until the cache fits its budget."""
+        if self.max_bytes <= 0 or not self.cache_dir.exists():
+            return 0
+        entries: List[Tuple[float, int, Path]] = []
+        orphan_locks: List[Path] = []
+        total = 0
+        for path in self.cache_dir.iterdir():
+            if path.name.endswith(".lock"):
+                if not path.with_name(path.name[: -len(".lock")]).exists():
+                    orphan_locks.append(path)
+                continue
+            if not path.is_file() or path.name.endswith(_TEMP_SUFFIXES):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == keep:
+                continue
+            with self._key_lock(path, blocking=False) as acquired:
+                # Skip entries another worker is (re)writing right now.
+                if not acquired:
+                    continue
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                self._unlink_lock_file(path)
+            total -= size
+            removed += 1
+            self._record(evictions=1, bytes_evicted=size)
+
+        for lock_path in orphan_locks:
+            entry = lock_path.with_name(lock_path.name[: -len(".lock")])
+            with self._key_lock(entry, blocking=False) as acquired:
+                if acquired and not entry.exists():
+                    self._unlink_lock_file(entry)
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return self._stats.as_dict()
+
+    @staticmethod
+    def _touch(path: Path) -> bool:
+        try:
+            os.utime(path, None)
+            return True
+        except OSError:
+            return False
+
+    def _record(self, **counters: int) -> None:
+        with self._stats_lock:
+            for name, value in counters.items():
+                setattr(self._stats, name, getattr(self._stats, name) + value)
+
+    @staticmethod
+    def _lock_path(target: Path) -> Path:
+        return target.with_name(target.name + ".lock")
+
+    def _unlink_lock_file(self, target: Path) -> None:
+        """Delete the sidecar of ``target``; only call while holding ``_key_lock(target)``."""
+        try:
+            self._lock_path(target).unlink()
+        except OSError:
+            pass
+
+    @contextmanager
+    def _key_lock(self, target: Path, *, blocking: bool = True) -> Iterator[bool]:
+        with self._local_locks_guard:
+            local_lock = self._local_locks.setdefault(target.name, threading.Lock())
+        if not local_lock.acquire(blocking=blocking):
+            yield False
+            return
+        try:
+            if fcntl is None:
+                yield True
+                return
+            lock_path = self._lock_path(target)
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            while True:
+                handle = lock_path.open("a")
+                try:
+                    try:
+                        fcntl.flock(handle.fileno(), flags)
+                    except BlockingIOError:
+                        yield False
+                        return
+                    # An evicting worker may have unlinked the sidecar while we waited;
+                    # our lock is then on an orphaned inode, so start over on the new file.
+                    try:
+                        current = os.stat(lock_path)
+                    except FileNotFoundError:
+                        continue
+                    locked = os.fstat(handle.fileno())
+                    if (current.st_dev, current.st_ino) != (locked.st_dev, locked.st_ino):
+                        continue
+                    try:
+                        yield True
+                    finally:
+                        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                    return
+                finally:
+                    handle.close()
+        finally:
+            local_lock.release()
+
+
+class RemoteMediaCache(BoundedFileCache):
+    """LRU-by-mtime download cache with a byte budget and cross-process locking."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        *,
+        max_bytes: int = _DEFAULT_MAX_BYTES,
+        range_threshold: int = _DEFAULT_RANGE_THRESHOLD,
+        range_workers: int = _DEFAULT_RANGE_WORKERS,
+    ) -> None:
+        super().__init__(cache_dir, max_bytes=max_bytes)
+        self.range_threshold = max(int(range_threshold), _STREAM_CHUNK)
+        self.range_workers = max(int(range_workers), 1)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def path_for(self, url: str) -> Path:
+        suffix = Path(urlparse(url).path).suffix or ".bin"
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}{suffix}"
+
+    def fetch(self, url: str, *, timeout: float = 60.0) -> Path:
+        """Return a local copy of ``url``, downloading it at most once across workers.
+
+        Raises httpx.HTTPError when the download fails.
+        """
+        target = self.path_for(url)
+        if self._touch(target):
+            self._record(hits=1)
+            return target
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._key_lock(target):
+            # Another worker may have finished the download while we waited.
+            if self._touch(target):
+                self._record(hits=1)
+                return target
+            size = self._download(url, target, timeout=timeout)
+            self._record(misses=1, bytes_downloaded=size)
+
+        self.evict(keep=target)
+        return target
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _download(self, url: str, target: Path, *, timeout: float) -> int:
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+        started = time.monotonic()
+        try:
+            # Shared keep-alive pool: repeated downloads from the same CDN reuse connections.
+            client = get_http_client("media-download", proxies={})
+            length = self._probe_range_support(client, url, timeout)
+            if length is not None and length >= self.range_threshold and self.range_workers > 1:
+                size = self._download_ranges(client, url, tmp_path, length, timeout)
+                self._record(range_downloads=1)
+            else:
+                size = self._download_stream(client, url, tmp_path, timeout)
+            tmp_path.replace(target)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        logger.info(
+            "Cached remote media %s (%d bytes) in %.2fs",
+            url,
+            size,
+            time.monotonic() - started,
+        )
+        return size
+
+    @staticmethod
+    def _probe_range_support(client: httpx.Client, url: str, timeout: float) -> Optional[int]:
+        """Return the content length when the server accepts byte ranges."""
+        try:
+            response = client.head(url, timeout=timeout)
+        except httpx.HTTPError:
+            return None
+        if response.status_code >= 400 or response.headers.get("accept-ranges", "").lower() != "bytes":
+            return None
+        try:
+            return int(response.headers.get("content-length", ""))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _download_stream(client: httpx.Client, url: str, tmp_path: Path, timeout: float) -> int:
+        size = 0
+        with client.stream("GET", url, timeout=timeout) as response:
+            response.raise_for_status()
+            with tmp_path.open("wb") as handle:
+                for chunk in response.iter_bytes(_STREAM_CHUNK):
+                    if chunk:
+                        handle.write(chunk)
+                        size += len(chunk)
+        return size
+
+    def _download_ranges(self, client: httpx.Client, url: str, tmp_path: Path, length: int, timeout: float) -> int:
+        part_size = -(-length // self.range_workers)
+        ranges = [
+            (start, min(start + part_size, length) - 1)
+            for start in range(0, length, part_size)
+        ]
+        with tmp_path.open("wb") as handle:
+            handle.truncate(length)
+
+        def fetch_range(bounds: Tuple[int, int]) -> int:
+            start, end = bounds
+            written = 0
+            with client.stream("GET", url, headers={"Range": f"bytes={start}-{end}"}, timeout=timeout) as response:
+                if response.status_code != 206:
+                    raise httpx.HTTPStatusError(
+                        f"Range request returned {response.status_code}",
+                        request=response.request,
+                        response=response,
+                    )
+                with tmp_path.open("r+b") as handle:
+                    handle.seek(start)
+                    for chunk in response.iter_bytes(_STREAM_CHUNK):
+                        if chunk:
+                            handle.write(chunk)
+                            written += len(chunk)
+            if written != end - start + 1:
+                raise httpx.TransportError(f"Incomplete range {start}-{end} for {url}")
+            return written
+
+        with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+            return sum(pool.map(fetch_range, ranges))
+
+
+_cache: Optional[RemoteMediaCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_remote_media_cache() -> RemoteMediaCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                base = Path(settings.STORAGE_BASE_PATH or "storage").resolve()
+                _cache = RemoteMediaCache(
+                    base / "tmp" / "ffmpeg-cache",
+                    max_bytes=settings.MEDIA_CACHE_MAX_BYTES or _DEFAULT_MAX_BYTES,
+                    range_threshold=settings.MEDIA_CACHE_RANGE_THRESHOLD_BYTES or _DEFAULT_RANGE_THRESHOLD,
+                    range_workers=settings.MEDIA_CACHE_RANGE_WORKERS or _DEFAULT_RANGE_WORKERS,
+                )
+    return _cache
+
+
+__all__ = ["BoundedFileCache", "MediaCacheStats", "RemoteMediaCache", "get_remote_media_cache"]
@@ -0,0 +1,208 @@
+"""On-demand thumbnails and video posters for stored media.
+
+``/api/v1/storage/<path>?w=320`` serves a downscaled copy of an image and
+``?poster=1`` (optionally with ``w``) the first frame of a video, so list views do
+not download full-size RunningHub outputs or whole clips just to render previews.
+
+Derivatives live in ``<STORAGE_BASE_PATH>/tmp/derivatives`` and are keyed by the
+source path, its size + mtime and the requested parameters, so rewriting the
+source invalidates them implicitly. The directory shares ``BoundedFileCache``
+with the remote media cache: a per-key lock makes concurrent requests wait for a
+single render and the total size is trimmed to
+``STORAGE_DERIVATIVE_CACHE_MAX_BYTES``.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from app.config.settings import get_settings
+from app.services.media_cache import BoundedFileCache
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif"}
+VIDEO_SUFFIXES = {".mp4", ".mov", ".m4v", ".webm", ".mkv"}
+
+_MIN_WIDTH = 16
+_POSTER_OFFSET_SECONDS = 0.5
+_FFMPEG_TIMEOUT_SECONDS = 30
+
+
+class UnsupportedDerivative(ValueError):
+    """The source type has no derivative for the requested parameters."""
+
+
+class DerivativeError(RuntimeError):
+    """Rendering failed (corrupt source, FFmpeg error)."""
+
+
+@dataclass
+class DerivativeCacheStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_generated: int = 0
+    evictions: int = 0
+    bytes_evicted: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    width: Optional[int] = None
+    poster: bool = False
+
+    @property
+    def token(self) -> str:
+        return f"w{self.width or 0}-p{int(self.poster)}"
+
+
+class MediaDerivativeCache(BoundedFileCache):
+    """Render resized images / video posters once and keep them on disk."""
+
+    def __init__(self, cache_dir: Path, *, max_bytes: int, max_width: int, ffmpeg_bin: str = "ffmpeg") -> None:
+        super().__init__(cache_dir, max_bytes=max_bytes)
+        self.max_width = max(int(max_width), _MIN_WIDTH)
+        self.ffmpeg_bin = ffmpeg_bin
+        self._image_suffix = ".webp" if features.check("webp") else ".png"
+
+    def _new_stats(self) -> DerivativeCacheStats:
+        return DerivativeCacheStats()
+
+    def normalize(self, *, width: Optional[int] = None, poster: bool = False) -> DerivativeSpec:
+        if width is not None:
+            width = min(max(int(width), _MIN_WIDTH), self.max_width)
+        return DerivativeSpec(width=width, poster=bool(poster))
+
+    def path_for(self, source: Path, stat_result: os.stat_result, spec: DerivativeSpec) -> Path:
+        key = f"{source}|{stat_result.st_size}|{stat_result.st_mtime_ns}|{spec.token}"
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        suffix = ".jpg" if spec.poster else self._image_suffix
+        return self.cache_dir / f"{digest}{suffix}"
+
+    def get(self, source: Path, spec: DerivativeSpec) -> Path:
+        """Return the derivative file for ``source`` (or ``source`` itself when no
+        work is needed, e.g. a width at or above the original)."""
+        suffix = source.suffix.lower()
+        if spec.poster and suffix not in VIDEO_SUFFIXES:
+            raise UnsupportedDerivative("poster is only available for video files")
+        if not spec.poster and (spec.width is None or suffix not in IMAGE_SUFFIXES):
+            raise UnsupportedDerivative("resizing is only available for image files")
+
+        stat_result = source.stat()
+        target = self.path_for(source, stat_result, spec)
+        if self._touch(target):
+            self._record(hits=1)
+            return target
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._key_lock(target):
+            # A concurrent request may have rendered it while we waited.
+            if self._touch(target):
+                self._record(hits=1)
+                return target
+            tmp_path = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+            started = time.monotonic()
+            try:
+                if spec.poster:
+                    self._render_poster(source, tmp_path, spec.width)
+                elif not self._render_image(source, tmp_path, spec.width or self.max_width):
+                    return source
+                tmp_path.replace(target)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            size = target.stat().st_size
+            self._record(misses=1, bytes_generated=size)
+            logger.debug(
+                "Rendered %s derivative of %s (%d bytes) in %.2fs",
+                spec.token,
+                source,
+                size,
+                time.monotonic() - started,
+            )
+
+        self.evict(keep=target)
+        return target
+
+    # ------------------------------------------------------------------
+    # Renderers
+    # ------------------------------------------------------------------
+    def _render_image(self, source: Path, output: Path, width: int) -> bool:
+        try:
+            with Image.open(source) as image:
+                height = max(round(image.height * width / max(image.width, 1)), 1)
+                # draft() lets JPEG decode at a reduced scale instead of full resolution.
+                image.draft("RGB", (width, height))
+                image = ImageOps.exif_transpose(image)
+                if image.width <= width:
+                    return False
+                if image.mode not in ("RGB", "RGBA"):
+                    image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+                image.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+                if self._image_suffix == ".webp":
+                    image.save(output, format="WEBP", quality=80, method=4)
+                else:
+                    image.save(output, format="PNG", optimize=True)
+        except (UnidentifiedImageError, OSError) as exc:
+            raise DerivativeError(f"cannot resize {source.name}: {exc}") from exc
+        return True
+
+    def _render_poster(self, source: Path, output: Path, width: Optional[int]) -> None:
+        # Seek slightly in: the very first frame of generated clips is often black.
+        for offset in (_POSTER_OFFSET_SECONDS, 0.0):
+            command = [self.ffmpeg_bin, "-hide_banner", "-loglevel", "error", "-y"]
+            if offset:
+                command += ["-ss", f"{offset:.3f}"]
+            command += ["-i", str(source), "-frames:v", "1", "-an"]
+            if width:
+                command += ["-vf", f"scale='min({width},iw)':-2"]
+            command += ["-q:v", "3", "-f", "image2", "-c:v", "mjpeg", str(output)]
+            try:
+                result = subprocess.run(command, capture_output=True, timeout=_FFMPEG_TIMEOUT_SECONDS)
+            except (OSError, subprocess.TimeoutExpired) as exc:
+                raise DerivativeError(f"cannot extract poster from {source.name}: {exc}") from exc
+            if result.returncode == 0 and output.exists() and output.stat().st_size > 0:
+                return
+        stderr = result.stderr.decode("utf-8", errors="replace").strip()
+        raise DerivativeError(f"cannot extract poster from {source.name}: {stderr or 'no frame decoded'}")
+
+
+_cache: Optional[MediaDerivativeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_media_derivative_cache() -> MediaDerivativeCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                base = Path(settings.STORAGE_BASE_PATH or "storage").resolve()
+                _cache = MediaDerivativeCache(
+                    base / "tmp" / "derivatives",
+                    max_bytes=settings.storage_derivative_cache_max_bytes,
+                    max_width=settings.storage_derivative_max_width,
+                    ffmpeg_bin=settings.FFMPEG_BIN or "ffmpeg",
+                )
+    return _cache
+
+
+__all__ = [
+    "DerivativeCacheStats",
+    "DerivativeError",
+    "DerivativeSpec",
+    "MediaDerivativeCache",
+    "UnsupportedDerivative",
+    "get_media_derivative_cache",
+]
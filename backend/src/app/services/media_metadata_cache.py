@@ -0,0 +1,264 @@
+"""Shared ffprobe result cache.
+
+Every probe site (FFmpegService, AudioPostProcessor, audio_task) goes through
+``probe_media``. Results are kept in an in-process LRU and persisted as JSON under
+``<STORAGE_BASE_PATH>/tmp/ffprobe-cache`` so other workers reuse them; the directory
+is trimmed to ``MEDIA_METADATA_DISK_CACHE_MAX_BYTES``, least recently used first.
+
+Cache keys:
+- local files: absolute path + size + mtime, so a rewritten file is never served stale;
+- remote URLs: the URL itself. Entries carry the ETag/Last-Modified seen when they
+  were probed; only a memory miss sends a HEAD to check it (URLs without a
+  validator are not cached).
+
+Producers call ``register_media_metadata`` right after writing a file so downstream
+steps never re-probe an output we just created.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import ffmpeg
+import httpx
+
+from app.config.settings import get_settings
+from app.core.http_client import get_http_client
+from app.services.media_cache import BoundedFileCache
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MAX_ENTRIES = 512
+# Trimming scans the directory, so only do it every few writes.
+_EVICT_EVERY_WRITES = 32
+
+
+class MediaMetadataCache:
+    """Two-level (memory LRU + disk) cache of raw ffprobe output."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: Optional[int] = None,
+        cache_dir: Optional[Path] = None,
+        max_disk_bytes: Optional[int] = None,
+    ) -> None:
+        settings = get_settings()
+        self._max_entries = max(int(max_entries or settings.MEDIA_METADATA_CACHE_SIZE or _DEFAULT_MAX_ENTRIES), 1)
+        if cache_dir is None and settings.STORAGE_BASE_PATH:
+            cache_dir = Path(settings.STORAGE_BASE_PATH).resolve() / "tmp" / "ffprobe-cache"
+        if max_disk_bytes is None:
+            max_disk_bytes = settings.media_metadata_disk_cache_max_bytes
+        self._disk = BoundedFileCache(cache_dir, max_bytes=max_disk_bytes) if cache_dir is not None else None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    @staticmethod
+    def key_for(source: str) -> Optional[str]:
+        """Return the cache key for ``source``, or None when it cannot be keyed."""
+        if _is_remote(source):
+            return f"url:{source}"
+        try:
+            path = Path(source).resolve()
+            stat = path.stat()
+        except OSError:
+            return None
+        return f"file:{path.as_posix()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    @staticmethod
+    def remote_validator(url: str) -> Optional[str]:
+        """ETag (or Last-Modified) of a remote media URL; None when the server offers neither."""
+        try:
+            response = get_http_client("media-download", proxies={}).head(str(url), timeout=10.0)
+        except httpx.HTTPError:
+            return None
+        if response.status_code >= 400:
+            return None
+        return response.headers.get("etag") or response.headers.get("last-modified")
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+    def get(
+        self,
+        key: str,
+        *,
+        validator: Optional[Callable[[], Optional[str]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Look up ``key``; ``validator`` is called only to check an entry read from disk."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+        data = self._read_disk(key, validator)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: Dict[str, Any], *, validator: Optional[str] = None) -> None:
+        with self._lock:
+            self._remember(key, data)
+        self._write_disk(key, data, validator)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _remember(self, key: str, data: Dict[str, Any]) -> None:
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self._disk is None:
+            return None
+        # Flat layout: BoundedFileCache trims a single directory.
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self._disk.cache_dir / f"{digest}.json"
+
+    def _read_disk(
+        self,
+        key: str,
+        validator: Optional[Callable[[], Optional[str]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(payload, dict) or payload.get("key") != key:
+            return None
+        data = payload.get("data")
+        if not isinstance(data, dict):
+            return None
+        stored = payload.get("validator")
+        if stored is not None and validator is not None and validator() != stored:
+            return None
+        self._disk._touch(path)
+        return data
+
+    def _write_disk(self, key: str, data: Dict[str, Any], validator: Optional[str] = None) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        payload: Dict[str, Any] = {"key": key, "data": data}
+        if validator is not None:
+            payload["validator"] = validator
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.part")
+            tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError:
+            logger.warning("Failed to persist ffprobe cache entry for %s", key, exc_info=True)
+            return
+        with self._lock:
+            self._writes_since_evict += 1
+            due = self._writes_since_evict >= _EVICT_EVERY_WRITES
+            if due:
+                self._writes_since_evict = 0
+        if due:
+            self._disk.evict(keep=path)
+
+
+def _is_remote(source: str) -> bool:
+    return urlparse(str(source)).scheme in {"http", "https"}
+
+
+_cache: Optional[MediaMetadataCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_media_metadata_cache() -> MediaMetadataCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MediaMetadataCache()
+    return _cache
+
+
+def probe_media(source: str, *, ffprobe_bin: Optional[str] = None) -> Dict[str, Any]:
+    """Return raw ffprobe output for ``source``, probing only on a cache miss.
+
+    Raises ffmpeg.Error when ffprobe fails, like ``ffmpeg.probe``.
+    """
+    cache = get_media_metadata_cache()
+    key = cache.key_for(source)
+    remote = _is_remote(source)
+    validators: Dict[str, Optional[str]] = {}
+
+    def validator() -> Optional[str]:
+        # At most one HEAD per probe, shared by the disk check and the store below.
+        if "current" not in validators:
+            validators["current"] = cache.remote_validator(str(source))
+        return validators["current"]
+
+    if key is not None:
+        cached = cache.get(key, validator=validator if remote else None)
+        if cached is not None:
+            return cached
+
+    data = _run_ffprobe(source, ffprobe_bin)
+    if key is not None and isinstance(data, dict):
+        if not remote:
+            cache.put(key, data)
+        elif validator() is not None:
+            cache.put(key, data, validator=validator())
+    return data
+
+
+def register_media_metadata(
+    path: str,
+    data: Optional[Dict[str, Any]] = None,
+    *,
+    ffprobe_bin: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Record ffprobe output for a freshly written file for every later reader.
+
+    Pass ``data`` when the caller already holds the probe result; otherwise the file
+    is probed once (a new file can never be in the cache, so no lookup is made).
+    """
+    if data is None:
+        data = _run_ffprobe(path, ffprobe_bin)
+    cache = get_media_metadata_cache()
+    key = cache.key_for(path)
+    if key is not None and isinstance(data, dict):
+        cache.put(key, data)
+    return data
+
+
+def _run_ffprobe(source: str, ffprobe_bin: Optional[str]) -> Dict[str, Any]:
+    settings = get_settings()
+    return ffmpeg.probe(str(source), cmd=ffprobe_bin or settings.FFPROBE_BIN or "ffprobe")
+
+
+__all__ = [
+    "MediaMetadataCache",
+    "get_media_metadata_cache",
+    "probe_media",
+    "register_media_metadata",
+]
@@ -7,9 +7,8 @@ from urllib.parse import urljoin
 
 from .base import BaseService
 from .exceptions import APIException, ConfigurationException, ValidationException
-from app.models.service_config import ServiceCredential
-from app.database import get_db_session
 from app.core.http_client import create_http_client
+from .config_cache import get_config_cache
 
 
 class NCAService(BaseService):
@@ -29,59 +28,47 @@ class NCAService(BaseService):
 
     def _load_credentials(self) -> None:
         """从数据库加载 API Key 与 Base URL（DB-only 策略）"""
-        session = self.db or get_db_session()
-        should_close = self.db is None
-        try:
-            credential = session.query(ServiceCredential).filter(
-                ServiceCredential.service_name == "nca",
-                ServiceCredential.is_active == True,
-            ).order_by(ServiceCredential.id.desc()).first()
-            if not credential or not credential.credential_key:
-                raise ConfigurationException(
-                    "NCA API key not found in database (service_credentials). Add an active nca credential via /api/v1/config/credentials",
-                    service_name=self.service_name,
-                    required_envs=["service_credentials (nca)"],
-                )
-            if not credential.api_url:
-                raise ConfigurationException(
-                    "NCA base URL not configured in database (service_credentials.api_url)",
-                    service_name=self.service_name,
-                    required_envs=["service_credentials (nca.api_url)"],
-                )
-            self.api_key = credential.credential_key
-            self.base_url = credential.api_url.rstrip("/")
-
-            asset_base = self.file_base_url or None
-            secret_value = credential.credential_secret or ""
-            if secret_value:
-                secret_value = secret_value.strip()
-                parsed_secret: Optional[Dict[str, Any]] = None
-                if secret_value.startswith("{") and secret_value.endswith("}"):
-                    try:
-                        parsed_secret = json.loads(secret_value)
-                    except json.JSONDecodeError:
-                        parsed_secret = None
-                if parsed_secret and isinstance(parsed_secret, dict):
-                    asset_base = parsed_secret.get("file_base_url") or parsed_secret.get("asset_base_url") or asset_base
-                elif secret_value.lower().startswith("http"):
-                    asset_base = secret_value
-
-            description = (credential.description or "").strip()
-            if description.lower().startswith("http"):
-                asset_base = description
-
-            if asset_base:
-                self.file_base_url = asset_base.rstrip("/") + "/"
-            elif self.base_url:
-                self.file_base_url = self.base_url.rstrip("/") + "/"
-
-            self.logger.info("Loaded NCA credentials from database")
-        finally:
-            if should_close:
+        credential = get_config_cache().active_credential("nca")
+        if not credential or not credential.credential_key:
+            raise ConfigurationException(
+                "NCA API key not found in database (service_credentials). Add an active nca credential via /api/v1/config/credentials",
+                service_name=self.service_name,
+                required_envs=["service_credentials (nca)"],
+            )
+        if not credential.api_url:
+            raise ConfigurationException(
+                "NCA base URL not configured in database (service_credentials.api_url)",
+                service_name=self.service_name,
+                required_envs=["service_credentials (nca.api_url)"],
+            )
+        self.api_key = credential.credential_key
+        self.base_url = credential.api_url.rstrip("/")
+
+        asset_base = self.file_base_url or None
+        secret_value = credential.credential_secret or ""
+        if secret_value:
+            secret_value = secret_value.strip()
+            parsed_secret: Optional[Dict[str, Any]] = None
+            if secret_value.startswith("{") and secret_value.endswith("}"):
                 try:
-                    session.close()
-                except Exception:
-                    pass
+                    parsed_secret = json.loads(secret_value)
+                except json.JSONDecodeError:
+                    parsed_secret = None
+            if parsed_secret and isinstance(parsed_secret, dict):
+                asset_base = parsed_secret.get("file_base_url") or parsed_secret.get("asset_base_url") or asset_base
+            elif secret_value.lower().startswith("http"):
+                asset_base = secret_value
+
+        description = (credential.description or "").strip()
+        if description.lower().startswith("http"):
+            asset_base = description
+
+        if asset_base:
+            self.file_base_url = asset_base.rstrip("/") + "/"
+        elif self.base_url:
+            self.file_base_url = self.base_url.rstrip("/") + "/"
+
+        self.logger.info("Loaded NCA credentials from database")
 
     def _validate_configuration(self) -> None:
         if not getattr(self, "api_key", None):
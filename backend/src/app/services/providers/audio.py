@@ -1,13 +1,18 @@
 """Audio generation provider implementations."""
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
+from typing import List, Optional, Sequence, Union
 
 from sqlalchemy.orm import Session
 
 from app.config.settings import get_settings
 from app.services.exceptions import ConfigurationException
 from app.services.fishaudio_service import FishAudioService
+from app.services.rate_limiter import RateLimitTicket, rate_limiter
+from app.services.storage_backends import get_storage_backend, publish_file
+from app.services.tts_cache import get_tts_audio_cache, tts_cache_key
 from .base import AudioGenerationProvider, MediaRequest, MediaResult
 
 
@@ -17,6 +22,8 @@ class FishAudioProvider(AudioGenerationProvider):
     def __init__(self, db: Session) -> None:
         self._service = FishAudioService(db)
         self._settings = get_settings()
+        self._cache = get_tts_audio_cache()
+        self._backend = get_storage_backend()
 
     def _ensure_storage_dir(self) -> Path:
         if not self._settings.STORAGE_BASE_PATH:
@@ -57,46 +64,199 @@ class FishAudioProvider(AudioGenerationProvider):
             "public_url": public_url,
         }
 
-    def generate(self, request: MediaRequest) -> MediaResult:
-        if not request.text:
-            return MediaResult(status="failed", meta={"error": "text is empty"})
+    def _rate_limit_key(self, voice_id: str | None) -> str:
+        key = f"cred-{getattr(self._service, 'credential_id', None) or 'default'}"
+        if self._settings.FISHAUDIO_RATE_LIMIT_PER_VOICE:
+            key = f"{key}:voice-{voice_id or self._service.voice_id}"
+        return key
 
-        extra = request.extra or {}
-        fmt = extra.get("format") or "mp3"
-        sample_rate = extra.get("sample_rate") or 44100
-        audio_bytes = self._service.text_to_speech(
-            text=request.text,
-            voice_id=request.voice_id,
-            format=fmt,
-            sample_rate=sample_rate,
+    def _acquire_ticket(self, request: MediaRequest) -> RateLimitTicket:
+        return rate_limiter.acquire(
+            self.provider_name,
+            feature="audio",
+            key=self._rate_limit_key(request.voice_id),
         )
 
-        audio_dir = self._ensure_storage_dir()
+    def _output_path(self, request: MediaRequest) -> Path:
+        extra = request.extra or {}
         filename = extra.get("filename")
         if not filename:
             filename = f"{extra.get('task_id', 'task')}_{extra.get('scene_seq', 'scene')}.mp3"
-        output_path = audio_dir / filename
-        with open(output_path, "wb") as fh:
-            fh.write(audio_bytes)
+        return self._ensure_storage_dir() / filename
+
+    def _cache_key(self, request: MediaRequest) -> str:
+        extra = request.extra or {}
+        return tts_cache_key(
+            self.provider_name,
+            request.voice_id or self._service.voice_id,
+            request.text or "",
+            audio_format=extra.get("format") or "mp3",
+            sample_rate=extra.get("sample_rate") or 44100,
+            model=extra.get("model"),
+        )
+
+    def _cached_result(self, request: MediaRequest, key: str) -> Optional[MediaResult]:
+        """Serve the request from the TTS cache (skipped when ``extra["tts_cache"]`` is False)."""
+        if (request.extra or {}).get("tts_cache") is False:
+            return None
+        output_path = self._output_path(request)
+        hit = self._cache.fetch(key, output_path)
+        if hit is None:
+            return None
+        result = self._completed_result(request, output_path, hit.size, None)
+        result.meta["tts_cache"] = {"hit": True, "key": key}
+        if hit.duration:
+            result.meta["duration"] = hit.duration
+        return result
 
+    def _remember(self, request: MediaRequest, key: str, result: MediaResult) -> MediaResult:
+        extra = request.extra or {}
+        duration = self._cache.store(
+            key,
+            Path(result.meta["path"]),
+            provider=self.provider_name,
+            voice_id=request.voice_id or self._service.voice_id,
+            text=request.text or "",
+            audio_format=extra.get("format") or "mp3",
+            sample_rate=extra.get("sample_rate") or 44100,
+            model=extra.get("model"),
+        )
+        result.meta["tts_cache"] = {"hit": False, "key": key}
+        if duration:
+            result.meta["duration"] = duration
+        return result
+
+    def _completed_result(
+        self,
+        request: MediaRequest,
+        output_path: Path,
+        size: int,
+        ticket: Optional[RateLimitTicket],
+        synthesis: Optional[dict] = None,
+    ) -> MediaResult:
+        extra = request.extra or {}
         access_info = self._build_access_paths(output_path)
-        resource_url = access_info["api_path"]
+        if self._backend.remote:
+            # Scene composition may run on another node; it resolves the same relative path.
+            publish_file(self._backend, output_path, access_info["relative_path"])
         meta = {
-            "storage": "local",
-            "size": len(audio_bytes),
+            "storage": self._backend.name,
+            "size": size,
             "path": str(output_path),
             "relative_path": access_info["relative_path"],
             "api_path": access_info["api_path"],
             "public_url": access_info["public_url"],
-            "format": fmt,
-            "sample_rate": sample_rate,
+            "format": extra.get("format") or "mp3",
+            "sample_rate": extra.get("sample_rate") or 44100,
         }
-
+        if ticket is not None:
+            meta["rate_limit"] = ticket.as_meta()
+        if synthesis:
+            meta["synthesis"] = synthesis
         return MediaResult(
             status="completed",
-            resource_url=resource_url,
+            resource_url=access_info["api_path"],
             meta=meta,
         )
 
+    def generate(self, request: MediaRequest) -> MediaResult:
+        if not request.text:
+            return MediaResult(status="failed", meta={"error": "text is empty"})
+
+        key = self._cache_key(request)
+        cached = self._cached_result(request, key)
+        if cached is not None:
+            return cached
+
+        extra = request.extra or {}
+        ticket = self._acquire_ticket(request)
+        output_path = self._output_path(request)
+        # Streams into a .part file swapped in atomically: a cache hit may have
+        # hard-linked the scene file to the cache entry, which must not be rewritten.
+        synthesis = self._service.stream_text_to_speech_sync(
+            request.text,
+            output_path,
+            voice_id=request.voice_id,
+            format=extra.get("format") or "mp3",
+            sample_rate=extra.get("sample_rate") or 44100,
+        )
+        synthesis["streamed"] = True
+        return self._remember(
+            request,
+            key,
+            self._completed_result(request, output_path, synthesis["bytes"], ticket, synthesis),
+        )
+
+    def generate_many(
+        self,
+        requests: Sequence[MediaRequest],
+        *,
+        max_concurrency: Optional[int] = None,
+    ) -> List[Union[MediaResult, BaseException]]:
+        """Synthesize several requests concurrently, streaming each body to its file.
+
+        Requests already in the TTS cache are served first without touching the
+        provider. At most ``max_concurrency`` (``FISHAUDIO_TTS_CONCURRENCY``) of the
+        remaining requests are in flight; each still takes a token from the
+        FishAudio rate limiter. Results keep the order of ``requests``; a failed
+        request yields its exception instead of aborting the others.
+        """
+        if not requests:
+            return []
+        results: List[Union[MediaResult, BaseException, None]] = [None] * len(requests)
+        misses: List[int] = []
+        keys: List[str] = []
+        for index, request in enumerate(requests):
+            keys.append(self._cache_key(request))
+            results[index] = self._cached_result(request, keys[index]) if request.text else None
+            if results[index] is None:
+                misses.append(index)
+
+        if misses:
+            limit = max(int(max_concurrency or self._settings.fishaudio_tts_concurrency), 1)
+            synthesized = asyncio.run(self._generate_many([requests[index] for index in misses], limit))
+            for index, result in zip(misses, synthesized):
+                if isinstance(result, MediaResult) and result.status == "completed":
+                    result = self._remember(requests[index], keys[index], result)
+                results[index] = result
+        return results
+
+    async def _generate_many(
+        self,
+        requests: List[MediaRequest],
+        limit: int,
+    ) -> List[Union[MediaResult, BaseException]]:
+        semaphore = asyncio.Semaphore(limit)
+
+        async def _run(request: MediaRequest) -> MediaResult:
+            async with semaphore:
+                return await self.agenerate(request)
+
+        try:
+            return await asyncio.gather(*(_run(request) for request in requests), return_exceptions=True)
+        finally:
+            await self._service.aclose()
+
+    async def agenerate(self, request: MediaRequest) -> MediaResult:
+        """Async variant of ``generate`` that streams the response to storage."""
+        if not request.text:
+            return MediaResult(status="failed", meta={"error": "text is empty"})
+
+        extra = request.extra or {}
+        # The token bucket may sleep; keep the event loop free for in-flight streams.
+        ticket = await asyncio.to_thread(self._acquire_ticket, request)
+        output_path = self._output_path(request)
+        synthesis = await self._service.stream_text_to_speech(
+            request.text,
+            output_path,
+            voice_id=request.voice_id,
+            format=extra.get("format") or "mp3",
+            sample_rate=extra.get("sample_rate") or 44100,
+        )
+        synthesis["streamed"] = True
+        return await asyncio.to_thread(
+            self._completed_result, request, output_path, synthesis["bytes"], ticket, synthesis
+        )
+
 
 __all__ = ["FishAudioProvider"]
@@ -1,10 +1,13 @@
 """Provider base classes and data contracts for workflow modules."""
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 from abc import ABC, abstractmethod
 
+logger = logging.getLogger(__name__)
+
 
 # ---- Storyboard generation ----
 
@@ -112,6 +115,21 @@ class VideoPromptProvider(ABC):
     def generate(self, request: VideoPromptRequest) -> VideoPromptResult:
         raise NotImplementedError
 
+    def generate_batch(self, requests: List[VideoPromptRequest]) -> List[Optional[VideoPromptResult]]:
+        """Generate prompts for several scenes; ``None`` marks a scene that failed.
+
+        The default runs ``generate`` per request. Providers with a cheaper
+        multi-scene call override this.
+        """
+        results: List[Optional[VideoPromptResult]] = []
+        for request in requests:
+            try:
+                results.append(self.generate(request))
+            except Exception as exc:  # pragma: no cover - remote failure
+                logger.warning("Video prompt generation failed for scene %s: %s", request.scene_seq, exc)
+                results.append(None)
+        return results
+
 
 @dataclass
 class ComposeInput:
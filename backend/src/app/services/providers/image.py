@@ -14,6 +14,7 @@ from app.services.runninghub_config import (
     RunningHubWorkflowConfig,
     get_runninghub_config,
 )
+from app.config.settings import get_settings
 from app.models.concurrency import ServiceConcurrencySlot
 from app.services.concurrency_manager import concurrency_manager
 from app.services.runninghub_service import RunningHubService
@@ -29,6 +30,10 @@ class LiblibImageProvider(ImageGenerationProvider):
         self._current_checkpoint: Optional[str] = None
         self._service = LiblibService(db)
 
+    def bind_session(self, db: Session) -> None:
+        self._db = db
+        self._service.db = db
+
     def apply_model_overrides(self, lora_id: Optional[str], checkpoint_id: Optional[str]) -> None:
         normalized_lora = lora_id or None
         normalized_checkpoint = checkpoint_id or None
@@ -37,12 +42,7 @@ class LiblibImageProvider(ImageGenerationProvider):
             and normalized_checkpoint == self._current_checkpoint
         ):
             return
-        try:
-            self._service.close()
-        except Exception:  # pragma: no cover - defensive cleanup
-            pass
-        self._service = LiblibService(
-            self._db,
+        self._service.set_model_overrides(
             lora_id=normalized_lora,
             checkpoint_id=normalized_checkpoint,
         )
@@ -160,6 +160,9 @@ class RunningHubImageProvider(ImageGenerationProvider):
             fallback=DEFAULT_IMAGE_WORKFLOW_CONFIG,
         )
 
+    def bind_session(self, db: Session) -> None:
+        self._db = db
+
     def _parse_int(self, value, default: int) -> int:
         try:
             return int(value)
@@ -251,10 +254,11 @@ class RunningHubImageProvider(ImageGenerationProvider):
         status: str = "pending"
         output_payload: Optional[Dict[str, Any]] = None
 
+        resource_id = self._build_resource_id(request)
         token = concurrency_manager.acquire(
             "runninghub",
             feature="image",
-            resource_id=self._build_resource_id(request),
+            resource_id=resource_id,
             metadata={
                 "scene_seq": (extra.get("scene_seq") if isinstance(extra, dict) else None),
                 "task_id": extra.get("task_id") if isinstance(extra, dict) else None,
@@ -265,6 +269,8 @@ class RunningHubImageProvider(ImageGenerationProvider):
 
         release_status = ServiceConcurrencySlot.STATUS_RELEASED
         release_meta: Dict[str, Any] = {}
+        # In async tracking mode the slot stays held until the tracker sees the job finish.
+        keep_slot = False
 
         try:
             for attempt in range(max(1, create_attempts)):
@@ -316,6 +322,20 @@ class RunningHubImageProvider(ImageGenerationProvider):
                 release_meta = {"job_id": task_id, "status": "queued"}
                 return MediaResult(status="queued", job_id=task_id, meta=meta)
 
+            if self._resolve_tracking_mode(extra, config) == "async":
+                meta["tracking"] = self._service.build_tracking_meta(
+                    feature="image",
+                    slot_id=token.slot_id,
+                    resource_id=resource_id,
+                    initial_delay=initial_delay,
+                    poll_attempts=poll_attempts,
+                    poll_interval=poll_interval,
+                    slot_backend=token.backend,
+                    slot_holder=token.holder,
+                )
+                keep_slot = True
+                return MediaResult(status="queued", job_id=task_id, meta=meta)
+
             status, output_payload = self._service.wait_for_task(
                 task_id,
                 max_attempts=poll_attempts,
@@ -363,7 +383,15 @@ class RunningHubImageProvider(ImageGenerationProvider):
             release_meta = {"exception": str(exc)}
             raise
         finally:
-            concurrency_manager.release(token, status=release_status, metadata=release_meta)
+            if not keep_slot:
+                concurrency_manager.release(token, status=release_status, metadata=release_meta)
+
+    @staticmethod
+    def _resolve_tracking_mode(extra: Dict[str, Any], config: RunningHubWorkflowConfig) -> str:
+        value = extra.get("runninghub_tracking") or config.resolve_default("tracking", None)
+        if not value:
+            return get_settings().runninghub_tracking_mode
+        return str(value).strip().lower()
 
     @staticmethod
     def _build_resource_id(request: MediaRequest) -> str:
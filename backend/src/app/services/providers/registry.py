@@ -15,6 +15,7 @@ from .base import (
     MediaComposeProvider,
 )
 from app.config.settings import get_settings
+from app.services.config_cache import cached_provider
 from .storyboard import GeminiStoryboardProvider
 from .image import LiblibImageProvider, ComfyUIImageProvider, RunningHubImageProvider
 from .audio import FishAudioProvider
@@ -59,19 +60,37 @@ def _resolve_provider_class(feature: str, provider_name: str) -> Type:
     return feature_map[provider_name]
 
 
-def get_provider(feature: str, provider_name: str, db: Session):
-    provider_cls = _resolve_provider_class(feature, provider_name)
+def _create_provider(provider_cls: Type, db: Session):
     try:
         return provider_cls(db)
     except TypeError:
         return provider_cls()  # Some providers may not require DB
 
 
-def resolve_task_provider(feature: str, task_providers: Optional[Dict[str, str]], db: Session):
+def get_provider(feature: str, provider_name: str, db: Session):
+    """Return a provider instance, reused across tasks on this worker thread.
+
+    Instances are rebuilt after credentials/options change (config cache generation);
+    providers that query the DB at call time are re-bound to the caller's session.
+    """
+    provider_cls = _resolve_provider_class(feature, provider_name)
+    provider = cached_provider((feature, provider_name), lambda: _create_provider(provider_cls, db))
+    bind_session = getattr(provider, "bind_session", None)
+    if callable(bind_session):
+        bind_session(db)
+    return provider
+
+
+def resolve_provider_name(feature: str, task_providers: Optional[Dict[str, str]]) -> str:
     provider_name = (task_providers or {}).get(feature) or DEFAULT_PROVIDERS.get(feature)
     if not provider_name:
         raise ValueError(f"No default provider configured for feature '{feature}'")
+    return provider_name
+
+
+def resolve_task_provider(feature: str, task_providers: Optional[Dict[str, str]], db: Session):
+    provider_name = resolve_provider_name(feature, task_providers)
     return get_provider(feature, provider_name, db), provider_name
 
 
-__all__ = ["DEFAULT_PROVIDERS", "resolve_task_provider"]
+__all__ = ["DEFAULT_PROVIDERS", "get_provider", "resolve_provider_name", "resolve_task_provider"]
@@ -14,6 +14,7 @@ from app.services.runninghub_config import (
     RunningHubWorkflowConfig,
     get_runninghub_config,
 )
+from app.config.settings import get_settings
 from app.models.concurrency import ServiceConcurrencySlot
 from app.services.concurrency_manager import concurrency_manager
 from app.services.runninghub_service import RunningHubService
@@ -139,6 +140,9 @@ class RunningHubVideoProvider(VideoGenerationProvider):
             fallback=DEFAULT_VIDEO_WORKFLOW_CONFIG,
         )
 
+    def bind_session(self, db: Session) -> None:
+        self._db = db
+
     def _parse_int(self, value, default: int) -> int:
         try:
             return int(round(float(value)))
@@ -275,10 +279,11 @@ class RunningHubVideoProvider(VideoGenerationProvider):
         status: str = "pending"
         output_payload: Optional[Dict[str, Any]] = None
 
+        resource_id = self._build_resource_id(request)
         token = concurrency_manager.acquire(
             "runninghub",
             feature="video",
-            resource_id=self._build_resource_id(request),
+            resource_id=resource_id,
             metadata={
                 "task_id": extra.get("task_id"),
                 "scene_seq": extra.get("scene_seq"),
@@ -289,6 +294,8 @@ class RunningHubVideoProvider(VideoGenerationProvider):
 
         release_status = ServiceConcurrencySlot.STATUS_RELEASED
         release_meta: Dict[str, Any] = {}
+        # In async tracking mode the slot stays held until the tracker sees the job finish.
+        keep_slot = False
 
         try:
             for attempt in range(max(1, create_attempts)):
@@ -340,6 +347,20 @@ class RunningHubVideoProvider(VideoGenerationProvider):
                 release_meta = {"job_id": task_id, "status": "queued"}
                 return MediaResult(status="queued", job_id=task_id, meta=meta)
 
+            if self._resolve_tracking_mode(extra, config) == "async":
+                meta["tracking"] = self._service.build_tracking_meta(
+                    feature="video",
+                    slot_id=token.slot_id,
+                    resource_id=resource_id,
+                    initial_delay=initial_delay,
+                    poll_attempts=poll_attempts,
+                    poll_interval=poll_interval,
+                    slot_backend=token.backend,
+                    slot_holder=token.holder,
+                )
+                keep_slot = True
+                return MediaResult(status="queued", job_id=task_id, meta=meta)
+
             status, output_payload = self._service.wait_for_task(
                 task_id,
                 max_attempts=poll_attempts,
@@ -386,7 +407,15 @@ class RunningHubVideoProvider(VideoGenerationProvider):
             release_meta = {"exception": str(exc)}
             raise
         finally:
-            concurrency_manager.release(token, status=release_status, metadata=release_meta)
+            if not keep_slot:
+                concurrency_manager.release(token, status=release_status, metadata=release_meta)
+
+    @staticmethod
+    def _resolve_tracking_mode(extra: Dict[str, Any], config: RunningHubWorkflowConfig) -> str:
+        value = extra.get("runninghub_tracking") or config.resolve_default("tracking", None)
+        if not value:
+            return get_settings().runninghub_tracking_mode
+        return str(value).strip().lower()
 
     @staticmethod
     def _build_resource_id(request: MediaRequest) -> str:
@@ -1,12 +1,23 @@
 """Video prompt provider implementations."""
 from __future__ import annotations
 
-from typing import Optional
+import logging
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 
+from app.config.settings import get_settings
 from app.services.gemini_service import GeminiService
 from .base import VideoPromptProvider, VideoPromptRequest, VideoPromptResult
 
+logger = logging.getLogger(__name__)
+
+
+def _target_and_duration(request: VideoPromptRequest) -> tuple:
+    extra = request.extra or {}
+    target_provider = extra.get("target_provider") or extra.get("video_provider") or ""
+    duration_hint = extra.get("duration") or extra.get("video_duration")
+    return target_provider, duration_hint
+
 
 class GeminiVideoPromptProvider(VideoPromptProvider):
     provider_name = "gemini"
@@ -14,11 +25,10 @@ class GeminiVideoPromptProvider(VideoPromptProvider):
     def __init__(self, db: Optional[Session] = None) -> None:
         # GeminiService manages its own credential lookup from the settings layer
         self._service = GeminiService()
+        self._batch_size = get_settings().video_prompt_batch_size
 
     def generate(self, request: VideoPromptRequest) -> VideoPromptResult:
-        extra = request.extra or {}
-        target_provider = extra.get("target_provider") or extra.get("video_provider") or ""
-        duration_hint = extra.get("duration") or extra.get("video_duration")
+        target_provider, duration_hint = _target_and_duration(request)
 
         response = self._service.generate_video_prompt(
             target=target_provider,
@@ -31,5 +41,43 @@ class GeminiVideoPromptProvider(VideoPromptProvider):
         )
         return VideoPromptResult(prompt=response.get("prompt", ""), raw=response)
 
+    def generate_batch(self, requests: List[VideoPromptRequest]) -> List[Optional[VideoPromptResult]]:
+        """One Gemini call per ``VIDEO_PROMPT_BATCH_SIZE`` scenes; scenes the batch
+        response does not cover fall back to a single-scene call."""
+        results: List[Optional[VideoPromptResult]] = [None] * len(requests)
+        for start in range(0, len(requests), self._batch_size):
+            chunk = requests[start : start + self._batch_size]
+            prompts: Dict[int, Dict[str, Any]] = {}
+            if len(chunk) > 1:
+                target_provider, _ = _target_and_duration(chunk[0])
+                try:
+                    prompts = self._service.generate_video_prompts(
+                        target=target_provider,
+                        scenes=[
+                            {
+                                "scene_seq": request.scene_seq,
+                                "narration": request.narration,
+                                "image_prompt": request.image_prompt,
+                                "image_url": request.image_url,
+                                "duration_hint": _target_and_duration(request)[1],
+                            }
+                            for request in chunk
+                        ],
+                        storyboard_context=chunk[0].storyboard_context,
+                    )
+                except Exception as exc:  # pragma: no cover - remote failure
+                    logger.warning("Batch video prompt generation failed, falling back per scene: %s", exc)
+
+            for offset, request in enumerate(chunk):
+                response = prompts.get(int(request.scene_seq))
+                if response and response.get("prompt"):
+                    results[start + offset] = VideoPromptResult(prompt=response["prompt"], raw=response)
+                    continue
+                try:
+                    results[start + offset] = self.generate(request)
+                except Exception as exc:  # pragma: no cover - remote failure
+                    logger.warning("Video prompt generation failed for scene %s: %s", request.scene_seq, exc)
+        return results
+
 
 __all__ = ["GeminiVideoPromptProvider"]
@@ -0,0 +1,289 @@
+"""Token-bucket rate limiter for external service calls.
+
+Limits are configured per service/feature, either on ``ServiceConcurrencyLimit``
+(``rate_per_second`` / ``burst`` / ``wait_timeout_seconds``) or through the
+``SERVICE_RATE_LIMITS`` setting. Buckets are further keyed by the caller (for
+example credential and voice), so independent quotas do not block each other.
+
+Bucket state lives in Redis (atomic Lua script, shared by every worker). When
+Redis is unavailable the limiter degrades to an in-process bucket.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import get_settings
+from app.core.redis_client import get_redis_client
+from app.database import get_db_session
+from app.models.concurrency import ServiceConcurrencyLimit
+from app.services.exceptions import RateLimitExceededException
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_WAIT_TIMEOUT = 120.0
+_LIMIT_CACHE_SECONDS = 5.0
+_KEY_PREFIX = "ratelimit"
+
+# Reserve one token. Returns the milliseconds the caller must wait before using
+# it, or -wait when the wait would exceed ARGV[3] (nothing is reserved then).
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1])
+local ts = tonumber(data[2])
+if tokens == nil or ts == nil then
+  tokens = burst
+  ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens < 1 then
+  wait = math.ceil((1 - tokens) * 1000 / rate)
+  if max_wait >= 0 and wait > max_wait then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 60000)
+    return -wait
+  end
+end
+tokens = tokens - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + wait + 60000)
+return wait
+"""
+
+
+@dataclass
+class RateLimit:
+    service_name: str
+    feature: Optional[str]
+    rate: float
+    burst: int
+    wait_timeout: Optional[float]
+
+
+@dataclass
+class RateLimitTicket:
+    service_name: str
+    feature: Optional[str]
+    key: Optional[str]
+    waited_seconds: float = 0.0
+    unlimited: bool = False
+
+    def as_meta(self) -> Dict[str, object]:
+        return {
+            "key": self.key,
+            "waited_seconds": round(self.waited_seconds, 3),
+            "unlimited": self.unlimited,
+        }
+
+
+@dataclass
+class RateLimitStats:
+    acquired: int = 0
+    rejected: int = 0
+    waited_total: float = 0.0
+    waited_max: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "waited_total": round(self.waited_total, 3),
+            "waited_max": round(self.waited_max, 3),
+        }
+
+
+@dataclass
+class _LocalBucket:
+    tokens: float
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+class TokenBucketRateLimiter:
+    """Distributed token bucket keyed by service/feature/caller key."""
+
+    def __init__(self) -> None:
+        self._settings = get_settings()
+        self._limit_cache: Dict[Tuple[str, Optional[str]], Tuple[Optional[RateLimit], float]] = {}
+        self._local_buckets: Dict[str, _LocalBucket] = {}
+        self._stats: Dict[Tuple[str, Optional[str]], RateLimitStats] = {}
+        self._lock = threading.Lock()
+        self._script = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def acquire(
+        self,
+        service_name: str,
+        *,
+        feature: Optional[str] = None,
+        key: Optional[str] = None,
+        wait_timeout: Optional[float] = None,
+    ) -> RateLimitTicket:
+        """Block until a token is available for the bucket.
+
+        Raises RateLimitExceededException when the required wait exceeds wait_timeout.
+        """
+        service_key = service_name.lower().strip()
+        feature_key = feature.lower().strip() if feature else None
+
+        limit = self._resolve_limit(service_key, feature_key)
+        if limit is None:
+            return RateLimitTicket(service_key, feature_key, key, unlimited=True)
+
+        wait_timeout = wait_timeout if wait_timeout is not None else limit.wait_timeout
+        bucket_key = ":".join([_KEY_PREFIX, service_key, feature_key or "*", key or "*"])
+        wait = self._reserve(bucket_key, limit, wait_timeout)
+        if wait < 0:
+            self._record(service_key, feature_key, rejected=True)
+            raise RateLimitExceededException(
+                "外部服务请求频率已达上限，请稍后重试",
+                service_name=service_name,
+                retry_after=-wait,
+                feature=feature_key,
+                key=key,
+            )
+
+        if wait > 0:
+            time.sleep(wait)
+            logger.info(
+                "Rate limiter delayed %s/%s (key=%s) by %.2fs",
+                service_key,
+                feature_key,
+                key,
+                wait,
+            )
+        self._record(service_key, feature_key, waited=wait)
+        return RateLimitTicket(service_key, feature_key, key, waited_seconds=wait)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return process-local counters keyed by ``service/feature``."""
+        with self._lock:
+            return {
+                f"{service}/{feature or '*'}": stats.as_dict()
+                for (service, feature), stats in self._stats.items()
+            }
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _reserve(self, bucket_key: str, limit: RateLimit, wait_timeout: Optional[float]) -> float:
+        """Reserve a token; returns seconds to wait, or a negative wait when rejected."""
+        max_wait_ms = int(wait_timeout * 1000) if wait_timeout is not None else -1
+        client = get_redis_client()
+        if client is not None:
+            try:
+                if self._script is None:
+                    self._script = client.register_script(_TOKEN_BUCKET_LUA)
+                wait_ms = int(self._script(keys=[bucket_key], args=[limit.rate, limit.burst, max_wait_ms]))
+                return wait_ms / 1000.0
+            except Exception:
+                logger.exception("Redis token bucket failed for %s; using local bucket", bucket_key)
+        return self._reserve_local(bucket_key, limit, max_wait_ms)
+
+    def _reserve_local(self, bucket_key: str, limit: RateLimit, max_wait_ms: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._local_buckets.get(bucket_key)
+            if bucket is None:
+                bucket = _LocalBucket(tokens=float(limit.burst), updated_at=now)
+                self._local_buckets[bucket_key] = bucket
+            elapsed = max(now - bucket.updated_at, 0.0)
+            bucket.tokens = min(float(limit.burst), bucket.tokens + elapsed * limit.rate)
+            bucket.updated_at = now
+            wait = 0.0
+            if bucket.tokens < 1:
+                wait = math.ceil((1 - bucket.tokens) * 1000 / limit.rate) / 1000.0
+                if max_wait_ms >= 0 and wait * 1000 > max_wait_ms:
+                    return -wait
+            bucket.tokens -= 1
+            return wait
+
+    def _record(self, service: str, feature: Optional[str], *, waited: float = 0.0, rejected: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.setdefault((service, feature), RateLimitStats())
+            if rejected:
+                stats.rejected += 1
+                return
+            stats.acquired += 1
+            stats.waited_total += waited
+            stats.waited_max = max(stats.waited_max, waited)
+
+    def _resolve_limit(self, service_name: str, feature: Optional[str]) -> Optional[RateLimit]:
+        cache_key = (service_name, feature)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._limit_cache.get(cache_key)
+            if cached and cached[1] > now:
+                return cached[0]
+
+        limit = self._load_limit_from_db(service_name, feature) or self._load_default_limit(service_name, feature)
+        with self._lock:
+            self._limit_cache[cache_key] = (limit, now + _LIMIT_CACHE_SECONDS)
+        return limit
+
+    def _load_limit_from_db(self, service_name: str, feature: Optional[str]) -> Optional[RateLimit]:
+        session = get_db_session()
+        try:
+            candidates = [feature, None] if feature is not None else [None]
+            for candidate in candidates:
+                record = (
+                    session.query(ServiceConcurrencyLimit)
+                    .filter(
+                        ServiceConcurrencyLimit.service_name == service_name,
+                        ServiceConcurrencyLimit.feature == candidate,
+                        ServiceConcurrencyLimit.enabled == True,  # noqa: E712
+                    )
+                    .first()
+                )
+                if record is not None and record.rate_per_second and record.rate_per_second > 0:
+                    return RateLimit(
+                        service_name=service_name,
+                        feature=feature,
+                        rate=float(record.rate_per_second),
+                        burst=max(int(record.burst or 1), 1),
+                        wait_timeout=(
+                            float(record.wait_timeout_seconds)
+                            if record.wait_timeout_seconds
+                            else _DEFAULT_WAIT_TIMEOUT
+                        ),
+                    )
+            return None
+        except Exception:
+            logger.exception("Failed to load rate limit for %s/%s", service_name, feature)
+            return None
+        finally:
+            session.close()
+
+    def _load_default_limit(self, service_name: str, feature: Optional[str]) -> Optional[RateLimit]:
+        defaults = getattr(self._settings, "service_rate_limits", {}) or {}
+        service_defaults = defaults.get(service_name)
+        if not isinstance(service_defaults, dict):
+            return None
+        values = service_defaults.get(feature or "__all__")
+        if values is None and feature is not None:
+            values = service_defaults.get("__all__")
+        if not values or not values.get("rps"):
+            return None
+        return RateLimit(
+            service_name=service_name,
+            feature=feature,
+            rate=float(values["rps"]),
+            burst=max(int(values.get("burst") or 1), 1),
+            wait_timeout=float(values.get("wait_timeout") or _DEFAULT_WAIT_TIMEOUT),
+        )
+
+
+rate_limiter = TokenBucketRateLimiter()
+
+__all__ = ["RateLimit", "RateLimitTicket", "TokenBucketRateLimiter", "rate_limiter"]
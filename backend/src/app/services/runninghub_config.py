@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db_session
 from app.models.runninghub_workflow import RunningHubWorkflow
+from .config_cache import get_config_cache
 from .exceptions import ConfigurationException
 
 
@@ -124,6 +125,29 @@ def get_runninghub_config(
     if key is None and config_id is None and workflow_type is None:
         raise ConfigurationException("缺少 Runninghub 配置查找参数", service_name="Runninghub")
 
+    cache_key = (
+        "runninghub_config",
+        key,
+        str(config_id) if config_id is not None else None,
+        workflow_type,
+        (fallback.key, fallback.workflow_id) if fallback else None,
+    )
+    config = get_config_cache().get_or_load(
+        cache_key,
+        lambda: _load_runninghub_config(key, config_id=config_id, workflow_type=workflow_type, db=db, fallback=fallback),
+    )
+    # Callers may adjust defaults/templates; never hand out the cached instance.
+    return copy.deepcopy(config)
+
+
+def _load_runninghub_config(
+    key: Optional[str],
+    *,
+    config_id: Optional[int],
+    workflow_type: Optional[str],
+    db: Optional[Session],
+    fallback: Optional[RunningHubWorkflowConfig],
+) -> RunningHubWorkflowConfig:
     base_fallback = fallback or (key and _CONFIG_FALLBACKS.get(key)) or _fallback_for_type(workflow_type)
 
     session = db or get_db_session()
@@ -7,9 +7,9 @@ from urllib.parse import urlparse
 
 from sqlalchemy.orm import Session
 
-from app.database import get_db_session
-from app.models.service_config import ServiceCredential
+from app.utils.timezone import naive_now
 from .base import BaseService
+from .config_cache import get_config_cache
 from .exceptions import APIException, ConfigurationException, ValidationException
 from app.core.http_client import create_http_client
 
@@ -29,38 +29,21 @@ class RunningHubService(BaseService):
         return "Runninghub"
 
     def _load_credentials(self) -> None:
-        session = self._db or get_db_session()
-        should_close = self._db is None
-        try:
-            credential = (
-                session.query(ServiceCredential)
-                .filter(
-                    ServiceCredential.service_name == "runninghub",
-                    ServiceCredential.is_active == True,  # noqa: E712
-                )
-                .order_by(ServiceCredential.id.desc())
-                .first()
+        credential = get_config_cache().active_credential("runninghub")
+        if not credential or not credential.credential_key:
+            raise ConfigurationException(
+                "Runninghub API key not found in database (service_credentials). Add an active runninghub credential via /api/v1/config/credentials",
+                service_name=self.service_name,
+                required_envs=["service_credentials (runninghub)"],
+            )
+        self.api_key = credential.credential_key
+        if not credential.api_url:
+            raise ConfigurationException(
+                "Runninghub base URL not configured in database (service_credentials.api_url)",
+                service_name=self.service_name,
+                required_envs=["service_credentials (runninghub.api_url)"],
             )
-            if not credential or not credential.credential_key:
-                raise ConfigurationException(
-                    "Runninghub API key not found in database (service_credentials). Add an active runninghub credential via /api/v1/config/credentials",
-                    service_name=self.service_name,
-                    required_envs=["service_credentials (runninghub)"],
-                )
-            self.api_key = credential.credential_key
-            if not credential.api_url:
-                raise ConfigurationException(
-                    "Runninghub base URL not configured in database (service_credentials.api_url)",
-                    service_name=self.service_name,
-                    required_envs=["service_credentials (runninghub.api_url)"],
-                )
-            self.base_url = credential.api_url.rstrip("/")
-        finally:
-            if should_close:
-                try:
-                    session.close()
-                except Exception:
-                    pass
+        self.base_url = credential.api_url.rstrip("/")
 
     def _validate_configuration(self) -> None:
         if not getattr(self, "api_key", None):
@@ -189,6 +172,50 @@ class RunningHubService(BaseService):
                 time.sleep(interval_seconds)
         return "pending", last_payload
 
+    def poll_once(self, task_id: str, *, timeout: Optional[int] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Fetch outputs a single time without sleeping (used by the async tracker)."""
+        payload = self.get_outputs(task_id, timeout=timeout)
+        return self._interpret_status(payload), payload
+
+    @classmethod
+    def extract_output_url(cls, payload: Optional[Dict[str, Any]]) -> Optional[str]:
+        entries = cls.extract_file_entries(payload)
+        if not entries:
+            return None
+        first = entries[0]
+        return (
+            first.get("fileUrl")
+            or first.get("file_url")
+            or first.get("url")
+            or first.get("value")
+        )
+
+    @staticmethod
+    def build_tracking_meta(
+        *,
+        feature: str,
+        slot_id: Optional[int],
+        resource_id: Optional[str],
+        initial_delay: float,
+        poll_attempts: int,
+        poll_interval: float,
+        slot_backend: str = "db",
+        slot_holder: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Describe a submitted job so the tracker can poll it and free its slot later."""
+        return {
+            "mode": "async",
+            "feature": feature,
+            "slot_id": slot_id,
+            "slot_backend": slot_backend,
+            "slot_holder": slot_holder,
+            "resource_id": resource_id,
+            "submitted_at": naive_now().isoformat(),
+            "initial_delay": max(float(initial_delay), 0.0),
+            "timeout_seconds": max(float(initial_delay), 0.0)
+            + max(int(poll_attempts), 1) * max(float(poll_interval), 1.0),
+        }
+
     @staticmethod
     def extract_task_id(payload: Optional[Dict[str, Any]]) -> Optional[str]:
         if not isinstance(payload, dict):
@@ -0,0 +1,244 @@
+"""Per-scene subtitle transcription.
+
+Instead of running Whisper over the merged video, each scene's narration audio is
+transcribed on its own (as soon as the audio exists, or in parallel at finalize
+time). The scene's ``narration_text`` is passed as the initial prompt so the
+recognised text follows the script, and an empty recognition falls back to the
+narration spanning the whole clip.
+
+Results are cached on ``Scene.audio_meta["transcription"]`` together with the
+audio URL they were computed from, so regenerated audio is never served a stale
+transcript. ``combine_scene_transcriptions`` shifts every scene's segments/words by
+the cumulative duration of the composed scene clips to build one
+``TranscriptionResult`` for the merged video. When the scene audio carries a
+silence keep-window (trimmed at composition time), timestamps are first shifted
+by the trimmed leading silence.
+"""
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.config.settings import get_settings
+from app.models.media import Scene
+from app.services.audio_postprocess import silence_trim_window
+from app.services.faster_whisper_service import (
+    FasterWhisperService,
+    TranscriptionResult,
+    TranscriptionSegment,
+    TranscriptionWord,
+)
+
+logger = logging.getLogger(__name__)
+
+MODE_VIDEO = "video"
+MODE_SCENE = "scene"
+
+_TRANSCRIBE_OPTION_KEYS = (
+    "language",
+    "beam_size",
+    "vad_filter",
+    "word_timestamps",
+    "task",
+    "chunk_length",
+    "temperature",
+)
+
+
+def subtitle_transcribe_mode(task_config: Optional[Dict[str, Any]]) -> str:
+    """Resolve ``finalize.subtitles.mode`` (task config first, then settings)."""
+    finalize_config = (task_config or {}).get("finalize") if isinstance(task_config, dict) else None
+    subtitles_config = finalize_config.get("subtitles") if isinstance(finalize_config, dict) else None
+    mode = subtitles_config.get("mode") if isinstance(subtitles_config, dict) else None
+    if not mode:
+        mode = get_settings().subtitle_transcribe_mode
+    mode = str(mode).strip().lower()
+    return mode if mode in {MODE_VIDEO, MODE_SCENE} else MODE_VIDEO
+
+
+def subtitle_options(task_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    finalize_config = (task_config or {}).get("finalize") if isinstance(task_config, dict) else None
+    subtitles_config = finalize_config.get("subtitles") if isinstance(finalize_config, dict) else None
+    if not isinstance(subtitles_config, dict):
+        return {}
+    return {key: subtitles_config.get(key) for key in _TRANSCRIBE_OPTION_KEYS if subtitles_config.get(key) is not None}
+
+
+def cached_scene_transcription(scene: Scene) -> Optional[Dict[str, Any]]:
+    """Return the stored transcript when it was computed from the scene's current audio."""
+    meta = scene.audio_meta if isinstance(scene.audio_meta, dict) else {}
+    payload = meta.get("transcription")
+    if not isinstance(payload, dict) or not scene.audio_url:
+        return None
+    if payload.get("audio_url") != scene.audio_url:
+        return None
+    return payload
+
+
+def transcribe_scene_audio(
+    whisper_service: FasterWhisperService,
+    scene: Scene,
+    options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Transcribe one scene's audio and return the JSON payload to cache on the scene."""
+    if not scene.audio_url:
+        raise ValueError(f"scene {scene.id} has no audio")
+    narration = (scene.narration_text or "").strip() or None
+    transcription = whisper_service.transcribe(
+        scene.audio_url,
+        initial_prompt=narration,
+        **(options or {}),
+    )
+    payload = transcription.to_dict()
+    payload.pop("source_path", None)
+    if not payload.get("segments") and narration and scene.audio_duration:
+        # Nothing recognised (music bed, whisper/VAD miss): keep the narration on screen.
+        window = silence_trim_window(scene.audio_meta, scene.audio_url)
+        start, end = window if window else (0.0, float(scene.audio_duration))
+        payload["segments"] = [{"index": 1, "start": start, "end": end, "text": narration, "words": []}]
+        payload["text"] = narration
+        payload["narration_fallback"] = True
+    payload["audio_url"] = scene.audio_url
+    return payload
+
+
+def store_scene_transcription(scene: Scene, payload: Dict[str, Any]) -> None:
+    meta = dict(scene.audio_meta) if isinstance(scene.audio_meta, dict) else {}
+    meta["transcription"] = payload
+    scene.audio_meta = meta
+
+
+def transcribe_scenes_parallel(
+    whisper_service: FasterWhisperService,
+    scenes: Sequence[Scene],
+    options: Optional[Dict[str, Any]] = None,
+    *,
+    max_workers: Optional[int] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """Transcribe scenes concurrently; returns payloads keyed by scene id.
+
+    CTranslate2 releases the GIL while decoding, so a thread pool overlaps work
+    without loading the model once per process.
+    """
+    targets = [scene for scene in scenes if scene.audio_url]
+    if not targets:
+        return {}
+    workers = max(int(max_workers or get_settings().subtitle_scene_workers), 1)
+    with ThreadPoolExecutor(max_workers=min(workers, len(targets))) as pool:
+        payloads = pool.map(lambda sc: transcribe_scene_audio(whisper_service, sc, options), targets)
+        return {scene.id: payload for scene, payload in zip(targets, payloads)}
+
+
+@dataclass
+class SceneTimelineEntry:
+    scene: Scene
+    offset: float
+    duration: float
+
+
+def scene_clip_duration(scene: Scene) -> Optional[float]:
+    """Duration of the composed scene clip as concatenated into the merged video."""
+    merge_meta = scene.merge_meta if isinstance(scene.merge_meta, dict) else {}
+    output_meta = merge_meta.get("output_metadata") if isinstance(merge_meta.get("output_metadata"), dict) else {}
+    for candidate in (output_meta.get("duration"), merge_meta.get("target_duration"), scene.audio_duration):
+        try:
+            if candidate is not None and float(candidate) > 0:
+                return float(candidate)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def build_scene_timeline(scenes: Sequence[Scene]) -> Optional[List[SceneTimelineEntry]]:
+    """Cumulative offsets of the scene clips, or None when the merged video is not
+    a plain concat of composed clips (then the caller transcribes the whole video)."""
+    timeline: List[SceneTimelineEntry] = []
+    offset = 0.0
+    for scene in sorted(scenes, key=lambda sc: sc.seq):
+        if scene.merge_status != 2 or not scene.merge_video_url:
+            if scene.video_status == 2 and scene.raw_video_url:
+                return None
+            continue
+        duration = scene_clip_duration(scene)
+        if duration is None or not scene.audio_url:
+            return None
+        timeline.append(SceneTimelineEntry(scene=scene, offset=offset, duration=duration))
+        offset += duration
+    return timeline or None
+
+
+def combine_scene_transcriptions(
+    timeline: Sequence[SceneTimelineEntry],
+    payloads: Dict[int, Dict[str, Any]],
+    *,
+    model: str,
+    source_path: str,
+) -> TranscriptionResult:
+    segments: List[TranscriptionSegment] = []
+    texts: List[str] = []
+    languages: List[str] = []
+    for entry in timeline:
+        payload = payloads.get(entry.scene.id) or {}
+        info = payload.get("info") if isinstance(payload.get("info"), dict) else {}
+        if info.get("language"):
+            languages.append(str(info["language"]))
+        # Transcripts are timed against the untrimmed audio; the clip starts at the keep-window.
+        window = silence_trim_window(entry.scene.audio_meta, payload.get("audio_url"))
+        shift = window[0] if window else 0.0
+        for raw in payload.get("segments") or []:
+            # Clamp to the clip so a long tail never overlaps the next scene.
+            start = min(max(float(raw.get("start") or 0.0) - shift, 0.0), entry.duration)
+            end = min(max(float(raw.get("end") or 0.0) - shift, start), entry.duration)
+            words = [
+                TranscriptionWord(
+                    start=entry.offset + min(max(float(word.get("start") or 0.0) - shift, 0.0), entry.duration),
+                    end=entry.offset + min(max(float(word.get("end") or 0.0) - shift, 0.0), entry.duration),
+                    text=str(word.get("text") or ""),
+                )
+                for word in raw.get("words") or []
+            ]
+            text = str(raw.get("text") or "").strip()
+            segments.append(
+                TranscriptionSegment(
+                    index=len(segments) + 1,
+                    start=entry.offset + start,
+                    end=entry.offset + end,
+                    text=text,
+                    words=words,
+                )
+            )
+            if text:
+                texts.append(text)
+
+    total_duration = timeline[-1].offset + timeline[-1].duration if timeline else 0.0
+    return TranscriptionResult(
+        model=model,
+        source_path=source_path,
+        segments=segments,
+        text=" ".join(texts).strip(),
+        info={
+            "language": max(set(languages), key=languages.count) if languages else None,
+            "duration": total_duration,
+            "mode": MODE_SCENE,
+            "scenes": len(timeline),
+        },
+        options={"mode": MODE_SCENE},
+    )
+
+
+__all__ = [
+    "MODE_SCENE",
+    "MODE_VIDEO",
+    "SceneTimelineEntry",
+    "build_scene_timeline",
+    "cached_scene_transcription",
+    "combine_scene_transcriptions",
+    "scene_clip_duration",
+    "store_scene_transcription",
+    "subtitle_options",
+    "subtitle_transcribe_mode",
+    "transcribe_scene_audio",
+    "transcribe_scenes_parallel",
+]
@@ -0,0 +1,482 @@
+"""Object-storage backends behind ``StorageService``.
+
+``STORAGE_BASE_PATH`` stays the node-local working directory: FFmpeg, Whisper
+and the audio post-processor read and write plain files there. With
+``STORAGE_TYPE=s3`` (or ``minio``) every artifact written through
+``StorageService.publish`` is also uploaded to an S3-compatible bucket under
+its storage-relative key (``audio/foo.mp3`` -> ``<prefix>audio/foo.mp3``), so
+API and media workers no longer need a shared filesystem:
+
+- uploads stream the file from disk; bodies above ``STORAGE_S3_PART_SIZE_MB``
+  go through a multipart upload with up to ``STORAGE_S3_UPLOAD_CONCURRENCY``
+  parts in flight, each read from its own bounded slice of the file;
+- reads go through the worker-local ``ObjectReadThroughCache``
+  (``<STORAGE_BASE_PATH>/tmp/object-cache``). Copies are named after the key
+  *and* the object's ETag, and every lookup revalidates with ``head_object``, so
+  a key republished by another node (scene audio keeps its
+  ``{task}_{seq}.mp3`` name across re-synthesis) is downloaded again instead
+  of served stale. ``publish_file`` seeds the cache with the writer's own file,
+  so the writer never downloads what it just uploaded. The cache shares the
+  LRU/flock machinery of ``RemoteMediaCache`` and is trimmed to
+  ``STORAGE_OBJECT_CACHE_MAX_BYTES``.
+
+The S3 backend only uses the low-level client calls (``put_object``,
+``create_multipart_upload``/``upload_part``/``complete_multipart_upload``,
+``get_object``, ``head_object``, ``delete_object``), which MinIO and other
+S3-compatible stores implement; ``boto3`` is imported lazily.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import mimetypes
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from app.config.settings import get_settings
+from app.services.exceptions import APIException, ConfigurationException
+from app.services.media_cache import BoundedFileCache
+
+logger = logging.getLogger(__name__)
+
+_MIN_PART_SIZE = 5 * 1024 ** 2  # S3 rejects smaller non-final parts
+_DEFAULT_PART_SIZE = 8 * 1024 ** 2
+_DEFAULT_UPLOAD_CONCURRENCY = 4
+_DEFAULT_CACHE_MAX_BYTES = 10 * 1024 ** 3
+_STREAM_CHUNK = 1024 * 1024
+_NOT_FOUND_CODES = {"404", "NoSuchKey", "NotFound"}
+_PRECONDITION_CODES = {"412", "PreconditionFailed"}
+
+
+@dataclass(frozen=True)
+class ObjectHead:
+    """Version of a published object; identical on every node."""
+
+    etag: str
+    size: int
+    last_modified: Optional[float] = None  # epoch seconds
+
+
+class StaleObjectError(FileNotFoundError):
+    """The object was replaced after its version was looked up."""
+
+
+class StorageBackend:
+    """Where published artifacts live besides the node-local storage directory."""
+
+    name = "local"
+    # Remote backends hold the authoritative copy; local paths are only a working set.
+    remote = False
+
+    def upload_file(self, path: Path, key: str, *, content_type: Optional[str] = None) -> Optional[str]:
+        """Publish ``path`` under ``key`` (a STORAGE_BASE_PATH-relative POSIX path); returns its ETag."""
+        return None
+
+    def download_file(self, key: str, target: Path, *, etag: Optional[str] = None) -> int:
+        """Write the object to ``target`` and return its size; FileNotFoundError when missing.
+
+        With ``etag`` only that version is downloaded; StaleObjectError when it was replaced.
+        """
+        raise FileNotFoundError(key)
+
+    def head(self, key: str) -> Optional[ObjectHead]:
+        """Current version of ``key``; None when it was never published."""
+        return None
+
+    def exists(self, key: str) -> bool:
+        return False
+
+    def delete(self, key: str) -> None:
+        """Remove the published copy (missing keys are ignored)."""
+
+
+class LocalStorageBackend(StorageBackend):
+    """Single node / shared volume: the storage directory already is the store."""
+
+
+class S3StorageBackend(StorageBackend):
+    """S3-compatible object store (AWS S3, MinIO, R2, ...)."""
+
+    name = "s3"
+    remote = True
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        endpoint_url: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        region: Optional[str] = None,
+        prefix: str = "",
+        part_size: int = _DEFAULT_PART_SIZE,
+        upload_concurrency: int = _DEFAULT_UPLOAD_CONCURRENCY,
+        client: Any = None,
+    ) -> None:
+        if not bucket:
+            raise ConfigurationException("STORAGE_S3_BUCKET is not configured", service_name=self.name)
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url or None
+        self.prefix = prefix.strip("/") + "/" if prefix and prefix.strip("/") else ""
+        self.part_size = max(int(part_size), _MIN_PART_SIZE)
+        self.upload_concurrency = max(int(upload_concurrency), 1)
+        self._credentials = {
+            "aws_access_key_id": access_key or None,
+            "aws_secret_access_key": secret_key or None,
+            "region_name": region or None,
+        }
+        self._client = client
+        self._client_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Client
+    # ------------------------------------------------------------------
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> Any:
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as exc:
+            raise ConfigurationException(
+                "boto3 is required for STORAGE_TYPE=s3",
+                service_name=self.name,
+            ) from exc
+        config = Config(
+            # MinIO and most self-hosted stores only support path-style addressing.
+            s3={"addressing_style": "path" if self.endpoint_url else "auto"},
+            retries={"max_attempts": 5, "mode": "standard"},
+            max_pool_connections=max(self.upload_concurrency * 2, 10),
+        )
+        return boto3.client("s3", endpoint_url=self.endpoint_url, config=config, **self._credentials)
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{key.lstrip('/')}"
+
+    # ------------------------------------------------------------------
+    # StorageBackend API
+    # ------------------------------------------------------------------
+    def upload_file(self, path: Path, key: str, *, content_type: Optional[str] = None) -> Optional[str]:
+        object_key = self.object_key(key)
+        size = path.stat().st_size
+        extra: Dict[str, Any] = {}
+        content_type = content_type or mimetypes.guess_type(path.name)[0]
+        if content_type:
+            extra["ContentType"] = content_type
+        started = time.monotonic()
+        try:
+            if size <= self.part_size:
+                with path.open("rb") as handle:
+                    response = self.client.put_object(Bucket=self.bucket, Key=object_key, Body=handle, **extra)
+                parts = 1
+            else:
+                parts, response = self._multipart_upload(path, object_key, size, extra)
+        except Exception as exc:
+            raise APIException(
+                f"Failed to upload {key} to s3://{self.bucket}/{object_key}: {exc}",
+                service_name=self.name,
+            ) from exc
+        logger.info(
+            "Uploaded %s to s3://%s/%s (%d bytes, %d part(s)) in %.2fs",
+            path,
+            self.bucket,
+            object_key,
+            size,
+            parts,
+            time.monotonic() - started,
+        )
+        return (response or {}).get("ETag")
+
+    def _multipart_upload(
+        self, path: Path, object_key: str, size: int, extra: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=object_key, **extra)["UploadId"]
+        offsets = list(range(0, size, self.part_size))
+
+        def upload_part(index: int) -> Dict[str, Any]:
+            # Each part streams from its own handle; nothing beyond botocore's chunks is buffered.
+            with path.open("rb") as handle:
+                response = self.client.upload_part(
+                    Bucket=self.bucket,
+                    Key=object_key,
+                    UploadId=upload_id,
+                    PartNumber=index + 1,
+                    Body=_FileSlice(handle, offsets[index], min(self.part_size, size - offsets[index])),
+                )
+            return {"PartNumber": index + 1, "ETag": response["ETag"]}
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.upload_concurrency, len(offsets))) as pool:
+                parts: List[Dict[str, Any]] = list(pool.map(upload_part, range(len(offsets))))
+            response = self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+            except Exception:  # pragma: no cover - best effort, lifecycle rules clean up leftovers
+                logger.warning("Failed to abort multipart upload %s for %s", upload_id, object_key)
+            raise
+        return len(parts), response
+
+    def download_file(self, key: str, target: Path, *, etag: Optional[str] = None) -> int:
+        object_key = self.object_key(key)
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+        size = 0
+        conditions = {"IfMatch": etag} if etag else {}
+        try:
+            try:
+                response = self.client.get_object(Bucket=self.bucket, Key=object_key, **conditions)
+            except Exception as exc:
+                if _error_code(exc) in _PRECONDITION_CODES:
+                    raise StaleObjectError(key) from exc
+                if _is_not_found(exc):
+                    raise FileNotFoundError(key) from exc
+                raise
+            body = response["Body"]
+            try:
+                with tmp_path.open("wb") as handle:
+                    while True:
+                        chunk = body.read(_STREAM_CHUNK)
+                        if not chunk:
+                            break
+                        handle.write(chunk)
+                        size += len(chunk)
+            finally:
+                body.close()
+            tmp_path.replace(target)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return size
+
+    def head(self, key: str) -> Optional[ObjectHead]:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except Exception as exc:
+            if _is_not_found(exc):
+                return None
+            raise
+        last_modified = response.get("LastModified")
+        return ObjectHead(
+            etag=response["ETag"],
+            size=int(response.get("ContentLength") or 0),
+            last_modified=last_modified.timestamp() if last_modified is not None else None,
+        )
+
+    def exists(self, key: str) -> bool:
+        return self.head(key) is not None
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+
+def _error_code(exc: BaseException) -> str:
+    error = (getattr(exc, "response", None) or {}).get("Error") or {}
+    return str(error.get("Code"))
+
+
+def _is_not_found(exc: BaseException) -> bool:
+    return _error_code(exc) in _NOT_FOUND_CODES
+
+
+class _FileSlice:
+    """Read-only window ``[start, start + length)`` of an open file, sized for ``upload_part``.
+
+    botocore reads it in chunks and seeks back to ``tell()`` when it retries a part.
+    """
+
+    def __init__(self, handle: IO[bytes], start: int, length: int) -> None:
+        self._handle = handle
+        self._start = start
+        self._length = length
+        self._position = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._length
+        self._position = min(max(offset, 0), self._length)
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self._length - self._position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size <= 0:
+            return b""
+        self._handle.seek(self._start + self._position)
+        data = self._handle.read(size)
+        self._position += len(data)
+        return data
+
+
+class ObjectReadThroughCache(BoundedFileCache):
+    """Worker-local copies of published objects, one file per (key, ETag), trimmed LRU first."""
+
+    def _key_prefix(self, key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, etag: str) -> Path:
+        version = hashlib.sha256(etag.encode("utf-8")).hexdigest()[:16]
+        # Keep the extension: FFmpeg and the subtitle filter sniff formats by suffix.
+        return self.cache_dir / f"{self._key_prefix(key)}-{version}{Path(key).suffix}"
+
+    def fetch(self, backend: StorageBackend, key: str) -> Optional[Path]:
+        """Return a local copy of the current version of ``key``; None when it is not published."""
+        for _ in range(2):
+            head = backend.head(key)
+            if head is None:
+                return None
+            target = self.fetch_version(backend, key, head)
+            if target is not None:
+                return target
+        return None
+
+    def fetch_version(self, backend: StorageBackend, key: str, head: ObjectHead) -> Optional[Path]:
+        """Local copy of exactly ``head``'s version, downloaded at most once per node.
+
+        None when the object was replaced or deleted since ``head`` was taken.
+        """
+        target = self.path_for(key, head.etag)
+        if self._touch(target):
+            self._record(hits=1)
+            return target
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._key_lock(target):
+            if self._touch(target):
+                self._record(hits=1)
+                return target
+            try:
+                size = backend.download_file(key, target, etag=head.etag)
+            except FileNotFoundError:
+                return None
+            self._record(misses=1, bytes_downloaded=size)
+
+        self.evict(keep=target)
+        return target
+
+    def seed(self, key: str, source: Path, etag: str) -> Path:
+        """Register the file this node just uploaded as the cached copy of that version."""
+        target = self.path_for(key, etag)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._key_lock(target):
+            temp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+            temp.unlink(missing_ok=True)
+            try:
+                os.link(source, temp)
+            except OSError:
+                shutil.copyfile(source, temp)
+            os.replace(temp, target)
+        self.evict(keep=target)
+        return target
+
+    def discard(self, key: str) -> None:
+        """Drop every cached version of ``key`` (their lock sidecars go with the next eviction)."""
+        if not self.cache_dir.exists():
+            return
+        for path in self.cache_dir.glob(f"{self._key_prefix(key)}-*"):
+            if not path.name.endswith(".lock"):
+                path.unlink(missing_ok=True)
+
+
+def publish_file(
+    backend: StorageBackend,
+    path: Path,
+    key: str,
+    *,
+    content_type: Optional[str] = None,
+    cache: Optional[ObjectReadThroughCache] = None,
+) -> Optional[str]:
+    """Upload ``path`` under ``key`` and seed this node's read cache with it; returns the ETag."""
+    etag = backend.upload_file(path, key, content_type=content_type)
+    if etag:
+        (cache or get_object_read_cache()).seed(key, path, etag)
+    return etag
+
+
+_backend: Optional[StorageBackend] = None
+_object_cache: Optional[ObjectReadThroughCache] = None
+_lock = threading.Lock()
+
+
+def create_storage_backend() -> StorageBackend:
+    settings = get_settings()
+    if settings.storage_backend_type == "s3":
+        return S3StorageBackend(
+            settings.STORAGE_S3_BUCKET or "",
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            access_key=settings.STORAGE_S3_ACCESS_KEY,
+            secret_key=settings.STORAGE_S3_SECRET_KEY,
+            region=settings.STORAGE_S3_REGION,
+            prefix=settings.STORAGE_S3_PREFIX or "",
+            part_size=settings.storage_s3_part_size,
+            upload_concurrency=settings.storage_s3_upload_concurrency,
+        )
+    return LocalStorageBackend()
+
+
+def get_storage_backend() -> StorageBackend:
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = create_storage_backend()
+    return _backend
+
+
+def get_object_read_cache() -> ObjectReadThroughCache:
+    global _object_cache
+    if _object_cache is None:
+        with _lock:
+            if _object_cache is None:
+                settings = get_settings()
+                base = Path(settings.STORAGE_BASE_PATH or "storage").resolve()
+                _object_cache = ObjectReadThroughCache(
+                    base / "tmp" / "object-cache",
+                    max_bytes=settings.storage_object_cache_max_bytes,
+                )
+    return _object_cache
+
+
+__all__ = [
+    "LocalStorageBackend",
+    "ObjectHead",
+    "ObjectReadThroughCache",
+    "S3StorageBackend",
+    "StaleObjectError",
+    "StorageBackend",
+    "create_storage_backend",
+    "get_object_read_cache",
+    "get_storage_backend",
+    "publish_file",
+]
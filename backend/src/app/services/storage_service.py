@@ -1,6 +1,16 @@
-"""Local storage helper for media assets."""
+"""Storage helper for media assets.
+
+Files are always written under ``STORAGE_BASE_PATH``; ``publish`` additionally
+hands them to the configured ``StorageBackend`` (see ``storage_backends``) so
+other nodes can resolve the same ``/api/v1/storage/...`` path. With a remote
+backend the bucket is authoritative: a local working file is only used while it
+is the copy this node published for the object's current version.
+"""
 from __future__ import annotations
 
+import logging
+import mimetypes
+import os
 import secrets
 from dataclasses import dataclass
 from pathlib import Path
@@ -11,8 +21,17 @@ from fastapi import UploadFile
 
 from app.config.settings import Settings, get_settings
 from app.services.exceptions import ConfigurationException
+from app.services.storage_backends import (
+    ObjectReadThroughCache,
+    StorageBackend,
+    get_object_read_cache,
+    get_storage_backend,
+    publish_file,
+)
 from app.utils.timezone import naive_now
 
+logger = logging.getLogger(__name__)
+
 _API_STORAGE_PREFIX = "/api/v1/storage/"
 
 
@@ -40,13 +59,44 @@ class StorageSaveResult:
 class StorageService:
     """Encapsulates media storage operations (save + resolve URLs)."""
 
-    def __init__(self, settings: Optional[Settings] = None):
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        *,
+        backend: Optional[StorageBackend] = None,
+        object_cache: Optional[ObjectReadThroughCache] = None,
+    ):
         self._settings = settings or get_settings()
         if not self._settings.STORAGE_BASE_PATH:
             raise ConfigurationException("STORAGE_BASE_PATH is not configured", service_name="StorageService")
         self._base_path = Path(self._settings.STORAGE_BASE_PATH).resolve()
         public_base = (self._settings.STORAGE_PUBLIC_BASE_URL or "").strip()
         self._public_base_url = public_base.rstrip("/") if public_base else ""
+        self._backend = backend or get_storage_backend()
+        self._object_cache = object_cache
+
+    @property
+    def backend(self) -> StorageBackend:
+        return self._backend
+
+    def _read_cache(self) -> ObjectReadThroughCache:
+        if self._object_cache is None:
+            self._object_cache = get_object_read_cache()
+        return self._object_cache
+
+    def publish(self, absolute_path: Path, *, content_type: Optional[str] = None) -> StorageReference:
+        """Return the reference for a file written under storage and upload it to the backend."""
+
+        reference = self.reference_from_absolute(absolute_path)
+        if self._backend.remote:
+            publish_file(
+                self._backend,
+                reference.absolute_path,
+                reference.relative_path,
+                content_type=content_type or mimetypes.guess_type(reference.relative_path)[0],
+                cache=self._read_cache(),
+            )
+        return reference
 
     def _category_dir(self, asset_type: Optional[str]) -> Path:
         type_map = {
@@ -91,7 +141,7 @@ class StorageService:
         except Exception:  # pragma: no cover - best effort
             pass
 
-        relative_path = absolute_path.relative_to(self._base_path).as_posix()
+        relative_path = self.publish(absolute_path, content_type=upload.content_type).relative_path
         api_path = f"{_API_STORAGE_PREFIX}{relative_path}".replace("//", "/")
 
         return StorageSaveResult(
@@ -121,7 +171,7 @@ class StorageService:
         absolute_path = target_dir / filename
         absolute_path.write_text(content, encoding=encoding)
 
-        return self.reference_from_absolute(absolute_path)
+        return self.publish(absolute_path)
 
     def ensure_api_path(self, value: str) -> str:
         """Normalise an input path to `/api/v1/storage/...` (reject absolute URLs)."""
@@ -237,6 +287,10 @@ class StorageService:
     def ensure_local_path(self, value: str) -> Path:
         reference = self.resolve_reference(value)
         if reference and reference.absolute_path:
+            if self._backend.remote and reference.relative_path:
+                cached = self._current_copy(reference)
+                if cached is not None:
+                    return cached
             return reference.absolute_path
         # value might already be an absolute filesystem path
         path_candidate = Path(value)
@@ -244,6 +298,37 @@ class StorageService:
             return path_candidate
         raise ValueError(f"unable to resolve local path for value: {value}")
 
+    def _current_copy(self, reference: StorageReference) -> Optional[Path]:
+        """Local file holding the object's current version; None when it was never published."""
+        local = reference.absolute_path
+        try:
+            cached = self._read_cache().fetch(self._backend, reference.relative_path)
+        except Exception:
+            if not local.is_file():
+                raise
+            logger.warning("Object storage revalidation failed for %s, using local copy", reference.relative_path)
+            return local
+        if cached is None:
+            return None
+        # The node that published this version shares the inode with its seeded copy.
+        try:
+            if os.path.samefile(local, cached):
+                return local
+        except OSError:
+            pass
+        return cached
+
+    def delete(self, value: str) -> None:
+        """Remove a stored asset locally and from the backend (missing files are ignored)."""
+
+        reference = self.resolve_reference(value)
+        if not reference or not reference.absolute_path:
+            raise ValueError(f"unable to resolve storage path for value: {value}")
+        reference.absolute_path.unlink(missing_ok=True)
+        if self._backend.remote and reference.relative_path:
+            self._backend.delete(reference.relative_path)
+            self._read_cache().discard(reference.relative_path)
+
     def get_external_url(self, value: Optional[str]) -> Optional[str]:
         """Return an externally accessible URL for stored assets (if available)."""
 
@@ -6,18 +6,18 @@ from typing import Any, Dict, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
-from app.models.style_preset import StylePreset
+from app.services.config_cache import StylePresetRecord, get_config_cache
 
 def merge_style_preset(
     db: Session,
     task_config: Optional[Dict[str, Any]],
-) -> Tuple[Dict[str, Any], Dict[str, Any], Optional[StylePreset]]:
+) -> Tuple[Dict[str, Any], Dict[str, Any], Optional[StylePresetRecord]]:
     """Merge a style preset into the task configuration if applicable."""
     config: Dict[str, Any] = deepcopy(task_config) if isinstance(task_config, dict) else {}
     storyboard_cfg = config.get("storyboard") if isinstance(config.get("storyboard"), dict) else {}
 
     preset_id = storyboard_cfg.get("style_preset_id") or config.get("style_preset_id")
-    preset: Optional[StylePreset] = None
+    preset: Optional[StylePresetRecord] = None
 
     if preset_id is not None:
         try:
@@ -25,11 +25,8 @@ def merge_style_preset(
         except (TypeError, ValueError):
             preset_id_int = None
         if preset_id_int:
-            preset = (
-                db.query(StylePreset)
-                .filter(StylePreset.id == preset_id_int, StylePreset.is_active == True)
-                .first()
-            )
+            # Active presets come from the process-wide config cache.
+            preset = get_config_cache().style_preset(preset_id_int)
 
     if preset:
         storyboard_cfg["style_preset_id"] = preset.id
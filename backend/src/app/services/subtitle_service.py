@@ -5,7 +5,6 @@ import math
 import random
 import re
 import unicodedata
-from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
@@ -1162,12 +1161,7 @@ class SubtitleService(BaseService):
 
     def _delete_asset(self, api_path: str) -> None:
         try:
-            absolute = self.storage.to_absolute_path(api_path)
-        except Exception as exc:  # pragma: no cover - best effort cleanup
-            self._log_error(exc, {"operation": "delete_asset", "api_path": api_path})
-            return
-        try:
-            Path(absolute).unlink(missing_ok=True)
+            self.storage.delete(api_path)
         except Exception as exc:  # pragma: no cover - best effort cleanup
             self._log_error(exc, {"operation": "delete_asset", "api_path": api_path})
 
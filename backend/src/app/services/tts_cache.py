@@ -0,0 +1,241 @@
+"""Cross-task cache of synthesized narration audio.
+
+Identical narration (re-running the audio step, ``/reset/audio-pipeline``, a
+single-scene retry, or stories built from shared templates) used to be sent to
+the TTS provider again. Audio is now addressed by
+sha256(provider, voice, normalized text, format, sample rate, model). The file
+lives under ``<STORAGE_BASE_PATH>/audio/tts-cache/<xx>/<key>.<fmt>`` and is
+indexed in ``tts_audio_cache`` together with its ffprobe output.
+
+On a hit the cached file is hard-linked (copied across filesystems) to the
+scene's output path and its probe result is seeded into the media metadata
+cache, so neither the provider nor ffprobe is called. Scene files stay
+independent of the cache entry: deleting one never breaks the other.
+
+With a remote storage backend the cache file is uploaded as well and every
+lookup reads the current object version through the worker-local object cache.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.database import get_db_session
+from app.models.tts_cache import TtsAudioCache
+from app.services.media_metadata_cache import probe_media, register_media_metadata
+from app.services.storage_backends import (
+    StorageBackend,
+    get_object_read_cache,
+    get_storage_backend,
+    publish_file,
+)
+from app.utils.timezone import naive_now
+
+logger = logging.getLogger(__name__)
+
+_CACHE_DIR = Path("audio") / "tts-cache"
+
+
+def normalize_tts_text(text: Optional[str]) -> str:
+    """NFKC + collapsed whitespace, so formatting-only edits share one entry."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def tts_cache_key(
+    provider: str,
+    voice_id: Optional[str],
+    text: str,
+    *,
+    audio_format: Optional[str],
+    sample_rate: Optional[int],
+    model: Optional[str] = None,
+) -> str:
+    payload = {
+        "provider": provider,
+        "voice_id": voice_id,
+        "text": normalize_tts_text(text),
+        "format": audio_format,
+        "sample_rate": int(sample_rate) if sample_rate else None,
+        "model": model,
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class TtsCacheHit:
+    key: str
+    size: int
+    duration: Optional[float]
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(f"{target.name}.link")
+    temp.unlink(missing_ok=True)
+    try:
+        os.link(source, temp)
+    except OSError:
+        shutil.copyfile(source, temp)
+    os.replace(temp, target)
+
+
+def _probe_duration(probe: Optional[Dict[str, Any]]) -> Optional[float]:
+    try:
+        value = ((probe or {}).get("format") or {}).get("duration")
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TtsAudioCacheService:
+    """Lookup/store of synthesized audio; every call uses its own short DB session."""
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        base_path: Optional[Path] = None,
+        backend: Optional[StorageBackend] = None,
+    ) -> None:
+        self.enabled = enabled
+        settings = get_settings()
+        if base_path is None and settings.STORAGE_BASE_PATH:
+            base_path = Path(settings.STORAGE_BASE_PATH).resolve()
+        self._base_path = base_path
+        self._backend = backend or get_storage_backend()
+
+    def _cache_path(self, key: str, audio_format: Optional[str]) -> Path:
+        suffix = (audio_format or "mp3").lstrip(".")
+        return self._base_path / _CACHE_DIR / key[:2] / f"{key}.{suffix}"
+
+    def fetch(self, key: str, target: Path) -> Optional[TtsCacheHit]:
+        """Materialize a cached entry at ``target``; None on a miss or a stale row."""
+        if not self.enabled or self._base_path is None:
+            return None
+        db = get_db_session()
+        try:
+            row = db.query(TtsAudioCache).filter(TtsAudioCache.cache_key == key).first()
+            if row is None:
+                return None
+            source = self._base_path / row.relative_path
+            if self._backend.remote:
+                # A forced re-synthesis on another node replaces the object under the same key.
+                source = get_object_read_cache().fetch(self._backend, row.relative_path) or source
+            if not source.is_file():
+                # The cached file was removed out of band; forget the row.
+                db.delete(row)
+                db.commit()
+                return None
+            _link_or_copy(source, target)
+            row.hit_count = (row.hit_count or 0) + 1
+            row.last_hit_at = naive_now()
+            db.commit()
+            if row.probe:
+                register_media_metadata(str(target), row.probe)
+            return TtsCacheHit(key=key, size=target.stat().st_size, duration=row.duration)
+        except Exception:
+            db.rollback()
+            logger.warning("TTS cache lookup failed for %s", key, exc_info=True)
+            return None
+        finally:
+            db.close()
+
+    def store(
+        self,
+        key: str,
+        source: Path,
+        *,
+        provider: str,
+        voice_id: Optional[str],
+        text: str,
+        audio_format: Optional[str],
+        sample_rate: Optional[int],
+        model: Optional[str] = None,
+    ) -> Optional[float]:
+        """Index a freshly synthesized file; returns its probed duration when known."""
+        if not self.enabled or self._base_path is None:
+            return None
+        probe: Optional[Dict[str, Any]] = None
+        try:
+            # Scene composition probes this file later anyway; the result is cached.
+            probe = probe_media(str(source))
+        except Exception:
+            logger.debug("Failed to probe synthesized audio %s", source, exc_info=True)
+        cached_path = self._cache_path(key, audio_format)
+        db = get_db_session()
+        try:
+            _link_or_copy(source, cached_path)
+            relative_path = cached_path.relative_to(self._base_path).as_posix()
+            if self._backend.remote:
+                publish_file(self._backend, cached_path, relative_path)
+            values = {
+                "provider": provider,
+                "voice_id": voice_id,
+                "model": model,
+                "audio_format": audio_format,
+                "sample_rate": int(sample_rate) if sample_rate else None,
+                "text_preview": normalize_tts_text(text)[:200],
+                "relative_path": relative_path,
+                "file_size": cached_path.stat().st_size,
+                "duration": _probe_duration(probe),
+                "probe": probe,
+            }
+            self._upsert_row(db, key, values)
+        except Exception:
+            db.rollback()
+            logger.warning("Failed to store synthesized audio %s in TTS cache", source, exc_info=True)
+        finally:
+            db.close()
+        return _probe_duration(probe)
+
+    @staticmethod
+    def _upsert_row(db: Session, key: str, values: Dict[str, Any]) -> None:
+        # The file at relative_path was just replaced (a forced re-synthesis, or a
+        # worker racing us on the same narration), so an existing row must follow it.
+        for attempt in range(2):
+            row = db.query(TtsAudioCache).filter(TtsAudioCache.cache_key == key).first()
+            if row is None:
+                db.add(TtsAudioCache(cache_key=key, hit_count=0, **values))
+            else:
+                for name, value in values.items():
+                    setattr(row, name, value)
+                row.updated_at = naive_now()
+            try:
+                db.commit()
+                return
+            except IntegrityError:
+                # Another worker inserted the row between our read and insert.
+                db.rollback()
+                if attempt:
+                    raise
+
+
+_cache: Optional[TtsAudioCacheService] = None
+
+
+def get_tts_audio_cache() -> TtsAudioCacheService:
+    global _cache
+    if _cache is None:
+        _cache = TtsAudioCacheService(enabled=get_settings().tts_cache_enabled)
+    return _cache
+
+
+__all__ = [
+    "TtsAudioCacheService",
+    "TtsCacheHit",
+    "get_tts_audio_cache",
+    "normalize_tts_text",
+    "tts_cache_key",
+]
@@ -2,22 +2,25 @@
 from typing import Optional
 
 import logging
+import time
 
 from celery import shared_task
 from celery.exceptions import Retry
-from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.celery_app import celery_app
+from app.config.settings import get_settings
 from app.database import get_db_session
 from app.models.media import Scene
 from app.models.task import Task, TaskStep
+from app.services.exceptions import RateLimitExceededException
 from app.services.providers.base import MediaRequest
 from app.services.providers.registry import resolve_task_provider
 from app.services.providers.utils import collect_provider_candidates
 from app.services.storage_service import StorageService
-from app.tasks.utils import ensure_provider_map
+from app.tasks.utils import ensure_provider_map, notify_scene_pipeline, scene_pipeline_enabled
 from app.tasks.utils.interrupts import StepInterruptController, summarize_status_counts
+from app.tasks.transcription_task import dispatch_scene_transcription
 from app.services.audio_postprocess import get_audio_post_processor
 from app.services.ffmpeg_service import FFmpegService
 from app.utils.timezone import naive_now
@@ -31,15 +34,6 @@ _audio_post_processor = get_audio_post_processor()
 _ffmpeg_service = FFmpegService()
 
 
-AUDIO_LOCK_NAME = "audio_generation_lock"
-
-
-def acquire_audio_lock(db: Session) -> bool:
-    result = db.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": AUDIO_LOCK_NAME})
-    value = result.scalar()
-    return bool(value)
-
-
 def _probe_audio_duration(audio_url: Optional[str]) -> Optional[float]:
     if not audio_url:
         return None
@@ -55,14 +49,158 @@ def _probe_audio_duration(audio_url: Optional[str]) -> Optional[float]:
         return None
 
 
-def release_audio_lock(db: Session) -> None:
-    db.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": AUDIO_LOCK_NAME})
+def _rate_limit_block(scene: Scene) -> dict:
+    meta = scene.audio_meta if isinstance(scene.audio_meta, dict) else {}
+    block = meta.get("rate_limit")
+    return dict(block) if isinstance(block, dict) else {}
+
+
+def _summarize_rate_limit(scenes) -> dict:
+    waited = 0.0
+    rejections = 0
+    for sc in scenes:
+        block = _rate_limit_block(sc)
+        try:
+            waited += float(block.get("waited_seconds") or 0.0)
+            rejections += int(block.get("rejections") or 0)
+        except (TypeError, ValueError):
+            continue
+    return {"waited_seconds": round(waited, 3), "rejections": rejections}
+
+def _scene_voice_id(task: Task, task_config: dict, audio_config: dict, scene: Scene) -> Optional[str]:
+    scene_params = scene.params if isinstance(scene.params, dict) else {}
+    return (
+        scene_params.get("voice_id")
+        or audio_config.get("voice_id")
+        or task_config.get("audio_voice_value")
+        or getattr(task, "selected_voice_id", None)
+        or task_config.get("audio_voice_id")
+    )
+
+
+def _scene_audio_request(task: Task, task_config: dict, audio_config: dict, scene: Scene, voice_id: str) -> MediaRequest:
+    return MediaRequest(
+        text=scene.narration_text,
+        voice_id=voice_id,
+        extra={
+            "task_id": task.id,
+            "scene_seq": scene.seq,
+            "format": audio_config.get("format") or task_config.get("audio_format"),
+            "sample_rate": audio_config.get("sample_rate") or task_config.get("audio_sample_rate"),
+            "voice_id": voice_id,
+            # task_config.audio.tts_cache=false 时强制重新合成（新结果仍写入缓存）
+            "tts_cache": audio_config.get("tts_cache") is not False,
+        },
+    )
+
+
+def _prefetch_scene_audio(db: Session, task: Task, provider, task_config: dict, audio_config: dict, scene_ids) -> dict:
+    """支持并发合成的 provider（FishAudio）先并发生成所有待处理分镜的音频
+
+    返回 {scene_id: MediaResult 或异常}，逐分镜循环直接消费这些结果；
+    总耗时约等于最慢的几次请求，而不是全部请求之和。
+    """
+    generate_many = getattr(provider, "generate_many", None)
+    if not callable(generate_many):
+        return {}
+    pending = []
+    for scene_pk in scene_ids:
+        scene = db.get(Scene, scene_pk)
+        if not scene or scene.audio_status == 2:
+            continue
+        voice_id = _scene_voice_id(task, task_config, audio_config, scene)
+        if voice_id:
+            pending.append((scene, _scene_audio_request(task, task_config, audio_config, scene, voice_id)))
+    if len(pending) < 2:
+        return {}
+
+    for scene, _ in pending:
+        scene.audio_status = 1
+        scene.audio_duration = None
+        scene.error_msg = None
+        scene.started_at = naive_now()
+    db.commit()
+
+    started = time.monotonic()
+    results = generate_many([request for _, request in pending])
+    logger.info(
+        "Synthesized audio for %s scenes of task %s concurrently in %.1fs",
+        len(pending),
+        task.id,
+        time.monotonic() - started,
+    )
+    return {scene.id: result for (scene, _), result in zip(pending, results)}
+
+
+def _release_prefetched_scenes(db: Session, prefetched: dict) -> None:
+    """中断或异常退出时，并发预取但未被逐分镜循环消费的分镜退回待处理
+
+    否则它们停在 audio_status=1，既不会被重跑，也会让步骤一直显示进行中。
+    """
+    if not prefetched:
+        return
+    scene_ids = list(prefetched)
+    prefetched.clear()
+    try:
+        for scene_pk in scene_ids:
+            scene = db.get(Scene, scene_pk)
+            if scene is not None and scene.audio_status == 1:
+                scene.audio_status = 0
+                scene.started_at = None
+        db.commit()
+    except Exception:
+        logger.exception("Failed to reset unconsumed prefetched audio scenes")
+        db.rollback()
+
+
+def _summarize_tts_cache(scenes) -> dict:
+    hits = 0
+    misses = 0
+    for sc in scenes:
+        meta = sc.audio_meta if isinstance(sc.audio_meta, dict) else {}
+        block = meta.get("tts_cache")
+        if not isinstance(block, dict):
+            continue
+        if block.get("hit"):
+            hits += 1
+        else:
+            misses += 1
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def _summarize_synthesis(scenes) -> dict:
+    latencies = []
+    total_bytes = 0
+    for sc in scenes:
+        meta = sc.audio_meta if isinstance(sc.audio_meta, dict) else {}
+        block = meta.get("synthesis")
+        if not isinstance(block, dict):
+            continue
+        try:
+            latencies.append(float(block.get("latency_ms") or 0.0))
+            total_bytes += int(block.get("bytes") or 0)
+        except (TypeError, ValueError):
+            continue
+    if not latencies:
+        return {}
+    return {
+        "requests": len(latencies),
+        "bytes": total_bytes,
+        "latency_ms_max": round(max(latencies), 1),
+        "latency_ms_avg": round(sum(latencies) / len(latencies), 1),
+    }
+
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
     """异步音频生成任务"""
     db: Session = get_db_session()
-    lock_acquired = False
+    prefetched: dict = {}
     try:
         task = db.get(Task, task_id)
         if not task or task.is_deleted:
@@ -80,12 +218,6 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
         task.providers = providers_map
         db.commit()
 
-        requires_lock = str(provider_name).lower() == "fishaudio"
-        if requires_lock:
-            lock_acquired = acquire_audio_lock(db)
-            if not lock_acquired:
-                raise self.retry(exc=RuntimeError("Fish Audio 服务已有任务执行中"), countdown=10)
-
         step.status = 1
         db.commit()
 
@@ -107,6 +239,10 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
 
         task_trim_enabled = _coerce_bool(task_config.get("audio_trim_silence"), True)
         audio_trim_default = _coerce_bool(audio_config.get("trim_silence"), task_trim_enabled)
+        trim_materialize = _coerce_bool(
+            audio_config.get("trim_materialize"),
+            get_settings().audio_trim_materialize,
+        )
 
         scenes = (
             db.query(Scene)
@@ -140,6 +276,11 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
         completed_count = 0
         queued_count = 0
         failed_count = 0
+        deferred_rate_limit: Optional[RateLimitExceededException] = None
+        rate_limit_retries = get_settings().audio_rate_limit_max_retries
+
+        if not interrupt_helper.should_abort():
+            prefetched = _prefetch_scene_audio(db, task, provider, task_config, audio_config, target_scene_ids)
 
         for scene_pk in target_scene_ids:
             if interrupt_helper.should_abort():
@@ -158,13 +299,7 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
             scene_params = scene.params if isinstance(scene.params, dict) else {}
             scene_trim_enabled = _coerce_bool(scene_params.get("trim_silence"), audio_trim_default)
 
-            voice_id = (
-                scene_params.get("voice_id")
-                or audio_config.get("voice_id")
-                or task_config.get("audio_voice_value")
-                or getattr(task, "selected_voice_id", None)
-                or task_config.get("audio_voice_id")
-            )
+            voice_id = _scene_voice_id(task, task_config, audio_config, scene)
             if not voice_id:
                 raise RuntimeError("缺少音色配置，无法生成音频")
 
@@ -172,7 +307,8 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
                 scene.audio_status = 1
             scene.audio_duration = None
             scene.error_msg = None
-            scene.started_at = naive_now()
+            if scene_pk not in prefetched:
+                scene.started_at = naive_now()
             try:
                 db.commit()
             except Exception as mark_exc:
@@ -186,20 +322,46 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
                 except Exception:
                     pass
 
+            previous_rejections = int(_rate_limit_block(scene).get("rejections") or 0)
             try:
-                result = provider.generate(
-                    MediaRequest(
-                        text=scene.narration_text,
-                        voice_id=voice_id,
-                        extra={
-                            "task_id": task.id,
-                            "scene_seq": scene.seq,
-                            "format": audio_config.get("format") or task_config.get("audio_format"),
-                            "sample_rate": audio_config.get("sample_rate") or task_config.get("audio_sample_rate"),
-                            "voice_id": voice_id,
-                        },
+                if scene_pk in prefetched:
+                    result = prefetched.pop(scene_pk)
+                    if isinstance(result, BaseException):
+                        raise result
+                else:
+                    result = provider.generate(_scene_audio_request(task, task_config, audio_config, scene, voice_id))
+            except RateLimitExceededException as exc:
+                # Quota exhausted for now: keep the scene in flight and retry later
+                # instead of failing it, until the retry budget is spent.
+                meta = dict(scene.audio_meta) if isinstance(scene.audio_meta, dict) else {}
+                meta["rate_limit"] = {**_rate_limit_block(scene), "rejections": previous_rejections + 1}
+                scene.audio_meta = meta
+                if self.request.retries < rate_limit_retries:
+                    db.commit()
+                    if prefetched:
+                        # 其余分镜的并发结果已就绪，先处理完再统一重试
+                        deferred_rate_limit = exc
+                        continue
+                    raise self.retry(
+                        exc=exc,
+                        countdown=max(int(exc.retry_after or 0), 5),
+                        max_retries=rate_limit_retries,
                     )
+                logger.warning(
+                    "Audio scene %s of task %s still rate limited after %s retries",
+                    scene_pk,
+                    task_id,
+                    self.request.retries,
                 )
+                scene.audio_status = 3
+                scene.audio_provider = provider_name
+                scene.audio_retry_count = (scene.audio_retry_count or 0) + 1
+                scene.error_msg = f"音频合成限流重试 {self.request.retries} 次后仍未获得配额: {exc}"
+                scene.finished_at = naive_now()
+                scene.audio_duration = None
+                failed_count += 1
+                db.commit()
+                continue
             except Exception as exc:  # pragma: no cover - remote failure
                 scene.audio_status = 3
                 scene.audio_provider = provider_name
@@ -214,6 +376,10 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
             scene.audio_provider = provider_name
             scene.audio_job_id = getattr(result, "job_id", None)
             scene.audio_meta = result.meta
+            if previous_rejections and isinstance(result.meta, dict):
+                meta = dict(result.meta)
+                meta["rate_limit"] = {**_rate_limit_block(scene), "rejections": previous_rejections}
+                scene.audio_meta = meta
 
             if interrupt_helper.handle_interrupt_after_provider(scene):
                 db.commit()
@@ -256,6 +422,7 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
                             threshold_db=-35.0,
                             max_leading=0.1,
                             max_trailing=0.1,
+                            materialize=trim_materialize,
                         )
                         if trim_result.report:
                             existing_meta = scene.audio_meta if isinstance(scene.audio_meta, dict) else {}
@@ -277,6 +444,7 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
                                     "duration": trim_result.report.duration,
                                     "remaining_leading": remaining_leading,
                                     "remaining_trailing": remaining_trailing,
+                                    "audio_url": storage_url,
                                 }
                             )
                             meta["silence_report"] = report_block
@@ -285,31 +453,35 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
                                 duration_value = float(trim_result.report.duration)
                             except (TypeError, ValueError):
                                 duration_value = None
-                        if trim_result.trimmed and trim_result.reference:
-                            original_url = scene.audio_url
-                            scene.audio_url = trim_result.reference.api_path
+                        if trim_result.trimmed and trim_result.end is not None:
+                            # 默认只缓存保留区间，由分镜合成在滤镜图中 atrim；显式要求时才落盘裁剪文件
                             existing_meta = scene.audio_meta if isinstance(scene.audio_meta, dict) else {}
                             meta = dict(existing_meta)
-                            trim_block = dict(meta.get("silence_trim") or {})
-                            trim_block.update(
-                                {
-                                    "tool": trim_result.tool,
-                                    "leading_removed": trim_result.removed_leading,
-                                    "trailing_removed": trim_result.removed_trailing,
-                                    "remaining_leading": max(
-                                        trim_result.report.leading_silence - trim_result.removed_leading,
-                                        0.0,
-                                    ),
-                                    "remaining_trailing": max(
-                                        trim_result.report.trailing_silence - trim_result.removed_trailing,
-                                        0.0,
-                                    ),
-                                    "original_url": original_url,
-                                    "new_url": trim_result.reference.api_path,
-                                }
-                            )
+                            trim_block = {
+                                "tool": trim_result.tool,
+                                "start": trim_result.start,
+                                "end": trim_result.end,
+                                "leading_removed": trim_result.removed_leading,
+                                "trailing_removed": trim_result.removed_trailing,
+                                "remaining_leading": max(
+                                    trim_result.report.leading_silence - trim_result.removed_leading,
+                                    0.0,
+                                ),
+                                "remaining_trailing": max(
+                                    trim_result.report.trailing_silence - trim_result.removed_trailing,
+                                    0.0,
+                                ),
+                            }
+                            if trim_result.reference:
+                                original_url = scene.audio_url
+                                scene.audio_url = trim_result.reference.api_path
+                                trim_block["original_url"] = original_url
+                                trim_block["new_url"] = trim_result.reference.api_path
+                            else:
+                                trim_block["audio_url"] = scene.audio_url
                             meta["silence_trim"] = trim_block
                             scene.audio_meta = meta
+                            duration_value = float(trim_result.end - trim_result.start)
                             try:
                                 db.commit()
                             except Exception:
@@ -320,6 +492,9 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
                             "Failed to trim silence for audio scene %s",
                             getattr(scene, "id", None),
                         )
+                if duration_value is None and isinstance(result.meta, dict) and result.meta.get("duration"):
+                    # TTS 缓存命中/入库时已有 ffprobe 时长，无需再次探测
+                    duration_value = float(result.meta["duration"])
                 if duration_value is None:
                     duration_value = _probe_audio_duration(scene.audio_url)
                 scene.audio_duration = duration_value
@@ -337,6 +512,21 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
                 failed_count += 1
 
             db.commit()
+            if scene.audio_status == 2:
+                try:
+                    dispatch_scene_transcription(task, scene)
+                except Exception:
+                    logger.exception("Failed to dispatch transcription for scene %s", scene.id)
+
+        # 中断 break 时剩余的并发结果不再消费
+        _release_prefetched_scenes(db, prefetched)
+
+        if deferred_rate_limit is not None and not interrupt_helper.should_abort():
+            raise self.retry(
+                exc=deferred_rate_limit,
+                countdown=max(int(deferred_rate_limit.retry_after or 0), 5),
+                max_retries=rate_limit_retries,
+            )
 
         scenes = (
             db.query(Scene)
@@ -356,6 +546,9 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
             "completed": overall_completed,
             "queued": overall_queued,
             "failed": overall_failed,
+            "rate_limit": _summarize_rate_limit(scenes),
+            "synthesis": _summarize_synthesis(scenes),
+            "tts_cache": _summarize_tts_cache(scenes),
         }
 
         total_scenes = len(scenes)
@@ -370,11 +563,11 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
                 step.status = 3
                 step.error_msg = "音频生成全部失败"
                 step.progress = 0
+            elif overall_queued > 0 or pending_count > 0:
+                step.status = 1
             elif overall_failed > 0 and overall_completed > 0:
                 step.status = 6
                 step.error_msg = "部分音频生成失败"
-            elif overall_queued > 0 or pending_count > 0:
-                step.status = 1
             else:
                 step.status = 2
 
@@ -384,11 +577,12 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
         if not task_mode:
             raise RuntimeError("任务未配置执行模式")
         # Only auto-continue when the step is fully completed (status == 2). Do NOT continue on INTERRUPTED (6).
-        if scene_id is None and task_mode == 'auto' and step.status == 2:
+        if scene_id is None and scene_pipeline_enabled(task):
+            notify_scene_pipeline(task.id)
+        elif scene_id is None and task_mode == 'auto' and step.status == 2:
             celery_app.send_task(
                 'app.tasks.video_task.generate_video_task',
                 args=[task.id],
-                queue='default',
                 serializer='json',
             )
 
@@ -405,9 +599,5 @@ def generate_audio_task(self, task_id: int, scene_id: Optional[int] = None):
             db.commit()
         raise self.retry(exc=e)
     finally:
-        if lock_acquired:
-            try:
-                release_audio_lock(db)
-            except Exception:
-                pass
+        _release_prefetched_scenes(db, prefetched)
         db.close()
@@ -9,6 +9,7 @@ from celery import shared_task
 from sqlalchemy.orm import Session
 
 from app.database import get_db_session
+from app.models.media import Scene
 from app.models.task import Task, TaskStep
 from app.models.subtitle_style import SubtitleStyle
 from app.models.media_asset import MediaAsset
@@ -18,6 +19,17 @@ from app.services.storage_service import StorageService
 from app.services.subtitle_service import SubtitleService
 from app.services.subtitle_style_service import SubtitleStyleService
 from app.services.faster_whisper_service import get_faster_whisper_service
+from app.services.scene_transcription import (
+    MODE_SCENE,
+    MODE_VIDEO,
+    build_scene_timeline,
+    cached_scene_transcription,
+    combine_scene_transcriptions,
+    store_scene_transcription,
+    subtitle_options,
+    subtitle_transcribe_mode,
+    transcribe_scenes_parallel,
+)
 from app.services.providers.utils import collect_provider_candidates
 from app.tasks.utils import ensure_provider_map
 from app.config.settings import get_settings
@@ -27,6 +39,9 @@ _storage_service = StorageService()
 _subtitle_service = SubtitleService()
 _subtitle_style_helper = SubtitleStyleService()
 
+# bgm_mix + embed_subtitles collapsed into one FFmpeg encode (ffmpeg provider only)
+_FUSED_OPERATION = "bgm_mix_embed_subtitles"
+
 
 def _extract_first_value(payload: Any, keys: Tuple[str, ...]) -> Optional[Any]:
     if isinstance(payload, dict):
@@ -97,6 +112,55 @@ def _resolve_subtitle_style_snapshot(task: Task, db: Session) -> Optional[Dict[s
     return snapshot_payload
 
 
+def _transcribe_by_scene(
+    whisper_service: Any,
+    task: Task,
+    db: Session,
+    source_video: str,
+) -> Tuple[Optional[Any], Dict[str, Any]]:
+    """Build the merged-video transcript from per-scene transcripts.
+
+    Scenes already transcribed by transcription_task are reused; the rest are
+    transcribed here in parallel. Returns (None, stats) when the merged video is
+    not a plain concat of composed scene clips.
+    """
+    scenes = db.query(Scene).filter(Scene.task_id == task.id).order_by(Scene.seq).all()
+    timeline = build_scene_timeline(scenes)
+    if not timeline:
+        return None, {"mode": MODE_SCENE, "fallback": "timeline_unavailable"}
+
+    payloads: Dict[int, Dict[str, Any]] = {}
+    missing: List[Scene] = []
+    for entry in timeline:
+        cached = cached_scene_transcription(entry.scene)
+        if cached:
+            payloads[entry.scene.id] = cached
+        else:
+            missing.append(entry.scene)
+
+    if missing:
+        fresh = transcribe_scenes_parallel(whisper_service, missing, subtitle_options(task.task_config))
+        for scene in missing:
+            payload = fresh.get(scene.id)
+            if payload:
+                store_scene_transcription(scene, payload)
+                payloads[scene.id] = payload
+        db.commit()
+
+    transcription = combine_scene_transcriptions(
+        timeline,
+        payloads,
+        model=getattr(whisper_service, "model_id", ""),
+        source_path=str(source_video),
+    )
+    return transcription, {
+        "mode": MODE_SCENE,
+        "scenes": len(timeline),
+        "precomputed": len(timeline) - len(missing),
+        "transcribed_at_finalize": len(missing),
+    }
+
+
 def _generate_subtitles(
     _service: Any,
     _provider_name: str,
@@ -123,17 +187,22 @@ def _generate_subtitles(
         }
 
     whisper_service = get_faster_whisper_service()
-    transcription = whisper_service.transcribe(
-        source_video,
-        language=subtitles_config.get("language"),
-        beam_size=subtitles_config.get("beam_size"),
-        vad_filter=subtitles_config.get("vad_filter"),
-        word_timestamps=subtitles_config.get("word_timestamps"),
-        task=subtitles_config.get("task"),
-        initial_prompt=subtitles_config.get("initial_prompt"),
-        chunk_length=subtitles_config.get("chunk_length"),
-        temperature=subtitles_config.get("temperature"),
-    )
+    transcription = None
+    scene_stats: Optional[Dict[str, Any]] = None
+    if subtitle_transcribe_mode(task.task_config) == MODE_SCENE:
+        transcription, scene_stats = _transcribe_by_scene(whisper_service, task, db, source_video)
+    if transcription is None:
+        transcription = whisper_service.transcribe(
+            source_video,
+            language=subtitles_config.get("language"),
+            beam_size=subtitles_config.get("beam_size"),
+            vad_filter=subtitles_config.get("vad_filter"),
+            word_timestamps=subtitles_config.get("word_timestamps"),
+            task=subtitles_config.get("task"),
+            initial_prompt=subtitles_config.get("initial_prompt"),
+            chunk_length=subtitles_config.get("chunk_length"),
+            temperature=subtitles_config.get("temperature"),
+        )
 
     asset_type = subtitles_config.get("asset_type") or "subtitles"
     style_snapshot = context.get("subtitle_style_snapshot") if isinstance(context.get("subtitle_style_snapshot"), dict) else None
@@ -170,6 +239,7 @@ def _generate_subtitles(
         "text": document.text,
         "style_name": subtitle_result.style_name,
         "force_style": subtitle_result.force_style,
+        "transcription": scene_stats or {"mode": MODE_VIDEO},
     }
 
     if style_snapshot:
@@ -276,22 +346,47 @@ def _resolve_bgm_source(
     return None, {"source": "missing"}
 
 
-def _apply_bgm_mix(
+def _resolve_output_api_path(result: Dict[str, Any]) -> Optional[str]:
+    candidate_values = [
+        result.get("video_api_path"),
+        result.get("video_relative_path"),
+        result.get("video_url"),
+    ]
+
+    for candidate in candidate_values:
+        if not candidate:
+            continue
+        final_reference = _storage_service.resolve_reference(candidate)
+        if final_reference:
+            return final_reference.api_path
+
+    for candidate in candidate_values:
+        if not candidate:
+            continue
+        try:
+            return _storage_service.ensure_api_path(str(candidate))
+        except ValueError:
+            continue
+    return None
+
+
+def _prepare_bgm_mix(
     service: Any,
     provider_name: str,
     task: Task,
     db: Session,
     context: Dict[str, Any],
     finalize_config: Dict[str, Any],
-) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Resolve BGM source, durations and fade/volume. Returns (params, skip_reason)."""
     bgm_settings = finalize_config.get("bgm") if isinstance(finalize_config.get("bgm"), dict) else {}
     bgm_enabled = bgm_settings.get("enabled", True)
     if not bgm_enabled:
-        return context, {"operation": "bgm_mix", "status": "skipped", "reason": "disabled"}
+        return None, "disabled"
 
     bgm_url, bgm_meta = _resolve_bgm_source(db, task, finalize_config)
     if not bgm_url:
-        return context, {"operation": "bgm_mix", "status": "skipped", "reason": "missing_bgm"}
+        return None, "missing_bgm"
 
     current_video_url = context.get("current_video_url")
     if not current_video_url:
@@ -337,6 +432,51 @@ def _apply_bgm_mix(
         "video_metadata": video_metadata,
     }
 
+    return {
+        "current_video_url": current_video_url,
+        "video_source": video_source,
+        "bgm_url": bgm_url,
+        "bgm_source": bgm_source,
+        "bgm_meta": bgm_meta,
+        "bgm_metadata": bgm_metadata,
+        "video_metadata": video_metadata,
+        "video_duration": video_duration,
+        "bgm_duration": bgm_duration,
+        "fade_start": fade_start,
+        "fade_duration": fade_duration,
+        "volume_db": volume_db,
+        "volume_expr": volume_expr,
+        "artifacts_entry": artifacts_entry,
+    }, None
+
+
+def _apply_bgm_mix(
+    service: Any,
+    provider_name: str,
+    task: Task,
+    db: Session,
+    context: Dict[str, Any],
+    finalize_config: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    params, skip_reason = _prepare_bgm_mix(service, provider_name, task, db, context, finalize_config)
+    if params is None:
+        return context, {"operation": "bgm_mix", "status": "skipped", "reason": skip_reason}
+
+    current_video_url = params["current_video_url"]
+    video_source = params["video_source"]
+    bgm_url = params["bgm_url"]
+    bgm_source = params["bgm_source"]
+    bgm_meta = params["bgm_meta"]
+    bgm_metadata = params["bgm_metadata"]
+    video_metadata = params["video_metadata"]
+    video_duration = params["video_duration"]
+    bgm_duration = params["bgm_duration"]
+    fade_start = params["fade_start"]
+    fade_duration = params["fade_duration"]
+    volume_db = params["volume_db"]
+    volume_expr = params["volume_expr"]
+    artifacts_entry = params["artifacts_entry"]
+
     if provider_name == "ffmpeg":
         result = service.mix_background_music(
             base_video_url=current_video_url,
@@ -347,33 +487,7 @@ def _apply_bgm_mix(
             task_id=task.id,
         )
 
-        candidate_values = [
-            result.get("video_api_path"),
-            result.get("video_relative_path"),
-            result.get("video_url"),
-        ]
-
-        final_reference = None
-        for candidate in candidate_values:
-            if not candidate:
-                continue
-            final_reference = _storage_service.resolve_reference(candidate)
-            if final_reference:
-                break
-
-        final_api_path: Optional[str] = None
-        if final_reference:
-            final_api_path = final_reference.api_path
-        else:
-            for candidate in candidate_values:
-                if not candidate:
-                    continue
-                try:
-                    final_api_path = _storage_service.ensure_api_path(str(candidate))
-                    break
-                except ValueError:
-                    continue
-
+        final_api_path = _resolve_output_api_path(result)
         if not final_api_path:
             raise RuntimeError("配乐合成未返回视频地址")
 
@@ -460,42 +574,69 @@ def _apply_bgm_mix(
     }
 
 
-def _embed_subtitles(
-    service: Any,
+def _resolve_embed_subtitles(
     provider_name: str,
-    task: Task,
-    db: Session,
     context: Dict[str, Any],
     finalize_config: Dict[str, Any],
-) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+) -> Tuple[Optional[Tuple[str, Optional[str]]], Optional[str]]:
+    """Return ((subtitle_local_path, subtitle_api_path), None) or (None, skip_reason)."""
     subtitles_config = finalize_config.get("subtitles") if isinstance(finalize_config.get("subtitles"), dict) else {}
     embed_enabled = subtitles_config.get("embed", True)
     if not embed_enabled:
-        return context, {
-            "operation": "embed_subtitles",
-            "status": "skipped",
-            "reason": "disabled",
-        }
+        return None, "disabled"
 
     if provider_name != "ffmpeg":
-        return context, {
-            "operation": "embed_subtitles",
-            "status": "skipped",
-            "reason": "provider_not_supported",
-            "provider": provider_name,
-        }
+        return None, "provider_not_supported"
 
-    subtitle_ass_api_path = context.get("subtitle_ass_api_path")
     subtitle_ass_local_path = context.get("subtitle_ass_local_path")
     if not subtitle_ass_local_path:
-        return context, {
+        return None, "missing_ass_subtitles"
+
+    subtitle_api_path = context.get("subtitle_ass_api_path") or context.get("subtitle_api_path")
+    return (subtitle_ass_local_path, subtitle_api_path), None
+
+
+def _record_embedded_subtitles(
+    context: Dict[str, Any],
+    result: Dict[str, Any],
+    *,
+    final_api_path: str,
+    subtitle_local_path: str,
+    subtitle_api_path: Optional[str],
+    subtitle_style: Optional[str],
+) -> str:
+    subtitles_artifact = context.setdefault("artifacts", {}).setdefault("subtitles", {})
+    embed_format = "ass" if subtitle_local_path.lower().endswith(".ass") else "srt"
+    subtitles_artifact["embedded_video_api_path"] = final_api_path
+    subtitles_artifact["embedded_video_relative_path"] = result.get("video_relative_path")
+    subtitles_artifact["embedded_video_url"] = result.get("video_url")
+    if subtitle_style:
+        subtitles_artifact["embedded_style"] = subtitle_style
+    subtitles_artifact["embedded_format"] = embed_format
+    subtitles_artifact["embedded_subtitle_api_path"] = subtitle_api_path
+    return embed_format
+
+
+def _embed_subtitles(
+    service: Any,
+    provider_name: str,
+    task: Task,
+    db: Session,
+    context: Dict[str, Any],
+    finalize_config: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    subtitle_paths, skip_reason = _resolve_embed_subtitles(provider_name, context, finalize_config)
+    if subtitle_paths is None:
+        entry: Dict[str, Any] = {
             "operation": "embed_subtitles",
             "status": "skipped",
-            "reason": "missing_ass_subtitles",
+            "reason": skip_reason,
         }
+        if skip_reason == "provider_not_supported":
+            entry["provider"] = provider_name
+        return context, entry
 
-    subtitle_local_path = subtitle_ass_local_path
-    subtitle_api_path = subtitle_ass_api_path or context.get("subtitle_api_path")
+    subtitle_local_path, subtitle_api_path = subtitle_paths
 
     current_video_url = context.get("current_video_url") or task.merged_video_url
     if not current_video_url:
@@ -513,45 +654,18 @@ def _embed_subtitles(
         subtitle_style=subtitle_style,
     )
 
-    candidate_values = [
-        result.get("video_api_path"),
-        result.get("video_relative_path"),
-        result.get("video_url"),
-    ]
-
-    final_reference = None
-    for candidate in candidate_values:
-        if not candidate:
-            continue
-        final_reference = _storage_service.resolve_reference(candidate)
-        if final_reference:
-            break
-
-    final_api_path: Optional[str] = None
-    if final_reference:
-        final_api_path = final_reference.api_path
-    else:
-        for candidate in candidate_values:
-            if not candidate:
-                continue
-            try:
-                final_api_path = _storage_service.ensure_api_path(str(candidate))
-                break
-            except ValueError:
-                continue
-
+    final_api_path = _resolve_output_api_path(result)
     if not final_api_path:
         raise RuntimeError("内嵌字幕处理未返回视频地址")
 
-    subtitles_artifact = context.setdefault("artifacts", {}).setdefault("subtitles", {})
-    embed_format = "ass" if subtitle_local_path.lower().endswith(".ass") else "srt"
-    subtitles_artifact["embedded_video_api_path"] = final_api_path
-    subtitles_artifact["embedded_video_relative_path"] = result.get("video_relative_path")
-    subtitles_artifact["embedded_video_url"] = result.get("video_url")
-    if subtitle_style:
-        subtitles_artifact["embedded_style"] = subtitle_style
-    subtitles_artifact["embedded_format"] = embed_format
-    subtitles_artifact["embedded_subtitle_api_path"] = subtitle_api_path
+    embed_format = _record_embedded_subtitles(
+        context,
+        result,
+        final_api_path=final_api_path,
+        subtitle_local_path=subtitle_local_path,
+        subtitle_api_path=subtitle_api_path,
+        subtitle_style=subtitle_style,
+    )
 
     context["current_video_url"] = final_api_path
 
@@ -569,13 +683,110 @@ def _embed_subtitles(
     }
 
 
+def _apply_bgm_mix_with_subtitles(
+    service: Any,
+    provider_name: str,
+    task: Task,
+    db: Session,
+    context: Dict[str, Any],
+    finalize_config: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """配乐 + 内嵌字幕单次编码；任一环节不可用时退回对应的独立步骤"""
+    subtitle_paths, _ = _resolve_embed_subtitles(provider_name, context, finalize_config)
+    if subtitle_paths is None or not isinstance(service, FFmpegService):
+        context, bgm_entry = _apply_bgm_mix(service, provider_name, task, db, context, finalize_config)
+        context, embed_entry = _embed_subtitles(service, provider_name, task, db, context, finalize_config)
+        return context, {
+            "operation": _FUSED_OPERATION,
+            "status": "split",
+            "steps": [bgm_entry, embed_entry],
+        }
+
+    params, skip_reason = _prepare_bgm_mix(service, provider_name, task, db, context, finalize_config)
+    if params is None:
+        context, embed_entry = _embed_subtitles(service, provider_name, task, db, context, finalize_config)
+        return context, {
+            "operation": _FUSED_OPERATION,
+            "status": "split",
+            "steps": [
+                {"operation": "bgm_mix", "status": "skipped", "reason": skip_reason},
+                embed_entry,
+            ],
+        }
+
+    subtitle_local_path, subtitle_api_path = subtitle_paths
+    subtitle_style: Optional[str] = None
+    current_video_url = params["current_video_url"]
+
+    result = service.mix_background_music_with_subtitles(
+        base_video_url=current_video_url,
+        bgm_url=params["bgm_url"],
+        subtitle_path=subtitle_local_path,
+        fade_start=params["fade_start"],
+        fade_duration=params["fade_duration"],
+        volume_db=params["volume_db"],
+        task_id=task.id,
+        subtitle_style=subtitle_style,
+        video_metadata=params["video_metadata"],
+    )
+
+    final_api_path = _resolve_output_api_path(result)
+    if not final_api_path:
+        raise RuntimeError("配乐与内嵌字幕合成未返回视频地址")
+
+    artifacts_entry = params["artifacts_entry"]
+    artifacts_entry["bgm_metadata"] = params["bgm_metadata"]
+    context.setdefault("artifacts", {})["bgm"] = artifacts_entry
+    embed_format = _record_embedded_subtitles(
+        context,
+        result,
+        final_api_path=final_api_path,
+        subtitle_local_path=subtitle_local_path,
+        subtitle_api_path=subtitle_api_path,
+        subtitle_style=subtitle_style,
+    )
+    context["current_video_url"] = final_api_path
+
+    return context, {
+        "operation": _FUSED_OPERATION,
+        "status": "completed",
+        "video_api_path": final_api_path,
+        "video_url": result.get("video_url") or final_api_path,
+        "video_relative_path": result.get("video_relative_path"),
+        "source_video": current_video_url,
+        "video_duration": params["video_duration"],
+        "bgm_duration": params["bgm_duration"],
+        "bgm_meta": params["bgm_meta"],
+        "subtitle_api_path": subtitle_api_path,
+        "subtitle_format": embed_format,
+        "subtitle_style": subtitle_style,
+        "scale_resolution": result.get("scale_resolution"),
+        "provider": provider_name,
+    }
+
+
 _PIPELINE_HANDLERS = {
     "generate_subtitles": _generate_subtitles,
     "bgm_mix": _apply_bgm_mix,
     "embed_subtitles": _embed_subtitles,
+    _FUSED_OPERATION: _apply_bgm_mix_with_subtitles,
 }
 
 
+def _fuse_pipeline(pipeline: List[str]) -> List[str]:
+    """Collapse adjacent bgm_mix + embed_subtitles into the single-pass operation."""
+    fused: List[str] = []
+    index = 0
+    while index < len(pipeline):
+        if pipeline[index: index + 2] == ["bgm_mix", "embed_subtitles"]:
+            fused.append(_FUSED_OPERATION)
+            index += 2
+            continue
+        fused.append(pipeline[index])
+        index += 1
+    return fused
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def finalize_video_task(self, task_id: int):
     """异步最终成片处理任务"""
@@ -675,6 +886,11 @@ def finalize_video_task(self, task_id: int):
                     insert_index = len(pipeline)
                 pipeline.insert(insert_index, "embed_subtitles")
 
+        fused_setting = finalize_config.get("fused")
+        fused_enabled = settings.finalize_fused_enabled if fused_setting is None else bool(fused_setting)
+        if provider_name == "ffmpeg" and fused_enabled:
+            pipeline = _fuse_pipeline(pipeline)
+
         context: Dict[str, Any] = {
             "base_video_url": task.merged_video_url,
             "current_video_url": task.merged_video_url,
@@ -1,19 +1,31 @@
 """Celery 任务：图片生成（image_task）"""
-from typing import Optional
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 from sqlalchemy import update as sa_update
 
-from celery import shared_task
+from celery import chord, group, shared_task
 from sqlalchemy.orm import Session
 
 from app.celery_app import celery_app
+from app.core.task_events import EVENT_SCENE, record_task_event
 from app.database import get_db_session
 from app.models.media import Scene
 from app.models.task import Task, TaskStep
+from app.services.exceptions import ConcurrencyLimitException
 from app.services.providers.base import MediaRequest
-from app.services.providers.registry import resolve_task_provider
+from app.services.providers.registry import get_provider, resolve_provider_name
 from app.services.providers.utils import collect_provider_candidates
-from app.tasks.utils import ensure_provider_map
+from app.tasks.utils import (
+    ensure_provider_map,
+    fail_waiting_scene,
+    notify_scene_pipeline,
+    scene_fanout_enabled,
+    scene_fanout_max_retries,
+    scene_fanout_retry_seconds,
+    scene_pipeline_enabled,
+)
 from app.tasks.utils.interrupts import StepInterruptController, summarize_status_counts
 from app.services.style_preset_service import merge_style_preset
 from app.utils.timezone import naive_now
@@ -23,379 +35,483 @@ import traceback
 
 logger = logging.getLogger(__name__)
 
+# Scenes started less than this long ago are assumed to be owned by another worker.
+_LOCK_WINDOW = timedelta(seconds=30)
+
+
+def summarize_image_step(db: Session, task: Task, step: TaskStep, provider_name: Optional[str]) -> TaskStep:
+    """Recompute the image step result/progress/status from all scenes of the task."""
+    scenes = (
+        db.query(Scene)
+        .filter(Scene.task_id == task.id)
+        .order_by(Scene.seq)
+        .all()
+    )
+
+    overall_completed, overall_queued, overall_failed, pending_count = summarize_status_counts(
+        scenes,
+        status_attr="image_status",
+    )
+
+    step.result = {
+        "provider": provider_name,
+        "completed": overall_completed,
+        "queued": overall_queued,
+        "failed": overall_failed,
+    }
+
+    total_scenes = len(scenes)
+    if total_scenes:
+        step.progress = int(overall_completed / total_scenes * 100)
+    else:
+        step.progress = 100
+
+    if step.status != 6:
+        step.error_msg = None
+        if overall_failed == total_scenes and total_scenes > 0:
+            step.status = 3
+            step.error_msg = "图片生成全部失败"
+            step.progress = 0
+        elif overall_queued > 0 or pending_count > 0:
+            step.status = 1
+        elif overall_failed > 0 and overall_completed > 0:
+            step.status = 6
+            step.error_msg = "部分图片生成失败"
+        else:
+            step.status = 2
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=30)
-def generate_images_task(self, task_id: int, scene_id: Optional[int] = None):
-    """异步图片生成任务"""
-    db: Session = get_db_session()
-    try:
-        task = db.get(Task, task_id)
-        if not task or task.is_deleted:
-            return {"error": "任务不存在"}
+    db.commit()
+    return step
 
-        step = (
-            db.query(TaskStep)
-            .filter(TaskStep.task_id == task_id, TaskStep.step_name == "generate_images")
-            .first()
-        )
-        if not step:
-            return {"error": "图片生成步骤不存在"}
 
-        step.status = 1
-        db.commit()
+def enqueue_next_step(task: Task, step: TaskStep) -> None:
+    """Kick off audio generation when the image step completed in auto mode."""
+    if scene_pipeline_enabled(task):
+        notify_scene_pipeline(task.id)
+        return
+    task_mode = getattr(task, "mode", None) or (task.task_config or {}).get("mode")
+    if task_mode != "auto" or step.status != 2:
+        return
+    try:
+        celery_app.send_task(
+            "app.tasks.audio_task.generate_audio_task",
+            args=[task.id],
+            serializer="json",
+        )
+    except Exception:
+        logger.exception("Failed to enqueue audio task for task %s", getattr(task, "id", None))
 
-        task_config = task.task_config or {}
-        if not isinstance(task_config, dict):
-            task_config = {}
 
-        merged_config, storyboard_config, preset = merge_style_preset(db, task_config)
-        if task_config != merged_config:
-            task.task_config = merged_config
-            db.commit()
-        task_config = merged_config
-
-        provider, provider_name = resolve_task_provider("image", collect_provider_candidates(task), db)
-        lora_id = task_config.get("lora_id") or task_config.get("liblib_lora_id")
-        checkpoint_id = (
-            task_config.get("checkpoint_id")
-            or task_config.get("model_id")
-            or task_config.get("liblib_model_id")
-        )
-        if hasattr(provider, "apply_model_overrides"):
-            provider.apply_model_overrides(lora_id, checkpoint_id)
-        step.provider = provider_name
-        db.commit()
+@dataclass
+class ImageStepContext:
+    """Provider and workflow settings shared by every scene of one image step run."""
 
-        providers_map = ensure_provider_map(task.providers)
-        providers_map["image"] = provider_name
-        task.providers = providers_map
-        db.commit()
+    task_id: int
+    provider: Any
+    provider_name: str
+    runninghub_workflow_id: Optional[Any]
+    interrupt_helper: StepInterruptController
 
-        style_meta = task_config.get("style_meta") if isinstance(task_config.get("style_meta"), dict) else {}
-        runninghub_meta = style_meta.get("runninghub") if isinstance(style_meta.get("runninghub"), dict) else {}
-        runninghub_image_workflow_id = runninghub_meta.get("image_workflow_config_id")
 
-        scenes = (
-            db.query(Scene)
-            .filter(Scene.task_id == task_id)
-            .order_by(Scene.seq)
-            .all()
-        )
+def _image_settings(db: Session, task: Task) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    task_config = task.task_config or {}
+    if not isinstance(task_config, dict):
+        task_config = {}
+    merged_config, _, _ = merge_style_preset(db, task_config)
 
-        target_scenes = scenes
-        if scene_id is not None:
-            target_scenes = [sc for sc in scenes if sc.id == scene_id]
-            if not target_scenes:
-                return {"error": f"scene {scene_id} not found"}
+    style_meta = merged_config.get("style_meta") if isinstance(merged_config.get("style_meta"), dict) else {}
+    runninghub_meta = style_meta.get("runninghub") if isinstance(style_meta.get("runninghub"), dict) else {}
+    settings = {
+        "provider": resolve_provider_name("image", collect_provider_candidates(task)),
+        "lora_id": merged_config.get("lora_id") or merged_config.get("liblib_lora_id"),
+        "checkpoint_id": (
+            merged_config.get("checkpoint_id")
+            or merged_config.get("model_id")
+            or merged_config.get("liblib_model_id")
+        ),
+        "runninghub_workflow_id": runninghub_meta.get("image_workflow_config_id"),
+    }
+    return settings, merged_config
 
-        interrupt_helper = StepInterruptController(
-            db=db,
-            step=step,
-            status_attr="image_status",
-            celery_id_attr="image_celery_id",
-            job_id_attr="image_job_id",
-            url_attr="image_url",
-            extra_reset=lambda sc: setattr(sc, "image_meta", None),
-            interrupt_clear_attrs=("image_celery_id",),
-        )
 
-        reset_count = interrupt_helper.reset_interrupted(target_scenes)
-        if reset_count:
-            logger.info("Reset %s interrupted image scenes to pending before rerun", reset_count)
+def resolve_image_settings(db: Session, task: Task) -> Dict[str, Any]:
+    """Provider name and model/workflow overrides of the image step (read only, JSON-safe)."""
+    return _image_settings(db, task)[0]
 
-        step = interrupt_helper.step
-        target_scene_ids = [sc.id for sc in target_scenes]
 
-        completed_count = 0
-        queued_count = 0
-        failed_count = 0
-        LOCK_WINDOW = timedelta(seconds=30)
+def record_image_settings(db: Session, task: Task, step: TaskStep) -> Dict[str, Any]:
+    """Resolve the image settings once per run and record them on the task/step.
 
-        for scene_pk in target_scene_ids:
-            if interrupt_helper.should_abort():
-                step = interrupt_helper.step
-                logger.info("Image step interrupted, aborting remaining scenes")
-                break
+    Fan-out parents and the scene pipeline call this and hand the result to the
+    per-scene subtasks, so subtasks never rewrite task_config/providers/step.
+    """
+    settings, merged_config = _image_settings(db, task)
+    if task.task_config != merged_config:
+        task.task_config = merged_config
+    step.provider = settings["provider"]
+    providers_map = ensure_provider_map(task.providers)
+    providers_map["image"] = settings["provider"]
+    task.providers = providers_map
+    db.commit()
+    return settings
+
+
+def prepare_image_context(
+    db: Session,
+    task: Task,
+    step: TaskStep,
+    settings: Optional[Dict[str, Any]] = None,
+) -> ImageStepContext:
+    """Build the image provider (with model overrides) for one run.
+
+    Without ``settings`` they are resolved and recorded first (see ``record_image_settings``).
+    """
+    if settings is None:
+        settings = record_image_settings(db, task, step)
+    provider_name = settings["provider"]
+    provider = get_provider("image", provider_name, db)
+    if hasattr(provider, "apply_model_overrides"):
+        provider.apply_model_overrides(settings.get("lora_id"), settings.get("checkpoint_id"))
+
+    interrupt_helper = StepInterruptController(
+        db=db,
+        step=step,
+        status_attr="image_status",
+        celery_id_attr="image_celery_id",
+        job_id_attr="image_job_id",
+        url_attr="image_url",
+        extra_reset=lambda sc: setattr(sc, "image_meta", None),
+        interrupt_clear_attrs=("image_celery_id",),
+    )
+    return ImageStepContext(
+        task_id=task.id,
+        provider=provider,
+        provider_name=provider_name,
+        runninghub_workflow_id=settings.get("runninghub_workflow_id"),
+        interrupt_helper=interrupt_helper,
+    )
+
+
+def process_image_scene(
+    db: Session,
+    ctx: ImageStepContext,
+    scene_pk: int,
+    *,
+    request_id: Optional[str] = None,
+    defer_on_slot_limit: bool = False,
+) -> str:
+    """Generate the image for one scene.
+
+    Returns one of "completed" | "queued" | "failed" | "skipped" | "interrupted".
+    A scene whose ``image_celery_id`` already equals ``request_id`` is treated as
+    claimed by this request (pipeline dispatch or a retried subtask) and processed.
+    With ``defer_on_slot_limit`` a full concurrency pool re-raises
+    :class:`ConcurrencyLimitException` (leaving the scene claimed) instead of
+    failing the scene, so fan-out subtasks can retry later.
+    """
+    interrupt_helper = ctx.interrupt_helper
+    current_request_id = request_id
+    scene = db.get(Scene, scene_pk)
+    if not scene:
+        return "skipped"
 
-            step = interrupt_helper.step
+    try:
+        logger.debug(
+            "Processing scene id=%s seq=%s status=%s existing_celery=%s",
+            getattr(scene, "id", None),
+            getattr(scene, "seq", None),
+            getattr(scene, "image_status", None),
+            getattr(scene, "image_celery_id", None),
+        )
 
-            scene = db.get(Scene, scene_pk)
-            if not scene:
-                continue
+        if scene.image_status == 2:
+            logger.debug("Skipping scene %s because already completed", getattr(scene, "id", None))
+            return "skipped"
 
-            try:
+        try:
+            existing_celery_id = getattr(scene, "image_celery_id", None)
+        except Exception as ex_get:
+            existing_celery_id = None
+            logger.exception(
+                "Failed to read image_celery_id for scene %s: %s",
+                getattr(scene, "id", None),
+                ex_get,
+            )
+        claimed = bool(current_request_id) and str(existing_celery_id or "") == str(current_request_id)
+
+        if not claimed and scene.image_status == 1 and scene.started_at:
+            age = naive_now() - scene.started_at
+            if age < _LOCK_WINDOW:
                 logger.debug(
-                    "Processing scene id=%s seq=%s status=%s existing_celery=%s",
+                    "Skipping scene %s because started %s seconds ago (< lock_window)",
                     getattr(scene, "id", None),
-                    getattr(scene, "seq", None),
-                    getattr(scene, "image_status", None),
-                    getattr(scene, "image_celery_id", None),
+                    age.total_seconds(),
                 )
+                return "skipped"
 
-                if scene.image_status == 2:
-                    logger.debug("Skipping scene %s because already completed", getattr(scene, "id", None))
-                    continue
+        if not claimed and existing_celery_id and str(existing_celery_id).strip():
+            logger.debug(
+                "Skipping scene %s because image_celery_id is present: %s",
+                getattr(scene, "id", None),
+                existing_celery_id,
+            )
+            return "skipped"
 
-                if scene.image_status == 1 and scene.started_at:
-                    age = naive_now() - scene.started_at
-                    if age < LOCK_WINDOW:
-                        logger.debug(
-                            "Skipping scene %s because started %s seconds ago (< lock_window)",
-                            getattr(scene, "id", None),
-                            age.total_seconds(),
-                        )
-                        continue
+        scene.image_status = 1
+        scene.error_msg = None
+        scene.started_at = naive_now()
 
+
+        if current_request_id:
+            try:
+                scene.image_celery_id = current_request_id
+                db.commit()
+                logger.debug(
+                    "Wrote image_celery_id=%s for scene %s",
+                    current_request_id,
+                    getattr(scene, "id", None),
+                )
+            except Exception as ex_write:
                 try:
-                    existing_celery_id = getattr(scene, "image_celery_id", None)
-                except Exception as ex_get:
-                    existing_celery_id = None
-                    logger.exception(
-                        "Failed to read image_celery_id for scene %s: %s",
-                        getattr(scene, "id", None),
-                        ex_get,
+                    db.rollback()
+                except Exception:
+                    pass
+                logger.exception(
+                    "Failed to commit image_celery_id for scene %s: %s",
+                    getattr(scene, "id", None),
+                    ex_write,
+                )
+                try:
+                    db.execute(
+                        sa_update(Scene)
+                        .where(Scene.id == scene.id)
+                        .values(
+                            image_celery_id=current_request_id,
+                            image_status=1,
+                            started_at=scene.started_at,
+                        )
                     )
-                if existing_celery_id and str(existing_celery_id).strip():
+                    record_task_event(
+                        db,
+                        EVENT_SCENE,
+                        scene.task_id,
+                        scene.id,
+                        {"image_status": 1, "started_at": scene.started_at},
+                    )
+                    db.commit()
                     logger.debug(
-                        "Skipping scene %s because image_celery_id is present: %s",
+                        "Fallback UPDATE wrote image_celery_id=%s for scene %s",
+                        current_request_id,
                         getattr(scene, "id", None),
-                        existing_celery_id,
                     )
-                    continue
-
-                scene.image_status = 1
-                scene.error_msg = None
-                scene.started_at = naive_now()
-
-                current_request_id = None
-                try:
-                    current_request_id = str(self.request.id)
-                except Exception as ex_req:
+                except Exception as ex_update:
+                    try:
+                        db.rollback()
+                    except Exception:
+                        pass
                     logger.exception(
-                        "Unable to read self.request.id in worker for scene %s: %s",
+                        "Fallback update also failed for scene %s: %s",
                         getattr(scene, "id", None),
-                        ex_req,
+                        ex_update,
                     )
+                    scene.image_celery_id = None
+        else:
+            try:
+                db.commit()
+            except Exception as ex_commit:
+                logger.exception(
+                    "Failed to commit scene state (without image_celery_id) for scene %s: %s",
+                    getattr(scene, "id", None),
+                    ex_commit,
+                )
 
-                if current_request_id:
-                    try:
-                        scene.image_celery_id = current_request_id
-                        db.commit()
+        try:
+            result = ctx.provider.generate(
+                MediaRequest(
+                    prompt=scene.image_prompt,
+                    width=(scene.image_meta or {}).get("width") if scene.image_meta else None,
+                    height=(scene.image_meta or {}).get("height") if scene.image_meta else None,
+                    extra={
+                        "task_id": ctx.task_id,
+                        "scene_seq": scene.seq,
+                        **(
+                            {"runninghub_image_workflow_config_id": ctx.runninghub_workflow_id}
+                            if ctx.provider_name == "runninghub" and ctx.runninghub_workflow_id
+                            else {}
+                        ),
+                    },
+                )
+            )
+        except Exception as exc:  # pragma: no cover - remote failure
+            if defer_on_slot_limit and isinstance(exc, ConcurrencyLimitException):
+                # The scene stays claimed under this request id; the retry resumes it.
+                raise
+            logger.exception("Provider.generate failed for scene %s: %s", getattr(scene, "id", None), exc)
+            scene.image_status = 3
+            scene.image_provider = ctx.provider_name
+            scene.image_retry_count = (scene.image_retry_count or 0) + 1
+            scene.error_msg = str(exc)
+            scene.finished_at = naive_now()
+            try:
+                _clear_id = getattr(scene, "image_celery_id", None)
+                if _clear_id:
+                    scene.image_celery_id = None
+                db.commit()
+                logger.debug(
+                    "Cleared image_celery_id after failure for scene %s (was=%s)",
+                    getattr(scene, "id", None),
+                    _clear_id,
+                )
+            except Exception as ex_clear:
+                try:
+                    db.rollback()
+                except Exception:
+                    pass
+                logger.exception(
+                    "Failed to clear image_celery_id after provider error for scene %s: %s",
+                    getattr(scene, "id", None),
+                    ex_clear,
+                )
+            return "failed"
+
+        scene.image_provider = ctx.provider_name
+        scene.image_job_id = getattr(result, "job_id", None) or (result.meta or {}).get("job_id")
+        scene.image_meta = result.meta
+
+        if interrupt_helper.handle_interrupt_after_provider(scene):
+            db.commit()
+            logger.info("Scene %s marked interrupted after provider response", scene_pk)
+            return "interrupted"
+
+        outcome = "failed"
+        try:
+            if result.status == "completed" and result.resource_url:
+                scene.image_url = result.resource_url
+                scene.image_status = 2
+                scene.error_msg = None
+                scene.finished_at = naive_now()
+                try:
+                    current_stored = getattr(scene, "image_celery_id", None)
+                    if current_stored and str(current_stored) == str(current_request_id):
+                        scene.image_celery_id = None
                         logger.debug(
-                            "Wrote image_celery_id=%s for scene %s",
-                            current_request_id,
-                            getattr(scene, "id", None),
-                        )
-                    except Exception as ex_write:
-                        try:
-                            db.rollback()
-                        except Exception:
-                            pass
-                        logger.exception(
-                            "Failed to commit image_celery_id for scene %s: %s",
+                            "Cleared image_celery_id for scene %s after completion (was=%s)",
                             getattr(scene, "id", None),
-                            ex_write,
+                            current_stored,
                         )
-                        try:
-                            db.execute(
-                                sa_update(Scene)
-                                .where(Scene.id == scene.id)
-                                .values(
-                                    image_celery_id=current_request_id,
-                                    image_status=1,
-                                    started_at=scene.started_at,
-                                )
-                            )
-                            db.commit()
-                            logger.debug(
-                                "Fallback UPDATE wrote image_celery_id=%s for scene %s",
-                                current_request_id,
-                                getattr(scene, "id", None),
-                            )
-                        except Exception as ex_update:
-                            try:
-                                db.rollback()
-                            except Exception:
-                                pass
-                            logger.exception(
-                                "Fallback update also failed for scene %s: %s",
-                                getattr(scene, "id", None),
-                                ex_update,
-                            )
-                            scene.image_celery_id = None
-                else:
-                    try:
-                        db.commit()
-                    except Exception as ex_commit:
-                        logger.exception(
-                            "Failed to commit scene state (without image_celery_id) for scene %s: %s",
+                    else:
+                        scene.image_celery_id = None
+                        logger.warning(
+                            "image_celery_id mismatch/cleanup for scene %s: stored=%s expected=%s",
                             getattr(scene, "id", None),
-                            ex_commit,
-                        )
-
-                try:
-                    result = provider.generate(
-                        MediaRequest(
-                            prompt=scene.image_prompt,
-                            width=(scene.image_meta or {}).get("width") if scene.image_meta else None,
-                            height=(scene.image_meta or {}).get("height") if scene.image_meta else None,
-                            extra={
-                                "task_id": task.id,
-                                "scene_seq": scene.seq,
-                                **(
-                                    {"runninghub_image_workflow_config_id": runninghub_image_workflow_id}
-                                    if provider_name == "runninghub" and runninghub_image_workflow_id
-                                    else {}
-                                ),
-                            },
+                            current_stored,
+                            current_request_id,
                         )
+                except Exception as ex_clear2:
+                    logger.exception(
+                        "Error while attempting to clear image_celery_id for scene %s: %s",
+                        getattr(scene, "id", None),
+                        ex_clear2,
                     )
-                except Exception as exc:  # pragma: no cover - remote failure
-                    logger.exception("Provider.generate failed for scene %s: %s", getattr(scene, "id", None), exc)
-                    scene.image_status = 3
-                    scene.image_provider = provider_name
-                    scene.image_retry_count = (scene.image_retry_count or 0) + 1
-                    scene.error_msg = str(exc)
-                    scene.finished_at = naive_now()
-                    failed_count += 1
-                    try:
-                        _clear_id = getattr(scene, "image_celery_id", None)
-                        if _clear_id:
-                            scene.image_celery_id = None
-                        db.commit()
+                outcome = "completed"
+            elif result.status == "queued":
+                scene.image_status = 1
+                scene.error_msg = None
+                outcome = "queued"
+            else:
+                scene.image_status = 3
+                scene.error_msg = (result.meta or {}).get("error") if result.meta else None
+                scene.image_retry_count = (scene.image_retry_count or 0) + 1
+                scene.finished_at = naive_now()
+                try:
+                    current_stored = getattr(scene, "image_celery_id", None)
+                    if current_stored and str(current_stored) == str(current_request_id):
+                        scene.image_celery_id = None
                         logger.debug(
-                            "Cleared image_celery_id after failure for scene %s (was=%s)",
+                            "Cleared image_celery_id for scene %s after failure branch (was=%s)",
                             getattr(scene, "id", None),
-                            _clear_id,
+                            current_stored,
                         )
-                    except Exception as ex_clear:
-                        try:
-                            db.rollback()
-                        except Exception:
-                            pass
-                        logger.exception(
-                            "Failed to clear image_celery_id after provider error for scene %s: %s",
+                    else:
+                        scene.image_celery_id = None
+                        logger.warning(
+                            "image_celery_id mismatch/cleanup for scene %s in failure branch: stored=%s expected=%s",
                             getattr(scene, "id", None),
-                            ex_clear,
+                            current_stored,
+                            current_request_id,
                         )
-                    continue
+                except Exception as ex_clear3:
+                    logger.exception(
+                        "Error while attempting to clear image_celery_id in failure branch for scene %s: %s",
+                        getattr(scene, "id", None),
+                        ex_clear3,
+                    )
+                outcome = "failed"
 
-                scene.image_provider = provider_name
-                scene.image_job_id = getattr(result, "job_id", None) or (result.meta or {}).get("job_id")
-                scene.image_meta = result.meta
+            db.commit()
+        except Exception as ex_commit_all:
+            try:
+                db.rollback()
+            except Exception:
+                pass
+            logger.exception(
+                "Failed to commit scene updates for scene %s (outcome=%s): %s",
+                getattr(scene, "id", None),
+                outcome,
+                ex_commit_all,
+            )
+            return "failed"
+        return outcome
+
+    except ConcurrencyLimitException:
+        raise
+    except Exception as scene_exc:
+        logger.exception(
+            "Unhandled exception while processing scene %s: %s\n%s",
+            getattr(scene, "id", None),
+            scene_exc,
+            traceback.format_exc(),
+        )
+        try:
+            scene.image_status = 3
+            scene.error_msg = str(scene_exc)
+            scene.finished_at = naive_now()
+            try:
+                scene.image_celery_id = None
+            except Exception:
+                pass
+            db.commit()
+        except Exception:
+            try:
+                db.rollback()
+            except Exception:
+                pass
+        return "failed"
 
-                if interrupt_helper.handle_interrupt_after_provider(scene):
-                    db.commit()
-                    step = interrupt_helper.step
-                    logger.info("Scene %s marked interrupted after provider response", scene_pk)
-                    break
 
-                step = interrupt_helper.step
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def generate_images_task(self, task_id: int, scene_id: Optional[int] = None):
+    """异步图片生成任务"""
+    db: Session = get_db_session()
+    try:
+        task = db.get(Task, task_id)
+        if not task or task.is_deleted:
+            return {"error": "任务不存在"}
 
-                old_celery_id = getattr(scene, "image_celery_id", None)
-                try:
-                    if result.status == "completed" and result.resource_url:
-                        scene.image_url = result.resource_url
-                        scene.image_status = 2
-                        scene.error_msg = None
-                        scene.finished_at = naive_now()
-                        try:
-                            current_stored = getattr(scene, "image_celery_id", None)
-                            if current_stored and str(current_stored) == str(current_request_id):
-                                scene.image_celery_id = None
-                                logger.debug(
-                                    "Cleared image_celery_id for scene %s after completion (was=%s)",
-                                    getattr(scene, "id", None),
-                                    current_stored,
-                                )
-                            else:
-                                scene.image_celery_id = None
-                                logger.warning(
-                                    "image_celery_id mismatch/cleanup for scene %s: stored=%s expected=%s",
-                                    getattr(scene, "id", None),
-                                    current_stored,
-                                    current_request_id,
-                                )
-                        except Exception as ex_clear2:
-                            logger.exception(
-                                "Error while attempting to clear image_celery_id for scene %s: %s",
-                                getattr(scene, "id", None),
-                                ex_clear2,
-                            )
-                        completed_count += 1
-                    elif result.status == "queued":
-                        scene.image_status = 1
-                        scene.error_msg = None
-                        queued_count += 1
-                    else:
-                        scene.image_status = 3
-                        scene.error_msg = (result.meta or {}).get("error") if result.meta else None
-                        scene.image_retry_count = (scene.image_retry_count or 0) + 1
-                        scene.finished_at = naive_now()
-                        try:
-                            current_stored = getattr(scene, "image_celery_id", None)
-                            if current_stored and str(current_stored) == str(current_request_id):
-                                scene.image_celery_id = None
-                                logger.debug(
-                                    "Cleared image_celery_id for scene %s after failure branch (was=%s)",
-                                    getattr(scene, "id", None),
-                                    current_stored,
-                                )
-                            else:
-                                scene.image_celery_id = None
-                                logger.warning(
-                                    "image_celery_id mismatch/cleanup for scene %s in failure branch: stored=%s expected=%s",
-                                    getattr(scene, "id", None),
-                                    current_stored,
-                                    current_request_id,
-                                )
-                        except Exception as ex_clear3:
-                            logger.exception(
-                                "Error while attempting to clear image_celery_id in failure branch for scene %s: %s",
-                                getattr(scene, "id", None),
-                                ex_clear3,
-                            )
-                        failed_count += 1
+        step = (
+            db.query(TaskStep)
+            .filter(TaskStep.task_id == task_id, TaskStep.step_name == "generate_images")
+            .first()
+        )
+        if not step:
+            return {"error": "图片生成步骤不存在"}
 
-                    db.commit()
-                except Exception as ex_commit_all:
-                    try:
-                        db.rollback()
-                    except Exception:
-                        pass
-                    logger.exception(
-                        "Failed to commit scene updates for scene %s (completed=%s queued=%s failed=%s): %s",
-                        getattr(scene, "id", None),
-                        completed_count,
-                        queued_count,
-                        failed_count,
-                        ex_commit_all,
-                    )
-                    continue
+        step.status = 1
+        db.commit()
 
-            except Exception as scene_exc:
-                logger.exception(
-                    "Unhandled exception while processing scene %s: %s\n%s",
-                    getattr(scene, "id", None),
-                    scene_exc,
-                    traceback.format_exc(),
-                )
-                try:
-                    scene.image_status = 3
-                    scene.error_msg = str(scene_exc)
-                    scene.finished_at = naive_now()
-                    try:
-                        scene.image_celery_id = None
-                    except Exception:
-                        pass
-                    db.commit()
-                except Exception:
-                    try:
-                        db.rollback()
-                    except Exception:
-                        pass
-                failed_count += 1
-                continue
+        image_settings = record_image_settings(db, task, step)
+        ctx = prepare_image_context(db, task, step, image_settings)
+        provider_name = ctx.provider_name
 
         scenes = (
             db.query(Scene)
@@ -404,54 +520,55 @@ def generate_images_task(self, task_id: int, scene_id: Optional[int] = None):
             .all()
         )
 
-        overall_completed, overall_queued, overall_failed, pending_count = summarize_status_counts(
-            scenes,
-            status_attr="image_status",
-        )
+        target_scenes = scenes
+        if scene_id is not None:
+            target_scenes = [sc for sc in scenes if sc.id == scene_id]
+            if not target_scenes:
+                return {"error": f"scene {scene_id} not found"}
 
-        step.result = {
-            "provider": provider_name,
-            "completed": overall_completed,
-            "queued": overall_queued,
-            "failed": overall_failed,
-        }
+        interrupt_helper = ctx.interrupt_helper
 
-        total_scenes = len(scenes)
-        if total_scenes:
-            step.progress = int(overall_completed / total_scenes * 100)
-        else:
-            step.progress = 100
-
-        if step.status != 6:
-            step.error_msg = None
-            if overall_failed == total_scenes and total_scenes > 0:
-                step.status = 3
-                step.error_msg = "图片生成全部失败"
-                step.progress = 0
-            elif overall_failed > 0 and overall_completed > 0:
-                step.status = 6
-                step.error_msg = "部分图片生成失败"
-            elif overall_queued > 0 or pending_count > 0:
-                step.status = 1
-            else:
-                step.status = 2
+        reset_count = interrupt_helper.reset_interrupted(target_scenes)
+        if reset_count:
+            logger.info("Reset %s interrupted image scenes to pending before rerun", reset_count)
 
-        db.commit()
+        step = interrupt_helper.step
+        target_scene_ids = [sc.id for sc in target_scenes]
 
         task_mode = getattr(task, "mode", None) or (task.task_config or {}).get("mode")
         if not task_mode:
             raise RuntimeError("任务未配置执行模式")
 
-        if scene_id is None and task_mode == "auto" and step.status == 2:
-            try:
-                celery_app.send_task(
-                    "app.tasks.audio_task.generate_audio_task",
-                    args=[task.id],
-                    queue="default",
-                    serializer="json",
-                )
-            except Exception:
-                logger.exception("Failed to enqueue audio task for task %s", getattr(task, "id", None))
+        if scene_id is None and scene_fanout_enabled(task.task_config, len(target_scene_ids)):
+            header = group(
+                generate_image_scene_task.s(task_id, scene_pk, image_settings=image_settings)
+                for scene_pk in target_scene_ids
+            )
+            chord(header)(summarize_images_task.s(task_id))
+            logger.info("Dispatched %s image scene subtasks for task %s", len(target_scene_ids), task_id)
+            return {"images": len(target_scene_ids), "fanout": True}
+
+        current_request_id = None
+        try:
+            current_request_id = str(self.request.id)
+        except Exception as ex_req:
+            logger.exception("Unable to read self.request.id in worker for task %s: %s", task_id, ex_req)
+
+        for scene_pk in target_scene_ids:
+            if interrupt_helper.should_abort():
+                step = interrupt_helper.step
+                logger.info("Image step interrupted, aborting remaining scenes")
+                break
+
+            outcome = process_image_scene(db, ctx, scene_pk, request_id=current_request_id)
+            step = interrupt_helper.step
+            if outcome == "interrupted":
+                break
+
+        step = summarize_image_step(db, task, step, provider_name)
+
+        if scene_id is None:
+            enqueue_next_step(task, step)
 
         return {"images": len(target_scene_ids)}
 
@@ -477,6 +594,98 @@ def generate_images_task(self, task_id: int, scene_id: Optional[int] = None):
         db.close()
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def generate_image_scene_task(
+    self,
+    task_id: int,
+    scene_id: int,
+    image_settings: Optional[Dict[str, Any]] = None,
+):
+    """单场景图片生成（chord 子任务）
+
+    Never fails the chord: scene errors are recorded on the scene and returned as an
+    outcome. Only a full concurrency pool retries the subtask, and only until
+    ``scene_fanout_max_retries``; after that the scene is failed. ``image_settings``
+    comes from ``record_image_settings`` in the dispatcher.
+    """
+    db: Session = get_db_session()
+    try:
+        task = db.get(Task, task_id)
+        if not task or task.is_deleted:
+            return {"scene_id": scene_id, "outcome": "skipped"}
+        step = (
+            db.query(TaskStep)
+            .filter(TaskStep.task_id == task_id, TaskStep.step_name == "generate_images")
+            .first()
+        )
+        if not step:
+            return {"scene_id": scene_id, "outcome": "skipped"}
+
+        ctx = prepare_image_context(db, task, step, image_settings or resolve_image_settings(db, task))
+        if ctx.interrupt_helper.should_abort():
+            return {"scene_id": scene_id, "outcome": "interrupted"}
+
+        outcome = process_image_scene(
+            db,
+            ctx,
+            scene_id,
+            request_id=str(self.request.id),
+            defer_on_slot_limit=True,
+        )
+        return {"scene_id": scene_id, "outcome": outcome}
+    except ConcurrencyLimitException as exc:
+        max_retries = scene_fanout_max_retries(exc)
+        if self.request.retries < max_retries:
+            raise self.retry(exc=exc, countdown=scene_fanout_retry_seconds(), max_retries=max_retries)
+        logger.warning("Image scene %s of task %s gave up waiting for a concurrency slot", scene_id, task_id)
+        fail_waiting_scene(db, scene_id, "image", str(exc))
+        return {"scene_id": scene_id, "outcome": "failed", "error": str(exc)}
+    except Exception as exc:
+        try:
+            db.rollback()
+        except Exception:
+            pass
+        logger.exception("Image scene subtask failed for task %s scene %s", task_id, scene_id)
+        return {"scene_id": scene_id, "outcome": "failed", "error": str(exc)}
+    finally:
+        db.close()
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def summarize_images_task(self, results: List[Any], task_id: int):
+    """chord 回调：汇总图片步骤状态并推进下一步"""
+    db: Session = get_db_session()
+    try:
+        task = db.get(Task, task_id)
+        if not task or task.is_deleted:
+            return {"error": "任务不存在"}
+        step = (
+            db.query(TaskStep)
+            .filter(TaskStep.task_id == task_id, TaskStep.step_name == "generate_images")
+            .first()
+        )
+        if not step:
+            return {"error": "图片生成步骤不存在"}
+
+        step = summarize_image_step(db, task, step, step.provider)
+        enqueue_next_step(task, step)
+
+        outcomes = Counter(
+            item.get("outcome", "unknown") if isinstance(item, dict) else "unknown"
+            for item in (results or [])
+        )
+        logger.info("Image fan-out finished for task %s: %s", task_id, dict(outcomes))
+        return {"images": len(results or []), "outcomes": dict(outcomes)}
+    except Exception as e:
+        try:
+            db.rollback()
+        except Exception:
+            pass
+        raise self.retry(exc=e)
+    finally:
+        db.close()
+
+
 @shared_task(bind=True)
 def poll_image_job_status(self, scene_id: Optional[int] = None, task_id: Optional[int] = None, max_attempts: int = 6, interval_seconds: int = 30):
     """Poll provider job status for a single scene or all scenes in a task that have a job id.
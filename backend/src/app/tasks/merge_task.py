@@ -271,7 +271,6 @@ def merge_video_task(self, task_id: int):
                     celery_app.send_task(
                         "app.tasks.finalize_task.finalize_video_task",
                         args=[task.id],
-                        queue="default",
                         serializer="json",
                     )
                 except Exception:
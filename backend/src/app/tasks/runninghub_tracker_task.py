@@ -0,0 +1,301 @@
+"""Celery 任务：Runninghub 异步作业跟踪（runninghub_tracker_task）
+
+Providers running in ``async`` tracking mode submit the Runninghub job, keep
+the concurrency slot and return ``queued``. This periodic task polls every
+outstanding job once per run (no sleeping inside the worker), writes finished
+outputs back to the scene, frees the slot and re-aggregates the step.
+"""
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from celery import shared_task
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.database import get_db_session
+from app.models.concurrency import ServiceConcurrencySlot
+from app.models.media import Scene
+from app.models.task import Task, TaskStep
+from app.services.concurrency_manager import SlotToken, concurrency_manager
+from app.services.runninghub_service import RunningHubService
+from app.tasks import image_task, video_task
+from app.tasks.utils import scene_pipeline_enabled
+from app.utils.timezone import naive_now
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_BATCH_SIZE = 16
+
+# feature -> (status attr, job id attr, meta attr, celery id attr, step name)
+_FEATURE_FIELDS: Dict[str, Tuple[str, str, str, str, str]] = {
+    "image": ("image_status", "image_job_id", "image_meta", "image_celery_id", "generate_images"),
+    "video": ("video_status", "video_job_id", "video_meta", "video_celery_id", "generate_videos"),
+}
+
+
+@dataclass
+class TrackedJob:
+    scene_id: int
+    task_id: int
+    feature: str
+    job_id: str
+    tracking: Dict[str, Any]
+
+    @property
+    def submitted_at(self) -> Optional[datetime]:
+        raw = self.tracking.get("submitted_at")
+        if not raw:
+            return None
+        try:
+            return datetime.fromisoformat(str(raw))
+        except ValueError:
+            return None
+
+    def is_due(self, now: datetime) -> bool:
+        submitted_at = self.submitted_at
+        if submitted_at is None:
+            return True
+        delay = float(self.tracking.get("initial_delay") or 0.0)
+        return now >= submitted_at + timedelta(seconds=delay)
+
+    def is_expired(self, now: datetime) -> bool:
+        submitted_at = self.submitted_at
+        timeout = self.tracking.get("timeout_seconds")
+        if submitted_at is None or timeout is None:
+            return False
+        return now >= submitted_at + timedelta(seconds=float(timeout))
+
+    def slot_token(self) -> SlotToken:
+        return SlotToken(
+            service_name="runninghub",
+            feature=self.feature,
+            slot_id=self.tracking.get("slot_id"),
+            resource_id=self.tracking.get("resource_id"),
+            backend=self.tracking.get("slot_backend") or "db",
+            holder=self.tracking.get("slot_holder"),
+        )
+
+
+def collect_tracked_jobs(db: Session) -> List[TrackedJob]:
+    """Return every scene job that was submitted in async tracking mode and is still running."""
+    jobs: List[TrackedJob] = []
+    for feature, (status_attr, job_attr, meta_attr, _, _) in _FEATURE_FIELDS.items():
+        provider_attr = f"{feature}_provider"
+        rows = (
+            db.query(Scene)
+            .filter(
+                getattr(Scene, status_attr) == 1,
+                getattr(Scene, provider_attr) == "runninghub",
+                getattr(Scene, job_attr) != None,  # noqa: E711
+            )
+            .order_by(Scene.id.asc())
+            .all()
+        )
+        for scene in rows:
+            meta = getattr(scene, meta_attr)
+            tracking = meta.get("tracking") if isinstance(meta, dict) else None
+            if not isinstance(tracking, dict) or tracking.get("mode") != "async":
+                continue
+            jobs.append(
+                TrackedJob(
+                    scene_id=scene.id,
+                    task_id=scene.task_id,
+                    feature=feature,
+                    job_id=str(getattr(scene, job_attr)),
+                    tracking=dict(tracking),
+                )
+            )
+    return jobs
+
+
+def _poll_job(service: RunningHubService, job: TrackedJob) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    try:
+        status, payload = service.poll_once(job.job_id, timeout=30)
+    except Exception as exc:  # pragma: no cover - network failure path
+        return "unknown", None, str(exc)
+    return status, payload, None
+
+
+def _apply_result(
+    db: Session,
+    job: TrackedJob,
+    status: str,
+    payload: Optional[Dict[str, Any]],
+    now: datetime,
+) -> bool:
+    """Write a poll result onto the scene. Returns True when the scene reached a terminal state.
+
+    ``status == "error"`` means the status request itself failed; like ``pending``
+    it only becomes terminal once the job has exceeded its timeout.
+    """
+    status_attr, job_attr, meta_attr, celery_attr, _ = _FEATURE_FIELDS[job.feature]
+    scene = db.get(Scene, job.scene_id)
+    # The scene may have been reset/interrupted while the job was in flight.
+    if (
+        not scene
+        or getattr(scene, status_attr) != 1
+        or str(getattr(scene, job_attr) or "") != job.job_id
+    ):
+        concurrency_manager.release(
+            job.slot_token(),
+            status=ServiceConcurrencySlot.STATUS_RELEASED,
+            metadata={"job_id": job.job_id, "status": "abandoned"},
+        )
+        return False
+
+    if status in {"pending", "error"} and not job.is_expired(now):
+        return False
+
+    meta: Dict[str, Any] = dict(getattr(scene, meta_attr) or {})
+    meta["last_output"] = payload
+    tracking = dict(meta.get("tracking") or {})
+    tracking["finished_at"] = now.isoformat()
+
+    output_url = RunningHubService.extract_output_url(payload) if status == "success" else None
+    if output_url:
+        meta["entries"] = RunningHubService.extract_file_entries(payload)
+        tracking["status"] = "completed"
+        release_status = ServiceConcurrencySlot.STATUS_RELEASED
+        setattr(scene, status_attr, 2)
+        scene.error_msg = None
+        if job.feature == "image":
+            scene.image_url = output_url
+        else:
+            meta["raw_video_url"] = output_url
+            scene.raw_video_url = output_url
+            scene.merge_status = 0
+            scene.merge_retry_count = 0
+            scene.merge_video_url = None
+            scene.merge_job_id = None
+            scene.merge_meta = None
+            scene.merge_video_provider = None
+    else:
+        if status == "success":
+            meta["error"] = "Runninghub success response missing file URL"
+            tracking["status"] = "invalid_output"
+            release_status = ServiceConcurrencySlot.STATUS_ERROR
+        elif status == "pending":
+            meta["error"] = "Runninghub 轮询超出最大次数"
+            meta["timeout"] = True
+            tracking["status"] = "timeout"
+            release_status = ServiceConcurrencySlot.STATUS_TIMEOUT
+        elif status == "error":
+            detail = RunningHubService.extract_error_message(payload)
+            meta["error"] = f"Runninghub 状态查询持续失败直至超时: {detail}" if detail else "Runninghub 状态查询持续失败直至超时"
+            meta["timeout"] = True
+            tracking["status"] = "poll_error"
+            release_status = ServiceConcurrencySlot.STATUS_TIMEOUT
+        else:
+            meta["error"] = RunningHubService.extract_error_message(payload) or "Runninghub task failed"
+            tracking["status"] = "failed"
+            release_status = ServiceConcurrencySlot.STATUS_ERROR
+        setattr(scene, status_attr, 3)
+        scene.error_msg = meta["error"]
+        retry_attr = f"{job.feature}_retry_count"
+        setattr(scene, retry_attr, (getattr(scene, retry_attr) or 0) + 1)
+        if job.feature == "video":
+            scene.raw_video_url = None
+
+    meta["tracking"] = tracking
+    setattr(scene, meta_attr, meta)
+    setattr(scene, celery_attr, None)
+    scene.finished_at = now
+    db.commit()
+
+    concurrency_manager.release(
+        job.slot_token(),
+        status=release_status,
+        metadata={"job_id": job.job_id, "status": tracking["status"]},
+    )
+    return True
+
+
+def _refresh_steps(db: Session, touched: Set[Tuple[int, str]]) -> None:
+    for task_pk, feature in sorted(touched):
+        task = db.get(Task, task_pk)
+        if not task or task.is_deleted:
+            continue
+        step_name = _FEATURE_FIELDS[feature][4]
+        step = (
+            db.query(TaskStep)
+            .filter(TaskStep.task_id == task_pk, TaskStep.step_name == step_name)
+            .first()
+        )
+        if not step:
+            continue
+        previous_status = step.status
+        # Pipeline tasks advance per scene, so every finished job may unblock the next stage.
+        advance = previous_status != 2 or scene_pipeline_enabled(task)
+        previous_result = step.result if isinstance(step.result, dict) else {}
+        if feature == "image":
+            step = image_task.summarize_image_step(db, task, step, step.provider)
+            if advance:
+                image_task.enqueue_next_step(task, step)
+        else:
+            step = video_task.summarize_video_step(
+                db,
+                task,
+                step,
+                step.provider,
+                prompt_provider_name=previous_result.get("video_prompt_provider"),
+            )
+            if advance:
+                video_task.enqueue_next_step(task, step)
+
+
+@shared_task(bind=True, ignore_result=True)
+def track_runninghub_jobs_task(self, batch_size: Optional[int] = None):
+    """轮询所有处于异步跟踪模式的 Runninghub 作业（每次运行每个作业只查询一次）"""
+    settings = get_settings()
+    batch_size = max(int(batch_size or settings.RUNNINGHUB_TRACKER_BATCH_SIZE or _DEFAULT_BATCH_SIZE), 1)
+
+    db: Session = get_db_session()
+    try:
+        now = naive_now()
+        jobs = [job for job in collect_tracked_jobs(db) if job.is_due(now)]
+        if not jobs:
+            return {"tracked": 0}
+
+        service = RunningHubService(db)
+        touched: Set[Tuple[int, str]] = set()
+        finished = 0
+        errors = 0
+
+        with ThreadPoolExecutor(max_workers=min(batch_size, len(jobs))) as pool:
+            for offset in range(0, len(jobs), batch_size):
+                batch = jobs[offset: offset + batch_size]
+                results = list(pool.map(lambda job: _poll_job(service, job), batch))
+                now = naive_now()
+                for job, (status, payload, error) in zip(batch, results):
+                    if error:
+                        errors += 1
+                        logger.warning(
+                            "Runninghub tracker poll failed for scene %s job %s: %s",
+                            job.scene_id,
+                            job.job_id,
+                            error,
+                        )
+                        # Still run the abandon/expiry checks so a job whose status endpoint
+                        # keeps failing cannot hold its concurrency slot forever.
+                        status, payload = "error", {"message": error}
+                    try:
+                        if _apply_result(db, job, status, payload, now):
+                            finished += 1
+                            touched.add((job.task_id, job.feature))
+                    except Exception:
+                        db.rollback()
+                        logger.exception(
+                            "Failed to apply Runninghub tracker result for scene %s job %s",
+                            job.scene_id,
+                            job.job_id,
+                        )
+
+        _refresh_steps(db, touched)
+        return {"tracked": len(jobs), "finished": finished, "errors": errors}
+    finally:
+        db.close()
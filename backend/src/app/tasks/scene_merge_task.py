@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import math
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from celery import shared_task
 from sqlalchemy.orm import Session
@@ -12,11 +12,12 @@ from app.celery_app import celery_app
 from app.database import get_db_session
 from app.models.media import Scene
 from app.models.task import Task, TaskStep
+from app.services.audio_postprocess import silence_trim_window
 from app.services.nca_service import NCAService
 from app.services.ffmpeg_service import FFmpegService
 from app.services.storage_service import StorageService
 from app.services.providers.utils import collect_provider_candidates
-from app.tasks.utils import ensure_provider_map
+from app.tasks.utils import ensure_provider_map, notify_scene_pipeline, scene_pipeline_enabled
 from app.config.settings import get_settings
 
 _storage_service = StorageService()
@@ -61,6 +62,7 @@ def _compose_scene_with_audio_nca(
     video_url: str,
     audio_url: str,
     frame_rate: int,
+    audio_trim: Optional[Tuple[float, float]] = None,
 ) -> Dict[str, Any]:
     video_metadata = service.get_media_metadata(video_url)
     audio_metadata = service.get_media_metadata(audio_url)
@@ -73,13 +75,24 @@ def _compose_scene_with_audio_nca(
     if not audio_duration or audio_duration <= 0:
         raise RuntimeError("无法获取音频时长")
 
+    trim_filter = ""
+    if audio_trim:
+        trim_start = max(float(audio_trim[0]), 0.0)
+        trim_end = min(float(audio_trim[1]), audio_duration)
+        if trim_end > trim_start:
+            audio_trim = (trim_start, trim_end)
+            audio_duration = trim_end - trim_start
+            trim_filter = f"atrim=start={trim_start:.6f}:end={trim_end:.6f},asetpts=PTS-STARTPTS,"
+        else:
+            audio_trim = None
+
     required_frames = math.ceil(audio_duration * frame_rate)
     target_duration = required_frames / frame_rate
     ratio = target_duration / video_duration if video_duration else 1.0
 
     filter_string = (
         f"[0:v]setpts=PTS*{ratio:.8f},fps={frame_rate}[v_out];"
-        f"[1:a]apad=whole_dur={target_duration:.8f},asetpts=PTS-STARTPTS[a_out]"
+        f"[1:a]{trim_filter}apad=whole_dur={target_duration:.8f},asetpts=PTS-STARTPTS[a_out]"
     )
 
     payload = {
@@ -126,6 +139,7 @@ def _compose_scene_with_audio_nca(
         "filter": filter_string,
         "video_duration": video_duration,
         "audio_duration": audio_duration,
+        "audio_trim": {"start": audio_trim[0], "end": audio_trim[1]} if audio_trim else None,
         "target_duration": target_duration,
         "speed_ratio": ratio,
         "compose_payload": payload,
@@ -145,6 +159,7 @@ def _compose_scene_with_audio_ffmpeg(
     task_id: int,
     scene_id: int,
     scene_seq: int,
+    audio_trim: Optional[Tuple[float, float]] = None,
 ) -> Dict[str, Any]:
     result = service.compose_scene_with_audio(
         video_url=video_url,
@@ -153,6 +168,7 @@ def _compose_scene_with_audio_ffmpeg(
         task_id=task_id,
         scene_id=scene_id,
         scene_seq=scene_seq,
+        audio_trim=audio_trim,
     )
     result["provider"] = "ffmpeg"
     return result
@@ -248,6 +264,8 @@ def merge_scene_media_task(self, task_id: int, scene_id: Optional[int] = None):
             try:
                 input_video_url = scene.raw_video_url
                 input_audio_url = scene.audio_url
+                # 音频任务缓存的静音保留区间，在合成滤镜图中直接 atrim
+                audio_trim = silence_trim_window(scene.audio_meta, scene.audio_url)
                 if provider_name == "nca":
                     input_video_url = _storage_service.build_full_url(input_video_url)
                     input_audio_url = _storage_service.build_full_url(input_audio_url)
@@ -260,6 +278,7 @@ def merge_scene_media_task(self, task_id: int, scene_id: Optional[int] = None):
                         task_id=task_id,
                         scene_id=scene.id,
                         scene_seq=scene.seq,
+                        audio_trim=audio_trim,
                     )
                 else:
                     compose_meta = _compose_scene_with_audio_nca(
@@ -267,6 +286,7 @@ def merge_scene_media_task(self, task_id: int, scene_id: Optional[int] = None):
                         video_url=input_video_url or scene.raw_video_url,
                         audio_url=input_audio_url or scene.audio_url,
                         frame_rate=frame_rate_default,
+                        audio_trim=audio_trim,
                     )
             except Exception as exc:
                 existing_meta = scene.merge_meta if isinstance(scene.merge_meta, dict) else {}
@@ -340,11 +360,11 @@ def merge_scene_media_task(self, task_id: int, scene_id: Optional[int] = None):
             step.status = 3
             step.error_msg = "音视频合成全部失败"
             step.progress = 0
+        elif overall_processing > 0 or (total_targets > overall_completed + overall_failed):
+            step.status = 1
         elif overall_failed > 0 and overall_completed > 0:
             step.status = 6
             step.error_msg = "部分音视频合成失败"
-        elif overall_processing > 0 or (total_targets > overall_completed + overall_failed):
-            step.status = 1
         else:
             step.status = 2
 
@@ -352,12 +372,14 @@ def merge_scene_media_task(self, task_id: int, scene_id: Optional[int] = None):
 
         task_mode = getattr(task, "mode", None) or (task.task_config or {}).get("mode", "auto")
         # Only auto-continue when the step is fully completed (status == 2). Do NOT continue on INTERRUPTED (6).
-        if scene_id is None and task_mode == "auto" and step.status == 2:
+        # In scene pipeline mode the scheduler owns the hand-off to merge_video.
+        if scene_id is None and scene_pipeline_enabled(task):
+            notify_scene_pipeline(task.id)
+        elif scene_id is None and task_mode == "auto" and step.status == 2:
             try:
                 celery_app.send_task(
                     "app.tasks.merge_task.merge_video_task",
                     args=[task.id],
-                    queue="default",
                     serializer="json",
                 )
             except Exception:
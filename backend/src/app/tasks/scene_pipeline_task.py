@@ -0,0 +1,336 @@
+"""Celery 任务：分镜级流水线调度（scene_pipeline_task）
+
+In auto mode scenes no longer wait for a whole step before moving on. Each scene
+walks its own chain: image and audio start as soon as the storyboard exists,
+video N once image N and audio N are done, and scene merge N once video N lands.
+Only ``merge_video_task`` waits for every scene.
+
+The scheduler is idempotent: each stage is claimed for all ready scenes at once
+with a locked SELECT plus one conditional UPDATE (status 0 -> 1), so concurrent
+runs dispatch each scene stage exactly once and a run costs a constant number of
+round-trips per stage. Every dispatched stage links back to this task, which then
+releases the next stage. A failed scene stage marks ``merge_video`` as failed
+(it can never start) until the scene is retried.
+"""
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from celery import shared_task
+from sqlalchemy import case, or_
+from sqlalchemy import update as sa_update
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.task_events import EVENT_SCENE, EVENT_STEP, record_task_event
+from app.database import get_db_session
+from app.models.media import Scene
+from app.models.task import Task, TaskStep
+from app.tasks import image_task, video_task
+from app.tasks.utils import ensure_provider_map, scene_pipeline_enabled
+from app.tasks.utils.pipeline import ADVANCE_TASK_NAME
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SceneStage:
+    name: str
+    step_name: str
+    status_attr: str
+    task_name: str
+    celery_id_attr: Optional[str] = None
+
+
+_IMAGE = SceneStage(
+    "image",
+    "generate_images",
+    "image_status",
+    "app.tasks.image_task.generate_image_scene_task",
+    celery_id_attr="image_celery_id",
+)
+_AUDIO = SceneStage(
+    "audio",
+    "generate_audio",
+    "audio_status",
+    "app.tasks.audio_task.generate_audio_task",
+)
+_VIDEO = SceneStage(
+    "video",
+    "generate_videos",
+    "video_status",
+    "app.tasks.video_task.generate_video_scene_task",
+    celery_id_attr="video_celery_id",
+)
+_MERGE = SceneStage(
+    "merge",
+    "merge_scene_media",
+    "merge_status",
+    "app.tasks.scene_merge_task.merge_scene_media_task",
+)
+
+
+def _is_interrupted(step: TaskStep) -> bool:
+    # Status 6 also means "partially failed"; only a user interrupt carries the marker.
+    return step.status == 6 and "[interrupted]" in (step.error_msg or "")
+
+
+def _stage_conditions(stage: SceneStage) -> Tuple[Any, ...]:
+    """Extra WHERE clauses a scene must satisfy before the stage may start."""
+    if stage is _VIDEO:
+        return (Scene.image_status == 2, Scene.image_url != None, Scene.audio_status == 2)  # noqa: E711
+    if stage is _MERGE:
+        return (
+            Scene.video_status == 2,
+            Scene.raw_video_url != None,  # noqa: E711
+            Scene.audio_status == 2,
+            Scene.audio_url != None,  # noqa: E711
+        )
+    return ()
+
+
+def claim_scene_stages(db: Session, task_id: int, stage: SceneStage) -> Dict[int, str]:
+    """Atomically move every ready scene of the task from pending to processing for ``stage``.
+
+    Returns ``{scene_id: celery task id}`` in scene order. The ready rows are locked
+    (``SELECT ... FOR UPDATE``) and flipped with a single UPDATE, so a concurrent
+    scheduler run waits and then finds nothing left to claim.
+    """
+    status_column = getattr(Scene, stage.status_attr)
+    ready = [
+        row.id
+        for row in db.query(Scene.id)
+        .filter(Scene.task_id == task_id, status_column == 0, *_stage_conditions(stage))
+        .order_by(Scene.seq.asc())
+        .with_for_update()
+        .all()
+    ]
+    if not ready:
+        db.commit()
+        return {}
+
+    claims = {scene_id: str(uuid4()) for scene_id in ready}
+    values: Dict[str, Any] = {stage.status_attr: 1}
+    if stage.celery_id_attr:
+        values[stage.celery_id_attr] = case(claims, value=Scene.id)
+    result = db.execute(
+        sa_update(Scene)
+        .where(Scene.id.in_(ready), status_column == 0)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(ready):  # pragma: no cover - rows are locked above
+        db.rollback()
+        logger.warning("Scene %s claim for task %s raced; retrying on the next run", stage.name, task_id)
+        return {}
+    # Bulk UPDATEs bypass the ORM event hooks; publish the progress events explicitly.
+    for scene_id in ready:
+        record_task_event(db, EVENT_SCENE, task_id, scene_id, {stage.status_attr: 1})
+    db.commit()
+    return claims
+
+
+def _release_scene_stage(db: Session, task_id: int, scene_id: int, stage: SceneStage) -> None:
+    values: Dict[str, Any] = {stage.status_attr: 0}
+    if stage.celery_id_attr:
+        values[stage.celery_id_attr] = None
+    db.execute(
+        sa_update(Scene)
+        .where(Scene.id == scene_id)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    record_task_event(db, EVENT_SCENE, task_id, scene_id, {stage.status_attr: 0})
+    db.commit()
+
+
+def _stage_kwargs(db: Session, task: Task, stage: SceneStage, step: TaskStep) -> Dict[str, Any]:
+    """Provider settings resolved once per scheduler run and shared by the stage's subtasks."""
+    if stage is _IMAGE:
+        # Record providers on the step the first time the stage starts; later runs only read them.
+        if step.status == 0:
+            return {"image_settings": image_task.record_image_settings(db, task, step)}
+        return {"image_settings": image_task.resolve_image_settings(db, task)}
+    if stage is _VIDEO:
+        if step.status == 0:
+            return {"video_settings": video_task.record_video_settings(db, task, step)}
+        return {"video_settings": video_task.resolve_video_settings(task)}
+    return {}
+
+
+def _dispatch_scene_stage(
+    task_id: int,
+    scene_id: int,
+    stage: SceneStage,
+    celery_id: str,
+    kwargs: Optional[Dict[str, Any]] = None,
+) -> None:
+    celery_app.send_task(
+        stage.task_name,
+        args=[task_id, scene_id],
+        kwargs=kwargs or {},
+        serializer="json",
+        task_id=celery_id,
+        link=celery_app.signature(ADVANCE_TASK_NAME, args=[task_id], immutable=True),
+    )
+
+
+def _claim_merge_video(db: Session, step: TaskStep) -> bool:
+    result = db.execute(
+        sa_update(TaskStep)
+        .where(TaskStep.id == step.id, TaskStep.status == 0)
+        .values(status=1, error_msg=None)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        record_task_event(db, EVENT_STEP, step.task_id, step.id, {"status": 1, "error_msg": None})
+    db.commit()
+    return result.rowcount == 1
+
+
+_STAGES = (_IMAGE, _AUDIO, _VIDEO, _MERGE)
+_BLOCKED_MARKER = "[scene-failed]"
+
+
+def _failed_scene_stages(db: Session, task_id: int) -> List[str]:
+    """Describe failed scene stages, e.g. ``["#3 video"]``."""
+    columns = [getattr(Scene, stage.status_attr) for stage in _STAGES]
+    rows = (
+        db.query(Scene.seq, *columns)
+        .filter(Scene.task_id == task_id, or_(*(column == 3 for column in columns)))
+        .order_by(Scene.seq.asc())
+        .all()
+    )
+    return [
+        f"#{row.seq} {stage.name}"
+        for row in rows
+        for stage in _STAGES
+        if getattr(row, stage.status_attr) == 3
+    ]
+
+
+def _sync_merge_blocked(db: Session, step: TaskStep, failures: List[str]) -> None:
+    """Fail ``merge_video`` while a scene stage has failed; reopen it once none has."""
+    if failures and step.status == 0:
+        shown = ", ".join(failures[:5]) + (" ..." if len(failures) > 5 else "")
+        values: Dict[str, Any] = {
+            "status": 3,
+            "error_msg": f"分镜阶段失败，整片合成无法开始（{shown}），请重试失败的分镜 {_BLOCKED_MARKER}",
+        }
+        condition = TaskStep.status == 0
+    elif not failures and step.status == 3 and _BLOCKED_MARKER in (step.error_msg or ""):
+        values = {"status": 0, "error_msg": None}
+        condition = TaskStep.error_msg.contains(_BLOCKED_MARKER)
+    else:
+        return
+    result = db.execute(
+        sa_update(TaskStep)
+        .where(TaskStep.id == step.id, condition)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        record_task_event(db, EVENT_STEP, step.task_id, step.id, values)
+    db.commit()
+    db.refresh(step)
+
+
+def _refresh_step_summaries(db: Session, task: Task, steps: Dict[str, TaskStep]) -> None:
+    image_step = steps.get(_IMAGE.step_name)
+    if image_step is not None and image_step.status != 0:
+        image_task.summarize_image_step(db, task, image_step, image_step.provider)
+    video_step = steps.get(_VIDEO.step_name)
+    if video_step is not None and video_step.status != 0:
+        video_task.summarize_video_step(
+            db,
+            task,
+            video_step,
+            video_step.provider,
+            prompt_provider_name=ensure_provider_map(task.providers).get("video_prompt"),
+        )
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def advance_scene_pipeline_task(self, task_id: int):
+    """分镜级调度：为已就绪的分镜派发下一阶段，全部分镜合成完毕后触发整片合成"""
+    db: Session = get_db_session()
+    try:
+        task = db.get(Task, task_id)
+        if not task or task.is_deleted:
+            return {"error": "任务不存在"}
+        if not scene_pipeline_enabled(task):
+            return {"skipped": "scene pipeline disabled"}
+
+        steps = {
+            step.step_name: step
+            for step in db.query(TaskStep).filter(TaskStep.task_id == task_id).all()
+        }
+        if not db.query(Scene.id).filter(Scene.task_id == task_id).first():
+            return {"dispatched": {}}
+
+        dispatched: Counter = Counter()
+        for stage in _STAGES:
+            step = steps.get(stage.step_name)
+            # Interrupted or missing steps hold their stage until the user resumes it.
+            if step is None or _is_interrupted(step):
+                continue
+            claims = claim_scene_stages(db, task_id, stage)
+            if not claims:
+                continue
+            stage_kwargs: Optional[Dict[str, Any]] = None
+            for scene_pk, celery_id in claims.items():
+                try:
+                    if stage_kwargs is None:
+                        stage_kwargs = _stage_kwargs(db, task, stage, step)
+                    _dispatch_scene_stage(task_id, scene_pk, stage, celery_id, stage_kwargs)
+                except Exception:
+                    logger.exception(
+                        "Failed to dispatch %s stage for task %s scene %s", stage.name, task_id, scene_pk
+                    )
+                    _release_scene_stage(db, task_id, scene_pk, stage)
+                    continue
+                dispatched[stage.name] += 1
+            if dispatched[stage.name] and step.status == 0:
+                step.status = 1
+                step.error_msg = None
+                db.commit()
+
+        _refresh_step_summaries(db, task, steps)
+
+        merge_started = False
+        merge_step = steps.get("merge_video")
+        if merge_step is not None:
+            _sync_merge_blocked(db, merge_step, _failed_scene_stages(db, task_id))
+            remaining = (
+                db.query(Scene.id)
+                .filter(Scene.task_id == task_id, Scene.merge_status != 2)
+                .count()
+            )
+            if remaining == 0 and _claim_merge_video(db, merge_step):
+                celery_app.send_task(
+                    "app.tasks.merge_task.merge_video_task",
+                    args=[task_id],
+                    serializer="json",
+                )
+                merge_started = True
+
+        if dispatched or merge_started:
+            logger.info(
+                "Scene pipeline for task %s dispatched %s%s",
+                task_id,
+                dict(dispatched),
+                " and merge_video" if merge_started else "",
+            )
+        return {"dispatched": dict(dispatched), "merge_video": merge_started}
+    except Exception as exc:
+        try:
+            db.rollback()
+        except Exception:
+            pass
+        raise self.retry(exc=exc)
+    finally:
+        db.close()
@@ -9,15 +9,27 @@ from app.models.task import Task, TaskStep
 from app.services.providers.base import StoryboardRequest
 from app.services.providers.registry import resolve_task_provider
 from app.services.providers.utils import collect_provider_candidates
-from app.tasks.utils import ensure_provider_map
+from app.tasks.utils import (
+    ensure_provider_map,
+    gemini_cache_bypassed,
+    notify_scene_pipeline,
+    scene_pipeline_enabled,
+)
 from app.services.style_preset_service import merge_style_preset
 from app.services.exceptions import APIException
+from app.services.gemini_response_cache import bypass_gemini_cache
 from app.services.storyboard_script import persist_script_scenes
+from app.tasks.video_task import enqueue_video_prompt_pregeneration
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
-def generate_storyboard_task(self, task_id: int):
-    """异步分镜生成任务"""
+def generate_storyboard_task(self, task_id: int, fresh: bool = False):
+    """异步分镜生成任务
+
+    Gemini 响应按提示词缓存，重试/重跑不会重新生成；``fresh`` 或
+    ``task_config.gemini_cache=false`` 时跳过缓存读取。``fresh`` 只作用于首次执行，
+    自动重试时恢复读取缓存。
+    """
     db: Session = get_db_session()
     try:
         task = db.get(Task, task_id)
@@ -94,7 +106,11 @@ def generate_storyboard_task(self, task_id: int):
             if not task_mode:
                 raise RuntimeError("任务未配置执行模式")
             if task_mode == 'auto' and result.created:
-                celery_app.send_task('app.tasks.image_task.generate_images_task', args=[task.id], queue='default', serializer='json')
+                enqueue_video_prompt_pregeneration(task)
+                if scene_pipeline_enabled(task):
+                    notify_scene_pipeline(task.id)
+                else:
+                    celery_app.send_task('app.tasks.image_task.generate_images_task', args=[task.id], serializer='json')
 
             return {"scenes": result.scene_count}
 
@@ -136,7 +152,8 @@ def generate_storyboard_task(self, task_id: int):
             trigger_words=trigger_words,
             channel_identity=channel_identity,
         )
-        result = provider.generate(request)
+        with bypass_gemini_cache(fresh or gemini_cache_bypassed(task_config)):
+            result = provider.generate(request)
 
         scenes = result.scenes or []
 
@@ -183,7 +200,12 @@ def generate_storyboard_task(self, task_id: int):
         if not task_mode:
             raise RuntimeError("任务未配置执行模式")
         if task_mode == 'auto':
-            celery_app.send_task('app.tasks.image_task.generate_images_task', args=[task.id], queue='default', serializer='json')
+            # 图片/音频生成期间提前批量生成视频提示词
+            enqueue_video_prompt_pregeneration(task)
+            if scene_pipeline_enabled(task):
+                notify_scene_pipeline(task.id)
+            else:
+                celery_app.send_task('app.tasks.image_task.generate_images_task', args=[task.id], serializer='json')
 
         return {"scenes": len(scenes)}
     except APIException as exc:
@@ -193,7 +215,8 @@ def generate_storyboard_task(self, task_id: int):
             step.status = 3
             step.error_msg = str(exc)
             db.commit()
-        raise self.retry(exc=exc)
+        # ``fresh`` only applies to the first attempt: a retry may reuse what the failed run cached.
+        raise self.retry(exc=exc, args=[task_id], kwargs={"fresh": False})
     except Exception as e:
         db.rollback()
         # 步骤失败
@@ -0,0 +1,113 @@
+"""Celery 任务：分镜字幕转写（transcription_task）
+
+When subtitles run in ``scene`` mode, audio_task dispatches one task per scene as
+soon as its narration audio is stored. The transcript is cached on the scene and
+picked up by finalize's generate_subtitles, so Whisper runs ahead of (and in
+parallel with) video generation instead of over the merged video at the end.
+
+Tasks go to ``TRANSCRIPTION_QUEUE`` so they can be served by dedicated CPU
+workers; with ``FASTER_WHISPER_PRELOAD`` the model is loaded once when such a
+worker starts instead of on its first request.
+"""
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+from celery.signals import worker_process_init, worker_ready
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.config.settings import get_settings
+from app.database import get_db_session
+from app.models.media import Scene
+from app.models.task import Task
+from app.services.faster_whisper_service import get_faster_whisper_service
+from app.services.scene_transcription import (
+    MODE_SCENE,
+    cached_scene_transcription,
+    store_scene_transcription,
+    subtitle_options,
+    subtitle_transcribe_mode,
+    transcribe_scene_audio,
+)
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIBE_SCENE_TASK_NAME = "app.tasks.transcription_task.transcribe_scene_audio_task"
+
+
+def dispatch_scene_transcription(task: Task, scene: Scene) -> bool:
+    """Queue background transcription for a scene whose audio just completed."""
+    if subtitle_transcribe_mode(task.task_config) != MODE_SCENE or not scene.audio_url:
+        return False
+    celery_app.send_task(
+        TRANSCRIBE_SCENE_TASK_NAME,
+        args=[scene.id],
+        serializer="json",
+    )
+    return True
+
+
+def _preload_whisper_model() -> None:
+    if not get_settings().FASTER_WHISPER_PRELOAD:
+        return
+    try:
+        get_faster_whisper_service().load_model()
+    except Exception:  # pragma: no cover - the first task retries the load and surfaces the error
+        logger.exception("Failed to preload faster-whisper model")
+
+
+@worker_ready.connect
+def _preload_on_worker_ready(sender=None, **_kwargs) -> None:
+    # Prefork children load their own copy in worker_process_init; skip the parent.
+    pool = getattr(sender, "pool", None)
+    if pool is not None and "prefork" in type(pool).__module__:
+        return
+    _preload_whisper_model()
+
+
+@worker_process_init.connect
+def _preload_on_process_init(**_kwargs) -> None:
+    _preload_whisper_model()
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=30)
+def transcribe_scene_audio_task(self, scene_id: int):
+    """转写单个分镜的旁白音频，结果缓存到 scene.audio_meta.transcription"""
+    db: Session = get_db_session()
+    try:
+        scene = db.get(Scene, scene_id)
+        if not scene or not scene.audio_url or scene.audio_status != 2:
+            return {"scene_id": scene_id, "status": "skipped"}
+        if cached_scene_transcription(scene):
+            return {"scene_id": scene_id, "status": "cached"}
+
+        task = db.get(Task, scene.task_id)
+        audio_url = scene.audio_url
+        payload = transcribe_scene_audio(
+            get_faster_whisper_service(),
+            scene,
+            subtitle_options(task.task_config if task else None),
+        )
+
+        db.refresh(scene)
+        if scene.audio_url != audio_url:
+            # Audio was regenerated while we were transcribing; the new audio dispatches its own run.
+            return {"scene_id": scene_id, "status": "stale"}
+        store_scene_transcription(scene, payload)
+        db.commit()
+        performance = (payload.get("info") or {}).get("performance") or {}
+        return {
+            "scene_id": scene_id,
+            "status": "completed",
+            "segments": len(payload.get("segments") or []),
+            "latency_ms": performance.get("latency_ms"),
+            "rtf": performance.get("rtf"),
+        }
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Scene transcription failed for scene %s", scene_id)
+        raise self.retry(exc=exc)
+    finally:
+        db.close()
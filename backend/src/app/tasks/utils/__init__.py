@@ -1,8 +1,17 @@
 """Shared helpers for Celery task modules."""
 from __future__ import annotations
 
+import math
 from typing import Any, Dict
 
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.models.media import Scene
+from app.services.concurrency_manager import concurrency_manager
+from app.services.exceptions import ConcurrencyLimitException
+from app.utils.timezone import naive_now
+
 from .interrupts import (  # re-export for convenience
 	StepInterruptController,
 	mark_scene_interrupted,
@@ -10,6 +19,7 @@ from .interrupts import (  # re-export for convenience
 	reset_interrupted_scenes,
 	summarize_status_counts,
 )
+from .pipeline import notify_scene_pipeline, scene_pipeline_enabled
 
 
 def ensure_provider_map(raw: Any) -> Dict[str, str]:
@@ -19,8 +29,67 @@ def ensure_provider_map(raw: Any) -> Dict[str, str]:
 	return {}
 
 
+def scene_fanout_enabled(task_config: Any, scene_count: int) -> bool:
+	"""Whether per-scene work should be dispatched as a Celery chord.
+
+	``task_config["scene_fanout"]`` overrides the ``SCENE_FANOUT_ENABLED`` setting;
+	a single scene never fans out.
+	"""
+	if scene_count <= 1:
+		return False
+	if isinstance(task_config, dict) and task_config.get("scene_fanout") is not None:
+		return bool(task_config.get("scene_fanout"))
+	return get_settings().scene_fanout_enabled
+
+
+def scene_fanout_retry_seconds() -> int:
+	"""Countdown before a fan-out subtask retries after hitting a full concurrency pool."""
+	return max(int(get_settings().SCENE_FANOUT_RETRY_SECONDS or 15), 1)
+
+
+def scene_fanout_max_retries(exc: ConcurrencyLimitException) -> int:
+	"""Retries a fan-out subtask may spend waiting for a full pool.
+
+	Covers two slot lifetimes: by then every slot held when the subtask first
+	waited has been released or expired, so a still-full pool means the scene
+	should fail instead of retrying forever.
+	"""
+	slot_timeout = concurrency_manager.slot_timeout(exc.service_name, exc.feature)
+	return max(math.ceil(2 * slot_timeout / scene_fanout_retry_seconds()), 1)
+
+
+def fail_waiting_scene(db: Session, scene_id: int, feature: str, error: str) -> None:
+	"""Fail a scene stage that is still claimed (status 1) by a subtask that gave up."""
+	try:
+		db.rollback()
+		scene = db.get(Scene, scene_id)
+		if scene is None or getattr(scene, f"{feature}_status") != 1:
+			return
+		setattr(scene, f"{feature}_status", 3)
+		setattr(scene, f"{feature}_celery_id", None)
+		retry_attr = f"{feature}_retry_count"
+		setattr(scene, retry_attr, (getattr(scene, retry_attr) or 0) + 1)
+		scene.error_msg = error
+		scene.finished_at = naive_now()
+		db.commit()
+	except Exception:
+		db.rollback()
+
+
+def gemini_cache_bypassed(task_config: Any) -> bool:
+	"""``task_config["gemini_cache"] = false`` asks for fresh Gemini responses on every run."""
+	return isinstance(task_config, dict) and task_config.get("gemini_cache") is False
+
+
 __all__ = [
 	"ensure_provider_map",
+	"fail_waiting_scene",
+	"gemini_cache_bypassed",
+	"notify_scene_pipeline",
+	"scene_pipeline_enabled",
+	"scene_fanout_enabled",
+	"scene_fanout_max_retries",
+	"scene_fanout_retry_seconds",
 	"StepInterruptController",
 	"mark_scene_interrupted",
 	"refresh_step",
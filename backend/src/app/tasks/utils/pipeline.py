@@ -0,0 +1,42 @@
+"""Helpers for the scene-level streaming pipeline (see ``scene_pipeline_task``)."""
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional
+
+from app.celery_app import celery_app
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+ADVANCE_TASK_NAME = "app.tasks.scene_pipeline_task.advance_scene_pipeline_task"
+
+
+def scene_pipeline_enabled(task: Any) -> bool:
+    """Whether an auto-mode task advances scene by scene instead of step by step.
+
+    ``task_config["scene_pipeline"]`` overrides the ``SCENE_PIPELINE_ENABLED`` setting.
+    Manual-mode tasks never use the pipeline.
+    """
+    task_config = getattr(task, "task_config", None)
+    if not isinstance(task_config, dict):
+        task_config = {}
+    task_mode = getattr(task, "mode", None) or task_config.get("mode")
+    if task_mode != "auto":
+        return False
+    if task_config.get("scene_pipeline") is not None:
+        return bool(task_config.get("scene_pipeline"))
+    return get_settings().scene_pipeline_enabled
+
+
+def notify_scene_pipeline(task_id: int, *, countdown: Optional[float] = None) -> None:
+    """Ask the scheduler to dispatch whatever scene work became ready for ``task_id``."""
+    try:
+        celery_app.send_task(
+            ADVANCE_TASK_NAME,
+            args=[task_id],
+            serializer="json",
+            countdown=countdown,
+        )
+    except Exception:
+        logger.exception("Failed to enqueue scene pipeline advance for task %s", task_id)
@@ -1,21 +1,682 @@
 """Celery 任务：视频生成（video_task）"""
 import json
-from typing import Any, Dict, Optional
-
-from celery import shared_task
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from celery import chord, group, shared_task
 from sqlalchemy.orm import Session
 
 from app.celery_app import celery_app
+from app.core.redis_client import get_redis_client
 from app.database import get_db_session
 from app.models.media import Scene
 from app.models.task import Task, TaskStep
+from app.services.audio_postprocess import silence_trim_window
+from app.services.exceptions import ConcurrencyLimitException
+from app.services.gemini_response_cache import bypass_gemini_cache
 from app.services.providers.base import MediaRequest, VideoPromptRequest
-from app.services.providers.registry import resolve_task_provider
+from app.services.providers.registry import DEFAULT_PROVIDERS, get_provider, resolve_provider_name, resolve_task_provider
 from app.services.providers.utils import collect_provider_candidates
-from app.tasks.utils import ensure_provider_map
+from app.tasks.utils import (
+    ensure_provider_map,
+    fail_waiting_scene,
+    gemini_cache_bypassed,
+    notify_scene_pipeline,
+    scene_fanout_enabled,
+    scene_fanout_max_retries,
+    scene_fanout_retry_seconds,
+    scene_pipeline_enabled,
+)
 from app.tasks.utils.interrupts import StepInterruptController, summarize_status_counts
 from app.utils.timezone import naive_now
 
+logger = logging.getLogger(__name__)
+
+# 这些视频提供商以文字运动提示词驱动，提交前必须先有 video_prompt
+PROMPTED_VIDEO_PROVIDERS = {"fal", "runninghub"}
+
+# 同一任务同时只跑一轮提示词预生成（分镜完成时与视频步骤开始时都会触发）
+_PROMPT_CLAIM_PREFIX = "video-prompts:claim:"
+_PROMPT_CLAIM_TTL_SECONDS = 900
+_PROMPT_CLAIM_WAIT_SECONDS = 120.0
+_PROMPT_CLAIM_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def summarize_video_step(
+    db: Session,
+    task: Task,
+    step: TaskStep,
+    provider_name: Optional[str],
+    *,
+    prompt_provider_name: Optional[str] = None,
+) -> TaskStep:
+    """Recompute the video step result/progress/status from all scenes of the task."""
+    scenes = (
+        db.query(Scene)
+        .filter(Scene.task_id == task.id)
+        .order_by(Scene.seq.asc())
+        .all()
+    )
+
+    overall_completed, overall_queued, overall_failed, pending_count = summarize_status_counts(
+        scenes,
+        status_attr="video_status",
+    )
+
+    step.result = {
+        "provider": provider_name,
+        "video_prompt_provider": prompt_provider_name,
+        "completed": overall_completed,
+        "queued": overall_queued,
+        "failed": overall_failed,
+    }
+
+    total_scenes = len(scenes)
+    if total_scenes:
+        step.progress = int(overall_completed / total_scenes * 100)
+    else:
+        step.progress = 100
+
+    if step.status != 6:
+        step.error_msg = None
+        if overall_failed == total_scenes and total_scenes > 0:
+            step.status = 3
+            step.error_msg = "视频生成全部失败"
+            step.progress = 0
+        elif overall_queued > 0 or pending_count > 0:
+            step.status = 1
+        elif overall_failed > 0 and overall_completed > 0:
+            step.status = 6
+            step.error_msg = "部分视频生成失败"
+        else:
+            step.status = 2
+
+    db.commit()
+    return step
+
+
+def enqueue_next_step(task: Task, step: TaskStep) -> None:
+    """Kick off per-scene AV merge when the video step completed in auto mode."""
+    if scene_pipeline_enabled(task):
+        notify_scene_pipeline(task.id)
+        return
+    task_mode = getattr(task, "mode", None) or (task.task_config or {}).get("mode")
+    if task_mode != "auto" or step.status != 2:
+        return
+    try:
+        celery_app.send_task(
+            "app.tasks.scene_merge_task.merge_scene_media_task",
+            args=[task.id],
+            serializer="json",
+        )
+    except Exception:
+        pass
+
+
+@dataclass
+class VideoStepContext:
+    """Providers and per-task settings shared by every scene of one video step run."""
+
+    task_id: int
+    provider: Any
+    provider_name: str
+    prompt_provider: Any
+    prompt_provider_name: Optional[str]
+    video_config: Dict[str, Any]
+    runninghub_workflow_id: Optional[Any]
+    storyboard_context: str
+    interrupt_helper: StepInterruptController
+    gemini_cache_bypassed: bool = False
+
+
+def _task_video_config(task: Task) -> Dict[str, Any]:
+    task_config = task.task_config if isinstance(task.task_config, dict) else {}
+    video_config = task_config.get("video")
+    return video_config if isinstance(video_config, dict) else {}
+
+
+def build_storyboard_context(db: Session, task: Task) -> str:
+    """Storyboard outline (all scenes) passed to the video prompt provider."""
+    scenes = (
+        db.query(Scene)
+        .filter(Scene.task_id == task.id)
+        .order_by(Scene.seq.asc())
+        .all()
+    )
+    task_params = task.params if isinstance(task.params, dict) else {}
+    return json.dumps(
+        {
+            "task_id": task.id,
+            "description": task_params.get("description"),
+            "reference_video": task_params.get("reference_video"),
+            "scenes": [
+                {
+                    "scene_number": sc.seq,
+                    "narration": sc.narration_text,
+                    "image_prompt": sc.image_prompt,
+                }
+                for sc in scenes
+            ],
+        },
+        ensure_ascii=False,
+    )
+
+
+def _scene_video_duration(scene: Scene, video_config: Dict[str, Any]) -> Tuple[Optional[float], Optional[int]]:
+    """Return (duration in seconds, rounded whole seconds) from the scene audio or the task config."""
+    duration_source: Optional[float] = None
+    if getattr(scene, "audio_duration", None) is not None:
+        try:
+            duration_source = float(scene.audio_duration) if scene.audio_duration is not None else None
+        except (TypeError, ValueError):
+            duration_source = None
+
+    if duration_source is None:
+        raw_config_duration = video_config.get("duration")
+        try:
+            duration_source = (
+                float(raw_config_duration)
+                if raw_config_duration is not None
+                else None
+            )
+        except (TypeError, ValueError):
+            duration_source = None
+
+    rounded_duration: Optional[int] = None
+    if duration_source is not None:
+        if duration_source < 0:
+            duration_source = 0.0
+        rounded_duration = int(round(duration_source))
+        if rounded_duration <= 0 and duration_source > 0:
+            rounded_duration = 1
+    return duration_source, rounded_duration
+
+
+def _scene_audio_trim(scene: Scene) -> Optional[Dict[str, float]]:
+    """未物化的静音裁剪窗口：audio_url 仍指向原始音频，时长却已按裁剪后计算。"""
+    window = silence_trim_window(getattr(scene, "audio_meta", None), getattr(scene, "audio_url", None))
+    if window is None:
+        return None
+    return {"start": window[0], "end": window[1]}
+
+
+def _video_prompt_request(
+    scene: Scene,
+    *,
+    task_id: int,
+    video_provider_name: str,
+    storyboard_context: str,
+    video_config: Dict[str, Any],
+) -> VideoPromptRequest:
+    duration_source, rounded_duration = _scene_video_duration(scene, video_config)
+    return VideoPromptRequest(
+        scene_seq=scene.seq,
+        narration=scene.narration_text or "",
+        image_prompt=scene.image_prompt,
+        image_url=scene.image_url,
+        storyboard_context=storyboard_context,
+        extra={
+            "task_id": task_id,
+            "video_provider": video_provider_name,
+            "target_provider": video_provider_name,
+            "duration": rounded_duration if rounded_duration is not None else None,
+            "audio_duration": duration_source,
+        },
+    )
+
+
+def _store_video_prompt(
+    scene: Scene,
+    prompt_text: str,
+    prompt_provider_name: Optional[str],
+    raw_payload: Any,
+    *,
+    duration: Optional[int] = None,
+) -> None:
+    scene.video_prompt = prompt_text
+    existing_meta = scene.video_meta if isinstance(scene.video_meta, dict) else {}
+    prompt_meta = dict(existing_meta) if isinstance(existing_meta, dict) else {}
+    prompt_meta["prompt"] = prompt_text
+    # 记录生成提示词时依据的音频时长；音频尚未生成时为 None（时长只作参考，不据此重新生成）
+    prompt_meta["prompt_duration"] = duration
+    if prompt_provider_name:
+        prompt_meta["video_prompt_provider"] = prompt_provider_name
+    if raw_payload is not None:
+        prompt_meta["prompt_raw"] = raw_payload
+    scene.video_meta = prompt_meta
+
+
+def _prompt_audio_duration(scene: Scene, video_config: Dict[str, Any]) -> Optional[int]:
+    """Whole-second clip length a prompt is written for; None until the narration audio exists."""
+    if getattr(scene, "audio_duration", None) is None:
+        return None
+    return _scene_video_duration(scene, video_config)[1]
+
+
+def _video_prompt_stale(scene: Scene, video_config: Dict[str, Any]) -> bool:
+    """True when the stored prompt was written for another narration length.
+
+    Prompts pre-generated right after the storyboard only had the generic duration as a
+    hint and are kept once the audio lands; only a prompt written for a known audio length
+    that has since changed (the narration was regenerated) is redone. Prompts edited by
+    the user are kept.
+    """
+    meta = scene.video_meta if isinstance(scene.video_meta, dict) else {}
+    recorded = meta.get("prompt_duration")
+    if recorded is None or meta.get("prompt") != scene.video_prompt:
+        return False
+    current = _prompt_audio_duration(scene, video_config)
+    return current is not None and current != recorded
+
+
+def _needs_video_prompt(scene: Scene, video_config: Dict[str, Any]) -> bool:
+    if not (scene.narration_text or "").strip():
+        return False
+    return not (scene.video_prompt or "").strip() or _video_prompt_stale(scene, video_config)
+
+
+@contextmanager
+def video_prompt_claim(task_id: int, *, wait_seconds: float = 0.0) -> Iterator[bool]:
+    """Per-task claim on prompt pre-generation; yields False when another run holds it.
+
+    Without Redis every caller proceeds (duplicate batches are then only wasted calls).
+    """
+    client = get_redis_client()
+    key = f"{_PROMPT_CLAIM_PREFIX}{task_id}"
+    token = uuid4().hex
+    acquired = client is None
+    deadline = time.monotonic() + max(wait_seconds, 0.0)
+    while not acquired:
+        try:
+            acquired = bool(client.set(key, token, nx=True, ex=_PROMPT_CLAIM_TTL_SECONDS))
+        except Exception:
+            logger.debug("Video prompt claim unavailable for task %s", task_id, exc_info=True)
+            client = None
+            acquired = True
+            break
+        if acquired or time.monotonic() >= deadline:
+            break
+        time.sleep(1.0)
+    try:
+        yield acquired
+    finally:
+        if acquired and client is not None:
+            try:
+                client.eval(_PROMPT_CLAIM_RELEASE_LUA, 1, key, token)
+            except Exception:  # pragma: no cover - the TTL frees it
+                logger.debug("Failed to release video prompt claim for task %s", task_id, exc_info=True)
+
+
+def pregenerate_video_prompts(
+    db: Session,
+    task: Task,
+    *,
+    video_provider_name: str,
+    prompt_provider: Any,
+    prompt_provider_name: Optional[str],
+    scene_ids: Optional[Sequence[int]] = None,
+    storyboard_context: Optional[str] = None,
+    wait_for_claim: float = 0.0,
+) -> int:
+    """Fill ``video_prompt`` for every scene missing one (or holding a stale one) with batched calls.
+
+    Runs before any scene is submitted so video generation never waits on the prompt
+    model. Only one run per task at a time: a caller that cannot take the claim within
+    ``wait_for_claim`` seconds returns 0. Failures are logged and left to the
+    per-scene path in ``process_video_scene``. Returns the number of prompts stored.
+    """
+    if video_provider_name not in PROMPTED_VIDEO_PROVIDERS or prompt_provider is None:
+        return 0
+    with video_prompt_claim(task.id, wait_seconds=wait_for_claim) as claimed:
+        if not claimed:
+            logger.info("Video prompt pre-generation for task %s is already running", task.id)
+            return 0
+        return _pregenerate_video_prompts(
+            db,
+            task,
+            video_provider_name=video_provider_name,
+            prompt_provider=prompt_provider,
+            prompt_provider_name=prompt_provider_name,
+            scene_ids=scene_ids,
+            storyboard_context=storyboard_context,
+        )
+
+
+def _pregenerate_video_prompts(
+    db: Session,
+    task: Task,
+    *,
+    video_provider_name: str,
+    prompt_provider: Any,
+    prompt_provider_name: Optional[str],
+    scene_ids: Optional[Sequence[int]],
+    storyboard_context: Optional[str],
+) -> int:
+    video_config = _task_video_config(task)
+    query = db.query(Scene).filter(Scene.task_id == task.id)
+    if scene_ids is not None:
+        query = query.filter(Scene.id.in_(list(scene_ids)))
+    # The previous holder may have filled these in while we waited for the claim.
+    db.expire_all()
+    pending = [sc for sc in query.order_by(Scene.seq.asc()).all() if _needs_video_prompt(sc, video_config)]
+    if not pending:
+        return 0
+
+    if storyboard_context is None:
+        storyboard_context = build_storyboard_context(db, task)
+    requests = [
+        _video_prompt_request(
+            sc,
+            task_id=task.id,
+            video_provider_name=video_provider_name,
+            storyboard_context=storyboard_context,
+            video_config=video_config,
+        )
+        for sc in pending
+    ]
+    try:
+        with bypass_gemini_cache(gemini_cache_bypassed(task.task_config)):
+            results = prompt_provider.generate_batch(requests)
+    except Exception:  # pragma: no cover - remote failure
+        logger.warning("Video prompt pre-generation failed for task %s", task.id, exc_info=True)
+        return 0
+
+    stored = 0
+    for scene, result in zip(pending, results):
+        prompt_text = (getattr(result, "prompt", None) or "").strip()
+        if not prompt_text:
+            continue
+        db.refresh(scene)
+        # A scene subtask may have generated its own prompt meanwhile.
+        if not _needs_video_prompt(scene, video_config):
+            continue
+        _store_video_prompt(
+            scene,
+            prompt_text,
+            prompt_provider_name,
+            getattr(result, "raw", None),
+            duration=_prompt_audio_duration(scene, video_config),
+        )
+        stored += 1
+    db.commit()
+    logger.info("Pre-generated %s/%s video prompts for task %s", stored, len(pending), task.id)
+    return stored
+
+
+def resolve_video_settings(task: Task) -> Dict[str, Any]:
+    """Video and prompt provider names of the video step (read only, JSON-safe)."""
+    provider_candidates = collect_provider_candidates(task)
+    try:
+        prompt_provider_name: Optional[str] = resolve_provider_name("video_prompt", provider_candidates)
+    except ValueError:
+        prompt_provider_name = None
+    return {
+        "provider": resolve_provider_name("video", provider_candidates),
+        "prompt_provider": prompt_provider_name,
+    }
+
+
+def record_video_settings(db: Session, task: Task, step: TaskStep) -> Dict[str, Any]:
+    """Resolve the video settings once per run and record them on the task/step.
+
+    Fan-out parents and the scene pipeline call this and hand the result to the
+    per-scene subtasks, so subtasks never rewrite providers/step.
+    """
+    settings = resolve_video_settings(task)
+    step.provider = settings["provider"]
+    providers_map = ensure_provider_map(task.providers)
+    if settings["prompt_provider"]:
+        providers_map["video_prompt"] = settings["prompt_provider"]
+    providers_map["video"] = settings["provider"]
+    task.providers = providers_map
+    db.commit()
+    return settings
+
+
+def prepare_video_context(
+    db: Session,
+    task: Task,
+    step: TaskStep,
+    settings: Optional[Dict[str, Any]] = None,
+) -> VideoStepContext:
+    """Build video/prompt providers and the storyboard context used for prompt generation.
+
+    Without ``settings`` they are resolved and recorded first (see ``record_video_settings``).
+    """
+    if settings is None:
+        settings = record_video_settings(db, task, step)
+    provider_name = settings["provider"]
+    provider = get_provider("video", provider_name, db)
+    prompt_provider = None
+    prompt_provider_name = settings.get("prompt_provider")
+    if prompt_provider_name:
+        try:
+            prompt_provider = get_provider("video_prompt", prompt_provider_name, db)
+        except ValueError:
+            prompt_provider_name = None
+
+    task_config = task.task_config or {}
+    if not isinstance(task_config, dict):
+        task_config = {}
+    video_config = _task_video_config(task)
+
+    style_meta = task_config.get("style_meta") if isinstance(task_config.get("style_meta"), dict) else {}
+    runninghub_meta = style_meta.get("runninghub") if isinstance(style_meta.get("runninghub"), dict) else {}
+    runninghub_video_workflow_id = runninghub_meta.get("video_workflow_config_id")
+
+    storyboard_context = build_storyboard_context(db, task)
+
+    interrupt_helper = StepInterruptController(
+        db=db,
+        step=step,
+        status_attr="video_status",
+        celery_id_attr="video_celery_id",
+        job_id_attr="video_job_id",
+        url_attr="raw_video_url",
+        extra_reset=lambda sc: setattr(sc, "video_meta", None),
+        interrupt_clear_attrs=("video_celery_id", "raw_video_url"),
+    )
+    return VideoStepContext(
+        task_id=task.id,
+        provider=provider,
+        provider_name=provider_name,
+        prompt_provider=prompt_provider,
+        prompt_provider_name=prompt_provider_name,
+        video_config=video_config,
+        runninghub_workflow_id=runninghub_video_workflow_id,
+        storyboard_context=storyboard_context,
+        interrupt_helper=interrupt_helper,
+        gemini_cache_bypassed=gemini_cache_bypassed(task_config),
+    )
+
+
+def process_video_scene(
+    db: Session,
+    ctx: VideoStepContext,
+    scene_pk: int,
+    *,
+    request_id: Optional[str] = None,
+    defer_on_slot_limit: bool = False,
+) -> str:
+    """Generate the (prompt and) video for one scene.
+
+    Returns one of "completed" | "queued" | "failed" | "skipped" | "interrupted".
+    Prompt generation problems raise ``RuntimeError`` like the serial loop always did.
+    With ``defer_on_slot_limit`` a full concurrency pool re-raises
+    :class:`ConcurrencyLimitException` and leaves the scene claimed for the retry.
+    """
+    interrupt_helper = ctx.interrupt_helper
+    scene = db.get(Scene, scene_pk)
+    if not scene:
+        return "skipped"
+
+    if scene.video_status == 2 and scene.raw_video_url:
+        return "skipped"
+
+    updated = False
+    if request_id and scene.video_celery_id != request_id:
+        scene.video_celery_id = request_id
+        updated = True
+
+    if scene.video_status != 1:
+        scene.video_status = 1
+        scene.error_msg = None
+        updated = True
+
+    if updated:
+        db.commit()
+        db.refresh(scene)
+
+    extra: Dict[str, Any] = {
+        "task_id": ctx.task_id,
+        "scene_seq": scene.seq,
+    }
+    if ctx.provider_name == "runninghub" and ctx.runninghub_workflow_id:
+        extra["runninghub_video_workflow_config_id"] = ctx.runninghub_workflow_id
+    if ctx.video_config.get("frame_rate") is not None:
+        try:
+            extra["frame_rate"] = int(ctx.video_config.get("frame_rate"))
+        except (TypeError, ValueError):
+            pass
+    if ctx.video_config.get("nca_options"):
+        extra["nca_options"] = ctx.video_config.get("nca_options")
+    if ctx.prompt_provider_name:
+        extra["video_prompt_provider"] = ctx.prompt_provider_name
+
+    duration_source, rounded_duration = _scene_video_duration(scene, ctx.video_config)
+    if duration_source is not None:
+        extra["audio_duration"] = duration_source
+    if rounded_duration is not None:
+        extra["duration"] = rounded_duration
+    audio_trim = _scene_audio_trim(scene)
+    if audio_trim is not None:
+        # 与合成阶段一致：使用音频的提供商需按该窗口截取，否则口型/节奏对不上裁剪后的时长
+        extra["audio_trim"] = audio_trim
+
+    requires_prompt = ctx.provider_name in PROMPTED_VIDEO_PROVIDERS
+    prompt_text = (scene.video_prompt or "").strip()
+
+    if requires_prompt:
+        # A prompt written for an earlier narration of another length is redone.
+        if not prompt_text or (ctx.prompt_provider and _video_prompt_stale(scene, ctx.video_config)):
+            if not ctx.prompt_provider:
+                raise RuntimeError("缺少 video_prompt 提供商，无法生成视频提示词")
+            if not (scene.narration_text or "").strip():
+                raise RuntimeError("分镜缺少旁白内容，无法生成视频提示词")
+
+            prompt_request = _video_prompt_request(
+                scene,
+                task_id=ctx.task_id,
+                video_provider_name=ctx.provider_name,
+                storyboard_context=ctx.storyboard_context,
+                video_config=ctx.video_config,
+            )
+            try:
+                with bypass_gemini_cache(ctx.gemini_cache_bypassed):
+                    prompt_result = ctx.prompt_provider.generate(prompt_request)
+            except Exception as prompt_exc:  # pragma: no cover - remote failure
+                raise RuntimeError(f"视频提示词生成失败: {prompt_exc}") from prompt_exc
+
+            prompt_text = (prompt_result.prompt or "").strip()
+            if not prompt_text:
+                raise RuntimeError("视频提示词服务返回空结果")
+
+            _store_video_prompt(
+                scene,
+                prompt_text,
+                ctx.prompt_provider_name,
+                getattr(prompt_result, "raw", None),
+                duration=_prompt_audio_duration(scene, ctx.video_config),
+            )
+            db.commit()
+            db.refresh(scene)
+
+    if prompt_text:
+        extra["prompt"] = prompt_text
+        extra["video_prompt"] = prompt_text
+
+    if interrupt_helper.should_abort():
+        return "interrupted"
+
+    try:
+        result = ctx.provider.generate(
+            MediaRequest(
+                prompt=prompt_text or None,
+                image_url=scene.image_url,
+                audio_url=scene.audio_url,
+                duration=rounded_duration,
+                extra=extra,
+            )
+        )
+    except Exception as exc:  # pragma: no cover - remote failure
+        if defer_on_slot_limit and isinstance(exc, ConcurrencyLimitException):
+            # The scene stays claimed under this request id; the retry resumes it.
+            raise
+        scene.video_status = 3
+        scene.video_provider = ctx.provider_name
+        scene.video_retry_count = (scene.video_retry_count or 0) + 1
+        scene.raw_video_url = None
+        scene.error_msg = str(exc)
+        db.commit()
+        return "failed"
+
+    scene.video_provider = ctx.provider_name
+    scene.video_job_id = getattr(result, "job_id", None)
+
+    if interrupt_helper.handle_interrupt_after_provider(scene):
+        db.commit()
+        logger.info("Scene %s marked interrupted after provider response", scene_pk)
+        return "interrupted"
+
+    merged_meta: Dict[str, Any] = {}
+    if isinstance(scene.video_meta, dict):
+        merged_meta.update(scene.video_meta)
+    if isinstance(result.meta, dict):
+        merged_meta.update(result.meta)
+    elif result.meta is not None:
+        merged_meta["provider_raw"] = result.meta
+
+    if result.status == "completed" and result.resource_url:
+        raw_video_url = result.resource_url
+        merged_meta["raw_video_url"] = raw_video_url
+        scene.raw_video_url = raw_video_url
+        scene.video_status = 2
+        scene.merge_status = 0
+        scene.merge_retry_count = 0
+        scene.merge_video_url = None
+        scene.merge_job_id = None
+        scene.merge_meta = None
+        scene.merge_video_provider = None
+        scene.error_msg = None
+    elif result.status == "queued":
+        scene.video_status = 1
+        scene.error_msg = None
+    else:
+        scene.video_status = 3
+        scene.error_msg = (result.meta or {}).get("error") if isinstance(result.meta, dict) else None
+        scene.video_retry_count = (scene.video_retry_count or 0) + 1
+        scene.raw_video_url = None
+
+    # clear video_celery_id for scenes that are no longer actively processing
+    if getattr(scene, 'video_celery_id', None) and scene.video_status != 1:
+        scene.video_celery_id = None
+
+    scene.video_meta = merged_meta if merged_meta else None
+    db.commit()
+    if scene.video_status == 2:
+        return "completed"
+    return "queued" if scene.video_status == 1 else "failed"
+
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def generate_video_task(self, task_id: int, scene_id: Optional[int] = None):
@@ -36,36 +697,10 @@ def generate_video_task(self, task_id: int, scene_id: Optional[int] = None):
         step.status = 1
         db.commit()
 
-        provider_candidates = collect_provider_candidates(task)
-        provider, provider_name = resolve_task_provider("video", provider_candidates, db)
-        step.provider = provider_name
-        db.commit()
-
-        try:
-            prompt_provider, prompt_provider_name = resolve_task_provider(
-                "video_prompt", provider_candidates, db
-            )
-        except ValueError:
-            prompt_provider = None
-            prompt_provider_name = None
-
-        providers_map = ensure_provider_map(task.providers)
-        if prompt_provider_name:
-            providers_map["video_prompt"] = prompt_provider_name
-        providers_map["video"] = provider_name
-        task.providers = providers_map
-        db.commit()
-
-        task_config = task.task_config or {}
-        if not isinstance(task_config, dict):
-            task_config = {}
-        video_config: Dict[str, Any] = {}
-        if isinstance(task_config.get("video"), dict):
-            video_config = task_config.get("video") or {}
-
-        style_meta = task_config.get("style_meta") if isinstance(task_config.get("style_meta"), dict) else {}
-        runninghub_meta = style_meta.get("runninghub") if isinstance(style_meta.get("runninghub"), dict) else {}
-        runninghub_video_workflow_id = runninghub_meta.get("video_workflow_config_id")
+        video_settings = record_video_settings(db, task, step)
+        ctx = prepare_video_context(db, task, step, video_settings)
+        provider_name = ctx.provider_name
+        prompt_provider_name = ctx.prompt_provider_name
 
         scenes = (
             db.query(Scene)
@@ -80,16 +715,7 @@ def generate_video_task(self, task_id: int, scene_id: Optional[int] = None):
             if not target_scenes:
                 return {"error": f"scene {scene_id} not found"}
 
-        interrupt_helper = StepInterruptController(
-            db=db,
-            step=step,
-            status_attr="video_status",
-            celery_id_attr="video_celery_id",
-            job_id_attr="video_job_id",
-            url_attr="raw_video_url",
-            extra_reset=lambda sc: setattr(sc, "video_meta", None),
-            interrupt_clear_attrs=("video_celery_id", "raw_video_url"),
-        )
+        interrupt_helper = ctx.interrupt_helper
 
         reset_count = interrupt_helper.reset_interrupted(target_scenes)
         if reset_count:
@@ -98,23 +724,32 @@ def generate_video_task(self, task_id: int, scene_id: Optional[int] = None):
         step = interrupt_helper.step
         scene_ids = [sc.id for sc in target_scenes]
 
-        task_params = task.params if isinstance(task.params, dict) else {}
-        storyboard_context = json.dumps(
-            {
-                "task_id": task.id,
-                "description": task_params.get("description"),
-                "reference_video": task_params.get("reference_video"),
-                "scenes": [
-                    {
-                        "scene_number": sc.seq,
-                        "narration": sc.narration_text,
-                        "image_prompt": sc.image_prompt,
-                    }
-                    for sc in scenes
-                ],
-            },
-            ensure_ascii=False,
-        )
+        task_mode = getattr(task, "mode", None) or (task.task_config or {}).get("mode")
+        if not task_mode:
+            raise RuntimeError("任务未配置执行模式")
+
+        if len(scene_ids) > 1:
+            # 一次批量请求生成所有缺失（或按旧时长生成）的视频提示词，后续提交无需逐个等待 Gemini；
+            # 分镜阶段的预生成仍在进行时先等它完成，再补齐剩余分镜
+            pregenerate_video_prompts(
+                db,
+                task,
+                video_provider_name=provider_name,
+                prompt_provider=ctx.prompt_provider,
+                prompt_provider_name=prompt_provider_name,
+                scene_ids=scene_ids,
+                storyboard_context=ctx.storyboard_context,
+                wait_for_claim=_PROMPT_CLAIM_WAIT_SECONDS,
+            )
+
+        if scene_id is None and scene_fanout_enabled(task.task_config, len(scene_ids)):
+            header = group(
+                generate_video_scene_task.s(task_id, scene_pk, video_settings=video_settings)
+                for scene_pk in scene_ids
+            )
+            chord(header)(summarize_videos_task.s(task_id))
+            logger.info("Dispatched %s video scene subtasks for task %s", len(scene_ids), task_id)
+            return {"videos": len(scene_ids), "fanout": True}
 
         try:
             current_task_id = str(getattr(self.request, "id", ""))
@@ -127,251 +762,22 @@ def generate_video_task(self, task_id: int, scene_id: Optional[int] = None):
                 self.get_logger().info("Video step interrupted, aborting remaining scenes")
                 break
 
+            outcome = process_video_scene(db, ctx, scene_pk, request_id=current_task_id)
             step = interrupt_helper.step
-
-            scene = db.get(Scene, scene_pk)
-            if not scene:
-                continue
-
-            if scene.video_status == 2 and scene.raw_video_url:
-                continue
-
-            updated = False
-            if current_task_id and scene.video_celery_id != current_task_id:
-                scene.video_celery_id = current_task_id
-                updated = True
-
-            if scene.video_status != 1:
-                scene.video_status = 1
-                scene.error_msg = None
-                updated = True
-
-            if updated:
-                db.commit()
-                db.refresh(scene)
-
-            extra: Dict[str, Any] = {
-                "task_id": task.id,
-                "scene_seq": scene.seq,
-            }
-            if provider_name == "runninghub" and runninghub_video_workflow_id:
-                extra["runninghub_video_workflow_config_id"] = runninghub_video_workflow_id
-            if video_config.get("frame_rate") is not None:
-                try:
-                    extra["frame_rate"] = int(video_config.get("frame_rate"))
-                except (TypeError, ValueError):
-                    pass
-            if video_config.get("nca_options"):
-                extra["nca_options"] = video_config.get("nca_options")
-            if prompt_provider_name:
-                extra["video_prompt_provider"] = prompt_provider_name
-
-            duration_source: Optional[float] = None
-            if getattr(scene, "audio_duration", None) is not None:
-                try:
-                    duration_source = float(scene.audio_duration) if scene.audio_duration is not None else None
-                except (TypeError, ValueError):
-                    duration_source = None
-
-            if duration_source is None:
-                raw_config_duration = video_config.get("duration")
-                try:
-                    duration_source = (
-                        float(raw_config_duration)
-                        if raw_config_duration is not None
-                        else None
-                    )
-                except (TypeError, ValueError):
-                    duration_source = None
-
-            rounded_duration: Optional[int] = None
-            if duration_source is not None:
-                if duration_source < 0:
-                    duration_source = 0.0
-                rounded_duration = int(round(duration_source))
-                if rounded_duration <= 0 and duration_source > 0:
-                    rounded_duration = 1
-
-            if duration_source is not None:
-                extra["audio_duration"] = duration_source
-            if rounded_duration is not None:
-                extra["duration"] = rounded_duration
-
-            requires_prompt = provider_name in {"fal", "runninghub"}
-            prompt_text = (scene.video_prompt or "").strip()
-
-            if requires_prompt:
-                if not prompt_text:
-                    if not prompt_provider:
-                        raise RuntimeError("缺少 video_prompt 提供商，无法生成视频提示词")
-                    if not (scene.narration_text or "").strip():
-                        raise RuntimeError("分镜缺少旁白内容，无法生成视频提示词")
-
-                    prompt_request = VideoPromptRequest(
-                        scene_seq=scene.seq,
-                        narration=scene.narration_text or "",
-                        image_prompt=scene.image_prompt,
-                        image_url=scene.image_url,
-                        storyboard_context=storyboard_context,
-                        extra={
-                            "task_id": task.id,
-                            "video_provider": provider_name,
-                            "target_provider": provider_name,
-                            "duration": rounded_duration if rounded_duration is not None else None,
-                            "audio_duration": duration_source,
-                        },
-                    )
-                    try:
-                        prompt_result = prompt_provider.generate(prompt_request)
-                    except Exception as prompt_exc:  # pragma: no cover - remote failure
-                        raise RuntimeError(f"视频提示词生成失败: {prompt_exc}") from prompt_exc
-
-                    prompt_text = (prompt_result.prompt or "").strip()
-                    if not prompt_text:
-                        raise RuntimeError("视频提示词服务返回空结果")
-
-                    scene.video_prompt = prompt_text
-                    existing_meta = scene.video_meta if isinstance(scene.video_meta, dict) else {}
-                    prompt_meta = dict(existing_meta) if isinstance(existing_meta, dict) else {}
-                    prompt_meta["prompt"] = prompt_text
-                    if prompt_provider_name:
-                        prompt_meta["video_prompt_provider"] = prompt_provider_name
-                    raw_payload = getattr(prompt_result, "raw", None)
-                    if raw_payload is not None:
-                        prompt_meta["prompt_raw"] = raw_payload
-                    scene.video_meta = prompt_meta
-                    db.commit()
-                    db.refresh(scene)
-
-            if prompt_text:
-                extra["prompt"] = prompt_text
-                extra["video_prompt"] = prompt_text
-
-            if interrupt_helper.should_abort():
-                step = interrupt_helper.step
-                continue
-
-            try:
-                result = provider.generate(
-                    MediaRequest(
-                        prompt=prompt_text or None,
-                        image_url=scene.image_url,
-                        audio_url=scene.audio_url,
-                        duration=rounded_duration,
-                        extra=extra,
-                    )
-                )
-            except Exception as exc:  # pragma: no cover - remote failure
-                scene.video_status = 3
-                scene.video_provider = provider_name
-                scene.video_retry_count = (scene.video_retry_count or 0) + 1
-                scene.raw_video_url = None
-                scene.error_msg = str(exc)
-                db.commit()
-                continue
-
-            scene.video_provider = provider_name
-            scene.video_job_id = getattr(result, "job_id", None)
-
-            if interrupt_helper.handle_interrupt_after_provider(scene):
-                db.commit()
-                step = interrupt_helper.step
-                self.get_logger().info("Scene %s marked interrupted after provider response", scene_pk)
+            if outcome == "interrupted":
                 break
 
-            merged_meta: Dict[str, Any] = {}
-            if isinstance(scene.video_meta, dict):
-                merged_meta.update(scene.video_meta)
-            if isinstance(result.meta, dict):
-                merged_meta.update(result.meta)
-            elif result.meta is not None:
-                merged_meta["provider_raw"] = result.meta
-
-            if result.status == "completed" and result.resource_url:
-                raw_video_url = result.resource_url
-                merged_meta["raw_video_url"] = raw_video_url
-                scene.raw_video_url = raw_video_url
-                scene.video_status = 2
-                scene.merge_status = 0
-                scene.merge_retry_count = 0
-                scene.merge_video_url = None
-                scene.merge_job_id = None
-                scene.merge_meta = None
-                scene.merge_video_provider = None
-                scene.error_msg = None
-            elif result.status == "queued":
-                scene.video_status = 1
-                scene.error_msg = None
-            else:
-                scene.video_status = 3
-                scene.error_msg = (result.meta or {}).get("error") if isinstance(result.meta, dict) else None
-                scene.video_retry_count = (scene.video_retry_count or 0) + 1
-                scene.raw_video_url = None
-
-            # clear video_celery_id for scenes that are no longer actively processing
-            if getattr(scene, 'video_celery_id', None) and scene.video_status != 1:
-                scene.video_celery_id = None
-
-            scene.video_meta = merged_meta if merged_meta else None
-            db.commit()
-
-        scenes = (
-            db.query(Scene)
-            .filter(Scene.task_id == task_id)
-            .order_by(Scene.seq.asc())
-            .all()
-        )
-
-        overall_completed, overall_queued, overall_failed, pending_count = summarize_status_counts(
-            scenes,
-            status_attr="video_status",
+        step = summarize_video_step(
+            db,
+            task,
+            interrupt_helper.step,
+            provider_name,
+            prompt_provider_name=prompt_provider_name,
         )
 
-        step = interrupt_helper.step
-        step.result = {
-            "provider": provider_name,
-            "video_prompt_provider": prompt_provider_name,
-            "completed": overall_completed,
-            "queued": overall_queued,
-            "failed": overall_failed,
-        }
-
-        total_scenes = len(scenes)
-        if total_scenes:
-            step.progress = int(overall_completed / total_scenes * 100)
-        else:
-            step.progress = 100
-
-        if step.status != 6:
-            step.error_msg = None
-            if overall_failed == total_scenes and total_scenes > 0:
-                step.status = 3
-                step.error_msg = "视频生成全部失败"
-                step.progress = 0
-            elif overall_failed > 0 and overall_completed > 0:
-                step.status = 6
-                step.error_msg = "部分视频生成失败"
-            elif overall_queued > 0 or pending_count > 0:
-                step.status = 1
-            else:
-                step.status = 2
-
-        db.commit()
-
-        task_mode = getattr(task, "mode", None) or (task.task_config or {}).get("mode")
-        if not task_mode:
-            raise RuntimeError("任务未配置执行模式")
         # Only auto-continue when the step is fully completed (status == 2). Do NOT continue on INTERRUPTED (6).
-        if scene_id is None and task_mode == "auto" and step.status == 2:
-            try:
-                celery_app.send_task(
-                    "app.tasks.scene_merge_task.merge_scene_media_task",
-                    args=[task.id],
-                    queue="default",
-                    serializer="json",
-                )
-            except Exception:
-                pass
+        if scene_id is None:
+            enqueue_next_step(task, step)
 
         return {"videos": len(target_scenes)}
     except Exception as e:
@@ -384,11 +790,11 @@ def generate_video_task(self, task_id: int, scene_id: Optional[int] = None):
         # Mark any scenes that were still 'processing' as failed so the UI/db
         # does not leave them stuck in state=1 after the task ultimately fails.
         try:
-            in_progress_scenes = (
-                db.query(Scene)
-                .filter(Scene.task_id == task_id, Scene.video_status == 1)
-                .all()
-            )
+            in_progress_query = db.query(Scene).filter(Scene.task_id == task_id, Scene.video_status == 1)
+            if scene_id is not None:
+                # Other scenes may be in flight in their own subtasks; only touch ours.
+                in_progress_query = in_progress_query.filter(Scene.id == scene_id)
+            in_progress_scenes = in_progress_query.all()
             for sc in in_progress_scenes:
                 sc.video_status = 3
                 # Only set/overwrite error_msg if empty to avoid destroying prior details.
@@ -418,3 +824,169 @@ def generate_video_task(self, task_id: int, scene_id: Optional[int] = None):
         raise self.retry(exc=e)
     finally:
         db.close()
+
+
+@shared_task(bind=True)
+def generate_video_prompts_task(self, task_id: int):
+    """分镜完成后预生成全部视频提示词（批量，尽力而为）"""
+    db: Session = get_db_session()
+    try:
+        task = db.get(Task, task_id)
+        if not task or task.is_deleted:
+            return {"error": "任务不存在"}
+        provider_candidates = collect_provider_candidates(task)
+        video_provider_name = provider_candidates.get("video") or DEFAULT_PROVIDERS.get("video") or ""
+        if video_provider_name not in PROMPTED_VIDEO_PROVIDERS:
+            return {"prompts": 0, "skipped": "video provider does not use prompts"}
+        try:
+            prompt_provider, prompt_provider_name = resolve_task_provider(
+                "video_prompt", provider_candidates, db
+            )
+        except ValueError:
+            return {"prompts": 0, "skipped": "no video_prompt provider"}
+        stored = pregenerate_video_prompts(
+            db,
+            task,
+            video_provider_name=video_provider_name,
+            prompt_provider=prompt_provider,
+            prompt_provider_name=prompt_provider_name,
+        )
+        return {"prompts": stored}
+    except Exception:
+        try:
+            db.rollback()
+        except Exception:
+            pass
+        # 预生成失败不影响视频步骤：提交时会逐个补齐
+        logger.warning("Video prompt pre-generation task failed for task %s", task_id, exc_info=True)
+        return {"prompts": 0, "error": "pre-generation failed"}
+    finally:
+        db.close()
+
+
+def enqueue_video_prompt_pregeneration(task: Task) -> None:
+    """Queue prompt pre-generation for an auto-mode task whose storyboard just landed."""
+    task_mode = getattr(task, "mode", None) or (task.task_config or {}).get("mode")
+    if task_mode != "auto":
+        return
+    try:
+        celery_app.send_task(
+            "app.tasks.video_task.generate_video_prompts_task",
+            args=[task.id],
+            serializer="json",
+        )
+    except Exception:
+        logger.debug("Failed to enqueue video prompt pre-generation for task %s", task.id, exc_info=True)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def generate_video_scene_task(
+    self,
+    task_id: int,
+    scene_id: int,
+    video_settings: Optional[Dict[str, Any]] = None,
+):
+    """单场景视频生成（chord 子任务）
+
+    Never fails the chord: scene errors are recorded on the scene and returned as an
+    outcome. Only a full concurrency pool retries the subtask, and only until
+    ``scene_fanout_max_retries``; after that the scene is failed. ``video_settings``
+    comes from ``record_video_settings`` in the dispatcher.
+    """
+    db: Session = get_db_session()
+    try:
+        task = db.get(Task, task_id)
+        if not task or task.is_deleted:
+            return {"scene_id": scene_id, "outcome": "skipped"}
+        step = (
+            db.query(TaskStep)
+            .filter(TaskStep.task_id == task_id, TaskStep.step_name == "generate_videos")
+            .first()
+        )
+        if not step:
+            return {"scene_id": scene_id, "outcome": "skipped"}
+
+        ctx = prepare_video_context(db, task, step, video_settings or resolve_video_settings(task))
+        if ctx.interrupt_helper.should_abort():
+            return {"scene_id": scene_id, "outcome": "interrupted"}
+
+        outcome = process_video_scene(
+            db,
+            ctx,
+            scene_id,
+            request_id=str(self.request.id),
+            defer_on_slot_limit=True,
+        )
+        return {"scene_id": scene_id, "outcome": outcome}
+    except ConcurrencyLimitException as exc:
+        max_retries = scene_fanout_max_retries(exc)
+        if self.request.retries < max_retries:
+            raise self.retry(exc=exc, countdown=scene_fanout_retry_seconds(), max_retries=max_retries)
+        logger.warning("Video scene %s of task %s gave up waiting for a concurrency slot", scene_id, task_id)
+        fail_waiting_scene(db, scene_id, "video", str(exc))
+        return {"scene_id": scene_id, "outcome": "failed", "error": str(exc)}
+    except Exception as exc:
+        try:
+            db.rollback()
+        except Exception:
+            pass
+        logger.exception("Video scene subtask failed for task %s scene %s", task_id, scene_id)
+        try:
+            scene = db.get(Scene, scene_id)
+            if scene and scene.video_status == 1:
+                scene.video_status = 3
+                if not (scene.error_msg or "").strip():
+                    scene.error_msg = str(exc)
+                scene.video_celery_id = None
+                scene.finished_at = naive_now()
+                db.commit()
+        except Exception:
+            try:
+                db.rollback()
+            except Exception:
+                pass
+        return {"scene_id": scene_id, "outcome": "failed", "error": str(exc)}
+    finally:
+        db.close()
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def summarize_videos_task(self, results: List[Any], task_id: int):
+    """chord 回调：汇总视频步骤状态并推进下一步"""
+    db: Session = get_db_session()
+    try:
+        task = db.get(Task, task_id)
+        if not task or task.is_deleted:
+            return {"error": "任务不存在"}
+        step = (
+            db.query(TaskStep)
+            .filter(TaskStep.task_id == task_id, TaskStep.step_name == "generate_videos")
+            .first()
+        )
+        if not step:
+            return {"error": "视频生成步骤不存在"}
+
+        providers_map = ensure_provider_map(task.providers)
+        step = summarize_video_step(
+            db,
+            task,
+            step,
+            step.provider,
+            prompt_provider_name=providers_map.get("video_prompt"),
+        )
+        enqueue_next_step(task, step)
+
+        outcomes = Counter(
+            item.get("outcome", "unknown") if isinstance(item, dict) else "unknown"
+            for item in (results or [])
+        )
+        logger.info("Video fan-out finished for task %s: %s", task_id, dict(outcomes))
+        return {"videos": len(results or []), "outcomes": dict(outcomes)}
+    except Exception as e:
+        try:
+            db.rollback()
+        except Exception:
+            pass
+        raise self.retry(exc=e)
+    finally:
+        db.close()
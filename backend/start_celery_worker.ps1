@@ -1,12 +1,73 @@
+# Worker groups (see WORKER_GROUPS in src/app/celery_app.py):
+#   provider-io    threads pool, many slots (Gemini / RunningHub / FishAudio calls)
+#   media-cpu      FFmpeg composition (solo pool on Windows; start one per core if needed)
+#   transcription  single process with a preloaded faster-whisper model
+#   all            launch the three groups above in separate windows
+# Without -Group a single worker consumes every queue (development default).
 param(
-    [int]$Concurrency = 4,
-    [string]$Queue = "default",
+    [int]$Concurrency = 0,
+    [string]$Queue = "",
     [ValidateSet("info","debug","warning","error","critical")]
     [string]$LogLevel = "debug",
-    [string]$Pool = "threads",
-    [string]$VirtualEnv = ".venv"
+    [string]$Pool = "",
+    [string]$VirtualEnv = ".venv",
+    [ValidateSet("", "provider-io", "media-cpu", "transcription", "all")]
+    [string]$Group = "",
+    [switch]$Transcription
 )
 
+if ($Transcription) {
+    $Group = "transcription"
+}
+
+if ($Group -eq "all") {
+    foreach ($workerGroup in @("provider-io", "media-cpu", "transcription")) {
+        Start-Process powershell -ArgumentList @(
+            "-NoExit", "-File", $PSCommandPath,
+            "-Group", $workerGroup,
+            "-LogLevel", $LogLevel,
+            "-VirtualEnv", $VirtualEnv
+        )
+    }
+    exit 0
+}
+
+$providerIoQueue = if ($env:CELERY_PROVIDER_IO_QUEUE) { $env:CELERY_PROVIDER_IO_QUEUE } else { "provider-io" }
+$mediaCpuQueue = if ($env:CELERY_MEDIA_CPU_QUEUE) { $env:CELERY_MEDIA_CPU_QUEUE } else { "media-cpu" }
+$transcriptionQueue = if ($env:TRANSCRIPTION_QUEUE) { $env:TRANSCRIPTION_QUEUE } else { "transcription" }
+$prefetch = 0
+
+switch ($Group) {
+    "provider-io" {
+        if (-not $Queue) { $Queue = $providerIoQueue }
+        if (-not $Pool) { $Pool = "threads" }
+        if ($Concurrency -le 0) { $Concurrency = 16 }
+        $prefetch = 4
+    }
+    "media-cpu" {
+        if (-not $Queue) { $Queue = $mediaCpuQueue }
+        # Prefork is unreliable on Windows; run the solo pool one job at a time.
+        if (-not $Pool) { $Pool = "solo" }
+        if ($Concurrency -le 0) { $Concurrency = 1 }
+        $prefetch = 1
+    }
+    "transcription" {
+        # Dedicated CPU transcription worker: one process, model preloaded, batched int8 engine.
+        if (-not $Queue) { $Queue = $transcriptionQueue }
+        if (-not $Pool) { $Pool = "threads" }
+        if ($Concurrency -le 0) { $Concurrency = 1 }
+        $prefetch = 1
+        if (-not $env:FASTER_WHISPER_ENGINE) { $env:FASTER_WHISPER_ENGINE = "cpu_batched" }
+        if (-not $env:FASTER_WHISPER_PRELOAD) { $env:FASTER_WHISPER_PRELOAD = "true" }
+    }
+    default {
+        if (-not $Queue) { $Queue = "default,$providerIoQueue,$mediaCpuQueue,$transcriptionQueue" }
+    }
+}
+
+if (-not $Pool) { $Pool = "threads" }
+if ($Concurrency -le 0) { $Concurrency = 4 }
+
 $scriptRoot = Split-Path -Parent $MyInvocation.MyCommand.Path
 $backendSrc = Join-Path $scriptRoot "src"
 
@@ -95,8 +156,14 @@ $celeryArgs = @(
     "--loglevel", $LogLevel,
     "-Q", $Queue
 )
+if ($Group) {
+    $celeryArgs += @("-n", "$Group@%h")
+}
+if ($prefetch -gt 0) {
+    $celeryArgs += @("--prefetch-multiplier", $prefetch)
+}
 
-Write-Host "Starting Celery worker..." -ForegroundColor Cyan
+Write-Host "Starting Celery worker $Group..." -ForegroundColor Cyan
 Write-Host "  Pool:        $Pool" -ForegroundColor DarkGray
 Write-Host "  Concurrency: $Concurrency" -ForegroundColor DarkGray
 Write-Host "  Queue:       $Queue" -ForegroundColor DarkGray
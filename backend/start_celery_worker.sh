@@ -1,13 +1,25 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-CONCURRENCY=4
-QUEUE="default"
+# Worker groups (see WORKER_GROUPS in src/app/celery_app.py):
+#   provider-io    threads pool, many slots (Gemini / RunningHub / FishAudio calls)
+#   media-cpu      prefork pool sized to the CPU cores (FFmpeg composition)
+#   transcription  single process with a preloaded faster-whisper model
+#   all            launch the three groups above as separate workers
+# Without --group a single worker consumes every queue (development default).
+GROUP=""
+CONCURRENCY=""
+QUEUE=""
 LOG_LEVEL="debug"
-POOL="threads"
+POOL=""
+PREFETCH=""
 VENV=".venv"
 EXTRA_ARGS=()
 
+PROVIDER_IO_QUEUE="${CELERY_PROVIDER_IO_QUEUE:-provider-io}"
+MEDIA_CPU_QUEUE="${CELERY_MEDIA_CPU_QUEUE:-media-cpu}"
+TRANSCRIPTION_QUEUE_NAME="${TRANSCRIPTION_QUEUE:-transcription}"
+
 while [[ $# -gt 0 ]]; do
     case "$1" in
         --concurrency)
@@ -30,6 +42,14 @@ while [[ $# -gt 0 ]]; do
             VENV="$2"
             shift 2
             ;;
+        --group)
+            GROUP="$2"
+            shift 2
+            ;;
+        --transcription)
+            GROUP="transcription"
+            shift
+            ;;
         --)
             shift
             EXTRA_ARGS+=("$@")
@@ -43,6 +63,52 @@ while [[ $# -gt 0 ]]; do
 done
 
 SCRIPT_DIR=$(cd -- "$(dirname "${BASH_SOURCE[0]}")" && pwd)
+
+if [[ "$GROUP" == "all" ]]; then
+    PIDS=()
+    for group in provider-io media-cpu transcription; do
+        "$SCRIPT_DIR/$(basename "${BASH_SOURCE[0]}")" --group "$group" --log-level "$LOG_LEVEL" --venv "$VENV" \
+            ${EXTRA_ARGS[@]+"${EXTRA_ARGS[@]}"} &
+        PIDS+=("$!")
+    done
+    trap 'kill "${PIDS[@]}" 2>/dev/null || true' INT TERM
+    wait
+    exit $?
+fi
+
+case "$GROUP" in
+    "")
+        QUEUE="${QUEUE:-default,$PROVIDER_IO_QUEUE,$MEDIA_CPU_QUEUE,$TRANSCRIPTION_QUEUE_NAME}"
+        ;;
+    provider-io)
+        QUEUE="${QUEUE:-$PROVIDER_IO_QUEUE}"
+        POOL="${POOL:-threads}"
+        CONCURRENCY="${CONCURRENCY:-16}"
+        PREFETCH="${PREFETCH:-4}"
+        ;;
+    media-cpu)
+        QUEUE="${QUEUE:-$MEDIA_CPU_QUEUE}"
+        POOL="${POOL:-prefork}"
+        CONCURRENCY="${CONCURRENCY:-$(nproc 2>/dev/null || getconf _NPROCESSORS_ONLN 2>/dev/null || echo 2)}"
+        PREFETCH="${PREFETCH:-1}"
+        ;;
+    transcription)
+        # Dedicated CPU transcription worker: one process, model preloaded, batched int8 engine.
+        QUEUE="${QUEUE:-$TRANSCRIPTION_QUEUE_NAME}"
+        POOL="${POOL:-threads}"
+        CONCURRENCY="${CONCURRENCY:-1}"
+        PREFETCH="${PREFETCH:-1}"
+        export FASTER_WHISPER_ENGINE="${FASTER_WHISPER_ENGINE:-cpu_batched}"
+        export FASTER_WHISPER_PRELOAD="${FASTER_WHISPER_PRELOAD:-true}"
+        ;;
+    *)
+        echo "[ERROR] Unknown worker group: $GROUP (expected provider-io, media-cpu, transcription or all)" >&2
+        exit 1
+        ;;
+esac
+
+CONCURRENCY="${CONCURRENCY:-4}"
+POOL="${POOL:-threads}"
 BACKEND_SRC="$SCRIPT_DIR/src"
 
 if [[ -n "$VENV" ]]; then
@@ -68,11 +134,18 @@ fi
 
 CELERY_ARGS=("-m" "celery" "-A" "app.celery_app.celery_app" "worker" "--pool" "$POOL" "--concurrency" "$CONCURRENCY" "--loglevel" "$LOG_LEVEL" "-Q" "$QUEUE")
 
+if [[ -n "$GROUP" ]]; then
+    CELERY_ARGS+=("-n" "$GROUP@%h")
+fi
+if [[ -n "$PREFETCH" ]]; then
+    CELERY_ARGS+=("--prefetch-multiplier" "$PREFETCH")
+fi
+
 if [[ ${#EXTRA_ARGS[@]} -gt 0 ]]; then
     CELERY_ARGS+=("${EXTRA_ARGS[@]}")
 fi
 
-echo "[INFO] Starting Celery worker"
+echo "[INFO] Starting Celery worker${GROUP:+ ($GROUP)}"
 echo "       Pool:        $POOL"
 echo "       Concurrency: $CONCURRENCY"
 echo "       Queue:       $QUEUE"
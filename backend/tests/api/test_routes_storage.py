@@ -0,0 +1,131 @@
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config.settings import get_settings
+
+get_settings.cache_clear()
+
+from app.api import routes_storage
+from app.services.storage_backends import ObjectHead, ObjectReadThroughCache
+
+
+def _client(tmp_path, monkeypatch) -> TestClient:
+    monkeypatch.setattr(routes_storage, "_BASE_STORAGE_PATH", tmp_path.resolve())
+    app = FastAPI()
+    app.include_router(routes_storage.router)
+    return TestClient(app)
+
+
+def test_range_and_conditional_requests(tmp_path, monkeypatch):
+    video_dir = tmp_path / "video"
+    video_dir.mkdir()
+    (video_dir / "final_7_1700000000000.mp4").write_bytes(bytes(range(256)) * 4)
+    client = _client(tmp_path, monkeypatch)
+    url = "/api/v1/storage/video/final_7_1700000000000.mp4"
+
+    full = client.get(url)
+    assert full.status_code == 200
+    assert "immutable" in full.headers["cache-control"]
+    etag = full.headers["etag"]
+
+    partial = client.get(url, headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == bytes(range(10, 20))
+    assert partial.headers["content-range"] == "bytes 10-19/1024"
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": full.headers["last-modified"]}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_mutable_names_revalidate_and_accel_mode(tmp_path, monkeypatch):
+    (tmp_path / "audio").mkdir()
+    (tmp_path / "audio" / "12_3.mp3").write_bytes(b"id3")
+    client = _client(tmp_path, monkeypatch)
+
+    response = client.get("/api/v1/storage/audio/12_3.mp3")
+    assert response.headers["cache-control"] == "no-cache"
+
+    monkeypatch.setattr(routes_storage, "_ACCEL_MODE", "x-accel")
+    accel = client.get("/api/v1/storage/audio/12_3.mp3")
+    assert accel.headers["x-accel-redirect"] == "/_storage/audio/12_3.mp3"
+    assert accel.content == b""
+    assert client.get("/api/v1/storage/audio/missing.mp3").status_code == 404
+
+
+def test_resized_derivative_is_rendered_once(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from io import BytesIO
+
+    from PIL import Image
+
+    from app.services.media_derivatives import MediaDerivativeCache
+
+    (tmp_path / "images").mkdir()
+    Image.new("RGB", (864, 1536), (200, 40, 40)).save(tmp_path / "images" / "scene.png")
+    cache = MediaDerivativeCache(tmp_path / "tmp" / "derivatives", max_bytes=10 * 1024 ** 2, max_width=1920)
+    monkeypatch.setattr(routes_storage, "get_media_derivative_cache", lambda: cache)
+    client = _client(tmp_path, monkeypatch)
+    url = "/api/v1/storage/images/scene.png?w=320"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda _: client.get(url), range(4)))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert Image.open(BytesIO(responses[0].content)).size == (320, 569)
+    assert cache.stats()["misses"] == 1
+    assert client.get(url, headers={"If-None-Match": responses[0].headers["etag"]}).status_code == 304
+    assert client.get("/api/v1/storage/images/scene.png?poster=1").status_code == 415
+
+
+class _Bucket:
+    remote = True
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.downloads = 0
+
+    def head(self, key):
+        data = self.objects.get(key)
+        if data is None:
+            return None
+        return ObjectHead(etag=f'"{len(data)}-{data[:4].hex()}"', size=len(data), last_modified=1_700_000_000.0)
+
+    def download_file(self, key, target, *, etag=None):
+        self.downloads += 1
+        target.write_bytes(self.objects[key])
+        return len(self.objects[key])
+
+
+def test_read_through_validators_come_from_the_object(tmp_path, monkeypatch):
+    bucket = _Bucket({"audio/7_1.mp3": bytes(range(200))})
+    monkeypatch.setattr(routes_storage, "get_storage_backend", lambda: bucket)
+    responses = []
+    for node in ("a", "b"):
+        base = tmp_path / node
+        cache = ObjectReadThroughCache(base / "tmp" / "object-cache", max_bytes=1024 ** 2)
+        monkeypatch.setattr(routes_storage, "get_object_read_cache", lambda cache=cache: cache)
+        responses.append(_client(base, monkeypatch).get("/api/v1/storage/audio/7_1.mp3"))
+        if node == "a":
+            # Node b copies the object later, so its local mtime differs.
+            os.utime(next((base / "tmp" / "object-cache").glob("*.mp3")), (1, 1))
+
+    first, second = responses
+    assert first.content == second.content == bytes(range(200))
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.headers["last-modified"] == second.headers["last-modified"]
+
+    client = _client(tmp_path / "b", monkeypatch)
+    url = "/api/v1/storage/audio/7_1.mp3"
+    resumed = client.get(url, headers={"Range": "bytes=0-9", "If-Range": first.headers["etag"]})
+    assert resumed.status_code == 206 and resumed.content == bytes(range(10))
+    downloads = bucket.downloads
+    assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert bucket.downloads == downloads
+
+    # Republished elsewhere under the same key: the old validators no longer match.
+    bucket.objects["audio/7_1.mp3"] = b"ID3 new take"
+    fresh = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+    assert fresh.status_code == 200 and fresh.content == b"ID3 new take"
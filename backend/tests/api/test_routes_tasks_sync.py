@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.config.settings import get_settings
+
+get_settings.cache_clear()
+
+from app.api import routes_tasks
+from app.database import get_db
+from app.models import Scene, Task
+from app.utils.timezone import naive_now
+
+
+@pytest.fixture
+def api(sqlite_session_factory, sqlite_session):
+    db = sqlite_session
+    task = Task(workflow_type="story")
+    db.add(task)
+    db.flush()
+    for seq in (1, 2):
+        db.add(Scene(task_id=task.id, seq=seq, image_meta={"polled_payload": "x" * 1000}))
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(routes_tasks.router)
+
+    def override_db():
+        session = sqlite_session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_db
+    return TestClient(app), db, task.id
+
+
+def test_detail_etag_projection_and_delta(api):
+    client, db, task_id = api
+    url = f"/api/v1/tasks/{task_id}"
+
+    full = client.get(url)
+    assert full.status_code == 200
+    assert "image_meta" in full.json()["scenes"][0]
+    assert client.get(url, headers={"If-None-Match": full.headers["etag"]}).status_code == 304
+
+    sparse = client.get(url, params={"fields": "image_status,image_url"}).json()
+    assert set(sparse["scenes"][0]) == {"id", "task_id", "seq", "status", "image_status", "image_url"}
+    assert client.get(url, params={"fields": "bogus"}).status_code == 400
+
+    cursor = sparse["synced_at"]
+    first, second = db.query(Scene).order_by(Scene.seq).all()
+    later = naive_now() + timedelta(seconds=5)
+    db.execute(update(Scene).where(Scene.id == second.id).values(image_status=2, updated_at=later))
+    db.execute(update(Scene).where(Scene.id == first.id).values(updated_at=later - timedelta(days=1)))
+    db.commit()
+
+    delta = client.get(url, params={"updated_since": cursor, "fields": "image_status"}).json()
+    assert [scene["id"] for scene in delta["scenes"]] == [second.id]
+    assert delta["scenes"][0]["image_status"] == 2
+    assert delta["scene_ids"] == [first.id, second.id]
+
+
+def test_scene_list_supports_conditional_requests(api):
+    client, _db, task_id = api
+    response = client.get(f"/api/v1/tasks/{task_id}/scenes", params={"fields": "audio_url"})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["x-synced-at"]
+    repeat = client.get(
+        f"/api/v1/tasks/{task_id}/scenes",
+        params={"fields": "audio_url"},
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert repeat.status_code == 304
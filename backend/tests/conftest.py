@@ -0,0 +1,53 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.mysql import TINYINT
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+SRC_DIR = ROOT_DIR / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# Settings are read at import time; keep test runs off real databases and storage.
+os.environ.setdefault("DATABASE_URL", "sqlite:///tmp/test.db")
+os.environ.setdefault("STORAGE_BASE_PATH", "/tmp/storage")
+os.environ.setdefault(
+    "PROVIDER_DEFAULTS",
+    '{"storyboard":"gemini","image":"runninghub","audio":"fishaudio","video":"ffmpeg","video_prompt":"gemini",'
+    '"media_compose":"ffmpeg","scene_merge":"ffmpeg","finalize":"ffmpeg"}',
+)
+
+
+# The models use MySQL TINYINT; the compiler registration is global, so it lives here once.
+@compiles(TINYINT, "sqlite")
+def _tinyint_on_sqlite(_type, _compiler, **_kw):
+    return "INTEGER"
+
+
+@pytest.fixture
+def sqlite_engine():
+    """In-memory SQLite holding every model table, shared across threads (TestClient)."""
+    from app.models import Base
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sqlite_session_factory(sqlite_engine):
+    return sessionmaker(bind=sqlite_engine)
+
+
+@pytest.fixture
+def sqlite_session(sqlite_session_factory):
+    session = sqlite_session_factory()
+    yield session
+    session.close()
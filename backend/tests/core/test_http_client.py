@@ -0,0 +1,67 @@
+import asyncio
+
+from app.core import http_client
+from app.core.http_client import HTTPClientRegistry
+
+_PROXY = {"http": "http://proxy-a:8080", "https": "http://proxy-a:8080"}
+
+
+def test_clients_are_shared_per_service_and_proxy():
+    registry = HTTPClientRegistry()
+    try:
+        direct = registry.get_client("fishaudio", proxies={})
+        assert registry.get_client("fishaudio", proxies={}) is direct
+
+        proxied = registry.get_client("fishaudio", proxies=_PROXY)
+        assert proxied is not direct
+        assert registry.get_client("fishaudio", proxies={"https": "http://proxy-a:8080"}) is proxied
+        assert registry.get_client("liblib", proxies={}) is not direct
+
+        stats = registry.stats()
+        assert stats["clients_created"] == 3 and stats["client_hits"] == 2
+        assert set(stats["pools"]) == {"fishaudio|direct", "fishaudio|http://proxy-a:8080", "liblib|direct"}
+    finally:
+        registry.close_all()
+
+
+def test_closed_or_forked_clients_are_rebuilt():
+    registry = HTTPClientRegistry()
+    client = registry.get_client("gemini", proxies={})
+    client.close()
+    rebuilt = registry.get_client("gemini", proxies={})
+    assert rebuilt is not client and not rebuilt.is_closed
+
+    # A forked child must not reuse the parent's sockets.
+    registry.reset_after_fork()
+    assert registry.get_client("gemini", proxies={}) is not rebuilt
+    registry.close_all()
+    assert registry.stats()["clients"] == 0
+
+
+def test_async_clients_are_scoped_to_the_event_loop():
+    registry = HTTPClientRegistry()
+
+    async def _pair():
+        first = registry.get_async_client("runninghub", proxies={})
+        assert registry.get_async_client("runninghub", proxies={}) is first
+        await first.aclose()
+        return first
+
+    first = asyncio.run(_pair())
+    second = asyncio.run(_pair())
+    assert first is not second
+
+
+def test_proxy_client_reuses_the_shared_pool(monkeypatch):
+    registry = HTTPClientRegistry()
+    monkeypatch.setattr(http_client, "_registry", registry)
+    monkeypatch.setattr(http_client, "get_proxy_for_service", lambda service: _PROXY)
+    try:
+        first = http_client.create_http_client("fishaudio")
+        first.close()
+        second = http_client.create_http_client("fishaudio", timeout=5)
+
+        assert second.client is first.client and not first.client.is_closed
+        assert registry.stats()["pools"].keys() == {"fishaudio|http://proxy-a:8080"}
+    finally:
+        registry.close_all()
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from app.core import task_events as task_events_module
+from app.core.task_events import TaskEventHub, install_task_event_hooks
+from app.models.media import Scene
+from app.models.task import Task
+
+
+class _RecordingRedis:
+    def __init__(self):
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+    def execute(self):
+        return []
+
+
+def test_committed_changes_are_published_as_deltas(monkeypatch, sqlite_session_factory):
+    redis = _RecordingRedis()
+    monkeypatch.setattr(task_events_module, "get_redis_client", lambda: redis)
+    install_task_event_hooks(sqlite_session_factory)
+    db = sqlite_session_factory()
+
+    task = Task(workflow_type="story")
+    db.add(task)
+    db.flush()
+    scene = Scene(task_id=task.id, seq=1)
+    db.add(scene)
+    db.commit()
+    assert redis.published == [(f"task-events:{task.id}", {"type": "resync", "task_id": task.id})]
+
+    redis.published.clear()
+    scene.image_status = 1
+    db.flush()
+    scene.image_status = 2
+    scene.image_url = "https://cdn.example/1.png"
+    scene.image_meta = {"large": "payload"}
+    db.commit()
+    assert redis.published == [
+        (
+            f"task-events:{task.id}",
+            {
+                "type": "scene",
+                "task_id": task.id,
+                "id": scene.id,
+                "changes": {"image_status": 2, "image_url": "https://cdn.example/1.png"},
+            },
+        )
+    ]
+
+    redis.published.clear()
+    task.progress = 50
+    db.flush()
+    db.rollback()
+    assert redis.published == []
+
+
+def test_hub_fans_out_per_task_and_resyncs_slow_clients():
+    async def scenario():
+        hub = TaskEventHub(queue_size=2)
+        hub._listener = asyncio.get_running_loop().create_future()  # no Redis in tests
+        first, other = hub.subscribe(1), hub.subscribe(2)
+        for progress in range(3):
+            hub.dispatch({"type": "task", "task_id": 1, "id": 1, "changes": {"progress": progress}})
+        assert other.empty()
+        assert first.get_nowait() == {"type": "resync", "task_id": 1}
+        hub.unsubscribe(1, first)
+        hub.unsubscribe(2, other)
+        assert hub.subscriber_count() == 0
+
+    asyncio.run(scenario())
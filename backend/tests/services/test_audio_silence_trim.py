@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import numpy as np
+
+from app.services.audio_postprocess import (
+    AudioPostProcessor,
+    PcmRmsTrimStrategy,
+    SilenceReport,
+    silence_trim_window,
+)
+
+
+def test_pcm_rms_analysis_finds_speech_edges():
+    strategy = PcmRmsTrimStrategy(sample_rate=1000, frame_ms=10)
+    tone = 0.5 * np.sin(np.linspace(0, 200 * np.pi, 600)).astype(np.float32)
+    samples = np.concatenate([np.zeros(300, np.float32), tone, np.zeros(100, np.float32)])
+
+    report = strategy.analyze_samples(samples, threshold_db=-35.0)
+
+    assert report.duration == 1.0
+    assert abs(report.leading_silence - 0.3) < 1e-9
+    assert abs(report.trailing_silence - 0.1) < 1e-9
+    silent = strategy.analyze_samples(np.zeros(500, np.float32), threshold_db=-35.0)
+    assert silent.leading_silence == silent.duration == 0.5
+
+
+class _Strategy:
+    name = "stub"
+
+    def __init__(self, report):
+        self.report = report
+        self.trim_calls = 0
+
+    def analyze(self, source, *, threshold_db):
+        return self.report
+
+    def trim(self, source, target, *, start, end):
+        self.trim_calls += 1
+
+
+class _Storage:
+    def ensure_local_path(self, api_path):
+        return Path("/tmp") / api_path
+
+
+def test_process_returns_window_without_writing_a_file():
+    strategy = _Strategy(SilenceReport(2.0, 0.5, 0.4, tuple()))
+    processor = AudioPostProcessor(storage_service=_Storage(), strategy=strategy)
+
+    result = processor.process("a.wav", threshold_db=-35.0, max_leading=0.1, max_trailing=0.1)
+
+    assert result.trimmed and result.reference is None and strategy.trim_calls == 0
+    assert (round(result.start, 6), round(result.end, 6)) == (0.4, 1.7)
+
+    meta = {"silence_trim": {"start": result.start, "end": result.end, "audio_url": "/api/a.wav"}}
+    assert silence_trim_window(meta, "/api/a.wav") == (result.start, result.end)
+    # A window computed for an older audio file is ignored.
+    assert silence_trim_window(meta, "/api/b.wav") is None
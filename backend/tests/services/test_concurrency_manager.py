@@ -0,0 +1,90 @@
+import importlib
+
+import pytest
+
+from app.core.redis_client import REDIS_SOCKET_TIMEOUT
+from app.services.concurrency_manager import BACKEND_REDIS, ConcurrencyManager, SlotLimit
+from app.services.exceptions import ConcurrencyLimitException
+
+# ``app.services`` re-exports the ``concurrency_manager`` singleton under the module's name.
+manager_module = importlib.import_module("app.services.concurrency_manager")
+
+
+class _FakeRedis:
+    """Runs the slot scripts' semantics in Python and records BLPOP timeouts."""
+
+    def __init__(self):
+        self.holders = {}
+        self.wake = {}
+        self.blpop_timeouts = []
+
+    def register_script(self, source):
+        if "ZADD" in source:
+            return self._acquire
+        return self._release
+
+    def _acquire(self, keys, args):
+        holders = self.holders.setdefault(keys[0], set())
+        if len(holders) >= int(args[1]):
+            return 0
+        holders.add(args[0])
+        return 1
+
+    def _release(self, keys, args):
+        holders = self.holders.setdefault(keys[0], set())
+        if args[0] not in holders:
+            return 0
+        holders.discard(args[0])
+        self.wake.setdefault(keys[1], []).append("1")
+        return 1
+
+    def blpop(self, keys, timeout=0):
+        assert timeout < REDIS_SOCKET_TIMEOUT
+        self.blpop_timeouts.append(timeout)
+        pending = self.wake.get(keys[0])
+        return (keys[0], pending.pop()) if pending else None
+
+
+def _limit(wait_interval):
+    return SlotLimit("runninghub", "video", max_slots=1, wait_interval=wait_interval, wait_timeout=None, slot_timeout=60)
+
+
+@pytest.fixture
+def redis_manager(monkeypatch):
+    client = _FakeRedis()
+    manager = ConcurrencyManager()
+    monkeypatch.setattr(manager, "_resolve_limit", lambda service, feature: _limit(30.0))
+    monkeypatch.setattr(manager_module, "get_redis_client", lambda: client)
+    monkeypatch.setattr(manager._settings.__class__, "concurrency_audit_enabled", property(lambda self: False))
+    monkeypatch.setattr(
+        manager._settings.__class__,
+        "concurrency_backend_for",
+        lambda self, service: BACKEND_REDIS,
+    )
+    return manager, client
+
+
+def test_release_hands_the_slot_to_the_next_waiter(redis_manager):
+    manager, client = redis_manager
+    first = manager.acquire("runninghub", feature="video")
+    assert first.backend == BACKEND_REDIS and first.holder
+
+    with pytest.raises(ConcurrencyLimitException):
+        manager.acquire("runninghub", feature="video", wait_timeout=0.01)
+
+    manager.release(first)
+    second = manager.acquire("runninghub", feature="video", wait_timeout=0.01)
+    assert second.holder != first.holder
+    assert client.holders["concurrency:runninghub:video:holders"] == {second.holder}
+
+
+def test_blocking_wait_stays_below_the_socket_timeout(redis_manager, monkeypatch):
+    manager, client = redis_manager
+    manager.acquire("runninghub", feature="video")
+    # The wait interval (30s) exceeds the client's socket timeout; BLPOP must not.
+    deadlines = iter([0.0, 0.0, 100.0, 100.0])
+    monkeypatch.setattr(manager_module.time, "monotonic", lambda: next(deadlines))
+
+    with pytest.raises(ConcurrencyLimitException):
+        manager.acquire("runninghub", feature="video", wait_timeout=50)
+    assert client.blpop_timeouts == [manager_module._MAX_BLOCK_SECONDS]
@@ -0,0 +1,72 @@
+from app.services import config_cache as config_cache_module
+from app.services.config_cache import CredentialRecord, ServiceConfigCache, _Snapshot
+
+
+class _VersionRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+
+def _snapshot(api_key: str) -> _Snapshot:
+    credential = CredentialRecord(
+        id=1,
+        service_name="runninghub",
+        credential_type="api_key",
+        credential_key=api_key,
+        credential_secret=None,
+        api_url="https://example.test",
+        description=None,
+    )
+    return _Snapshot(credentials={"runninghub": [credential]}, options={}, style_presets={})
+
+
+def test_version_bump_in_one_process_reloads_the_other(monkeypatch):
+    redis = _VersionRedis()
+    monkeypatch.setattr(config_cache_module, "get_redis_client", lambda: redis)
+
+    worker = ServiceConfigCache(check_interval=0)
+    api = ServiceConfigCache(check_interval=0)
+    keys = iter(["old-key", "new-key"])
+    loads = []
+
+    def load_snapshot():
+        loads.append(1)
+        return _snapshot(next(keys))
+
+    monkeypatch.setattr(worker, "_load_snapshot", load_snapshot)
+
+    assert worker.active_credential("runninghub").credential_key == "old-key"
+    assert worker.active_credential("runninghub").credential_key == "old-key"
+    generation = worker.current_generation()
+    assert len(loads) == 1
+
+    api.invalidate("test")
+
+    assert worker.active_credential("runninghub").credential_key == "new-key"
+    assert worker.current_generation() > generation
+    assert len(loads) == 2
+
+
+def test_get_or_load_memoizes_until_invalidated(monkeypatch):
+    monkeypatch.setattr(config_cache_module, "get_redis_client", lambda: None)
+    cache = ServiceConfigCache(check_interval=0)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"workflow_id": "1"}
+
+    assert cache.get_or_load(("runninghub_config", "image.default"), loader) == {"workflow_id": "1"}
+    assert cache.get_or_load(("runninghub_config", "image.default"), loader) == {"workflow_id": "1"}
+    assert len(calls) == 1
+
+    cache.invalidate()
+    cache.get_or_load(("runninghub_config", "image.default"), loader)
+    assert len(calls) == 2
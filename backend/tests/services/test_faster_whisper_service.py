@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.config.settings import get_settings
+from app.services import faster_whisper_service as whisper_module
+from app.services.faster_whisper_service import FasterWhisperService
+
+
+class _Model:
+    created = []
+
+    def __init__(self, model_id, **kwargs):
+        self.created.append((model_id, kwargs))
+
+    def transcribe(self, path, **options):
+        raise AssertionError("the batched pipeline should decode")
+
+
+class _Pipeline:
+    def __init__(self, model):
+        self.model = model
+        self.calls = []
+
+    def transcribe(self, path, *, batch_size, **options):
+        self.calls.append((path, batch_size, options))
+        word = SimpleNamespace(start=0.0, end=0.4, word=" hi")
+        segments = [SimpleNamespace(start=0.0, end=1.0, text=" hi there", words=[word])]
+        return iter(segments), SimpleNamespace(language="en", language_probability=0.9, duration=2.0)
+
+
+def _service(monkeypatch, **overrides):
+    _Model.created = []
+    monkeypatch.setattr(whisper_module, "WhisperModel", _Model)
+    monkeypatch.setattr(whisper_module, "BatchedInferencePipeline", _Pipeline)
+    settings = get_settings().model_copy(update=overrides)
+    return FasterWhisperService(settings)
+
+
+def test_cpu_batched_engine_loads_once_and_decodes_in_batches(monkeypatch, tmp_path):
+    service = _service(
+        monkeypatch,
+        FASTER_WHISPER_ENGINE="cpu_batched",
+        FASTER_WHISPER_DEVICE=None,
+        FASTER_WHISPER_COMPUTE_TYPE=None,
+        FASTER_WHISPER_BATCH_SIZE=4,
+        FASTER_WHISPER_CPU_THREADS=2,
+    )
+    assert (service.device, service.compute_type, service.batch_size) == ("cpu", "int8", 4)
+
+    # Preload and the first requests race; the model is still created once.
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        models = list(pool.map(lambda _: service.load_model(), range(4)))
+    assert len(_Model.created) == 1 and all(model is models[0] for model in models)
+    assert _Model.created[0][1]["cpu_threads"] == 2
+
+    audio = tmp_path / "scene.wav"
+    audio.write_bytes(b"RIFF")
+    result = service.transcribe(str(audio), language="en")
+
+    (call,) = service._pipeline.calls
+    assert call[1] == 4 and call[2]["language"] == "en"
+    assert result.text == "hi there" and result.segments[0].words[0].text == "hi"
+    performance = result.info["performance"]
+    assert performance["batched"] is True and performance["engine"] == "cpu_batched"
+    assert performance["audio_seconds"] == 2.0 and performance["rtf"] is not None
+
+
+def test_default_engine_keeps_gpu_defaults_without_batching(monkeypatch):
+    service = _service(
+        monkeypatch,
+        FASTER_WHISPER_ENGINE=None,
+        FASTER_WHISPER_DEVICE=None,
+        FASTER_WHISPER_COMPUTE_TYPE=None,
+    )
+    service.load_model()
+
+    assert (service.device, service.compute_type, service.batch_size) == ("cuda", "float16", None)
+    assert service._pipeline is None
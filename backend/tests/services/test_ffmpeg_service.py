@@ -0,0 +1,137 @@
+import logging
+from pathlib import Path
+
+from app.services.ffmpeg_service import FFmpegService
+from app.services.storage_service import StorageReference
+from app.tasks.finalize_task import _fuse_pipeline
+
+_ASS = "[Script Info]\nPlayResX: 1080\nPlayResY: 1920\n\n[Events]\n"
+
+
+def _service(tmp_path, commands, probes):
+    service = FFmpegService.__new__(FFmpegService)
+    service.logger = logging.getLogger("test")
+    service.ffmpeg_bin = "ffmpeg"
+    service.storage_base = tmp_path
+    service._normalise_media_input = lambda value: value
+    service._reference_from_output = lambda path: StorageReference(
+        api_path=f"/api/v1/storage/{path.name}", relative_path=path.name, absolute_path=path, public_url=None
+    )
+    service._run_stream = lambda stream: commands.append(stream.compile(cmd="ffmpeg")) or ("", "")
+
+    def get_media_metadata(value):
+        probes.append(value)
+        return {"streams": [{"codec_type": "video", "width": 720, "height": 1280}]}
+
+    service.get_media_metadata = get_media_metadata
+    service._register_output = lambda path: get_media_metadata(str(path))
+    return service
+
+
+def test_adjacent_bgm_mix_and_subtitles_fuse_into_one_step():
+    assert _fuse_pipeline(["bgm_mix", "embed_subtitles"]) == ["bgm_mix_embed_subtitles"]
+    assert _fuse_pipeline(["embed_subtitles", "bgm_mix"]) == ["embed_subtitles", "bgm_mix"]
+    assert _fuse_pipeline(["bgm_mix", "watermark", "embed_subtitles"]) == ["bgm_mix", "watermark", "embed_subtitles"]
+
+
+def test_fused_pass_burns_subtitles_and_mixes_bgm_in_one_command(tmp_path):
+    subtitle = tmp_path / "subs.ass"
+    subtitle.write_text(_ASS, encoding="utf-8")
+    commands, probes = [], []
+    service = _service(tmp_path, commands, probes)
+
+    result = service.mix_background_music_with_subtitles(
+        base_video_url="/work/merged.mp4",
+        bgm_url="/work/bgm.mp3",
+        subtitle_path=str(subtitle),
+        fade_start=10.0,
+        fade_duration=2.0,
+        volume_db=-12.0,
+        task_id=7,
+        video_metadata={"streams": [{"codec_type": "video", "width": 720, "height": 1280}]},
+    )
+
+    assert len(commands) == 1
+    command = commands[0]
+    graph = command[command.index("-filter_complex") + 1]
+    assert "subtitles=" in graph and "amix=" in graph and "scale=1080:1920" in graph
+    outputs = [arg for arg in command if arg.endswith("_subtitled.mp4")]
+    assert command.count("-i") == 2 and len(outputs) == 1
+    # The caller's probe of the input is reused; only the output is probed.
+    assert probes == outputs
+    assert result["scale_resolution"] == (1080, 1920)
+
+
+def _clip(tmp_path, name, width=1080, pix_fmt="yuv420p"):
+    path = tmp_path / name
+    path.write_bytes(b"\x00")
+    video = {
+        "codec_type": "video",
+        "codec_name": "h264",
+        "profile": "High",
+        "width": width,
+        "height": 1920,
+        "pix_fmt": pix_fmt,
+        "r_frame_rate": "25/1",
+        "time_base": "1/12800",
+        "sample_aspect_ratio": "1:1",
+    }
+    audio = {
+        "codec_type": "audio",
+        "codec_name": "aac",
+        "sample_rate": "44100",
+        "channels": 2,
+        "channel_layout": "stereo",
+    }
+    return str(path), {"streams": [video, audio]}
+
+
+def _concat_service(tmp_path, clips, commands):
+    service = _service(tmp_path, commands, [])
+    service.settings = type("Settings", (), {"ffmpeg_concat_stream_copy": True})()
+    service.get_media_metadata = lambda value: clips.get(value, {"streams": []})
+    service._register_output = lambda path: {}
+
+    def run_stream(stream):
+        command = stream.compile(cmd="ffmpeg")
+        if "concat" in command:
+            # The demuxer list is deleted right after the run.
+            command.append(Path(command[command.index("-i") + 1]).read_text(encoding="utf-8"))
+        commands.append(command)
+        return "", ""
+
+    service._run_stream = run_stream
+    return service
+
+
+def test_matching_scene_clips_are_spliced_without_reencoding(tmp_path):
+    clips = dict(_clip(tmp_path, name) for name in ("scene 1.mp4", "scene'2.mp4"))
+    commands = []
+    service = _concat_service(tmp_path, clips, commands)
+
+    result = service.concat_with_payload({"inputs": [{"file_url": path} for path in clips]})
+
+    assert result["concat_mode"] == "stream_copy" and result["concat_fallback_reason"] is None
+    (command,) = commands
+    assert command[command.index("-f") + 1] == "concat" and command[command.index("-c") + 1] == "copy"
+    assert "-filter_complex" not in command
+    assert "file '" in command[-1] and "scene'\\''2.mp4" in command[-1]
+    assert not list((tmp_path / "video" / "merge").glob("*.txt"))
+
+
+def test_mismatched_clips_fall_back_to_the_concat_filter(tmp_path):
+    clips = dict([_clip(tmp_path, "a.mp4"), _clip(tmp_path, "b.mp4", width=720)])
+    commands = []
+    service = _concat_service(tmp_path, clips, commands)
+
+    result = service.concat_with_payload({"inputs": [{"file_url": path} for path in clips]})
+
+    assert result["concat_mode"] == "filter" and result["concat_fallback_reason"] == "parameters_differ"
+    (command,) = commands
+    assert "concat=" in command[command.index("-filter_complex") + 1]
+
+    clips = dict([_clip(tmp_path, "c.mp4", pix_fmt="yuv444p"), _clip(tmp_path, "d.mp4", pix_fmt="yuv444p")])
+    service = _concat_service(tmp_path, clips, [])
+    assert service.concat_with_payload({"inputs": [{"file_url": path} for path in clips]})[
+        "concat_fallback_reason"
+    ] == "pix_fmt"
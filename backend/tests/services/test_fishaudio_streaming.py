@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.core.http_client import ProxyHTTPClient
+from app.services import fishaudio_service as fishaudio_module
+from app.services.exceptions import APIException
+from app.services.fishaudio_service import FishAudioService
+from app.services.providers.audio import FishAudioProvider
+from app.services.providers.base import MediaRequest
+from app.services.rate_limiter import RateLimitTicket
+from app.services.storage_backends import LocalStorageBackend
+from app.services.tts_cache import TtsAudioCacheService
+
+
+def _service() -> FishAudioService:
+    service = FishAudioService.__new__(FishAudioService)
+    service.logger = logging.getLogger("test")
+    service.api_url = "https://fish.example"
+    service.api_key = "key"
+    service.voice_id = "voice"
+    return service
+
+
+def test_stream_writes_body_to_file_and_cleans_up_on_error(tmp_path, monkeypatch):
+    def handler(request):
+        if b"fail" in request.content:
+            return httpx.Response(500, json={"error": {"message": "boom"}})
+        return httpx.Response(200, content=b"ID3" + b"\x00" * 4096)
+
+    monkeypatch.setattr(
+        fishaudio_module,
+        "get_async_http_client",
+        lambda *args, **kwargs: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    service = _service()
+    target = tmp_path / "scene.mp3"
+
+    stats = asyncio.run(service.stream_text_to_speech("hello", target))
+    assert target.read_bytes().startswith(b"ID3") and stats["bytes"] == 4099
+    assert stats["latency_ms"] >= 0 and stats["ttfb_ms"] is not None
+
+    failed = tmp_path / "failed.mp3"
+    with pytest.raises(APIException, match="boom"):
+        asyncio.run(service.stream_text_to_speech("fail", failed))
+    assert not failed.exists() and not list(tmp_path.glob("*.part"))
+
+
+def _sync_client(handler) -> ProxyHTTPClient:
+    client = ProxyHTTPClient.__new__(ProxyHTTPClient)
+    client.timeout = 60
+    client.client = httpx.Client(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_sync_stream_writes_chunks_without_buffering_the_body(tmp_path):
+    chunks = [b"ID3", b"\x00" * 4096, b"\x01" * 10]
+
+    def handler(request):
+        if b"fail" in request.content:
+            return httpx.Response(429, json={"error": {"message": "quota"}})
+        return httpx.Response(200, stream=httpx.ByteStream(b"".join(chunks)))
+
+    service = _service()
+    service.client = _sync_client(handler)
+    target = tmp_path / "scene.mp3"
+
+    stats = service.stream_text_to_speech_sync("hello", target)
+    assert target.read_bytes() == b"".join(chunks) and stats["bytes"] == 4109
+    assert stats["ttfb_ms"] is not None
+
+    with pytest.raises(APIException, match="quota"):
+        service.stream_text_to_speech_sync("fail", tmp_path / "failed.mp3")
+    assert not (tmp_path / "failed.mp3").exists() and not list(tmp_path.glob("*.part"))
+
+
+class _SlowService:
+    credential_id = 1
+    voice_id = "voice"
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def stream_text_to_speech(self, text, output_path, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.1)
+        self.in_flight -= 1
+        if text == "bad":
+            raise APIException("tts failed", service_name="Fish Audio")
+        output_path.write_bytes(text.encode())
+        return {"bytes": len(text), "latency_ms": 100.0, "ttfb_ms": 10.0}
+
+    async def aclose(self):
+        return None
+
+
+def test_generate_many_runs_concurrently_and_keeps_order(tmp_path, monkeypatch):
+    provider = FishAudioProvider.__new__(FishAudioProvider)
+    provider._service = _SlowService()
+    provider._cache = TtsAudioCacheService(enabled=False)
+    provider._backend = LocalStorageBackend()
+    provider._settings = SimpleNamespace(
+        STORAGE_BASE_PATH=str(tmp_path),
+        STORAGE_PUBLIC_BASE_URL=None,
+        FISHAUDIO_RATE_LIMIT_PER_VOICE=False,
+        fishaudio_tts_concurrency=4,
+    )
+    monkeypatch.setattr(provider, "_acquire_ticket", lambda request: RateLimitTicket("fishaudio", "audio", None))
+    texts = [f"line {index}" for index in range(8)] + ["bad"]
+    requests = [
+        MediaRequest(text=text, voice_id="voice", extra={"task_id": 7, "scene_seq": index})
+        for index, text in enumerate(texts)
+    ]
+
+    started = time.monotonic()
+    results = provider.generate_many(requests)
+    elapsed = time.monotonic() - started
+
+    # Nine 100ms requests, four at a time: three rounds instead of nine sequential calls.
+    assert elapsed < 0.6 and provider._service.peak == 4
+    assert [result.meta["synthesis"]["bytes"] for result in results[:8]] == [len(text) for text in texts[:8]]
+    assert results[3].resource_url == "/api/v1/storage/audio/7_3.mp3"
+    assert isinstance(results[8], APIException)
+
+
+def test_sync_generate_does_not_rewrite_a_linked_cache_entry(tmp_path):
+    provider = FishAudioProvider.__new__(FishAudioProvider)
+    provider._service = _service()
+    provider._service.client = _sync_client(lambda request: httpx.Response(200, content=b"ID3 fresh"))
+    provider._cache = TtsAudioCacheService(enabled=False)
+    provider._backend = LocalStorageBackend()
+    provider._settings = SimpleNamespace(STORAGE_BASE_PATH=str(tmp_path), STORAGE_PUBLIC_BASE_URL=None)
+    provider._acquire_ticket = lambda request: None
+    request = MediaRequest(text="hello", voice_id="voice", extra={"task_id": 7, "scene_seq": 1, "tts_cache": False})
+
+    # An earlier cache hit left the scene file hard-linked to the cache entry.
+    cached = tmp_path / "cached.mp3"
+    cached.write_bytes(b"ID3 cached")
+    output = provider._output_path(request)
+    output.unlink(missing_ok=True)
+    output.hardlink_to(cached)
+
+    result = provider.generate(request)
+
+    assert result.meta["synthesis"]["streamed"] is True
+    assert output.read_bytes() == b"ID3 fresh"
+    assert cached.read_bytes() == b"ID3 cached"
+    assert not list(output.parent.glob("*.part"))
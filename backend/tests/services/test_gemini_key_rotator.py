@@ -0,0 +1,51 @@
+import pytest
+
+from app.services import gemini_credential_pool as pool_module
+from app.services.config_cache import CredentialRecord
+from app.services.exceptions import RateLimitExceededException
+from app.services.gemini_credential_pool import GeminiKeyRotator
+
+
+def _key(key_id: int) -> CredentialRecord:
+    return CredentialRecord(
+        id=key_id,
+        service_name="gemini",
+        credential_type="api_key",
+        credential_key=f"key-{key_id}",
+        credential_secret=None,
+        api_url=None,
+        description=None,
+    )
+
+
+@pytest.fixture()
+def rotator(monkeypatch):
+    monkeypatch.setattr(pool_module, "get_redis_client", lambda: None)
+    rotator = GeminiKeyRotator(rpm=2, tpm=1000, wait_timeout=0)
+    monkeypatch.setattr(rotator, "_touch_last_used", lambda key_id: None)
+    return rotator
+
+
+def test_leases_spread_by_headroom_until_exhausted(rotator):
+    keys = [_key(1), _key(2)]
+
+    leased = [rotator.acquire(keys, tokens=100).api_key for _ in range(4)]
+
+    assert sorted(leased) == ["key-1", "key-1", "key-2", "key-2"]
+    assert leased[0] != leased[1]
+    with pytest.raises(RateLimitExceededException):
+        rotator.acquire(keys, tokens=100)
+
+
+def test_token_budget_and_rate_limited_key_is_skipped(rotator):
+    keys = [_key(1), _key(2)]
+
+    first = rotator.acquire(keys, tokens=900)
+    rotator.report_usage(first, 950)
+    # Key 1 has no token headroom left, so even a fresh request lands on key 2.
+    second = rotator.acquire(keys, tokens=200)
+    assert second.credential.id != first.credential.id
+
+    rotator.report_rate_limited(second)
+    with pytest.raises(RateLimitExceededException):
+        rotator.acquire(keys, tokens=200)
@@ -0,0 +1,156 @@
+import logging
+from contextlib import nullcontext
+
+import google.ai.generativelanguage as glm
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.services import gemini_response_cache as cache_module
+from app.services import gemini_service as gemini_module
+from app.services.exceptions import ValidationException
+from app.services.gemini_response_cache import GeminiResponseCache, bypass_gemini_cache, cache_key
+from app.services.gemini_service import GeminiService
+
+
+@pytest.fixture()
+def local_cache(monkeypatch):
+    monkeypatch.setattr(cache_module, "get_redis_client", lambda: None)
+    cache = GeminiResponseCache(max_entries=2, max_entry_bytes=64)
+    monkeypatch.setattr(gemini_module, "get_gemini_response_cache", lambda: cache)
+    return cache
+
+
+def test_local_cache_bounds_and_bypass(local_cache):
+    assert cache_key("storyboard", "m", "p", generation_config={"a": 1, "b": 2}) == cache_key(
+        "storyboard", "m", "p", generation_config={"b": 2, "a": 1}
+    )
+
+    local_cache.set("a", "first")
+    local_cache.set("b", "second")
+    assert local_cache.get("a") == "first"
+    local_cache.set("c", "third")  # evicts the least recently used entry ("b")
+    assert local_cache.get("b") is None
+    assert local_cache.set("big", "x" * 65) is False
+
+    with bypass_gemini_cache():
+        assert local_cache.get("a") is None
+        local_cache.set("a", "fresh")
+    assert local_cache.get("a") == "fresh"
+
+    stats = local_cache.stats()["process"]
+    assert stats["bypassed"] == 1 and stats["skipped"] == 1
+
+
+class _Model:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        return type("Response", (), {"text": self.responses.pop(0)})()
+
+
+def _service(model) -> GeminiService:
+    service = GeminiService.__new__(GeminiService)
+    service.logger = logging.getLogger("test")
+    service.model = model
+    service.model_name = "gemini-test"
+    service.generation_config = {"temperature": 0.9}
+    service.safety_settings = []
+    service._proxy_context = nullcontext
+    service._prepare_model_for_request = lambda tokens=0: (None, model)
+    return service
+
+
+def _parse(text):
+    if not text.startswith("ok"):
+        raise ValidationException("bad response")
+    return text.upper()
+
+
+def test_only_parsed_responses_are_cached(local_cache):
+    model = _Model(["garbage", "ok storyboard"])
+    service = _service(model)
+
+    with pytest.raises(ValidationException):
+        service._cached_generate("storyboard", "prompt", timeout_seconds=1, parse=_parse)
+    # The malformed answer was not stored, so the retry calls Gemini again.
+    assert service._cached_generate("storyboard", "prompt", timeout_seconds=1, parse=_parse) == (
+        "OK STORYBOARD",
+        "ok storyboard",
+        False,
+    )
+    assert service._cached_generate("storyboard", "prompt", timeout_seconds=1, parse=_parse)[2] is True
+    assert model.calls == 2
+
+
+def test_each_pooled_key_gets_its_own_client(monkeypatch):
+    monkeypatch.setattr(gemini_module, "_KEY_CLIENTS", {})
+    configured = []
+    monkeypatch.setattr(gemini_module.genai, "configure", lambda **kwargs: configured.append(kwargs))
+    proxies = {}
+    monkeypatch.setattr(gemini_module, "get_proxy_for_service", lambda service: proxies)
+    service = _service(None)
+
+    first = service._build_model("key-a")
+    second = service._build_model("key-b")
+
+    assert first._client is not second._client
+    assert service._build_model("key-a")._client is first._client
+    assert configured == []
+
+    # A new proxy needs a new channel; the key's old client is dropped.
+    proxies["https"] = "http://proxy-b:8080"
+    proxied = service._build_model("key-a")
+    assert proxied._client is not first._client
+    assert set(gemini_module._KEY_CLIENTS) == {("key-a", "http://proxy-b:8080"), ("key-b", None)}
+
+
+def test_key_bound_model_sends_its_own_request():
+    class _Client:
+        def __init__(self):
+            self.calls = []
+
+        def generate_content(self, request, timeout=None):
+            self.calls.append((request, timeout))
+            return glm.GenerateContentResponse(
+                candidates=[glm.Candidate(content=glm.Content(parts=[glm.Part(text="ok")]))]
+            )
+
+    client = _Client()
+    model = gemini_module._KeyBoundModel(client, "gemini-test", generation_config={"temperature": 0.9})
+
+    response = model.generate_content("prompt", timeout=5, generation_config={"max_output_tokens": 64})
+
+    assert response.text == "ok"
+    request, timeout = client.calls[0]
+    assert timeout == 5 and request.model == "models/gemini-test"
+    assert request.contents[0].parts[0].text == "prompt"
+    assert request.generation_config.max_output_tokens == 64
+    assert round(request.generation_config.temperature, 2) == 0.9
+
+
+def test_rate_limited_key_retries_on_the_next_lease(monkeypatch):
+    class _Limited:
+        def generate_content(self, prompt, **kwargs):
+            raise google_exceptions.ResourceExhausted("quota")
+
+    class _Rotator:
+        def __init__(self):
+            self.limited, self.used = [], []
+
+        def report_rate_limited(self, lease):
+            self.limited.append(lease)
+
+        def report_usage(self, lease, tokens):
+            self.used.append(lease)
+
+    rotator = _Rotator()
+    monkeypatch.setattr(gemini_module, "get_gemini_key_rotator", lambda: rotator)
+    service = _service(None)
+    leases = iter([("a", _Limited()), ("b", _Model(["ok"]))])
+    service._prepare_model_for_request = lambda tokens=0: next(leases)
+
+    assert service._generate_content("prompt", timeout_seconds=1).text == "ok"
+    assert rotator.limited == ["a"] and rotator.used == ["b"]
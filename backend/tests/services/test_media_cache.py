@@ -0,0 +1,35 @@
+import os
+
+from app.services.media_cache import BoundedFileCache
+
+
+def _entry(cache, name, size, mtime):
+    path = cache.cache_dir / name
+    with cache._key_lock(path):
+        path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_eviction_removes_lock_sidecars(tmp_path):
+    cache = BoundedFileCache(tmp_path, max_bytes=150)
+    old = _entry(cache, "old.bin", 100, 1)
+    new = _entry(cache, "new.bin", 100, 2)
+    # A download that failed left only its sidecar behind.
+    (tmp_path / "gone.bin.lock").touch()
+
+    assert cache.evict() == 1
+
+    assert not old.exists() and new.exists()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["new.bin", "new.bin.lock"]
+
+
+def test_lock_survives_sidecar_removed_while_waiting(tmp_path):
+    cache = BoundedFileCache(tmp_path, max_bytes=0)
+    target = tmp_path / "clip.bin"
+    with cache._key_lock(target) as acquired:
+        assert acquired
+        cache._unlink_lock_file(target)
+    # The next holder recreates the sidecar instead of locking an orphaned inode.
+    with cache._key_lock(target) as acquired:
+        assert acquired and cache._lock_path(target).exists()
@@ -0,0 +1,89 @@
+import importlib
+
+import pytest
+
+from app.services.media_metadata_cache import MediaMetadataCache, probe_media, register_media_metadata
+
+metadata_module = importlib.import_module("app.services.media_metadata_cache")
+
+
+def test_key_changes_when_file_is_rewritten(tmp_path):
+    media = tmp_path / "clip.mp4"
+    media.write_bytes(b"a")
+    first = MediaMetadataCache.key_for(str(media))
+
+    media.write_bytes(b"ab")
+    second = MediaMetadataCache.key_for(str(media))
+
+    assert first is not None and second is not None
+    assert first != second
+    assert MediaMetadataCache.key_for(str(tmp_path / "missing.mp4")) is None
+
+
+def test_entries_survive_via_disk_after_lru_eviction(tmp_path):
+    cache = MediaMetadataCache(max_entries=1, cache_dir=tmp_path / "cache")
+    cache.put("file:a", {"format": {"duration": "1.0"}})
+    cache.put("file:b", {"format": {"duration": "2.0"}})
+
+    assert cache.stats()["entries"] == 1
+    assert cache.get("file:a") == {"format": {"duration": "1.0"}}
+    assert cache.get("file:missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_remote_urls_revalidate_only_entries_read_from_disk(tmp_path, monkeypatch):
+    heads = []
+    etag = {"value": '"v1"'}
+
+    def remote_validator(url):
+        heads.append(url)
+        return etag["value"]
+
+    probes = []
+    cache = MediaMetadataCache(max_entries=8, cache_dir=tmp_path / "cache")
+    monkeypatch.setattr(metadata_module, "get_media_metadata_cache", lambda: cache)
+    monkeypatch.setattr(MediaMetadataCache, "remote_validator", staticmethod(remote_validator))
+    monkeypatch.setattr(
+        metadata_module,
+        "_run_ffprobe",
+        lambda source, ffprobe_bin: probes.append(source) or {"format": {"duration": str(len(probes))}},
+    )
+    url = "https://cdn.example/clip.mp4"
+
+    assert probe_media(url) == {"format": {"duration": "1"}}
+    assert heads == [url]
+    # Memory hits never touch the network.
+    assert probe_media(url) == {"format": {"duration": "1"}}
+    assert heads == [url] and probes == [url]
+
+    # Another worker only has the disk entry and checks its ETag once.
+    other = MediaMetadataCache(max_entries=8, cache_dir=tmp_path / "cache")
+    monkeypatch.setattr(metadata_module, "get_media_metadata_cache", lambda: other)
+    etag["value"] = '"v2"'
+    assert probe_media(url) == {"format": {"duration": "2"}}
+    assert len(heads) == 2 and len(probes) == 2
+
+
+def test_register_stores_the_callers_probe(tmp_path, monkeypatch):
+    cache = MediaMetadataCache(max_entries=8, cache_dir=tmp_path / "cache")
+    monkeypatch.setattr(metadata_module, "get_media_metadata_cache", lambda: cache)
+    monkeypatch.setattr(metadata_module, "_run_ffprobe", lambda *args: pytest.fail("ffprobe must not run"))
+    media = tmp_path / "out.mp3"
+    media.write_bytes(b"x")
+
+    register_media_metadata(str(media), {"format": {"duration": "3.0"}})
+
+    assert probe_media(str(media)) == {"format": {"duration": "3.0"}}
+
+
+def test_disk_entries_are_trimmed_to_the_byte_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_module, "_EVICT_EVERY_WRITES", 1)
+    cache = MediaMetadataCache(max_entries=1, cache_dir=tmp_path / "cache", max_disk_bytes=200)
+    for index in range(10):
+        cache.put(f"file:{index}", {"format": {"duration": str(index)}})
+
+    files = list((tmp_path / "cache").glob("*.json"))
+    assert 0 < len(files) < 10
+    assert sum(path.stat().st_size for path in files) <= 200
+    assert cache.get("file:9") is not None
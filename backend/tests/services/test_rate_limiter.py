@@ -0,0 +1,36 @@
+import pytest
+
+from app.services import rate_limiter as rate_limiter_module
+from app.services.exceptions import RateLimitExceededException
+from app.services.rate_limiter import RateLimit, TokenBucketRateLimiter
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, "get_redis_client", lambda: None)
+    instance = TokenBucketRateLimiter()
+    limit = RateLimit(service_name="fishaudio", feature="audio", rate=2.0, burst=2, wait_timeout=0.1)
+    monkeypatch.setattr(instance, "_resolve_limit", lambda service, feature: limit)
+    return instance
+
+
+def test_burst_is_served_without_waiting(limiter):
+    first = limiter.acquire("fishaudio", feature="audio", key="cred-1")
+    second = limiter.acquire("fishaudio", feature="audio", key="cred-1")
+
+    assert first.waited_seconds == 0.0
+    assert second.waited_seconds == 0.0
+    assert limiter.stats()["fishaudio/audio"]["acquired"] == 2
+
+
+def test_exhausted_bucket_rejects_beyond_wait_timeout(limiter):
+    limiter.acquire("fishaudio", feature="audio", key="cred-1")
+    limiter.acquire("fishaudio", feature="audio", key="cred-1")
+
+    with pytest.raises(RateLimitExceededException) as excinfo:
+        limiter.acquire("fishaudio", feature="audio", key="cred-1")
+
+    assert excinfo.value.retry_after > 0.1
+    assert limiter.stats()["fishaudio/audio"]["rejected"] == 1
+    # Other keys have their own bucket.
+    assert limiter.acquire("fishaudio", feature="audio", key="cred-2").waited_seconds == 0.0
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from app.services.faster_whisper_service import TranscriptionResult
+from app.services.scene_transcription import (
+    build_scene_timeline,
+    cached_scene_transcription,
+    combine_scene_transcriptions,
+    transcribe_scene_audio,
+)
+
+
+def _scene(scene_id, seq, duration, audio_meta=None, **overrides):
+    values = dict(
+        id=scene_id,
+        seq=seq,
+        merge_status=2,
+        merge_video_url=f"/merged/{seq}.mp4",
+        merge_meta={"output_metadata": {"duration": duration}},
+        video_status=2,
+        raw_video_url=f"/raw/{seq}.mp4",
+        audio_url=f"/audio/{seq}.mp3",
+        audio_meta=audio_meta,
+        audio_duration=duration,
+        narration_text=f"line {seq}",
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_scene_segments_are_offset_into_the_merged_timeline():
+    trim = {"silence_trim": {"audio_url": "/audio/2.mp3", "start": 0.5, "end": 3.5}}
+    first, second = _scene(1, 1, 4.0), _scene(2, 2, 3.0, audio_meta=trim)
+    timeline = build_scene_timeline([second, first])
+    assert [(entry.scene.id, entry.offset) for entry in timeline] == [(1, 0.0), (2, 4.0)]
+
+    payloads = {
+        1: {"audio_url": "/audio/1.mp3", "segments": [{"start": 0.2, "end": 9.0, "text": "one"}]},
+        # Timed against the untrimmed audio, which the clip enters 0.5s late.
+        2: {
+            "audio_url": "/audio/2.mp3",
+            "segments": [
+                {"start": 1.0, "end": 2.0, "text": "two", "words": [{"start": 1.0, "end": 1.5, "text": "two"}]},
+            ],
+        },
+    }
+    result = combine_scene_transcriptions(timeline, payloads, model="small", source_path="/final.mp4")
+
+    assert [(seg.start, seg.end, seg.text) for seg in result.segments] == [(0.2, 4.0, "one"), (4.5, 5.5, "two")]
+    assert (result.segments[1].words[0].start, result.segments[1].words[0].end) == (4.5, 5.0)
+    assert result.text == "one two" and result.info["duration"] == 7.0
+
+
+def test_unmerged_clips_fall_back_to_whole_video_transcription():
+    assert build_scene_timeline([_scene(1, 1, 4.0), _scene(2, 2, 3.0, merge_status=0)]) is None
+    assert build_scene_timeline([_scene(1, 1, 4.0, merge_meta={}, audio_duration=None)]) is None
+
+
+class _Whisper:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, source, **kwargs):
+        self.calls.append((source, kwargs))
+        return TranscriptionResult(model="small", source_path=source, segments=[], text="", info={}, options={})
+
+
+def test_empty_recognition_keeps_the_narration_and_caches_by_audio_url():
+    whisper = _Whisper()
+    scene = _scene(1, 1, 4.0)
+
+    payload = transcribe_scene_audio(whisper, scene, {"language": "zh"})
+
+    assert whisper.calls == [("/audio/1.mp3", {"initial_prompt": "line 1", "language": "zh"})]
+    assert payload["narration_fallback"] is True
+    assert payload["segments"][0]["start"] == 0.0 and payload["segments"][0]["end"] == 4.0
+    scene.audio_meta = {"transcription": payload}
+    assert cached_scene_transcription(scene) is payload
+    # Regenerated audio invalidates the transcript.
+    scene.audio_url = "/audio/1-v2.mp3"
+    assert cached_scene_transcription(scene) is None
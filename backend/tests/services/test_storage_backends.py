@@ -0,0 +1,186 @@
+import hashlib
+import io
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.services.storage_backends import ObjectReadThroughCache, S3StorageBackend, _FileSlice
+from app.services.storage_service import StorageService
+
+
+class _NoSuchKey(Exception):
+    response = {"Error": {"Code": "NoSuchKey"}}
+
+
+class _PreconditionFailed(Exception):
+    response = {"Error": {"Code": "PreconditionFailed"}}
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+class _FakeS3:
+    """In-memory stand-in for the subset of the S3 API MinIO serves."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.part_calls = 0
+        self.part_sizes = []
+        self.get_calls = 0
+        self.head_calls = 0
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body.read()
+        return {"ETag": _etag(self.objects[(Bucket, Key)])}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.part_calls += 1
+        self.part_sizes.append(len(Body))
+        self.uploads[UploadId][PartNumber] = Body.read()
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts)
+        self.objects[(Bucket, Key)] = b"".join(parts[number] for number in numbers)
+        return {"ETag": _etag(self.objects[(Bucket, Key)])}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+
+    def get_object(self, Bucket, Key, IfMatch=None):
+        self.get_calls += 1
+        if (Bucket, Key) not in self.objects:
+            raise _NoSuchKey()
+        data = self.objects[(Bucket, Key)]
+        if IfMatch is not None and IfMatch != _etag(data):
+            raise _PreconditionFailed()
+        return {"Body": io.BytesIO(data), "ETag": _etag(data)}
+
+    def head_object(self, Bucket, Key):
+        self.head_calls += 1
+        if (Bucket, Key) not in self.objects:
+            raise _NoSuchKey()
+        data = self.objects[(Bucket, Key)]
+        return {
+            "ContentLength": len(data),
+            "ETag": _etag(data),
+            "LastModified": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        }
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+def _node(base: Path, backend, cache_bytes=1024 ** 2) -> StorageService:
+    settings = SimpleNamespace(STORAGE_BASE_PATH=str(base), STORAGE_PUBLIC_BASE_URL=None)
+    cache = ObjectReadThroughCache(base / "tmp" / "object-cache", max_bytes=cache_bytes)
+    return StorageService(settings, backend=backend, object_cache=cache)
+
+
+def test_large_files_use_multipart_upload(tmp_path):
+    client = _FakeS3()
+    backend = S3StorageBackend("media", prefix="prod", part_size=5 * 1024 ** 2, client=client)
+    storage = _node(tmp_path, backend)
+    video = tmp_path / "video" / "final.mp4"
+    video.parent.mkdir()
+    payload = os.urandom(1024) * (11 * 1024)  # 11 MiB -> parts of 5 + 5 + 1 MiB
+    video.write_bytes(payload)
+
+    reference = storage.publish(video)
+
+    assert reference.api_path == "/api/v1/storage/video/final.mp4"
+    assert client.part_calls == 3 and not client.uploads
+    assert sorted(client.part_sizes) == [1024 ** 2, 5 * 1024 ** 2, 5 * 1024 ** 2]
+    assert client.objects[("media", "prod/video/final.mp4")] == payload
+    assert backend.exists("video/final.mp4") and not backend.exists("video/missing.mp4")
+
+
+def test_other_nodes_read_through_local_cache(tmp_path):
+    client = _FakeS3()
+    backend = S3StorageBackend("media", client=client)
+    writer = _node(tmp_path / "a", backend)
+    reader = _node(tmp_path / "b", backend)
+
+    reference = writer.save_text("subtitle", "1\n00:00:00,000 --> 00:00:01,000\nhi\n", suffix=".srt")
+    local = reader.ensure_local_path(reference.api_path)
+
+    assert local.parent == tmp_path / "b" / "tmp" / "object-cache" and local.suffix == ".srt"
+    assert local.read_text(encoding="utf-8").endswith("hi\n")
+    assert reader.ensure_local_path(reference.api_path) == local
+    assert client.get_calls == 1
+    # The writer still uses its own copy; unknown objects keep the old (missing) path.
+    assert writer.ensure_local_path(reference.api_path) == reference.absolute_path
+    assert reader.ensure_local_path("/api/v1/storage/audio/nope.mp3") == tmp_path / "b" / "audio" / "nope.mp3"
+
+    reader.delete(reference.api_path)
+    assert not local.exists() and not client.objects
+
+
+def test_read_through_cache_evicts_least_recently_used(tmp_path):
+    client = _FakeS3()
+    backend = S3StorageBackend("media", client=client)
+    for name in ("one", "two"):
+        client.objects[("media", f"audio/{name}.mp3")] = b"x" * 600
+    cache = ObjectReadThroughCache(tmp_path / "cache", max_bytes=1000)
+
+    first = cache.fetch(backend, "audio/one.mp3")
+    os.utime(first, (1, 1))
+    second = cache.fetch(backend, "audio/two.mp3")
+
+    assert second.exists() and not first.exists()
+    assert cache.fetch(backend, "audio/three.mp3") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_republished_key_is_not_served_stale(tmp_path):
+    client = _FakeS3()
+    backend = S3StorageBackend("media", client=client)
+    writer = _node(tmp_path / "a", backend)
+    reader = _node(tmp_path / "b", backend)
+    # Scene audio keeps its name when it is synthesized again.
+    audio = tmp_path / "a" / "audio" / "7_1.mp3"
+    audio.parent.mkdir(parents=True)
+    audio.write_bytes(b"ID3 first take")
+    api_path = writer.publish(audio).api_path
+    # The reader also has an old working file of its own under that name.
+    stale = tmp_path / "b" / "audio" / "7_1.mp3"
+    stale.parent.mkdir(parents=True)
+    stale.write_bytes(b"ID3 older")
+
+    assert reader.ensure_local_path(api_path).read_bytes() == b"ID3 first take"
+
+    audio.unlink()
+    audio.write_bytes(b"ID3 second take")
+    writer.publish(audio)
+
+    assert reader.ensure_local_path(api_path).read_bytes() == b"ID3 second take"
+    # The writer keeps using its working file and never downloads its own upload.
+    assert writer.ensure_local_path(api_path) == audio
+    assert client.get_calls == 2
+
+    reader.delete(api_path)
+    assert not [path for path in (tmp_path / "b" / "tmp" / "object-cache").iterdir() if path.suffix == ".mp3"]
+
+
+def test_file_slice_reads_only_its_window(tmp_path):
+    source = tmp_path / "data.bin"
+    source.write_bytes(bytes(range(100)))
+    with source.open("rb") as handle:
+        part = _FileSlice(handle, 10, 20)
+        assert len(part) == 20
+        assert part.read(5) == bytes(range(10, 15)) and part.tell() == 5
+        assert part.read() == bytes(range(15, 30)) and part.read() == b""
+        # botocore rewinds a part before retrying it.
+        part.seek(0)
+        assert part.read(100) == bytes(range(10, 30))
+        assert part.seek(-4, os.SEEK_END) == 16 and part.read() == bytes(range(26, 30))
@@ -0,0 +1,66 @@
+import pytest
+
+from app.models.tts_cache import TtsAudioCache
+from app.services import tts_cache as tts_cache_module
+from app.services.tts_cache import TtsAudioCacheService, tts_cache_key
+
+
+@pytest.fixture()
+def cache(tmp_path, monkeypatch, sqlite_session_factory):
+    monkeypatch.setattr(tts_cache_module, "get_db_session", sqlite_session_factory)
+    monkeypatch.setattr(tts_cache_module, "probe_media", lambda source: {"format": {"duration": "1.5"}})
+    return TtsAudioCacheService(base_path=tmp_path)
+
+
+def test_key_ignores_formatting_but_not_voice_or_params():
+    key = tts_cache_key("fishaudio", "v1", "你好，  世界\n", audio_format="mp3", sample_rate=44100)
+    assert key == tts_cache_key("fishaudio", "v1", " 你好， 世界", audio_format="mp3", sample_rate=44100)
+    assert key != tts_cache_key("fishaudio", "v2", "你好， 世界", audio_format="mp3", sample_rate=44100)
+    assert key != tts_cache_key("fishaudio", "v1", "你好， 世界", audio_format="mp3", sample_rate=24000)
+
+
+def test_store_then_fetch_links_file_and_reuses_duration(cache, tmp_path):
+    source = tmp_path / "audio" / "1_1.mp3"
+    source.parent.mkdir(parents=True)
+    source.write_bytes(b"ID3 narration")
+    key = tts_cache_key("fishaudio", "v1", "hello", audio_format="mp3", sample_rate=44100)
+
+    assert cache.fetch(key, tmp_path / "audio" / "2_1.mp3") is None
+    assert cache.store(
+        key, source, provider="fishaudio", voice_id="v1", text="hello", audio_format="mp3", sample_rate=44100
+    ) == 1.5
+
+    # The scene file can go away without breaking the cache entry.
+    source.unlink()
+    target = tmp_path / "audio" / "2_1.mp3"
+    hit = cache.fetch(key, target)
+    assert hit is not None and hit.duration == 1.5 and hit.size == len(b"ID3 narration")
+    assert target.read_bytes() == b"ID3 narration"
+
+    # A cache file removed out of band turns into a miss and drops the row.
+    for path in (tmp_path / "audio" / "tts-cache").rglob("*.mp3"):
+        path.unlink()
+    assert cache.fetch(key, tmp_path / "audio" / "3_1.mp3") is None
+    assert cache.fetch(key, tmp_path / "audio" / "3_1.mp3") is None
+
+
+def test_forced_resynthesis_refreshes_the_existing_row(cache, tmp_path, monkeypatch):
+    source = tmp_path / "audio" / "1_1.mp3"
+    source.parent.mkdir(parents=True)
+    source.write_bytes(b"ID3 old")
+    key = tts_cache_key("fishaudio", "v1", "hello", audio_format="mp3", sample_rate=44100)
+    params = dict(provider="fishaudio", voice_id="v1", text="hello", audio_format="mp3", sample_rate=44100)
+    cache.store(key, source, **params)
+
+    # tts_cache=false synthesizes again and replaces the cached file under the same key.
+    source.unlink()
+    source.write_bytes(b"ID3 new narration")
+    monkeypatch.setattr(tts_cache_module, "probe_media", lambda source: {"format": {"duration": "2.25"}})
+    assert cache.store(key, source, **params) == 2.25
+
+    hit = cache.fetch(key, tmp_path / "audio" / "2_1.mp3")
+    assert hit.duration == 2.25 and hit.size == len(b"ID3 new narration")
+    db = tts_cache_module.get_db_session()
+    row = db.query(TtsAudioCache).one()
+    assert row.file_size == hit.size and row.probe == {"format": {"duration": "2.25"}}
+    db.close()
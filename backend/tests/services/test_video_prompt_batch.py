@@ -0,0 +1,143 @@
+import logging
+from types import SimpleNamespace
+
+from app.services import gemini_service
+from app.services.gemini_service import GeminiService
+from app.services.providers.base import VideoPromptRequest
+from app.services.providers.video_prompt import GeminiVideoPromptProvider
+from app.tasks import video_task
+
+
+def _service() -> GeminiService:
+    service = GeminiService.__new__(GeminiService)
+    service.logger = logging.getLogger("test")
+    service._record_invalid_response = lambda text: None
+    return service
+
+
+def test_batch_response_parsing_keeps_only_requested_scenes():
+    service = _service()
+    text = (
+        "```json\n"
+        '[{"scene_seq": 1, "prompt_en": "<prompt_en>Static shot, she exhales.</prompt_en>"},'
+        ' {"scene_seq": "2", "prompt": "Slow push-in on the rain."},'
+        ' {"scene_seq": 9, "prompt_en": "Not requested."},'
+        ' {"scene_seq": 3, "prompt_en": ""}]\n'
+        "```"
+    )
+
+    prompts = service._parse_video_prompt_batch_response(text, {1, 2, 3})
+
+    assert prompts == {1: "Static shot, she exhales.", 2: "Slow push-in on the rain."}
+    assert service._parse_video_prompt_batch_response("not json at all", {1}) == {}
+
+
+class _StubService:
+    def __init__(self, batch_prompts):
+        self.batch_prompts = batch_prompts
+        self.batch_calls = []
+        self.single_calls = []
+
+    def generate_video_prompts(self, target, scenes, storyboard_context=None):
+        self.batch_calls.append([item["scene_seq"] for item in scenes])
+        return {seq: {"prompt": prompt} for seq, prompt in self.batch_prompts.items()}
+
+    def generate_video_prompt(self, **kwargs):
+        self.single_calls.append(kwargs["scene_seq"])
+        return {"prompt": f"single {kwargs['scene_seq']}"}
+
+
+def test_provider_batches_and_falls_back_per_missing_scene():
+    provider = GeminiVideoPromptProvider.__new__(GeminiVideoPromptProvider)
+    provider._service = _StubService({1: "batch 1", 3: "batch 3"})
+    provider._batch_size = 2
+    requests = [
+        VideoPromptRequest(scene_seq=seq, narration=f"line {seq}", extra={"target_provider": "runninghub"})
+        for seq in (1, 2, 3)
+    ]
+
+    results = provider.generate_batch(requests)
+
+    assert [result.prompt for result in results] == ["batch 1", "single 2", "single 3"]
+    # Chunks of two; a trailing single scene goes straight to the per-scene call.
+    assert provider._service.batch_calls == [[1, 2]]
+    assert provider._service.single_calls == [2, 3]
+
+
+def test_batch_template_reuses_single_scene_sections():
+    single = (gemini_service.PROMPTS_DIR / "video_prompt.tmpl").read_text(encoding="utf-8")
+    rendered = _service()._build_video_prompt_batch_prompt(
+        [{"scene_seq": 1, "narration": "hi", "duration_hint": 6.6}, {"scene_seq": 2, "narration": "yo"}],
+        "outline",
+    )
+
+    sections = gemini_service._video_prompt_sections(single)
+    assert "### **第五步" in sections["workflow"] and "${" not in rendered
+    assert sections["workflow"].replace("$$", "$") in rendered
+    assert "约 7 秒" in rendered and "3-12 秒范围内" in rendered
+
+
+def _scene(prompt, meta, audio_duration=None):
+    return SimpleNamespace(
+        video_prompt=prompt,
+        video_meta=meta,
+        audio_duration=audio_duration,
+        narration_text="line",
+    )
+
+
+def test_only_prompts_written_for_another_audio_length_are_stale():
+    assert video_task._video_prompt_stale(_scene("p", {"prompt": "p", "prompt_duration": 7}, 9.4), {}) is True
+    assert video_task._video_prompt_stale(_scene("p", {"prompt": "p", "prompt_duration": 7}, 6.6), {}) is False
+    # Pre-audio prompts only had the configured duration as a hint and are kept.
+    generic = _scene("p", {"prompt": "p", "prompt_duration": None}, audio_duration=6.6)
+    assert video_task._video_prompt_stale(generic, {"duration": 5}) is False
+    # User edits and prompts stored before durations were recorded are kept.
+    assert video_task._video_prompt_stale(_scene("edited", {"prompt": "p", "prompt_duration": None}, 6.6), {}) is False
+    assert video_task._video_prompt_stale(_scene("p", {"prompt": "p"}, 6.6), {}) is False
+    assert video_task._needs_video_prompt(_scene("", {}), {}) is True
+
+
+
+def test_unmaterialized_trim_window_travels_with_the_audio():
+    trim = {"silence_trim": {"audio_url": "/a.wav", "start": 0.4, "end": 5.0}}
+    assert video_task._scene_audio_trim(SimpleNamespace(audio_url="/a.wav", audio_meta=trim)) == {
+        "start": 0.4,
+        "end": 5.0,
+    }
+    # The window belongs to an older file, or the trim was written into audio_url.
+    assert video_task._scene_audio_trim(SimpleNamespace(audio_url="/b.wav", audio_meta=trim)) is None
+    assert video_task._scene_audio_trim(SimpleNamespace(audio_url="/a.wav", audio_meta=None)) is None
+
+class _ClaimRedis:
+    def __init__(self):
+        self.values = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        if self.values.get(key) == token:
+            del self.values[key]
+            return 1
+        return 0
+
+
+def test_prompt_pregeneration_claim_is_per_task(monkeypatch):
+    redis = _ClaimRedis()
+    monkeypatch.setattr(video_task, "get_redis_client", lambda: redis)
+
+    with video_task.video_prompt_claim(1) as first:
+        assert first is True
+        with video_task.video_prompt_claim(1) as second:
+            assert second is False
+        with video_task.video_prompt_claim(2) as other_task:
+            assert other_task is True
+    assert redis.values == {}
+
+    monkeypatch.setattr(video_task, "get_redis_client", lambda: None)
+    with video_task.video_prompt_claim(1) as without_redis:
+        assert without_redis is True
@@ -0,0 +1,20 @@
+from app.models.media import Scene
+from app.tasks.audio_task import _release_prefetched_scenes
+from app.utils.timezone import naive_now
+
+
+def test_unconsumed_prefetched_scenes_return_to_pending(sqlite_session):
+    db = sqlite_session
+    consumed = Scene(task_id=1, seq=1, audio_status=2)
+    waiting = Scene(task_id=1, seq=2, audio_status=1, started_at=naive_now())
+    db.add_all([consumed, waiting])
+    db.commit()
+
+    # The loop stopped (interrupt or error) before reaching the second scene.
+    prefetched = {consumed.id: object(), waiting.id: object()}
+    _release_prefetched_scenes(db, prefetched)
+
+    assert prefetched == {}
+    db.expire_all()
+    assert consumed.audio_status == 2
+    assert waiting.audio_status == 0 and waiting.started_at is None
@@ -0,0 +1,71 @@
+import pytest
+from celery.exceptions import Retry
+
+from app.config.settings import get_settings
+from app.models.media import Scene
+from app.models.task import Task, TaskStep
+from app.services.exceptions import RateLimitExceededException
+from app.tasks import audio_task
+
+
+class _ExhaustedProvider:
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, request):
+        self.calls += 1
+        raise RateLimitExceededException("quota", service_name="fishaudio", retry_after=30)
+
+
+@pytest.fixture
+def rate_limited(monkeypatch, sqlite_session_factory):
+    db = sqlite_session_factory()
+    task = Task(workflow_type="story", mode="manual", selected_voice_id="voice-1")
+    db.add(task)
+    db.flush()
+    db.add(TaskStep(task_id=task.id, step_name="generate_audio", seq=2, status=0))
+    db.add(Scene(task_id=task.id, seq=1, narration_text="line"))
+    db.commit()
+
+    provider = _ExhaustedProvider()
+    settings = get_settings().model_copy(update={"AUDIO_RATE_LIMIT_MAX_RETRIES": 2})
+    monkeypatch.setattr(audio_task, "get_db_session", sqlite_session_factory)
+    monkeypatch.setattr(audio_task, "get_settings", lambda: settings)
+    monkeypatch.setattr(audio_task, "scene_pipeline_enabled", lambda task_: False)
+    monkeypatch.setattr(audio_task, "resolve_task_provider", lambda feature, candidates, db_: (provider, "fishaudio"))
+    monkeypatch.setattr(
+        audio_task.generate_audio_task,
+        "retry",
+        lambda exc=None, countdown=None, max_retries=None: Retry(exc=exc, when=(countdown, max_retries)),
+    )
+    yield db, task.id, provider
+    db.close()
+
+
+def _run(task_id, retries):
+    task = audio_task.generate_audio_task
+    task.push_request(id="audio-1", retries=retries)
+    try:
+        return task.run(task_id)
+    finally:
+        task.pop_request()
+
+
+def test_rate_limited_scene_fails_once_the_retry_cap_is_spent(rate_limited):
+    db, task_id, provider = rate_limited
+
+    with pytest.raises(Retry) as retry:
+        _run(task_id, retries=1)
+    assert retry.value.when == (30, 2)
+    scene = db.query(Scene).one()
+    assert scene.audio_status == 1 and scene.audio_meta["rate_limit"]["rejections"] == 1
+
+    _run(task_id, retries=2)
+
+    db.expire_all()
+    scene = db.query(Scene).one()
+    step = db.query(TaskStep).one()
+    assert provider.calls == 2
+    assert scene.audio_status == 3 and "2 次" in scene.error_msg
+    assert scene.audio_meta["rate_limit"]["rejections"] == 2
+    assert step.status == 3 and step.result["rate_limit"]["rejections"] == 2
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.concurrency import ServiceConcurrencySlot
+from app.tasks import runninghub_tracker_task as tracker
+from app.utils.timezone import naive_now
+
+
+class _FakeDb:
+    def __init__(self, scene):
+        self.scene = scene
+        self.commits = 0
+
+    def get(self, model, pk):
+        return self.scene if self.scene and self.scene.id == pk else None
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def released(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        tracker.concurrency_manager,
+        "release",
+        lambda token, status=None, metadata=None: calls.append((token.slot_id, status, metadata["status"])),
+    )
+    return calls
+
+
+def _scene(**overrides):
+    values = dict(
+        id=7,
+        task_id=1,
+        video_status=1,
+        video_job_id="job-1",
+        video_meta={},
+        video_celery_id="celery-1",
+        video_retry_count=0,
+        raw_video_url=None,
+        error_msg=None,
+        finished_at=None,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def _job(submitted_seconds_ago: float, timeout: float = 60.0) -> tracker.TrackedJob:
+    submitted_at = naive_now() - timedelta(seconds=submitted_seconds_ago)
+    return tracker.TrackedJob(
+        scene_id=7,
+        task_id=1,
+        feature="video",
+        job_id="job-1",
+        tracking={
+            "mode": "async",
+            "submitted_at": submitted_at.isoformat(),
+            "timeout_seconds": timeout,
+            "slot_id": 42,
+        },
+    )
+
+
+def test_poll_errors_wait_until_the_job_expires(released):
+    scene = _scene()
+    db = _FakeDb(scene)
+
+    assert tracker._apply_result(db, _job(10), "error", {"message": "502"}, naive_now()) is False
+    assert scene.video_status == 1 and not released
+
+    assert tracker._apply_result(db, _job(120), "error", {"message": "502"}, naive_now()) is True
+    assert scene.video_status == 3 and scene.video_retry_count == 1
+    assert scene.video_meta["tracking"]["status"] == "poll_error" and "502" in scene.error_msg
+    assert released == [(42, ServiceConcurrencySlot.STATUS_TIMEOUT, "poll_error")]
+
+
+def test_errored_poll_for_reset_scene_releases_the_slot(released):
+    db = _FakeDb(_scene(video_status=0, video_job_id=None))
+
+    assert tracker._apply_result(db, _job(10), "error", {"message": "timeout"}, naive_now()) is False
+    assert released == [(42, ServiceConcurrencySlot.STATUS_RELEASED, "abandoned")]
+    assert db.commits == 0
+
+
+def test_success_stores_output_and_resets_merge(released, monkeypatch):
+    service = tracker.RunningHubService
+    monkeypatch.setattr(service, "extract_output_url", staticmethod(lambda payload: "https://cdn/x.mp4"))
+    monkeypatch.setattr(service, "extract_file_entries", staticmethod(lambda payload: []))
+    scene = _scene(
+        merge_status=3,
+        merge_retry_count=2,
+        merge_video_url="old",
+        merge_job_id="m",
+        merge_meta={},
+        merge_video_provider="ffmpeg",
+    )
+
+    assert tracker._apply_result(_FakeDb(scene), _job(5), "success", {"code": 0}, naive_now()) is True
+    assert scene.video_status == 2 and scene.raw_video_url == "https://cdn/x.mp4"
+    assert scene.merge_status == 0 and scene.merge_video_url is None and scene.video_celery_id is None
+    assert released == [(42, ServiceConcurrencySlot.STATUS_RELEASED, "completed")]
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+from celery.exceptions import Retry
+
+from app.services.exceptions import ConcurrencyLimitException
+from app.tasks import image_task
+from app.tasks import utils as task_utils
+
+
+class _Query:
+    def __init__(self, result):
+        self.result = result
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.result
+
+
+class _FakeDb:
+    def __init__(self):
+        self.task = SimpleNamespace(id=1, is_deleted=False, task_config={}, providers={})
+        self.step = SimpleNamespace(id=5, status=1, provider="runninghub")
+
+    def get(self, model, pk):
+        return self.task
+
+    def query(self, model):
+        return _Query(self.step)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def subtask(monkeypatch):
+    db = _FakeDb()
+    calls = {"resolved": 0, "failed": [], "contexts": []}
+    monkeypatch.setattr(image_task, "get_db_session", lambda: db)
+    monkeypatch.setattr(task_utils.concurrency_manager, "slot_timeout", lambda service, feature=None: 30.0)
+
+    def resolve(db_, task):
+        calls["resolved"] += 1
+        return {"provider": "runninghub"}
+
+    def prepare(db_, task, step, settings=None):
+        calls["contexts"].append(settings)
+        return SimpleNamespace(interrupt_helper=SimpleNamespace(should_abort=lambda: False))
+
+    def process(*args, **kwargs):
+        raise ConcurrencyLimitException("full", service_name="runninghub", feature="image")
+
+    def record(*args, **kwargs):
+        raise AssertionError("subtasks must not record image settings")
+
+    monkeypatch.setattr(image_task, "resolve_image_settings", resolve)
+    monkeypatch.setattr(image_task, "record_image_settings", record)
+    monkeypatch.setattr(image_task, "prepare_image_context", prepare)
+    monkeypatch.setattr(image_task, "process_image_scene", process)
+    monkeypatch.setattr(
+        image_task,
+        "fail_waiting_scene",
+        lambda db_, scene_id, feature, error: calls["failed"].append((scene_id, feature)),
+    )
+    monkeypatch.setattr(
+        image_task.generate_image_scene_task,
+        "retry",
+        lambda exc=None, countdown=None, max_retries=None: Retry(exc=exc, when=countdown),
+    )
+    return calls
+
+
+def _run(retries, **kwargs):
+    task = image_task.generate_image_scene_task
+    task.push_request(id="celery-1", retries=retries)
+    try:
+        return task.run(1, 9, **kwargs)
+    finally:
+        task.pop_request()
+
+
+def test_retry_cap_follows_slot_timeout(subtask):
+    # Two 30s slot lifetimes at the default 15s countdown.
+    assert task_utils.scene_fanout_max_retries(ConcurrencyLimitException("x", service_name="runninghub")) == 4
+
+
+def test_full_pool_retries_then_fails_the_scene(subtask):
+    with pytest.raises(Retry):
+        _run(3, image_settings={"provider": "runninghub"})
+    assert subtask["resolved"] == 0 and subtask["contexts"] == [{"provider": "runninghub"}]
+
+    result = _run(4)
+    assert result["outcome"] == "failed"
+    assert subtask["failed"] == [(9, "image")]
+    # Without settings from the dispatcher the subtask only reads them.
+    assert subtask["resolved"] == 1
@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import event
+
+from app.models.media import Scene
+from app.models.task import Task, TaskStep
+from app.tasks import scene_pipeline_task as pipeline
+
+
+_STEPS = ("generate_images", "generate_audio", "generate_videos", "merge_scene_media", "merge_video")
+
+
+@pytest.fixture
+def pipeline_db(monkeypatch, sqlite_engine, sqlite_session_factory):
+    statements = []
+    event.listen(sqlite_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    factory = sqlite_session_factory
+
+    db = factory()
+    task = Task(workflow_type="story")
+    db.add(task)
+    db.flush()
+    for order, name in enumerate(_STEPS, start=1):
+        db.add(TaskStep(task_id=task.id, step_name=name, seq=order, status=0))
+    for seq in range(1, 4):
+        db.add(Scene(task_id=task.id, seq=seq))
+    db.commit()
+    task_id = task.id
+    db.close()
+
+    sent = []
+    monkeypatch.setattr(pipeline, "get_db_session", factory)
+    monkeypatch.setattr(pipeline, "scene_pipeline_enabled", lambda task: True)
+    monkeypatch.setattr(pipeline, "_refresh_step_summaries", lambda *args: None)
+    monkeypatch.setattr(pipeline, "_stage_kwargs", lambda *args: {})
+    monkeypatch.setattr(
+        pipeline.celery_app,
+        "send_task",
+        lambda name, args=None, task_id=None, **kwargs: sent.append((name.rsplit(".", 1)[-1], args, task_id)),
+    )
+    return factory, task_id, sent, statements
+
+
+def _advance(task_id):
+    return pipeline.advance_scene_pipeline_task.run(task_id)
+
+
+def test_stages_are_claimed_in_bulk(pipeline_db):
+    factory, task_id, sent, statements = pipeline_db
+
+    statements.clear()
+    result = _advance(task_id)
+
+    assert result["dispatched"] == {"image": 3, "audio": 3}
+    scene_updates = [sql for sql in statements if sql.startswith("UPDATE scenes")]
+    assert len(scene_updates) == 2
+    db = factory()
+    scenes = db.query(Scene).order_by(Scene.seq).all()
+    image_sends = {args[1]: celery_id for name, args, celery_id in sent if name == "generate_image_scene_task"}
+    assert {scene.id: scene.image_celery_id for scene in scenes} == image_sends
+    assert len(set(image_sends.values())) == 3
+    assert all(scene.image_status == 1 and scene.audio_status == 1 for scene in scenes)
+
+    # A second run finds nothing left to claim.
+    sent.clear()
+    assert _advance(task_id)["dispatched"] == {}
+    assert sent == []
+
+
+def test_failed_scene_blocks_merge_video_until_retried(pipeline_db):
+    factory, task_id, sent, _ = pipeline_db
+    db = factory()
+    for scene in db.query(Scene).all():
+        scene.image_status = scene.audio_status = scene.video_status = scene.merge_status = 2
+        scene.image_url = scene.audio_url = scene.raw_video_url = "x"
+    failed = db.query(Scene).filter(Scene.seq == 2).one()
+    failed.video_status = 3
+    failed.merge_status = 0
+    db.commit()
+
+    assert _advance(task_id)["merge_video"] is False
+    merge_step = db.query(TaskStep).filter(TaskStep.step_name == "merge_video").one()
+    db.refresh(merge_step)
+    assert merge_step.status == 3 and "#2 video" in merge_step.error_msg
+
+    # Retrying the scene reopens merge_video; it starts once every scene is merged.
+    failed.video_status = 2
+    failed.merge_status = 2
+    db.commit()
+    assert _advance(task_id)["merge_video"] is True
+    db.refresh(merge_step)
+    assert merge_step.status == 1 and merge_step.error_msg is None
+    assert sent[-1][0] == "merge_video_task"
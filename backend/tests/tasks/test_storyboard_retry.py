@@ -0,0 +1,45 @@
+import pytest
+from celery.exceptions import Retry
+
+from app.services.exceptions import APIException
+from app.tasks import storyboard_task
+
+
+class _FailingDb:
+    def get(self, model, pk):
+        raise APIException("Gemini unavailable", service_name="gemini")
+
+    def query(self, model):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return None
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_retry_after_fresh_run_reads_the_cache_again(monkeypatch):
+    calls = []
+    monkeypatch.setattr(storyboard_task, "get_db_session", _FailingDb)
+    task = storyboard_task.generate_storyboard_task
+
+    def retry(exc=None, args=None, kwargs=None, **options):
+        calls.append((args, kwargs))
+        return Retry(exc=exc)
+
+    monkeypatch.setattr(task, "retry", retry)
+    task.push_request(id="celery-1", args=[1], kwargs={"fresh": True})
+    try:
+        with pytest.raises(Retry):
+            task.run(1, fresh=True)
+    finally:
+        task.pop_request()
+
+    assert calls == [([1], {"fresh": False})]
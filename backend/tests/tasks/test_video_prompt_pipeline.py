@@ -0,0 +1,101 @@
+import pytest
+
+from app.models.media import Scene
+from app.models.task import Task, TaskStep
+from app.services.providers.base import MediaResult, VideoPromptResult
+from app.tasks import video_task
+
+_SETTINGS = {"provider": "runninghub", "prompt_provider": "gemini"}
+
+
+class _PromptProvider:
+    def __init__(self):
+        self.batches = []
+        self.singles = []
+
+    def generate_batch(self, requests):
+        self.batches.append([(request.scene_seq, request.extra["duration"]) for request in requests])
+        return [VideoPromptResult(prompt=f"batch {request.scene_seq}") for request in requests]
+
+    def generate(self, request):
+        self.singles.append((request.scene_seq, request.extra["duration"]))
+        return VideoPromptResult(prompt=f"single {request.scene_seq}")
+
+
+class _VideoProvider:
+    def __init__(self):
+        self.submitted = []
+
+    def generate(self, request):
+        self.submitted.append((request.extra["scene_seq"], request.prompt, request.duration))
+        return MediaResult(status="completed", resource_url=f"/videos/{request.extra['scene_seq']}.mp4")
+
+
+@pytest.fixture
+def auto_task(monkeypatch, sqlite_session_factory):
+    db = sqlite_session_factory()
+    task = Task(workflow_type="story", mode="auto", task_config={"video": {"duration": 5}})
+    db.add(task)
+    db.flush()
+    db.add(TaskStep(task_id=task.id, step_name="generate_videos", seq=4, status=1))
+    for seq in (1, 2, 3):
+        db.add(Scene(task_id=task.id, seq=seq, narration_text=f"line {seq}", image_url=f"/images/{seq}.png"))
+    db.commit()
+
+    prompts, videos = _PromptProvider(), _VideoProvider()
+    monkeypatch.setattr(video_task, "get_db_session", sqlite_session_factory)
+    monkeypatch.setattr(video_task, "get_redis_client", lambda: None)
+    monkeypatch.setattr(video_task, "build_storyboard_context", lambda db_, task_: "outline")
+    monkeypatch.setattr(video_task, "collect_provider_candidates", lambda task_: {"video": "runninghub"})
+    monkeypatch.setattr(video_task, "resolve_task_provider", lambda feature, candidates, db_: (prompts, "gemini"))
+    monkeypatch.setattr(
+        video_task,
+        "get_provider",
+        lambda feature, name, db_: prompts if feature == "video_prompt" else videos,
+    )
+    yield db, task.id, prompts, videos
+    db.close()
+
+
+def _land_audio(db, task_id, durations):
+    for scene in db.query(Scene).filter(Scene.task_id == task_id).all():
+        scene.audio_status = 2
+        scene.audio_url = f"/audio/{scene.seq}.mp3"
+        scene.audio_duration = durations[scene.seq]
+    db.commit()
+
+
+def _submit_videos(db, task_id):
+    task = video_task.generate_video_scene_task
+    for scene in db.query(Scene).filter(Scene.task_id == task_id, Scene.video_status == 0).order_by(Scene.seq).all():
+        task.push_request(id=f"video-{scene.id}")
+        try:
+            assert task.run(task_id, scene.id, video_settings=_SETTINGS)["outcome"] == "completed"
+        finally:
+            task.pop_request()
+
+
+def test_storyboard_batch_is_reused_after_audio_lands(auto_task):
+    db, task_id, prompts, videos = auto_task
+
+    # Storyboard done: one batch with the configured duration as a hint.
+    assert video_task.generate_video_prompts_task.run(task_id) == {"prompts": 3}
+    assert prompts.batches == [[(1, 5), (2, 5), (3, 5)]]
+
+    # The scene pipeline dispatches each video once its audio exists.
+    _land_audio(db, task_id, {1: 6.6, 2: 3.2, 3: 8.0})
+    _submit_videos(db, task_id)
+
+    assert len(prompts.batches) == 1 and prompts.singles == []
+    assert videos.submitted == [(1, "batch 1", 7), (2, "batch 2", 3), (3, "batch 3", 8)]
+
+    # Prompts written for a known narration length are redone when the narration changes.
+    scene = db.query(Scene).filter(Scene.task_id == task_id, Scene.seq == 1).one()
+    video_task._store_video_prompt(scene, "written for 7s", "gemini", None, duration=7)
+    scene.video_status = 0
+    scene.audio_duration = 9.4
+    db.commit()
+    _submit_videos(db, task_id)
+
+    assert prompts.singles == [(1, 9)]
+    assert videos.submitted[-1] == (1, "single 1", 9)
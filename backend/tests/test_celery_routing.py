@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from app.celery_app import (
+    PROVIDER_TASK_RATE_LIMIT,
+    QUEUE_CLASS_MEDIA_CPU,
+    QUEUE_CLASS_PROVIDER_IO,
+    QUEUE_CLASS_TRANSCRIPTION,
+    TaskAnnotations,
+    build_task_routes,
+    celery_app,
+    queue_class_for,
+)
+
+
+def test_tasks_route_to_their_queue_class():
+    assert queue_class_for("app.tasks.video_task.generate_video_scene_task") == QUEUE_CLASS_PROVIDER_IO
+    assert queue_class_for("app.tasks.scene_merge_task.merge_scene_media_task") == QUEUE_CLASS_MEDIA_CPU
+    assert queue_class_for("app.tasks.merge_task.merge_video_task") == QUEUE_CLASS_MEDIA_CPU
+    assert queue_class_for("app.tasks.transcription_task.transcribe_scene_audio_task") == QUEUE_CLASS_TRANSCRIPTION
+    assert queue_class_for("celery.chord_unlock") is None
+
+
+def test_routing_can_be_disabled():
+    settings = SimpleNamespace(
+        celery_queue_routing=True,
+        provider_io_queue="io",
+        media_cpu_queue="cpu",
+        transcription_queue="asr",
+    )
+    routes = build_task_routes(settings)
+    assert routes["app.tasks.finalize_task.*"] == {"queue": "cpu"}
+    assert routes["app.tasks.image_task.*"] == {"queue": "io"}
+
+    settings.celery_queue_routing = False
+    assert build_task_routes(settings) == {}
+
+
+def test_rate_limit_only_applies_to_provider_submissions():
+    annotations = TaskAnnotations(max_retries=5)
+    limited = SimpleNamespace(name="app.tasks.image_task.generate_image_scene_task")
+    scheduler = SimpleNamespace(name="app.tasks.scene_pipeline_task.advance_scene_pipeline_task")
+    merge = SimpleNamespace(name="app.tasks.merge_task.merge_video_task")
+
+    assert annotations.annotate(limited) == {"rate_limit": PROVIDER_TASK_RATE_LIMIT}
+    assert annotations.annotate(scheduler) is None and annotations.annotate(merge) is None
+    assert annotations.annotate_any() == {"max_retries": 5}
+    assert TaskAnnotations().annotate_any() is None
+
+    # Registered tasks pick the annotations up.
+    celery_app.loader.import_default_modules()
+    assert celery_app.tasks["app.tasks.merge_task.merge_video_task"].rate_limit is None
+    assert celery_app.tasks["app.tasks.image_task.generate_images_task"].rate_limit == PROVIDER_TASK_RATE_LIMIT
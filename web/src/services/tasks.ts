@@ -6,7 +6,8 @@ import type {
   UpdateTaskPayload,
   VoiceOption,
   StoryboardScriptPayload,
-  StoryboardScriptImportResponse
+  StoryboardScriptImportResponse,
+  TaskProgressEvent
 } from '@/types/task'
 
 export async function fetchTasks(): Promise<TaskSummary[]> {
@@ -71,11 +72,48 @@ export async function createTask(payload: CreateTaskPayload): Promise<TaskSummar
   return data
 }
 
-export async function fetchTaskDetail(taskId: number): Promise<TaskDetail> {
-  const { data } = await apiClient.get<TaskDetail>(`/tasks/${taskId}`)
+export async function fetchTaskDetail(
+  taskId: number,
+  params: { updated_since?: string } = {}
+): Promise<TaskDetail> {
+  const { data } = await apiClient.get<TaskDetail>(`/tasks/${taskId}`, { params })
   return data
 }
 
+/**
+ * 订阅任务进度事件（SSE）。服务端推送 task/step/scene 增量与 resync；
+ * 连接建立后回调 onOpen，连接不可用（如 503 未配置 Redis）时回调 onUnavailable。
+ */
+export function openTaskEventStream(
+  taskId: number,
+  handlers: {
+    onEvent: (event: TaskProgressEvent) => void
+    onOpen?: () => void
+    onUnavailable?: () => void
+  }
+): EventSource {
+  const base = (import.meta.env.VITE_API_BASE ?? '/api/v1').replace(/\/$/, '')
+  const source = new EventSource(`${base}/tasks/${taskId}/events`)
+  const handle = (message: MessageEvent) => {
+    try {
+      handlers.onEvent(JSON.parse(message.data) as TaskProgressEvent)
+    } catch {
+      // ignore malformed payloads
+    }
+  }
+  source.addEventListener('ready', () => handlers.onOpen?.())
+  for (const type of ['task', 'step', 'scene', 'resync']) {
+    source.addEventListener(type, handle as EventListener)
+  }
+  source.onerror = () => {
+    // EventSource 自动重连；只有被服务端拒绝（非 200）时才会进入 CLOSED
+    if (source.readyState === EventSource.CLOSED) {
+      handlers.onUnavailable?.()
+    }
+  }
+  return source
+}
+
 export async function runTaskStep(taskId: number, stepName: string): Promise<void> {
   await apiClient.post(`/tasks/${taskId}/steps/${stepName}/run`, {})
 }
@@ -19,7 +19,9 @@ import type {
   CreateTaskPayload,
   UpdateTaskPayload,
   StoryboardScriptPayload,
-  StoryboardScriptImportResponse
+  StoryboardScriptImportResponse,
+  TaskDetail,
+  TaskProgressEvent
 } from '@/types/task'
 import type { SubtitleDocument } from '@/types/subtitle'
 
@@ -69,9 +71,44 @@ export const useTaskStore = defineStore('task', () => {
   }
 
   let currentDetailRequestId = 0
+  // 静默刷新时只拉取 synced_at 之后变化的分镜
+  let detailCursor: { taskId: number; syncedAt: string } | null = null
+
+  function mergeDetailDelta(detail: TaskDetail) {
+    selectedTask.value = detail.task
+    selectedSteps.value = detail.steps
+    const changed = new Map(detail.scenes.map((scene) => [scene.id, scene]))
+    const existing = new Map(selectedScenes.value.map((scene) => [scene.id, scene]))
+    const ids = detail.scene_ids ?? selectedScenes.value.map((scene) => scene.id)
+    selectedScenes.value = ids
+      .map((id) => changed.get(id) ?? existing.get(id))
+      .filter((scene): scene is SceneRecord => Boolean(scene))
+    if (detail.subtitle_document) {
+      selectedSubtitleDocument.value = detail.subtitle_document
+    }
+  }
 
   async function loadTaskDetail(taskId: number, opts: { silent?: boolean } = {}) {
     const requestId = ++currentDetailRequestId
+    const cursor =
+      opts.silent && detailCursor?.taskId === taskId && selectedTask.value?.id === taskId
+        ? detailCursor.syncedAt
+        : null
+    if (cursor) {
+      const detail = await fetchTaskDetail(taskId, { updated_since: cursor })
+      if (requestId !== currentDetailRequestId) {
+        return
+      }
+      const known = new Set([...detail.scenes, ...selectedScenes.value].map((scene) => scene.id))
+      // 出现本地没有的分镜时回退为完整拉取
+      if ((detail.scene_ids ?? []).every((id) => known.has(id))) {
+        mergeDetailDelta(detail)
+        detailCursor = detail.synced_at ? { taskId, syncedAt: detail.synced_at } : null
+        return
+      }
+      detailCursor = null
+    }
+
     if (!opts.silent) {
       detailLoading.value = true
     }
@@ -91,6 +128,7 @@ export const useTaskStore = defineStore('task', () => {
       selectedSteps.value = detail.steps
       selectedScenes.value = detail.scenes
       selectedSubtitleDocument.value = detail.subtitle_document ?? null
+      detailCursor = detail.synced_at ? { taskId, syncedAt: detail.synced_at } : null
     } finally {
       if (!opts.silent && requestId === currentDetailRequestId) {
         detailLoading.value = false
@@ -98,7 +136,28 @@ export const useTaskStore = defineStore('task', () => {
     }
   }
 
+  /** 将 SSE 推送的增量合并到当前详情；返回 false 表示需要重新拉取完整详情 */
+  function applyTaskEvent(event: TaskProgressEvent): boolean {
+    if (event.type === 'resync') return false
+    if (event.type === 'task') {
+      if (selectedTask.value?.id !== event.id) return false
+      selectedTask.value = { ...selectedTask.value, ...event.changes }
+      return true
+    }
+    if (event.type === 'step') {
+      const index = selectedSteps.value.findIndex((item) => item.id === event.id)
+      if (index < 0) return false
+      selectedSteps.value.splice(index, 1, { ...selectedSteps.value[index], ...event.changes })
+      return true
+    }
+    const index = selectedScenes.value.findIndex((item) => item.id === event.id)
+    if (index < 0) return false
+    selectedScenes.value.splice(index, 1, { ...selectedScenes.value[index], ...event.changes })
+    return true
+  }
+
   function clearSelection() {
+    detailCursor = null
     selectedTask.value = null
     selectedSteps.value = []
     selectedScenes.value = []
@@ -155,6 +214,7 @@ export const useTaskStore = defineStore('task', () => {
     addTask,
     editTask,
     loadTaskDetail,
+    applyTaskEvent,
     clearSelection,
     triggerStep,
     retryStep,
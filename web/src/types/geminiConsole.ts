@@ -50,4 +50,6 @@ export interface GeminiPromptRequestPayload {
   generation_config?: Record<string, unknown>
   safety_settings?: Array<Record<string, unknown>>
   timeout?: number
+  /** 默认 true：提示词与参数相同时复用缓存的响应 */
+  use_cache?: boolean
 }
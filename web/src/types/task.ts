@@ -97,8 +97,18 @@ export interface TaskDetail {
   steps: TaskStep[]
   scenes: SceneRecord[]
   subtitle_document?: SubtitleDocument | null
+  /** 增量请求（updated_since）时返回的全部分镜 ID */
+  scene_ids?: number[] | null
+  /** 下一次增量请求使用的 updated_since */
+  synced_at?: string | null
 }
 
+export type TaskProgressEvent =
+  | { type: 'task'; task_id: number; id: number; changes: Partial<TaskSummary> }
+  | { type: 'step'; task_id: number; id: number; changes: Partial<TaskStep> }
+  | { type: 'scene'; task_id: number; id: number; changes: Partial<SceneRecord> }
+  | { type: 'resync'; task_id: number }
+
 export interface CreateTaskPayload {
   title: string
   description: string
@@ -0,0 +1,23 @@
+const STORAGE_PATH_MARKER = '/api/v1/storage/'
+
+export interface StorageDerivativeOptions {
+  w?: number
+  poster?: boolean
+}
+
+/**
+ * 为本地存储（/api/v1/storage/）的媒体地址追加缩略图参数：图片 ?w= 缩放，视频 ?poster=1 取封面帧。
+ * 外部地址（Cloudinary、RunningHub 等）无法生成缩略图，返回 null。
+ */
+export function storageDerivativeUrl(
+  url: string | null | undefined,
+  options: StorageDerivativeOptions
+): string | null {
+  if (!url || !url.includes(STORAGE_PATH_MARKER)) return null
+  const [base, query = ''] = url.split('?', 2)
+  const params = new URLSearchParams(query)
+  if (options.w) params.set('w', String(Math.round(options.w)))
+  if (options.poster) params.set('poster', '1')
+  const search = params.toString()
+  return search ? `${base}?${search}` : base
+}